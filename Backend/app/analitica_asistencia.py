@@ -0,0 +1,262 @@
+# app/analitica_asistencia.py
+"""
+Analítica de asistencia de estudiantes (tasa de asistencia y rachas de faltas).
+
+Se lee ASISTENCIA_AULA_ESTUDIANTE por lotes (fetchmany) directamente a columnas
+NumPy y todo el cálculo es vectorizado: no hay un bucle de Python por fila ni
+por estudiante. El resultado reemplaza completo el contenido de
+RESUMEN_ASISTENCIA_ESTUDIANTE y RESUMEN_ASISTENCIA_AULA, que son las tablas
+que leen los dashboards.
+
+Un estudiante queda EN_RIESGO si tiene al menos ANALITICA_MIN_CLASES registros y
+su tasa es menor que ANALITICA_TASA_RIESGO, o si acumula ANALITICA_RACHA_RIESGO
+faltas seguidas en sus últimos registros.
+"""
+import logging
+import os
+import numpy as np
+
+from . import control_refresco
+from .db import get_conn
+
+logger = logging.getLogger(__name__)
+
+RESUMEN = "RESUMEN_ASISTENCIA_ESTUDIANTE"
+
+ANALITICA_TASA_RIESGO = float(os.getenv("ANALITICA_TASA_RIESGO", "0.75"))
+ANALITICA_RACHA_RIESGO = int(os.getenv("ANALITICA_RACHA_RIESGO", "3"))
+ANALITICA_MIN_CLASES = int(os.getenv("ANALITICA_MIN_CLASES", "4"))
+ANALITICA_LOTE = int(os.getenv("ANALITICA_LOTE", "50000"))
+ANALITICA_HORA = os.getenv("ANALITICA_HORA", "03:00")
+
+# orden de las columnas que devuelve cargar_columnas
+COLUMNAS = ("id_asistencia", "id_estudiante", "id_aula", "id_sede", "id_institucion", "dia", "presente")
+
+
+def cargar_columnas(conn, lote: int = ANALITICA_LOTE):
+    """
+    Lee las asistencias en lotes y devuelve un dict columna -> np.ndarray.
+    La fecha llega como número de día desde 1970-01-01 (int32) para no
+    construir un objeto datetime por fila.
+    """
+    cur = conn.cursor()
+    try:
+        cur.arraysize = lote
+        cur.prefetchrows = lote + 1
+        cur.execute("""
+            SELECT ID_ASISTENCIA, ID_ESTUDIANTE, ID_AULA, ID_SEDE, ID_INSTITUCION,
+                   TRUNC(FECHA) - DATE '1970-01-01' AS DIA,
+                   NVL(PRESENTE, 1) AS PRESENTE
+            FROM ASISTENCIA_AULA_ESTUDIANTE
+            WHERE FECHA IS NOT NULL
+        """)
+        bloques = []
+        while True:
+            filas = cur.fetchmany(lote)
+            if not filas:
+                break
+            bloques.append(np.array(filas, dtype=np.int64))
+    finally:
+        cur.close()
+
+    if bloques:
+        datos = np.concatenate(bloques)
+    else:
+        datos = np.empty((0, len(COLUMNAS)), dtype=np.int64)
+
+    columnas = {nombre: datos[:, i] for i, nombre in enumerate(COLUMNAS)}
+    columnas["dia"] = columnas["dia"].astype(np.int32)
+    columnas["presente"] = (columnas["presente"] != 0)
+    return columnas
+
+
+def _rachas_ausencia(ausente: np.ndarray, inicio_grupo: np.ndarray) -> np.ndarray:
+    """
+    Largo de la racha de faltas que termina en cada posición (0 si asistió).
+    `inicio_grupo` marca la primera fila de cada estudiante; las rachas no
+    cruzan de un estudiante a otro.
+    """
+    n = ausente.size
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    idx = np.arange(n)
+    anterior_ausente = np.empty(n, dtype=bool)
+    anterior_ausente[0] = False
+    anterior_ausente[1:] = ausente[:-1]
+    empieza = ausente & (~anterior_ausente | inicio_grupo)
+    # posición donde empezó la racha vigente en cada fila
+    inicio_racha = np.maximum.accumulate(np.where(empieza, idx, 0))
+    return np.where(ausente, idx - inicio_racha + 1, 0)
+
+
+def calcular(columnas):
+    """
+    Calcula el resumen por estudiante y por aula.
+    Devuelve (estudiantes, aulas): dos dicts de columnas NumPy.
+    """
+    est = columnas["id_estudiante"]
+    if est.size == 0:
+        return None, None
+
+    # orden por estudiante, día y ID: las rachas se miden en orden cronológico
+    orden = np.lexsort((columnas["id_asistencia"], columnas["dia"], est))
+    est = est[orden]
+    dia = columnas["dia"][orden]
+    presente = columnas["presente"][orden]
+    aula = columnas["id_aula"][orden]
+    sede = columnas["id_sede"][orden]
+    inst = columnas["id_institucion"][orden]
+
+    inicio_grupo = np.empty(est.size, dtype=bool)
+    inicio_grupo[0] = True
+    inicio_grupo[1:] = est[1:] != est[:-1]
+    inicios = np.flatnonzero(inicio_grupo)
+    finales = np.append(inicios[1:], est.size) - 1
+
+    clases = finales - inicios + 1
+    presentes = np.add.reduceat(presente.astype(np.int64), inicios)
+    tasa = presentes / clases
+
+    rachas = _rachas_ausencia(~presente, inicio_grupo)
+    racha_maxima = np.maximum.reduceat(rachas, inicios)
+    racha_actual = rachas[finales]
+
+    en_riesgo = (
+        ((clases >= ANALITICA_MIN_CLASES) & (tasa < ANALITICA_TASA_RIESGO))
+        | (racha_actual >= ANALITICA_RACHA_RIESGO)
+    )
+
+    estudiantes = {
+        "id_estudiante": est[inicios],
+        # el aula del estudiante es la de su último registro
+        "id_aula": aula[finales],
+        "id_sede": sede[finales],
+        "id_institucion": inst[finales],
+        "clases": clases,
+        "presentes": presentes,
+        "tasa": tasa,
+        "racha_actual": racha_actual,
+        "racha_maxima": racha_maxima,
+        "ultimo_dia": dia[finales],
+        "en_riesgo": en_riesgo,
+    }
+
+    # por aula se agregan todos los registros tomados en ella (no solo el aula actual)
+    claves_aula, inverso = np.unique(np.stack([aula, sede, inst], axis=1), axis=0, return_inverse=True)
+    inverso = inverso.reshape(-1)
+    n_aulas = claves_aula.shape[0]
+    # estudiantes distintos por aula: pares (aula, estudiante) únicos
+    pares = np.unique(np.stack([inverso, est], axis=1), axis=0)
+
+    clases_aula = np.bincount(inverso, minlength=n_aulas)
+    presentes_aula = np.bincount(inverso, weights=presente, minlength=n_aulas).astype(np.int64)
+    estudiantes_aula = np.bincount(pares[:, 0], minlength=n_aulas)
+    # estudiantes en riesgo, contados en su aula actual
+    inverso_actual = inverso[finales]
+    riesgo_aula = np.bincount(inverso_actual, weights=en_riesgo, minlength=n_aulas).astype(np.int64)
+
+    aulas = {
+        "id_aula": claves_aula[:, 0],
+        "id_sede": claves_aula[:, 1],
+        "id_institucion": claves_aula[:, 2],
+        "estudiantes": estudiantes_aula,
+        "clases": clases_aula,
+        "presentes": presentes_aula,
+        "tasa": presentes_aula / clases_aula,
+        "en_riesgo": riesgo_aula,
+    }
+    return estudiantes, aulas
+
+
+def _filas(columnas, nombres, lote: int):
+    """Convierte columnas NumPy en lotes de tuplas Python para executemany."""
+    listas = [columnas[n].tolist() for n in nombres]
+    filas = list(zip(*listas))
+    for i in range(0, len(filas), lote):
+        yield filas[i:i + lote]
+
+
+def guardar(conn, estudiantes, aulas, lote: int = ANALITICA_LOTE):
+    """Reemplaza el contenido de las tablas de resumen. No hace commit."""
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM RESUMEN_ASISTENCIA_ESTUDIANTE")
+        cur.execute("DELETE FROM RESUMEN_ASISTENCIA_AULA")
+        if estudiantes is None:
+            return
+
+        estudiantes = dict(estudiantes)
+        estudiantes["tasa"] = np.round(estudiantes["tasa"], 4)
+        estudiantes["ultima_fecha"] = estudiantes["ultimo_dia"].astype("datetime64[D]").astype(object)
+        estudiantes["en_riesgo"] = estudiantes["en_riesgo"].astype(np.int8)
+        for filas in _filas(estudiantes, (
+            "id_estudiante", "id_aula", "id_sede", "id_institucion", "clases", "presentes",
+            "tasa", "racha_actual", "racha_maxima", "ultima_fecha", "en_riesgo",
+        ), lote):
+            cur.executemany("""
+                INSERT INTO RESUMEN_ASISTENCIA_ESTUDIANTE
+                  (ID_ESTUDIANTE, ID_AULA, ID_SEDE, ID_INSTITUCION, CLASES, PRESENTES,
+                   TASA, RACHA_ACTUAL, RACHA_MAXIMA, ULTIMA_FECHA, EN_RIESGO, CALCULADO)
+                VALUES (:1, :2, :3, :4, :5, :6, :7, :8, :9, :10, :11, SYSDATE)
+            """, filas)
+
+        aulas = dict(aulas)
+        aulas["tasa"] = np.round(aulas["tasa"], 4)
+        for filas in _filas(aulas, (
+            "id_aula", "id_sede", "id_institucion", "estudiantes", "clases", "presentes",
+            "tasa", "en_riesgo",
+        ), lote):
+            cur.executemany("""
+                INSERT INTO RESUMEN_ASISTENCIA_AULA
+                  (ID_AULA, ID_SEDE, ID_INSTITUCION, ESTUDIANTES, CLASES, PRESENTES,
+                   TASA, EN_RIESGO, CALCULADO)
+                VALUES (:1, :2, :3, :4, :5, :6, :7, :8, SYSDATE)
+            """, filas)
+    finally:
+        cur.close()
+
+
+def recalcular(conn) -> dict:
+    """
+    Lee todas las asistencias, calcula y guarda los resúmenes. No hace commit.
+    La fila de CONTROL_REFRESCO queda bloqueada hasta el commit, así dos
+    workers no recalculan a la vez.
+    """
+    cur = conn.cursor()
+    try:
+        control_refresco.bloquear(cur, RESUMEN)
+    finally:
+        cur.close()
+
+    columnas = cargar_columnas(conn)
+    estudiantes, aulas = calcular(columnas)
+    guardar(conn, estudiantes, aulas)
+
+    registros = int(columnas["id_asistencia"].size)
+    ultimo_id = int(columnas["id_asistencia"].max()) if registros else 0
+    cur = conn.cursor()
+    try:
+        control_refresco.guardar(cur, RESUMEN, ultimo_id)
+    finally:
+        cur.close()
+
+    resultado = {
+        "registros": registros,
+        "estudiantes": 0 if estudiantes is None else int(estudiantes["id_estudiante"].size),
+        "aulas": 0 if aulas is None else int(aulas["id_aula"].size),
+        "en_riesgo": 0 if estudiantes is None else int(estudiantes["en_riesgo"].sum()),
+    }
+    logger.info(f"{RESUMEN}: {resultado}")
+    return resultado
+
+
+def tarea_recalcular():
+    conn = get_conn()
+    try:
+        recalcular(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
@@ -0,0 +1,724 @@
+# app/archivo.py
+"""
+Archivo histórico de periodos cerrados en archivos columnares locales.
+
+Las asistencias (tutor y estudiante) y las notas de un PERIODO cerrado se
+exportan a ARCHIVO_DIR/periodo_<id>/ con un archivo .npy por columna y un
+manifest.json, y luego se borran de las tablas calientes por lotes.
+
+Formato de columnas (ancho fijo, para poder abrirlas con mmap sin copiar):
+- enteros (ids, fechas en segundos, banderas): se guarda valor - base en el
+  entero con signo más angosto que alcance (int8..int64); -1 es NULL.
+  Es una compresión por "frame of reference": un id de 7 dígitos dentro de
+  un periodo suele caber en int16/int32.
+- VALOR de NOTA: centésimas como entero (NUMBER(6,2) es exacto así).
+- textos cortos (HORA_ENTRADA/HORA_SALIDA): bytes de ancho fijo ('S<n>'); NULL -> b''.
+No se usa zlib/gzip a propósito: un archivo comprimido no se puede mapear
+ni leer como vista NumPy sin descomprimirlo entero.
+
+Los reportes históricos abren las columnas con np.load(mmap_mode="r") y
+filtran comparando directamente los valores guardados (sin decodificar).
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ARCHIVO_DIR = os.getenv(
+    "ARCHIVO_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "archivo"),
+)
+ARCHIVO_LOTE_BORRADO = int(os.getenv("ARCHIVO_LOTE_BORRADO", "5000"))
+ARCHIVO_LOTE_LECTURA = int(os.getenv("ARCHIVO_LOTE_LECTURA", "50000"))
+
+FORMATO = 1
+NULO = -1
+
+_EPOCA = datetime(1970, 1, 1)
+
+# Filtro común de asistencias del periodo: aula del programa del periodo y fecha dentro del rango.
+_DEL_PERIODO = """
+    JOIN AULA a
+        ON a.ID_AULA = x.ID_AULA
+        AND a.ID_SEDE = x.ID_SEDE
+        AND a.ID_INSTITUCION = x.ID_INSTITUCION
+    JOIN PERIODO p
+        ON p.ID_PROGRAMA = a.ID_PROGRAMA
+    WHERE p.ID_PERIODO = :id_periodo
+    AND x.FECHA >= TRUNC(p.FECHA_INICIO)
+    AND x.FECHA < TRUNC(p.FECHA_FIN) + 1
+"""
+
+_SEGUNDOS = "ROUND((x.FECHA - DATE '1970-01-01') * 86400)"
+
+# tabla -> (columna id, [(columna, tipo, expresión SQL)], SQL FROM/WHERE)
+TABLAS = {
+    "nota": (
+        "ID_NOTA",
+        [
+            ("id_nota", "entero", "x.ID_NOTA"),
+            ("valor", "centesimas", "ROUND(x.VALOR * 100)"),
+            ("id_estudiante", "entero", "x.ID_ESTUDIANTE"),
+            ("id_periodo", "entero", "x.ID_PERIODO"),
+            ("id_componente", "entero", "x.ID_COMPONENTE"),
+            ("id_tutor", "entero", "x.ID_TUTOR"),
+        ],
+        "FROM NOTA x WHERE x.ID_PERIODO = :id_periodo",
+    ),
+    "estudiante": (
+        "ID_ASISTENCIA",
+        [
+            ("id_asistencia", "entero", "x.ID_ASISTENCIA"),
+            ("id_estudiante", "entero", "x.ID_ESTUDIANTE"),
+            ("id_aula", "entero", "x.ID_AULA"),
+            ("id_sede", "entero", "x.ID_SEDE"),
+            ("id_institucion", "entero", "x.ID_INSTITUCION"),
+            ("fecha", "entero", _SEGUNDOS),
+            ("hora_entrada", "texto", "x.HORA_ENTRADA"),
+            ("hora_salida", "texto", "x.HORA_SALIDA"),
+            ("presente", "entero", "x.PRESENTE"),
+        ],
+        "FROM ASISTENCIA_AULA_ESTUDIANTE x" + _DEL_PERIODO,
+    ),
+    "tutor": (
+        "ID_ASISTENCIA",
+        [
+            ("id_asistencia", "entero", "x.ID_ASISTENCIA"),
+            ("id_tutor", "entero", "x.ID_TUTOR"),
+            ("id_aula", "entero", "x.ID_AULA"),
+            ("id_sede", "entero", "x.ID_SEDE"),
+            ("id_institucion", "entero", "x.ID_INSTITUCION"),
+            ("fecha", "entero", _SEGUNDOS),
+            ("hora_entrada", "texto", "x.HORA_ENTRADA"),
+            ("hora_salida", "texto", "x.HORA_SALIDA"),
+            ("se_dio", "entero", "x.SE_DIO"),
+            ("id_motivo", "entero", "x.ID_MOTIVO"),
+            ("id_asistencia_reposicion", "entero", "x.ID_ASISTENCIA_REPOSICION"),
+            ("id_horario", "entero", "x.ID_HORARIO"),
+        ],
+        # una clase repuesta en otro periodo sigue referenciada: se queda en caliente
+        "FROM ASISTENCIA_AULA_TUTOR x" + _DEL_PERIODO + """
+    AND NOT EXISTS (
+        SELECT 1 FROM ASISTENCIA_AULA_TUTOR r
+        WHERE r.ID_ASISTENCIA_REPOSICION = x.ID_ASISTENCIA
+        AND (r.FECHA < TRUNC(p.FECHA_INICIO) OR r.FECHA >= TRUNC(p.FECHA_FIN) + 1)
+    )
+""",
+    ),
+}
+
+_TABLA_SQL = {"nota": "NOTA", "estudiante": "ASISTENCIA_AULA_ESTUDIANTE", "tutor": "ASISTENCIA_AULA_TUTOR"}
+# orden de borrado: primero lo que no es referenciado por nadie
+_ORDEN_BORRADO = ("nota", "estudiante", "tutor")
+
+
+# ---------------- codificación ----------------
+
+def _dtype_entero(maximo: int):
+    for dtype in (np.int8, np.int16, np.int32):
+        if maximo <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def codificar_enteros(valores: np.ndarray):
+    """int64 con NULO -> (arreglo angosto valor - base, base). NULO se mantiene como -1."""
+    validos = valores != NULO
+    if not validos.any():
+        return np.full(valores.size, NULO, dtype=np.int8), 0
+    base = int(valores[validos].min())
+    desplazados = np.where(validos, valores - base, NULO)
+    return desplazados.astype(_dtype_entero(int(desplazados.max()))), base
+
+
+def decodificar_enteros(guardados: np.ndarray, base: int) -> np.ndarray:
+    valores = guardados.astype(np.int64)
+    return np.where(guardados == NULO, NULO, valores + base)
+
+
+def _a_guardado(valor: int, base: int, dtype) -> Optional[int]:
+    """Valor real -> valor guardado, o None si no puede estar en la columna."""
+    desplazado = valor - base
+    if desplazado < 0 or desplazado > np.iinfo(dtype).max:
+        return None
+    return desplazado
+
+
+# ---------------- exportación ----------------
+
+def _leer_tabla(conn, tabla: str, id_periodo: int) -> Dict[str, np.ndarray]:
+    _, columnas, desde = TABLAS[tabla]
+    select = ", ".join(
+        f"NVL({sql}, {NULO})" if tipo != "texto" else sql for _, tipo, sql in columnas
+    )
+    cur = conn.cursor()
+    try:
+        cur.arraysize = ARCHIVO_LOTE_LECTURA
+        cur.execute(f"SELECT {select} {desde}", {"id_periodo": id_periodo})
+        bloques = []
+        while True:
+            filas = cur.fetchmany(ARCHIVO_LOTE_LECTURA)
+            if not filas:
+                break
+            bloques.append(filas)
+    finally:
+        cur.close()
+
+    filas = [f for bloque in bloques for f in bloque]
+    resultado = {}
+    for i, (nombre, tipo, _) in enumerate(columnas):
+        valores = [f[i] for f in filas]
+        if tipo == "texto":
+            datos = [v.encode("utf-8") if v is not None else b"" for v in valores]
+            ancho = max((len(v) for v in datos), default=1) or 1
+            resultado[nombre] = np.array(datos, dtype=f"S{ancho}")
+        else:
+            resultado[nombre] = np.array(valores, dtype=np.int64)
+    return resultado
+
+
+def _guardar_columna(carpeta: str, nombre: str, arreglo: np.ndarray):
+    ruta = os.path.join(carpeta, f"{nombre}.npy")
+    with open(ruta, "wb") as f:
+        np.save(f, arreglo, allow_pickle=False)
+        f.flush()
+        os.fsync(f.fileno())
+    return os.path.basename(ruta)
+
+
+def exportar_periodo(conn, id_periodo: int, directorio: str = None) -> dict:
+    """
+    Escribe el archivo del periodo y devuelve su manifest. Escribe primero en
+    una carpeta temporal y la renombra al final: un archivo a medias nunca
+    queda con el nombre definitivo.
+    """
+    directorio = directorio or ARCHIVO_DIR
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "SELECT FECHA_INICIO, FECHA_FIN, ID_PROGRAMA FROM PERIODO WHERE ID_PERIODO = :1",
+            (id_periodo,),
+        )
+        periodo = cur.fetchone()
+    finally:
+        cur.close()
+    if periodo is None:
+        raise ValueError(f"Periodo {id_periodo} no encontrado")
+
+    final = os.path.join(directorio, f"periodo_{id_periodo}")
+    temporal = final + ".tmp"
+    if os.path.exists(temporal):
+        shutil.rmtree(temporal)
+    os.makedirs(temporal)
+
+    manifest = {
+        "formato": FORMATO,
+        "id_periodo": id_periodo,
+        "fecha_inicio": periodo[0].date().isoformat() if periodo[0] else None,
+        "fecha_fin": periodo[1].date().isoformat() if periodo[1] else None,
+        "id_programa": periodo[2],
+        "creado": datetime.now().isoformat(timespec="seconds"),
+        "tablas": {},
+    }
+    for tabla, (_, columnas, _) in TABLAS.items():
+        datos = _leer_tabla(conn, tabla, id_periodo)
+        carpeta = os.path.join(temporal, tabla)
+        os.makedirs(carpeta)
+        info = {"filas": 0, "columnas": {}}
+        for nombre, tipo, _ in columnas:
+            valores = datos[nombre]
+            info["filas"] = int(valores.size)
+            if tipo == "texto":
+                guardado, base = valores, None
+            else:
+                guardado, base = codificar_enteros(valores)
+            info["columnas"][nombre] = {
+                "archivo": _guardar_columna(carpeta, nombre, guardado),
+                "tipo": tipo,
+                "dtype": guardado.dtype.str,
+                "base": base,
+            }
+        # suma de control de los ids para verificar antes de borrar
+        ids = datos[columnas[0][0]]
+        info["suma_ids"] = int(ids.sum()) if ids.size else 0
+        manifest["tablas"][tabla] = info
+
+    with open(os.path.join(temporal, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+
+    if os.path.exists(final):
+        shutil.rmtree(final)
+    os.replace(temporal, final)
+    _cache_archivos.pop(id_periodo, None)
+    logger.info(
+        f"Periodo {id_periodo} exportado a {final}: "
+        + ", ".join(f"{t}={i['filas']}" for t, i in manifest["tablas"].items())
+    )
+    return manifest
+
+
+def registrar_archivo(conn, manifest: dict, ruta: str):
+    """Marca el periodo como exportado en ARCHIVO_PERIODO. No hace commit."""
+    t = manifest["tablas"]
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            MERGE INTO ARCHIVO_PERIODO a
+            USING (SELECT :id_periodo AS ID_PERIODO FROM dual) n
+            ON (a.ID_PERIODO = n.ID_PERIODO)
+            WHEN MATCHED THEN UPDATE SET
+                RUTA = :ruta, FILAS_TUTOR = :tutor, FILAS_ESTUDIANTE = :estudiante,
+                FILAS_NOTA = :nota, ESTADO = 'EXPORTADO', ARCHIVADO = SYSDATE
+            WHEN NOT MATCHED THEN INSERT
+                (ID_PERIODO, FECHA_INICIO, FECHA_FIN, RUTA, FILAS_TUTOR, FILAS_ESTUDIANTE,
+                 FILAS_NOTA, ESTADO, ARCHIVADO)
+            VALUES
+                (:id_periodo, TO_DATE(:inicio, 'YYYY-MM-DD'), TO_DATE(:fin, 'YYYY-MM-DD'), :ruta,
+                 :tutor, :estudiante, :nota, 'EXPORTADO', SYSDATE)
+        """, {
+            "id_periodo": manifest["id_periodo"],
+            "inicio": manifest["fecha_inicio"],
+            "fin": manifest["fecha_fin"],
+            "ruta": ruta,
+            "tutor": t["tutor"]["filas"],
+            "estudiante": t["estudiante"]["filas"],
+            "nota": t["nota"]["filas"],
+        })
+    finally:
+        cur.close()
+
+
+def borrar_archivados(conn, id_periodo: int, lote: int = ARCHIVO_LOTE_BORRADO) -> Dict[str, int]:
+    """
+    Borra de las tablas calientes las filas que quedaron en el archivo del periodo.
+    Borra por id en lotes con commit por lote (deshacer pequeño, reanudable:
+    borrar un id que ya no existe no hace nada). Las asistencias de tutor van en
+    orden descendente de id para que una reposición caiga antes que su original.
+    """
+    archivo = abrir(id_periodo)
+    borradas = {}
+    cur = conn.cursor()
+    try:
+        for tabla in _ORDEN_BORRADO:
+            columna_id = TABLAS[tabla][0]
+            ids = np.sort(archivo.columna(tabla, columna_id.lower()))[::-1]
+            total = 0
+            for i in range(0, ids.size, lote):
+                filas = [(int(v),) for v in ids[i:i + lote]]
+                cur.executemany(f"DELETE FROM {_TABLA_SQL[tabla]} WHERE {columna_id} = :1", filas)
+                total += cur.rowcount
+                conn.commit()
+            borradas[tabla] = total
+        cur.execute(
+            "UPDATE ARCHIVO_PERIODO SET ESTADO = 'BORRADO' WHERE ID_PERIODO = :1",
+            (id_periodo,),
+        )
+        conn.commit()
+    finally:
+        cur.close()
+    logger.info(f"Periodo {id_periodo}: filas borradas de las tablas calientes {borradas}")
+    return borradas
+
+
+def verificar(conn, id_periodo: int):
+    """
+    Compara el archivo con la base (conteo y suma de ids por tabla).
+    Lanza ValueError si no coinciden; se llama antes de borrar.
+    """
+    archivo = abrir(id_periodo)
+    for tabla, (columna_id, _, desde) in TABLAS.items():
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                f"SELECT COUNT(*), NVL(SUM(x.{columna_id}), 0) {desde}",
+                {"id_periodo": id_periodo},
+            )
+            filas, suma = cur.fetchone()
+        finally:
+            cur.close()
+        info = archivo.manifest["tablas"][tabla]
+        if int(filas) != info["filas"] or int(suma) != info["suma_ids"]:
+            raise ValueError(
+                f"Archivo del periodo {id_periodo} no coincide con {tabla}: "
+                f"base={filas}/{suma}, archivo={info['filas']}/{info['suma_ids']}"
+            )
+
+
+def estado_archivo(conn, id_periodo: int) -> Optional[str]:
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT ESTADO FROM ARCHIVO_PERIODO WHERE ID_PERIODO = :1", (id_periodo,))
+        row = cur.fetchone()
+        return row[0] if row else None
+    finally:
+        cur.close()
+
+
+def _cambiar_estado(conn, id_periodo: int, estado: str):
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "UPDATE ARCHIVO_PERIODO SET ESTADO = :1 WHERE ID_PERIODO = :2",
+            (estado, id_periodo),
+        )
+    finally:
+        cur.close()
+    conn.commit()
+
+
+def _fin_periodo(conn, id_periodo: int) -> date:
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT FECHA_FIN FROM PERIODO WHERE ID_PERIODO = :1", (id_periodo,))
+        row = cur.fetchone()
+    finally:
+        cur.close()
+    if row is None:
+        raise ValueError(f"Periodo {id_periodo} no encontrado")
+    fin = row[0]
+    return fin.date() if isinstance(fin, datetime) else fin
+
+
+def archivar_periodo(conn, id_periodo: int, borrar: bool = True, antes_de: date = None,
+                     forzar: bool = False) -> dict:
+    """
+    Exporta, verifica y (si borrar=True) borra de las tablas calientes un periodo.
+    Hace commit. Si una ejecución anterior quedó a mitad del borrado (ESTADO =
+    'BORRANDO') no se vuelve a exportar, porque el archivo ya tiene filas que
+    no están en la base: solo se termina de borrar.
+    Solo archiva periodos con FECHA_FIN anterior a `antes_de` (por defecto
+    hoy), como periodos_para_archivar; un periodo en curso todavía recibe
+    asistencias y notas. Con forzar=True no se revisa (ValueError si no).
+    """
+    estado = estado_archivo(conn, id_periodo)
+    resultado = {"id_periodo": id_periodo, "exportado": False, "borradas": {}}
+    if estado == "BORRADO":
+        return resultado
+
+    if estado != "BORRANDO" and not forzar:
+        antes_de = antes_de or date.today()
+        fin = _fin_periodo(conn, id_periodo)
+        if fin >= antes_de:
+            raise ValueError(
+                f"El periodo {id_periodo} termina el {fin}: solo se archivan periodos terminados antes del {antes_de}"
+            )
+
+    if estado != "BORRANDO":
+        manifest = exportar_periodo(conn, id_periodo)
+        verificar(conn, id_periodo)
+        registrar_archivo(conn, manifest, os.path.join(ARCHIVO_DIR, f"periodo_{id_periodo}"))
+        conn.commit()
+        resultado["exportado"] = True
+
+    if borrar:
+        _cambiar_estado(conn, id_periodo, "BORRANDO")
+        resultado["borradas"] = borrar_archivados(conn, id_periodo)
+    return resultado
+
+
+def periodos_para_archivar(conn, antes_de: date) -> List[int]:
+    """Periodos terminados antes de `antes_de` que aún no están archivados."""
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT p.ID_PERIODO
+            FROM PERIODO p
+            WHERE p.FECHA_FIN < :antes_de
+            AND NOT EXISTS (
+                SELECT 1 FROM ARCHIVO_PERIODO a
+                WHERE a.ID_PERIODO = p.ID_PERIODO AND a.ESTADO = 'BORRADO'
+            )
+            ORDER BY p.FECHA_FIN, p.ID_PERIODO
+        """, {"antes_de": antes_de})
+        return [r[0] for r in cur.fetchall()]
+    finally:
+        cur.close()
+
+
+def ultima_fecha_archivada(conn) -> Optional[date]:
+    """Mayor FECHA_FIN archivada: los resúmenes no deben reconstruirse antes de esa fecha."""
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT MAX(FECHA_FIN) FROM ARCHIVO_PERIODO")
+        row = cur.fetchone()
+        return row[0].date() if row and row[0] else None
+    finally:
+        cur.close()
+
+
+# ---------------- lectura (mmap) ----------------
+
+class ArchivoPeriodo:
+    """Archivo de un periodo abierto en modo mmap; las columnas se abren al primer uso."""
+
+    def __init__(self, carpeta: str):
+        self.carpeta = carpeta
+        with open(os.path.join(carpeta, "manifest.json"), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("formato") != FORMATO:
+            raise ValueError(f"Formato de archivo no soportado en {carpeta}")
+        self.id_periodo = self.manifest["id_periodo"]
+        self._columnas = {}
+        self._lock = threading.Lock()
+
+    def filas(self, tabla: str) -> int:
+        return self.manifest["tablas"][tabla]["filas"]
+
+    def guardada(self, tabla: str, nombre: str) -> np.ndarray:
+        """Vista de solo lectura sobre el archivo (sin copiar ni decodificar)."""
+        clave = (tabla, nombre)
+        arreglo = self._columnas.get(clave)
+        if arreglo is None:
+            with self._lock:
+                arreglo = self._columnas.get(clave)
+                if arreglo is None:
+                    info = self.manifest["tablas"][tabla]["columnas"][nombre]
+                    ruta = os.path.join(self.carpeta, tabla, info["archivo"])
+                    if self.filas(tabla) == 0:
+                        # np.load no puede mapear un arreglo vacío
+                        arreglo = np.load(ruta)
+                    else:
+                        arreglo = np.load(ruta, mmap_mode="r")
+                    self._columnas[clave] = arreglo
+        return arreglo
+
+    def info(self, tabla: str, nombre: str) -> dict:
+        return self.manifest["tablas"][tabla]["columnas"][nombre]
+
+    def columna(self, tabla: str, nombre: str, mascara=None) -> np.ndarray:
+        """Valores reales de la columna (decodificados), opcionalmente solo las filas de la máscara."""
+        guardado = self.guardada(tabla, nombre)
+        if mascara is not None:
+            guardado = guardado[mascara]
+        info = self.info(tabla, nombre)
+        if info["tipo"] == "texto":
+            return guardado
+        valores = decodificar_enteros(guardado, info["base"])
+        if info["tipo"] == "centesimas":
+            return np.where(valores == NULO, np.nan, valores / 100.0)
+        return valores
+
+    def igual(self, tabla: str, nombre: str, valor: int) -> np.ndarray:
+        """Máscara columna == valor comparando en el dominio guardado (cero copias)."""
+        guardado = self.guardada(tabla, nombre)
+        info = self.info(tabla, nombre)
+        objetivo = _a_guardado(valor, info["base"], guardado.dtype)
+        if objetivo is None:
+            return np.zeros(guardado.size, dtype=bool)
+        return guardado == guardado.dtype.type(objetivo)
+
+    def entre(self, tabla: str, nombre: str, minimo: Optional[int], maximo: Optional[int]) -> np.ndarray:
+        """Máscara minimo <= columna <= maximo (NULL nunca cumple)."""
+        guardado = self.guardada(tabla, nombre)
+        base = self.info(tabla, nombre)["base"]
+        mascara = guardado != NULO
+        if minimo is not None:
+            mascara &= guardado.astype(np.int64) >= minimo - base
+        if maximo is not None:
+            mascara &= guardado.astype(np.int64) <= maximo - base
+        return mascara
+
+
+_cache_archivos: Dict[int, ArchivoPeriodo] = {}
+_cache_lock = threading.Lock()
+
+
+def abrir(id_periodo: int, directorio: str = None) -> ArchivoPeriodo:
+    archivo = _cache_archivos.get(id_periodo)
+    if archivo is None:
+        carpeta = os.path.join(directorio or ARCHIVO_DIR, f"periodo_{id_periodo}")
+        if not os.path.exists(os.path.join(carpeta, "manifest.json")):
+            raise FileNotFoundError(f"No hay archivo para el periodo {id_periodo}")
+        with _cache_lock:
+            archivo = _cache_archivos.get(id_periodo)
+            if archivo is None:
+                archivo = _cache_archivos[id_periodo] = ArchivoPeriodo(carpeta)
+    return archivo
+
+
+def listar(directorio: str = None) -> List[ArchivoPeriodo]:
+    """Todos los periodos archivados en disco, por fecha de inicio."""
+    directorio = directorio or ARCHIVO_DIR
+    if not os.path.isdir(directorio):
+        return []
+    archivos = []
+    for nombre in os.listdir(directorio):
+        if nombre.startswith("periodo_") and not nombre.endswith(".tmp"):
+            try:
+                archivos.append(abrir(int(nombre[len("periodo_"):]), directorio))
+            except (ValueError, FileNotFoundError) as e:
+                logger.warning(f"Archivo {nombre} ignorado: {str(e)}")
+    return sorted(archivos, key=lambda a: (a.manifest["fecha_inicio"] or "", a.id_periodo))
+
+
+def segundos(d: date) -> int:
+    """Fecha -> segundos desde 1970 (unidad de la columna fecha en los archivos)."""
+    return int((datetime(d.year, d.month, d.day) - _EPOCA).total_seconds())
+
+
+def a_fecha(segundos_epoca: int) -> datetime:
+    return _EPOCA + timedelta(seconds=int(segundos_epoca))
+
+
+# ---------------- reportes históricos ----------------
+
+AGRUPABLES = {
+    "estudiante": ("periodo", "institucion", "sede", "aula", "estudiante", "mes"),
+    "tutor": ("periodo", "institucion", "sede", "aula", "tutor", "mes"),
+}
+_MARCA = {"estudiante": "presente", "tutor": "se_dio"}
+
+
+def _claves_grupo(archivo: ArchivoPeriodo, tabla: str, dim: str, mascara) -> List[np.ndarray]:
+    """Columnas (int64, decodificadas) que forman la dimensión para las filas de la máscara."""
+    if dim == "periodo":
+        return [np.full(int(mascara.sum()), archivo.id_periodo, dtype=np.int64)]
+    if dim == "mes":
+        dias = archivo.columna(tabla, "fecha", mascara) // 86400
+        return [dias.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)]
+    if dim == "sede":
+        return [archivo.columna(tabla, "id_sede", mascara), archivo.columna(tabla, "id_institucion", mascara)]
+    if dim == "aula":
+        return [
+            archivo.columna(tabla, "id_aula", mascara),
+            archivo.columna(tabla, "id_sede", mascara),
+            archivo.columna(tabla, "id_institucion", mascara),
+        ]
+    return [archivo.columna(tabla, f"id_{dim}", mascara)]
+
+
+def _contar_grupos(columnas: List[np.ndarray], marca: np.ndarray, acumulado: dict):
+    """Suma total/marcados por combinación de columnas en `acumulado` (tupla -> [total, si])."""
+    if not columnas:
+        t = acumulado.setdefault((), [0, 0])
+        t[0] += int(marca.size)
+        t[1] += int(marca.sum())
+        return
+    # cada columna a códigos densos y luego una sola llave entera
+    clave = np.zeros(marca.size, dtype=np.int64)
+    unicos_por_columna = []
+    paso = 1
+    for col in columnas:
+        unicos, inverso = np.unique(col, return_inverse=True)
+        clave += inverso.reshape(-1).astype(np.int64) * paso
+        unicos_por_columna.append((unicos, paso))
+        paso *= unicos.size
+    grupos, inverso = np.unique(clave, return_inverse=True)
+    conteo = np.bincount(inverso.reshape(-1) * 2 + marca, minlength=grupos.size * 2).reshape(-1, 2)
+    partes = [unicos[(grupos // p) % unicos.size].tolist() for unicos, p in unicos_por_columna]
+    for i, clave_grupo in enumerate(zip(*partes)):
+        t = acumulado.setdefault(clave_grupo, [0, 0])
+        t[0] += int(conteo[i, 0] + conteo[i, 1])
+        t[1] += int(conteo[i, 1])
+
+
+def agregar_asistencia(
+    tabla: str,
+    agrupar: List[str],
+    filtros: dict,
+    id_periodo: Optional[int] = None,
+    directorio: str = None,
+) -> List[dict]:
+    """
+    Conteos de asistencia (total y presentes / clases dadas) sobre los archivos,
+    agrupados por las dimensiones pedidas. Recorre cada periodo archivado con
+    máscaras sobre las columnas mapeadas; solo se decodifican las filas que pasan.
+    filtros: id_institucion, id_sede, id_aula, id_tutor, id_estudiante, desde, hasta.
+    """
+    for dim in agrupar:
+        if dim not in AGRUPABLES[tabla]:
+            raise ValueError(f"No se puede agrupar {tabla} por '{dim}'")
+
+    archivos = [abrir(id_periodo, directorio)] if id_periodo is not None else listar(directorio)
+    acumulado = {}
+    for archivo in archivos:
+        if archivo.filas(tabla) == 0:
+            continue
+        mascara = np.ones(archivo.filas(tabla), dtype=bool)
+        for campo in ("id_institucion", "id_sede", "id_aula", "id_tutor", "id_estudiante"):
+            valor = filtros.get(campo)
+            if valor is None:
+                continue
+            if campo not in archivo.manifest["tablas"][tabla]["columnas"]:
+                raise ValueError(f"Filtro '{campo}' no disponible para {tabla}")
+            mascara &= archivo.igual(tabla, campo, valor)
+        desde, hasta = filtros.get("desde"), filtros.get("hasta")
+        if desde is not None or hasta is not None:
+            mascara &= archivo.entre(
+                tabla, "fecha",
+                segundos(desde) if desde is not None else None,
+                segundos(hasta) + 86399 if hasta is not None else None,
+            )
+        if not mascara.any():
+            continue
+
+        marca = (archivo.columna(tabla, _MARCA[tabla], mascara) == 1).astype(np.int64)
+        columnas = []
+        for dim in agrupar:
+            columnas.extend(_claves_grupo(archivo, tabla, dim, mascara))
+        _contar_grupos(columnas, marca, acumulado)
+
+    res = []
+    for clave, (total, si) in sorted(acumulado.items()):
+        d = {}
+        i = 0
+        for dim in agrupar:
+            if dim == "mes":
+                d["mes"] = str(np.datetime64(clave[i], "M"))
+                i += 1
+            elif dim == "sede":
+                d["id_sede"], d["id_institucion"] = clave[i], clave[i + 1]
+                i += 2
+            elif dim == "aula":
+                d["id_aula"], d["id_sede"], d["id_institucion"] = clave[i], clave[i + 1], clave[i + 2]
+                i += 3
+            else:
+                valor = clave[i]
+                d[f"id_{dim}"] = None if valor == NULO else valor
+                i += 1
+        d["total"] = total
+        d["marcados"] = si
+        d["tasa"] = si / total if total else 0.0
+        res.append(d)
+    return res
+
+
+def notas(filtros: dict, id_periodo: Optional[int] = None, limite: int = 1000,
+          directorio: str = None) -> List[dict]:
+    """Notas archivadas filtradas por id_estudiante / id_componente / id_tutor."""
+    archivos = [abrir(id_periodo, directorio)] if id_periodo is not None else listar(directorio)
+    res = []
+    for archivo in archivos:
+        n = archivo.filas("nota")
+        if n == 0:
+            continue
+        mascara = np.ones(n, dtype=bool)
+        for campo in ("id_estudiante", "id_componente", "id_tutor"):
+            if filtros.get(campo) is not None:
+                mascara &= archivo.igual("nota", campo, filtros[campo])
+        if not mascara.any():
+            continue
+        columnas = {
+            nombre: archivo.columna("nota", nombre, mascara).tolist()
+            for nombre in ("id_nota", "valor", "id_estudiante", "id_periodo", "id_componente", "id_tutor")
+        }
+        for fila in zip(*columnas.values()):
+            d = dict(zip(columnas.keys(), fila))
+            for k, v in d.items():
+                if k == "valor":
+                    d[k] = None if v != v else v  # NaN -> None
+                elif v == NULO:
+                    d[k] = None
+            res.append(d)
+            if len(res) >= limite:
+                return res
+    return res
@@ -0,0 +1,98 @@
+# app/cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .db import al_confirmar, transaccion_activa
+
+# -------------------------------
+# Caché en memoria del proceso
+# -------------------------------
+# Cada worker de uvicorn tiene su propia copia, por eso toda entrada lleva
+# un TTL: la invalidación explícita solo llega al proceso que hizo la escritura
+# y el TTL acota lo desactualizado que puede quedar el resto.
+#
+# Dentro de un POST /batch transaccional la caché no se lee ni se llena (lo
+# leído puede no confirmarse nunca, y lo guardado de antes no ve lo escrito en
+# el lote) y las invalidaciones esperan al commit (ver db.al_confirmar).
+
+CACHE_TTL_SEGUNDOS = int(os.getenv("CACHE_TTL_SEGUNDOS", "300"))
+
+_SIN_VALOR = object()
+
+# registro de todas las cachés creadas (lo usan los diagnósticos)
+CACHES = {}
+
+
+class CacheTTL:
+    """
+    Caché clave -> valor con expiración por tiempo y tamaño máximo (LRU).
+    Es segura entre hilos: los endpoints síncronos corren en el threadpool.
+    """
+
+    def __init__(self, nombre: str, ttl_segundos: int = CACHE_TTL_SEGUNDOS, max_entradas: int = 1024):
+        self.nombre = nombre
+        self.ttl = ttl_segundos
+        self.max_entradas = max_entradas
+        self.aciertos = 0
+        self.fallos = 0
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        CACHES[nombre] = self
+
+    def get(self, clave, default=None):
+        if transaccion_activa():
+            return default
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave, _SIN_VALOR)
+            if entrada is _SIN_VALOR or entrada[0] < ahora:
+                if entrada is not _SIN_VALOR:
+                    del self._datos[clave]
+                self.fallos += 1
+                return default
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[1]
+
+    def set(self, clave, valor):
+        if transaccion_activa():
+            return
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + self.ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def invalidar(self, *claves):
+        al_confirmar(self._invalidar, claves)
+
+    def limpiar(self):
+        al_confirmar(self._limpiar)
+
+    def _invalidar(self, claves):
+        with self._lock:
+            for clave in claves:
+                if clave is not None:
+                    self._datos.pop(clave, None)
+
+    def _limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+
+# Semana de clases por tutor (GET /tutores/{id}/semana).
+# Se invalida al escribir HORARIO o al cambiar AULA.ID_TUTOR.
+semana_tutor = CacheTTL("semana_tutor")
+
+# Datos de referencia para GET /bootstrap (instituciones, sedes, programas,
+# aulas, horarios, personas), una entrada por rol (por persona si es TUTOR).
+# Se limpia entera en cualquier escritura de esas tablas: son pocas y el
+# payload se rearma con unas pocas consultas.
+referencia = CacheTTL("referencia", max_entradas=256)
+
+# Respuestas guardadas por Idempotency-Key (app/idempotencia.py): el reintento
+# que cae en el mismo worker no va a la base. La tabla IDEMPOTENCIA es la que
+# manda; esto es solo el atajo.
+idempotencia = CacheTTL("idempotencia", max_entradas=4096)
@@ -0,0 +1,196 @@
+# app/calendario.py
+"""
+Materialización del calendario de clases en SESION_CLASE.
+
+Cada HORARIO semanal se expande sobre los PERIODO de su programa
+(PERIODO.ID_PROGRAMA = AULA.ID_PROGRAMA) entre FECHA_INICIO y FECHA_FIN,
+descartando las fechas de FESTIVO. Todo se hace con un INSERT ... SELECT
+en la base de datos, sin traer filas a Python. Si dos periodos del programa se
+solapan, la fecha queda una sola vez, con el periodo de menor ID.
+
+Las funciones reciben la conexión del llamador y NO hacen commit: así la
+actualización de sesiones queda en la misma transacción que el cambio de
+horario, periodo o festivo que la provocó.
+"""
+import logging
+from datetime import date
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _semanas_necesarias(cur, id_periodo: Optional[int]) -> int:
+    """Número de semanas que cubre el periodo más largo (límite del generador de filas)."""
+    sql = """
+        SELECT NVL(MAX(CEIL((TRUNC(FECHA_FIN) - TRUNC(FECHA_INICIO, 'IW')) / 7)) + 1, 0)
+        FROM PERIODO
+        WHERE FECHA_INICIO IS NOT NULL AND FECHA_FIN IS NOT NULL
+    """
+    binds = {}
+    if id_periodo is not None:
+        sql += " AND ID_PERIODO = :id_periodo"
+        binds["id_periodo"] = id_periodo
+    cur.execute(sql, binds)
+    return int(cur.fetchone()[0] or 0)
+
+
+def materializar(
+    conn,
+    id_periodo: Optional[int] = None,
+    id_horario: Optional[int] = None,
+    fecha: Optional[date] = None,
+    desde: Optional[date] = None,
+    id_aula: Optional[int] = None,
+) -> int:
+    """
+    Inserta las sesiones que falten para los filtros dados y devuelve cuántas se crearon.
+    Es idempotente: las sesiones ya existentes (ID_HORARIO, FECHA) no se duplican.
+
+    - id_periodo / id_horario / id_aula: limita la expansión a ese periodo,
+      horario o a los horarios de esa aula.
+    - fecha: solo esa fecha (se usa al borrar un festivo).
+    - desde: solo fechas >= desde (al crear o cambiar un horario no se reescribe el pasado).
+    """
+    cur = conn.cursor()
+    try:
+        semanas = _semanas_necesarias(cur, id_periodo)
+        if semanas <= 0:
+            return 0
+
+        filtros = []
+        binds = {"semanas": semanas}
+        if id_periodo is not None:
+            filtros.append("p.ID_PERIODO = :id_periodo")
+            binds["id_periodo"] = id_periodo
+        if id_horario is not None:
+            filtros.append("h.ID_HORARIO = :id_horario")
+            binds["id_horario"] = id_horario
+        if id_aula is not None:
+            filtros.append("h.ID_AULA = :id_aula")
+            binds["id_aula"] = id_aula
+        filtros_fecha = []
+        if fecha is not None:
+            filtros_fecha.append("c.FECHA = TRUNC(:fecha)")
+            binds["fecha"] = fecha
+        if desde is not None:
+            filtros_fecha.append("c.FECHA >= TRUNC(:desde)")
+            binds["desde"] = desde
+
+        where_origen = ("AND " + " AND ".join(filtros)) if filtros else ""
+        where_fecha = ("AND " + " AND ".join(filtros_fecha)) if filtros_fecha else ""
+
+        # TRUNC(x, 'IW') es el lunes de la semana ISO: no depende de NLS_TERRITORY.
+        # GROUP BY: con periodos solapados la misma (ID_HORARIO, FECHA) sale una
+        # vez por periodo y el NOT EXISTS no ve las filas del mismo INSERT
+        cur.execute(f"""
+            INSERT INTO SESION_CLASE
+              (ID_HORARIO, ID_PERIODO, FECHA, HORA_INICIO, HORA_FIN, ID_AULA, ID_SEDE, ID_INSTITUCION)
+            SELECT c.ID_HORARIO, MIN(c.ID_PERIODO), c.FECHA, c.HORA_INICIO, c.HORA_FIN,
+                   c.ID_AULA, c.ID_SEDE, c.ID_INSTITUCION
+            FROM (
+                SELECT h.ID_HORARIO, p.ID_PERIODO,
+                       TRUNC(p.FECHA_INICIO, 'IW') + 7 * s.N +
+                         CASE h.DIA
+                             WHEN 'Lunes' THEN 0
+                             WHEN 'Martes' THEN 1
+                             WHEN 'Miércoles' THEN 2
+                             WHEN 'Jueves' THEN 3
+                             WHEN 'Viernes' THEN 4
+                             WHEN 'Sábado' THEN 5
+                         END AS FECHA,
+                       h.HORA_INICIO, h.HORA_FIN, h.ID_AULA, h.ID_SEDE, h.ID_INSTITUCION,
+                       TRUNC(p.FECHA_INICIO) AS INICIO_PERIODO,
+                       TRUNC(p.FECHA_FIN) AS FIN_PERIODO
+                FROM HORARIO h
+                JOIN AULA a
+                    ON a.ID_AULA = h.ID_AULA
+                    AND a.ID_SEDE = h.ID_SEDE
+                    AND a.ID_INSTITUCION = h.ID_INSTITUCION
+                JOIN PERIODO p
+                    ON p.ID_PROGRAMA = a.ID_PROGRAMA
+                JOIN (SELECT LEVEL - 1 AS N FROM dual CONNECT BY LEVEL <= :semanas) s
+                    ON TRUNC(p.FECHA_INICIO, 'IW') + 7 * s.N <= p.FECHA_FIN
+                WHERE h.DIA IN ('Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado')
+                {where_origen}
+            ) c
+            WHERE c.FECHA BETWEEN c.INICIO_PERIODO AND c.FIN_PERIODO
+            {where_fecha}
+            AND NOT EXISTS (
+                SELECT 1 FROM FESTIVO f
+                WHERE f.FECHA_FESTIVO >= c.FECHA AND f.FECHA_FESTIVO < c.FECHA + 1
+            )
+            AND NOT EXISTS (
+                SELECT 1 FROM SESION_CLASE x
+                WHERE x.ID_HORARIO = c.ID_HORARIO AND x.FECHA = c.FECHA
+            )
+            GROUP BY c.ID_HORARIO, c.FECHA, c.HORA_INICIO, c.HORA_FIN, c.ID_AULA, c.ID_SEDE, c.ID_INSTITUCION
+        """, binds)
+        creadas = cur.rowcount
+        logger.info(
+            f"Sesiones materializadas: {creadas} "
+            f"(periodo={id_periodo}, horario={id_horario}, aula={id_aula}, fecha={fecha}, desde={desde})"
+        )
+        return creadas
+    finally:
+        cur.close()
+
+
+def quitar_sesiones_horario(conn, id_horario: int, desde: Optional[date] = None) -> int:
+    """Borra las sesiones de un horario (desde una fecha si se indica)."""
+    cur = conn.cursor()
+    try:
+        if desde is None:
+            cur.execute("DELETE FROM SESION_CLASE WHERE ID_HORARIO = :1", (id_horario,))
+        else:
+            cur.execute(
+                "DELETE FROM SESION_CLASE WHERE ID_HORARIO = :1 AND FECHA >= TRUNC(:2)",
+                (id_horario, desde),
+            )
+        return cur.rowcount
+    finally:
+        cur.close()
+
+
+def quitar_sesiones_aula(conn, id_aula: int, desde: date) -> int:
+    """Borra las sesiones de los horarios de un aula desde una fecha."""
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "DELETE FROM SESION_CLASE WHERE ID_AULA = :1 AND FECHA >= TRUNC(:2)",
+            (id_aula, desde),
+        )
+        return cur.rowcount
+    finally:
+        cur.close()
+
+
+def quitar_sesiones_fecha(conn, fecha: date) -> int:
+    """Borra todas las sesiones de una fecha (se usa al crear un festivo)."""
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM SESION_CLASE WHERE FECHA = TRUNC(:1)", (fecha,))
+        return cur.rowcount
+    finally:
+        cur.close()
+
+
+def quitar_sesiones_periodo(conn, id_periodo: int) -> int:
+    """Borra todas las sesiones de un periodo (reconstrucción completa)."""
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM SESION_CLASE WHERE ID_PERIODO = :1", (id_periodo,))
+        return cur.rowcount
+    finally:
+        cur.close()
+
+
+def rehacer_horario(conn, id_horario: int, desde: date) -> int:
+    """Regenera las sesiones de un horario que cambió de día u hora, desde una fecha."""
+    quitar_sesiones_horario(conn, id_horario, desde)
+    return materializar(conn, id_horario=id_horario, desde=desde)
+
+
+def rehacer_aula(conn, id_aula: int, desde: date) -> int:
+    """Regenera las sesiones de un aula que cambió de programa (otros periodos), desde una fecha."""
+    quitar_sesiones_aula(conn, id_aula, desde)
+    return materializar(conn, id_aula=id_aula, desde=desde)
@@ -0,0 +1,440 @@
+# app/cola_asistencia.py
+"""
+Cola de escritura diferida (write-behind) para las asistencias.
+
+A las 07:00 todos los tutores registran asistencia en un par de minutos, y
+cada POST con su propio commit termina esperando el log file sync de Oracle.
+Con COLA_ASISTENCIA_HABILITADA=1 los POST de /asistencias validan el cuerpo,
+anotan la fila en un archivo local y responden 202 sin tocar la base; un hilo
+la vacía en Oracle por lotes (executemany del mismo MERGE de los POST
+directos) con un commit por lote, cada COLA_ASISTENCIA_MS milisegundos o
+apenas hay COLA_ASISTENCIA_LOTE filas.
+
+El archivo (COLA_ASISTENCIA_DIR/cola-<pid>-<ms>.jsonl, uno por worker) es de
+solo agregar: una línea JSON por fila encolada y, después de cada commit,
+una marca {"hecho": n} con la última aplicada. El 202 sale cuando la línea
+ya pasó por fsync; los hilos que escriben mientras otro hace fsync quedan
+cubiertos por el siguiente, así las ráfagas comparten los fsync (group
+commit en el archivo). Cuando todo lo anotado quedó en Oracle y el archivo
+pasa de COLA_ASISTENCIA_ROTAR_BYTES, se vacía.
+
+Recuperación: cada worker tiene su archivo bloqueado (flock). Al arrancar, y
+en cada vuelta hasta lograrlo, el hilo busca archivos de workers que ya no
+existen (los que se pueden bloquear), escribe lo que quedó después de su
+última marca y los borra. Reaplicar una fila ya escrita no duplica: el MERGE
+es sobre la llave natural (V011). Sin fcntl (Windows) no hay bloqueo, así
+que ahí solo es seguro con un worker.
+
+Límites:
+- el 202 no trae id de asistencia (todavía no existe), sino el número en la cola;
+- FECHA es la hora del servidor de la app al encolar, no al escribir en Oracle;
+- una fila que Oracle rechaza (tutor o aula inexistente, dato inválido) ya
+  respondió 202: se registra en rechazadas.jsonl del mismo directorio y en
+  métricas, y la cola sigue. Solo los errores de conexión o de base no
+  disponible dejan el lote en la cola para reintentarlo;
+- dentro de un POST /batch transaccional no se encola (la escritura tiene que
+  ser parte de la transacción).
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+import oracledb
+from fastapi.responses import JSONResponse
+
+from . import metricas, resumen_admin
+from .db import codigo_error, get_conn, transaccion_activa
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+COLA_ASISTENCIA_HABILITADA = os.getenv("COLA_ASISTENCIA_HABILITADA", "0") == "1"
+COLA_ASISTENCIA_DIR = os.getenv(
+    "COLA_ASISTENCIA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cola_asistencia"),
+)
+COLA_ASISTENCIA_MS = int(os.getenv("COLA_ASISTENCIA_MS", "200"))
+COLA_ASISTENCIA_LOTE = int(os.getenv("COLA_ASISTENCIA_LOTE", "500"))
+COLA_ASISTENCIA_ROTAR_BYTES = int(os.getenv("COLA_ASISTENCIA_ROTAR_BYTES", str(4 * 1024 * 1024)))
+COLA_ASISTENCIA_REINTENTO_SEGUNDOS = int(os.getenv("COLA_ASISTENCIA_REINTENTO_SEGUNDOS", "5"))
+
+RECHAZADAS = "rechazadas.jsonl"
+
+# errores que no dicen nada de la fila: conexión caída o base no disponible
+# (los DPY-6xxx son de conexión). Con estos el lote queda en la cola; con
+# cualquier otro error de Oracle la fila se aparta para no trabar a las demás.
+_CAIDAS = {
+    "ORA-00028", "ORA-00054", "ORA-00060", "ORA-01012", "ORA-01013", "ORA-01033", "ORA-01034",
+    "ORA-01089", "ORA-01092", "ORA-02396", "ORA-03113", "ORA-03114", "ORA-03135", "ORA-12170",
+    "ORA-12514", "ORA-12528", "ORA-12537", "ORA-12541", "DPI-1080", "DPY-4011", "DPY-4024",
+}
+
+# MERGE sobre la llave natural (ver V011), el mismo de los POST directos.
+# :fecha es la hora del servidor de la app al recibir la asistencia (al
+# encolarla, si pasa por la cola). Solo actualiza si la fila que llega no es
+# más vieja que la guardada: una fila recuperada de un spool o vaciada tarde
+# desde otro worker no pisa un reenvío posterior ya escrito. ACTUALIZADO
+# anota la reescritura para los refrescos de horas_tutor y hechos_asistencia.
+MERGE_TUTOR = """
+    MERGE INTO ASISTENCIA_AULA_TUTOR x
+    USING (
+        SELECT :id_tutor AS ID_TUTOR, :id_aula AS ID_AULA, :id_sede AS ID_SEDE, :id_institucion AS ID_INSTITUCION,
+               TRUNC(:fecha) AS DIA, COALESCE(-:id_asistencia_reposicion, :id_horario, 0) AS CLASE,
+               :fecha AS FECHA, :hora_entrada AS HORA_ENTRADA, :hora_salida AS HORA_SALIDA, :se_dio AS SE_DIO,
+               :id_motivo AS ID_MOTIVO, :id_asistencia_reposicion AS ID_ASISTENCIA_REPOSICION,
+               :id_horario AS ID_HORARIO
+        FROM DUAL
+    ) n
+    ON (x.ID_AULA = n.ID_AULA AND x.ID_SEDE = n.ID_SEDE AND x.ID_INSTITUCION = n.ID_INSTITUCION
+        AND x.DIA = n.DIA AND x.CLASE = n.CLASE AND x.ID_TUTOR = n.ID_TUTOR)
+    WHEN MATCHED THEN
+        UPDATE SET x.FECHA = n.FECHA, x.HORA_ENTRADA = n.HORA_ENTRADA, x.HORA_SALIDA = n.HORA_SALIDA,
+                   x.SE_DIO = n.SE_DIO, x.ID_MOTIVO = n.ID_MOTIVO, x.ACTUALIZADO = SYSDATE
+        WHERE n.FECHA >= x.FECHA
+    WHEN NOT MATCHED THEN
+        INSERT (ID_TUTOR, ID_AULA, ID_SEDE, ID_INSTITUCION, FECHA, HORA_ENTRADA, HORA_SALIDA, SE_DIO, ID_MOTIVO,
+                ID_ASISTENCIA_REPOSICION, ID_HORARIO)
+        VALUES (n.ID_TUTOR, n.ID_AULA, n.ID_SEDE, n.ID_INSTITUCION, n.FECHA, n.HORA_ENTRADA, n.HORA_SALIDA,
+                n.SE_DIO, n.ID_MOTIVO, n.ID_ASISTENCIA_REPOSICION, n.ID_HORARIO)
+"""
+
+MERGE_ESTUDIANTE = """
+    MERGE INTO ASISTENCIA_AULA_ESTUDIANTE x
+    USING (
+        SELECT :id_estudiante AS ID_ESTUDIANTE, :id_aula AS ID_AULA, :id_sede AS ID_SEDE,
+               :id_institucion AS ID_INSTITUCION, TRUNC(:fecha) AS DIA, COALESCE(:id_horario, 0) AS CLASE,
+               :fecha AS FECHA, :hora_entrada AS HORA_ENTRADA, :hora_salida AS HORA_SALIDA,
+               :presente AS PRESENTE, :id_horario AS ID_HORARIO
+        FROM DUAL
+    ) n
+    ON (x.ID_AULA = n.ID_AULA AND x.ID_SEDE = n.ID_SEDE AND x.ID_INSTITUCION = n.ID_INSTITUCION
+        AND x.DIA = n.DIA AND x.CLASE = n.CLASE AND x.ID_ESTUDIANTE = n.ID_ESTUDIANTE)
+    WHEN MATCHED THEN
+        UPDATE SET x.FECHA = n.FECHA, x.HORA_ENTRADA = n.HORA_ENTRADA, x.HORA_SALIDA = n.HORA_SALIDA,
+                   x.PRESENTE = n.PRESENTE, x.ACTUALIZADO = SYSDATE
+        WHERE n.FECHA >= x.FECHA
+    WHEN NOT MATCHED THEN
+        INSERT (ID_ESTUDIANTE, ID_AULA, ID_SEDE, ID_INSTITUCION, FECHA, HORA_ENTRADA, HORA_SALIDA, PRESENTE,
+                ID_HORARIO)
+        VALUES (n.ID_ESTUDIANTE, n.ID_AULA, n.ID_SEDE, n.ID_INSTITUCION, n.FECHA, n.HORA_ENTRADA, n.HORA_SALIDA,
+                n.PRESENTE, n.ID_HORARIO)
+"""
+
+SQL_COLA = {
+    "tutor": MERGE_TUTOR,
+    "estudiante": MERGE_ESTUDIANTE,
+}
+
+
+class Spool:
+    """Archivo de solo agregar con fsync compartido entre los hilos que escriben."""
+
+    def __init__(self, ruta: str):
+        # se crea y se bloquea con otro nombre y recién bloqueado pasa a
+        # llamarse cola-*.jsonl: si no, el recuperar() de otro worker que
+        # arranca a la vez lo podría bloquear y borrar antes que su dueño
+        nuevo = ruta + ".nuevo"
+        self._archivo = open(nuevo, "ab")
+        if fcntl is not None:
+            fcntl.flock(self._archivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        os.rename(nuevo, ruta)
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._lock_fsync = threading.Lock()
+        self._escritas = 0
+        self._sincronizadas = 0
+
+    def escribir(self, armar) -> int:
+        """
+        Agrega la línea de armar() sin esperar el fsync y devuelve su número de
+        escritura. armar() corre con el lock tomado: las líneas quedan en el
+        orden en que se armaron.
+        """
+        with self._lock:
+            registro = armar()
+            self._archivo.write((json.dumps(registro, separators=(",", ":"), default=str) + "\n").encode("utf-8"))
+            self._escritas += 1
+            return self._escritas
+
+    def sincronizar(self, hasta: int):
+        """Vuelve cuando la escritura `hasta` ya pasó por fsync."""
+        with self._lock_fsync:
+            if self._sincronizadas >= hasta:
+                # el fsync de otro hilo ya la cubrió
+                return
+            with self._lock:
+                self._archivo.flush()
+                escritas = self._escritas
+            os.fsync(self._archivo.fileno())
+            self._sincronizadas = escritas
+
+    def vaciar_si_pasa(self, limite: int, vacia) -> bool:
+        """Trunca el archivo si pasa de `limite` bytes y vacia() sigue siendo cierto con el lock tomado."""
+        with self._lock_fsync, self._lock:
+            self._archivo.flush()
+            if os.fstat(self._archivo.fileno()).st_size <= limite or not vacia():
+                return False
+            self._archivo.truncate(0)
+            os.fsync(self._archivo.fileno())
+            self._sincronizadas = self._escritas
+            return True
+
+    def cerrar(self, borrar: bool):
+        with self._lock_fsync, self._lock:
+            self._archivo.flush()
+            os.fsync(self._archivo.fileno())
+            if borrar:
+                os.remove(self.ruta)
+            self._archivo.close()
+
+
+# filas encoladas en este worker que todavía no están en Oracle: [(n, tabla, binds)]
+_pendientes = []
+_siguiente = 0
+_lock = threading.Lock()
+# un solo vaciar() a la vez: el hilo y el de detener() tomarían el mismo lote
+_lock_vaciar = threading.Lock()
+_spool = None
+_hilo = None
+_despertar = threading.Event()
+_parar = threading.Event()
+
+
+def encolar(tabla: str, binds: dict):
+    """
+    Anota la fila (`binds` del MERGE, con :fecha) en el spool y responde
+    202. Devuelve None si no corresponde encolar (cola apagada, transacción
+    de lote) o si el archivo falló: el handler sigue con la escritura directa.
+    """
+    if _spool is None or transaccion_activa():
+        return None
+    registro = {"tabla": tabla, "binds": binds}
+
+    def armar():
+        global _siguiente
+        with _lock:
+            _siguiente += 1
+            registro["n"] = _siguiente
+            # si después falla el archivo, la fila igual se escribe desde la
+            # cola y también directo: el MERGE por llave natural no la duplica
+            _pendientes.append((_siguiente, tabla, binds))
+            if len(_pendientes) >= COLA_ASISTENCIA_LOTE:
+                _despertar.set()
+        return registro
+
+    try:
+        _spool.sincronizar(_spool.escribir(armar))
+    except OSError as e:
+        logger.error(f"No se pudo anotar la asistencia en la cola, se escribe directo: {str(e)}")
+        return None
+    metricas.sumar("cola_asistencia_encoladas_total", (("tabla", tabla),))
+    return JSONResponse(status_code=202, content={"encolada": True, "id_cola": registro["n"]})
+
+
+def _rechazar(n: int, tabla: str, binds: dict, error: Exception):
+    logger.error(f"Asistencia {n} de la cola rechazada por Oracle ({tabla}): {str(error)}")
+    metricas.sumar("cola_asistencia_rechazadas_total", (("tabla", tabla),))
+    registro = {"n": n, "tabla": tabla, "binds": binds, "error": str(error), "rechazada": datetime.now()}
+    with open(os.path.join(COLA_ASISTENCIA_DIR, RECHAZADAS), "a", encoding="utf-8") as f:
+        f.write(json.dumps(registro, separators=(",", ":"), default=str) + "\n")
+
+
+def _es_caida(e: Exception) -> bool:
+    codigo = codigo_error(e) or ""
+    return codigo in _CAIDAS or codigo.startswith("DPY-6")
+
+
+def escribir_lote(conn, filas: list) -> int:
+    """
+    Escribe las filas [(n, tabla, binds)] con un executemany por tabla y un
+    commit. Si Oracle rechaza alguna, deshace y las escribe de a una para
+    apartar solo las malas. Los errores de conexión (ver _CAIDAS) se
+    propagan: el lote sigue pendiente. Devuelve cuántas quedaron escritas.
+    """
+    por_tabla = {}
+    for n, tabla, binds in filas:
+        por_tabla.setdefault(tabla, []).append(binds)
+    cur = conn.cursor()
+    try:
+        try:
+            for tabla, lote in por_tabla.items():
+                cur.executemany(SQL_COLA[tabla], lote)
+            conn.commit()
+            escritas = len(filas)
+        except oracledb.DatabaseError as e:
+            if _es_caida(e):
+                raise
+            conn.rollback()
+            escritas = 0
+            malas = []
+            for n, tabla, binds in filas:
+                try:
+                    cur.execute(SQL_COLA[tabla], binds)
+                    escritas += 1
+                except oracledb.DatabaseError as error:
+                    if _es_caida(error):
+                        raise
+                    malas.append((n, tabla, binds, error))
+            conn.commit()
+            # después del commit: si algo falla antes, el lote se reintenta entero
+            for n, tabla, binds, error in malas:
+                _rechazar(n, tabla, binds, error)
+    finally:
+        cur.close()
+    for id_sede, id_institucion in {(b["id_sede"], b["id_institucion"]) for b in por_tabla.get("estudiante", [])}:
+        resumen_admin.marcar(id_sede, id_institucion)
+    metricas.sumar("cola_asistencia_escritas_total", (), escritas)
+    return escritas
+
+
+def vaciar() -> int:
+    """
+    Escribe en Oracle lo pendiente de este worker, de a COLA_ASISTENCIA_LOTE
+    filas con un commit por lote, y anota la marca de cada lote en el spool.
+    Devuelve cuántas filas salieron de la cola.
+    """
+    total = 0
+    with _lock_vaciar:
+        while True:
+            with _lock:
+                lote = _pendientes[:COLA_ASISTENCIA_LOTE]
+            if not lote:
+                break
+            conn = get_conn()
+            try:
+                escribir_lote(conn, lote)
+            finally:
+                conn.close()
+            with _lock:
+                # encolar() solo agrega al final: el lote sigue siendo el principio
+                del _pendientes[:len(lote)]
+            # sin fsync: si la marca se pierde, el lote se vuelve a aplicar y el MERGE no duplica
+            _spool.escribir(lambda: {"hecho": lote[-1][0]})
+            total += len(lote)
+        if total:
+            _spool.vaciar_si_pasa(COLA_ASISTENCIA_ROTAR_BYTES, lambda: pendientes() == 0)
+    return total
+
+
+def leer_spool(ruta: str) -> list:
+    """Filas [(n, tabla, binds)] del archivo que siguen después de su última marca."""
+    filas = []
+    hecho = 0
+    with open(ruta, "rb") as f:
+        for linea in f:
+            try:
+                registro = json.loads(linea)
+            except ValueError:
+                # la última línea puede haber quedado a medias: nunca se respondió
+                logger.warning(f"Línea incompleta en {ruta}, se ignora")
+                continue
+            if "hecho" in registro:
+                hecho = max(hecho, registro["hecho"])
+                continue
+            binds = registro["binds"]
+            binds["fecha"] = datetime.fromisoformat(binds["fecha"])
+            filas.append((registro["n"], registro["tabla"], binds))
+    return [f for f in filas if f[0] > hecho]
+
+
+def recuperar() -> bool:
+    """
+    Escribe lo pendiente de los archivos de workers que ya no están y los
+    borra. Devuelve False si la base no respondió (se reintenta después).
+    """
+    for nombre in sorted(os.listdir(COLA_ASISTENCIA_DIR)):
+        ruta = os.path.join(COLA_ASISTENCIA_DIR, nombre)
+        if not (nombre.startswith("cola-") and nombre.endswith(".jsonl")) or ruta == _spool.ruta:
+            continue
+        with open(ruta, "ab") as f:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    continue  # es de un worker vivo
+            filas = leer_spool(ruta)
+            conn = None
+            try:
+                conn = get_conn()
+                for i in range(0, len(filas), COLA_ASISTENCIA_LOTE):
+                    escribir_lote(conn, filas[i:i + COLA_ASISTENCIA_LOTE])
+            except oracledb.DatabaseError as e:
+                logger.error(f"No se pudo recuperar {nombre}: {str(e)}")
+                return False
+            finally:
+                if conn:
+                    conn.close()
+            os.remove(ruta)
+        logger.info(f"Cola de asistencias {nombre} recuperada: {len(filas)} filas")
+    return True
+
+
+def _bucle():
+    recuperado = False
+    while not _parar.is_set():
+        _despertar.wait(COLA_ASISTENCIA_MS / 1000)
+        _despertar.clear()
+        try:
+            if not recuperado:
+                recuperado = recuperar()
+            vaciar()
+        except oracledb.DatabaseError as e:
+            # lo pendiente sigue en memoria y en el spool: se reintenta
+            logger.error(f"No se pudo vaciar la cola de asistencias: {str(e)}")
+            _parar.wait(COLA_ASISTENCIA_REINTENTO_SEGUNDOS)
+        except Exception as e:
+            # una falla no debe matar el hilo
+            logger.error(f"Error en la cola de asistencias: {str(e)}", exc_info=True)
+
+
+def iniciar():
+    """Abre el spool de este worker y arranca el hilo que vacía la cola. Llamar una vez en el startup."""
+    global _spool, _hilo
+    if not COLA_ASISTENCIA_HABILITADA:
+        return
+    os.makedirs(COLA_ASISTENCIA_DIR, exist_ok=True)
+    _spool = Spool(os.path.join(COLA_ASISTENCIA_DIR, f"cola-{os.getpid()}-{int(time.time() * 1000)}.jsonl"))
+    _parar.clear()
+    _hilo = threading.Thread(target=_bucle, name="cola-asistencia", daemon=True)
+    _hilo.start()
+    logger.info(f"Cola de asistencias en {_spool.ruta} (cada {COLA_ASISTENCIA_MS} ms o {COLA_ASISTENCIA_LOTE} filas)")
+
+
+def detener(timeout: float = 10.0):
+    """
+    Vacía lo pendiente y cierra el spool (en el shutdown, cuando ya no llegan
+    peticiones): lo borra si quedó todo en Oracle; si no, lo deja para la
+    recuperación del próximo arranque. Si el hilo no terminó en `timeout`
+    (Oracle lento), este vaciar() espera al suyo y el spool tampoco se borra.
+    """
+    global _spool, _hilo
+    if _spool is None:
+        return
+    _parar.set()
+    _despertar.set()
+    vivo = False
+    if _hilo is not None:
+        _hilo.join(timeout)
+        vivo = _hilo.is_alive()
+        if vivo:
+            logger.warning(f"El hilo de la cola de asistencias no terminó en {timeout}s")
+        _hilo = None
+    try:
+        vaciar()
+    except oracledb.DatabaseError as e:
+        logger.error(f"La cola de asistencias queda en {_spool.ruta} para el próximo arranque: {str(e)}")
+    _spool.cerrar(borrar=not _pendientes and not vivo)
+    _spool = None
+
+
+def pendientes() -> int:
+    """Filas encoladas en este worker que todavía no están en Oracle."""
+    with _lock:
+        return len(_pendientes)
@@ -0,0 +1,32 @@
+# app/control_refresco.py
+"""
+Marcas de agua de los resúmenes (tabla CONTROL_REFRESCO, una fila por resumen).
+
+ULTIMO_ID es el último ID_ASISTENCIA incorporado. bloquear() toma la fila con
+FOR UPDATE: el lock dura hasta el commit del llamador y evita que dos workers
+refresquen el mismo resumen a la vez.
+"""
+
+
+def bloquear(cur, nombre: str) -> int:
+    """Bloquea la fila del resumen y devuelve su ULTIMO_ID (la crea si no existe)."""
+    cur.execute(
+        "SELECT ULTIMO_ID FROM CONTROL_REFRESCO WHERE NOMBRE = :1 FOR UPDATE",
+        (nombre,),
+    )
+    row = cur.fetchone()
+    if row is None:
+        # base creada antes de la migración que registra el resumen
+        cur.execute(
+            "INSERT INTO CONTROL_REFRESCO (NOMBRE, ULTIMO_ID) VALUES (:1, 0)",
+            (nombre,),
+        )
+        return 0
+    return int(row[0])
+
+
+def guardar(cur, nombre: str, ultimo_id: int):
+    cur.execute(
+        "UPDATE CONTROL_REFRESCO SET ULTIMO_ID = :1, ACTUALIZADO = SYSDATE WHERE NOMBRE = :2",
+        (ultimo_id, nombre),
+    )
@@ -1,7 +1,18 @@
 # app/db.py
+import contextlib
+import contextvars
+import logging
 import os
+import re
+import time
+from typing import Optional
+
 import oracledb
 
+from . import metricas, traza_sql
+
+logger = logging.getLogger(__name__)
+
 # -------------------------------
 # Configuración de conexión Oracle
 # -------------------------------
@@ -24,6 +35,9 @@ ORACLE_DSN = os.getenv(
 
 pool = None
 
+# conexión compartida por todas las escrituras de un POST /batch transaccional
+_transaccion = contextvars.ContextVar("transaccion_compartida", default=None)
+
 
 def _create_pool_compatible(**kwargs):
     """
@@ -68,7 +82,6 @@ def init_db():
             print("Se intentará usar conexiones puntuales. Error:", ex)
             pool = None
 
-
 def get_conn():
     """
     Retorna una conexión Oracle:
@@ -77,14 +90,154 @@ def get_conn():
 
     IMPORTANTE: quien llame a get_conn() debe hacer siempre conn.close()
     cuando termine de usarla.
+
+    Dentro de una transacción compartida (ver abrir_transaccion) devuelve
+    siempre la conexión de esa transacción.
     """
     global pool
+    compartida = _transaccion.get()
+    if compartida is not None:
+        return compartida
     if pool:
-        return pool.acquire()
+        # el tiempo esperando una conexión libre va aparte en la traza (Server-Timing: pool)
+        metricas.sumar("db_pool_esperando")
+        t0 = time.perf_counter()
+        try:
+            conn = pool.acquire()
+        finally:
+            espera = time.perf_counter() - t0
+            metricas.sumar("db_pool_esperando", valor=-1)
+        metricas.observar("db_pool_espera_segundos", (), espera)
+        traza_sql.anotar_espera_pool(espera)
+        return traza_sql.envolver(conn)
 
     # Fallback: conexión directa (sin pool)
-    return oracledb.connect(
+    return traza_sql.envolver(oracledb.connect(
         user=ORACLE_USER,
         password=ORACLE_PASSWORD,
         dsn=ORACLE_DSN,
-    )
+    ))
+
+
+class ConexionCompartida:
+    """
+    Conexión de una transacción compartida: los handlers la usan como
+    cualquier otra, pero commit() y close() no hacen nada (confirma o deshace
+    quien abrió la transacción). Un rollback() sí deshace todo lo anterior y
+    deja la transacción marcada como fallida. Lo que los handlers hacen
+    "después del commit" (ver al_confirmar) espera al commit real.
+    """
+
+    def __init__(self, conexion):
+        self.conexion = conexion
+        self.fallida = False
+        self.pendientes = []
+
+    def cursor(self, *args, **kwargs):
+        return self.conexion.cursor(*args, **kwargs)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self.fallida = True
+        self.conexion.rollback()
+
+    def close(self):
+        pass
+
+    def __getattr__(self, nombre):
+        return getattr(self.conexion, nombre)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+def abrir_transaccion() -> ConexionCompartida:
+    """
+    Toma una conexión para una transacción compartida. Se activa con
+    `with en_transaccion(compartida):` en el contexto que va a lanzar las
+    peticiones y se termina con cerrar_transaccion.
+    """
+    return ConexionCompartida(get_conn())
+
+
+@contextlib.contextmanager
+def en_transaccion(compartida: ConexionCompartida):
+    """get_conn() devuelve `compartida` en este contexto y en las tareas e hilos que salgan de él."""
+    token = _transaccion.set(compartida)
+    try:
+        yield compartida
+    finally:
+        _transaccion.reset(token)
+
+
+def transaccion_activa() -> bool:
+    """True dentro de una transacción compartida (get_conn() devuelve su conexión)."""
+    return _transaccion.get() is not None
+
+
+def al_confirmar(funcion, *args):
+    """
+    Efecto de una escritura que solo vale si la escritura quedó confirmada
+    (limpiar cachés, marcar resúmenes). Fuera de una transacción compartida
+    corre ya (el handler lo llama después de su commit); dentro, se guarda y
+    corre en cerrar_transaccion solo si el lote confirma.
+    """
+    compartida = _transaccion.get()
+    if compartida is None:
+        funcion(*args)
+    else:
+        compartida.pendientes.append((funcion, args))
+
+
+def cerrar_transaccion(compartida: ConexionCompartida, confirmar: bool):
+    """
+    Confirma (si nadie hizo rollback) o deshace, y devuelve la conexión al pool.
+    Después de confirmar corre lo anotado con al_confirmar; si deshace, lo descarta.
+    """
+    confirmada = False
+    try:
+        if confirmar and not compartida.fallida:
+            compartida.conexion.commit()
+            confirmada = True
+        else:
+            compartida.conexion.rollback()
+    finally:
+        compartida.conexion.close()
+        pendientes, compartida.pendientes = compartida.pendientes, []
+    if confirmada:
+        for funcion, args in pendientes:
+            try:
+                funcion(*args)
+            except Exception as e:
+                # lo escrito ya quedó: un efecto que falla no deshace el lote
+                logger.error(f"Error después de confirmar la transacción ({funcion.__qualname__}): {str(e)}")
+
+
+# p. ej. "ORA-00001: unique constraint (...) violated", "DPY-4011: the database or network closed the connection"
+_CODIGO_ERROR = re.compile(r"\b(?:ORA|DPY|DPI)-\d{4,5}\b")
+
+
+def codigo_error(e: Exception) -> Optional[str]:
+    """Primer código ORA-/DPY-/DPI- del mensaje de un error de oracledb (p. ej. "ORA-00001"), o None."""
+    m = _CODIGO_ERROR.search(str(e))
+    return m.group(0) if m else None
+
+
+def armar_update(tabla: str, campos, clave):
+    """
+    Arma un UPDATE parcial: solo entran al SET los campos con valor.
+    campos y clave son pares (COLUMNA, valor); clave va al WHERE.
+    Devuelve (sql, binds), o (None, None) si no hay nada que actualizar.
+    """
+    columnas = [(c, v) for c, v in campos if v is not None]
+    if not columnas:
+        return None, None
+    binds = [v for _, v in columnas] + [v for _, v in clave]
+    set_sql = ", ".join(f"{c} = :{i}" for i, (c, _) in enumerate(columnas, 1))
+    where_sql = " AND ".join(f"{c} = :{i}" for i, (c, _) in enumerate(clave, len(columnas) + 1))
+    return f"UPDATE {tabla} SET {set_sql} WHERE {where_sql}", binds
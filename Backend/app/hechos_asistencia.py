@@ -0,0 +1,581 @@
+# app/hechos_asistencia.py
+"""
+Almacén columnar en memoria de las asistencias (tutores y estudiantes).
+
+Los dashboards de administración agrupan asistencias por institución, sede,
+aula, tutor, día de la semana y rango de fechas. En vez de lanzar un GROUP BY
+pesado a Oracle por cada vista, cada proceso guarda los hechos como arreglos
+NumPy y resuelve filtro + agrupación con máscaras vectorizadas.
+
+Formato por fila (~28 bytes):
+- id: ID_ASISTENCIA int64 (para ubicar las filas que se reescriben).
+- institucion/sede: código int16; aula, tutor, estudiante: código int32.
+  Los códigos salen de diccionarios id -> código; sede y aula usan su llave
+  compuesta completa (ID_SEDE, ID_INSTITUCION) / (ID_AULA, ID_SEDE, ID_INSTITUCION).
+- dia: int32, días desde 1970-01-01; dia_semana: int8 (0 = lunes).
+- marca: uint8 con bits; MARCA_SI vale 1 si PRESENTE / SE_DIO.
+
+Se carga al arrancar, se refresca por ID_ASISTENCIA > último cargado y se
+recarga completo en la noche. Un reenvío que actualiza la asistencia del día
+(MERGE sobre la llave natural, ver V011) deja el ID y solo puede cambiar la
+marca: cada refresco relee la marca de las filas ya cargadas con ACTUALIZADO
+desde el refresco anterior (menos un margen) y corrige filas y cubo. El tutor
+de las asistencias de estudiantes es el tutor actual del aula (AULA.ID_TUTOR)
+al momento de cargar.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .db import get_conn
+
+logger = logging.getLogger(__name__)
+
+HECHOS_HABILITADOS = os.getenv("HECHOS_HABILITADOS", "1") == "1"
+HECHOS_REFRESCO_SEGUNDOS = int(os.getenv("HECHOS_REFRESCO_SEGUNDOS", "30"))
+HECHOS_RECARGA_HORA = os.getenv("HECHOS_RECARGA_HORA", "04:00")
+HECHOS_LOTE = int(os.getenv("HECHOS_LOTE", "50000"))
+# filas reescritas hasta este margen antes del refresco anterior se releen
+HECHOS_MARGEN_SEGUNDOS = int(os.getenv("HECHOS_MARGEN_SEGUNDOS", "300"))
+
+MARCA_SI = 1
+
+_EPOCA = date(1970, 1, 1)
+
+# dimensiones por las que se puede agrupar
+DIMENSIONES = ("institucion", "sede", "aula", "tutor", "estudiante", "dia_semana", "fecha", "mes")
+
+# campos de salida de cada dimensión codificada con diccionario
+_CAMPOS_SALIDA = {
+    "institucion": ("id_institucion",),
+    "sede": ("id_sede", "id_institucion"),
+    "aula": ("id_aula", "id_sede", "id_institucion"),
+    "tutor": ("id_tutor",),
+    "estudiante": ("id_estudiante",),
+}
+
+# hasta este número de combinaciones se agrupa con bincount directo
+_MAX_GRUPOS_DENSOS = 4_000_000
+
+
+class Diccionario:
+    """Codificación id -> código denso (0..n-1). Los ids pueden ser tuplas (llaves compuestas)."""
+
+    def __init__(self):
+        self._codigos = {}
+        self.valores = []
+
+    def __len__(self):
+        return len(self.valores)
+
+    def codificar(self, ids: np.ndarray, dtype) -> np.ndarray:
+        """Codifica un arreglo (n,) o (n, k); solo los valores distintos pasan por Python."""
+        if ids.shape[0] == 0:
+            return np.empty(0, dtype=dtype)
+        if ids.ndim == 1:
+            unicos, inverso = np.unique(ids, return_inverse=True)
+            claves = unicos.tolist()
+        else:
+            # llave compuesta: se codifica cada columna por separado y se combinan
+            # los códigos en un int64 (np.unique con axis=0 es mucho más lento)
+            combinada = np.zeros(ids.shape[0], dtype=np.int64)
+            partes = []
+            paso = 1
+            for j in range(ids.shape[1]):
+                u, inv = np.unique(ids[:, j], return_inverse=True)
+                combinada += inv.reshape(-1).astype(np.int64) * paso
+                partes.append((u, paso))
+                paso *= u.size
+            unicos, inverso = np.unique(combinada, return_inverse=True)
+            columnas = [u[(unicos // p) % u.size] for u, p in partes]
+            claves = list(zip(*(c.tolist() for c in columnas)))
+        codigos = np.empty(len(claves), dtype=dtype)
+        for i, clave in enumerate(claves):
+            codigo = self._codigos.get(clave)
+            if codigo is None:
+                codigo = self._codigos[clave] = len(self.valores)
+                self.valores.append(clave)
+            codigos[i] = codigo
+        return codigos[inverso.reshape(-1)]
+
+    def codigo(self, valor) -> int:
+        """Código de un id, o -1 si nunca apareció."""
+        return self._codigos.get(valor, -1)
+
+
+class TablaHechos:
+    """
+    Columnas de una tabla de hechos con capacidad que crece al doble.
+    Las filas nuevas se escriben después de `n` y luego se publica el nuevo
+    `n` con el lock tomado: una consulta en curso sigue viendo su instantánea.
+    """
+
+    def __init__(self, nombre: str, columnas: Dict[str, type], capacidad: int = 1024):
+        self.nombre = nombre
+        self.tipos = dict(columnas)
+        self.n = 0
+        self.ultimo_id = 0
+        self.actualizado = None
+        # hora de la base al empezar el último refresco (reescrituras desde ahí)
+        self.cambios_desde = None
+        self._datos = {c: np.empty(capacidad, dtype=t) for c, t in self.tipos.items()}
+        self._lock = threading.Lock()
+
+    def instantanea(self):
+        """(columnas recortadas a n, n). Las vistas no cambian aunque lleguen filas nuevas."""
+        with self._lock:
+            n = self.n
+            return {c: a[:n] for c, a in self._datos.items()}, n
+
+    def agregar(self, columnas: Dict[str, np.ndarray], ultimo_id: int):
+        m = len(next(iter(columnas.values())))
+        n = self.n
+        capacidad = len(self._datos[next(iter(self.tipos))])
+        datos = self._datos
+        if n + m > capacidad:
+            nueva = max(capacidad * 2, n + m)
+            datos = {}
+            for c, t in self.tipos.items():
+                arreglo = np.empty(nueva, dtype=t)
+                arreglo[:n] = self._datos[c][:n]
+                datos[c] = arreglo
+        for c in self.tipos:
+            datos[c][n:n + m] = columnas[c]
+        with self._lock:
+            self._datos = datos
+            self.n = n + m
+            self.ultimo_id = max(self.ultimo_id, ultimo_id)
+
+    def reemplazar(self, columna: str, posiciones: np.ndarray, valores: np.ndarray):
+        """Cambia valores ya cargados sobre una copia de la columna: las instantáneas en curso no cambian."""
+        with self._lock:
+            arreglo = self._datos[columna].copy()
+        arreglo[posiciones] = valores
+        with self._lock:
+            self._datos = dict(self._datos, **{columna: arreglo})
+
+    def marcar_actualizado(self):
+        with self._lock:
+            self.actualizado = time.time()
+
+    def bytes(self) -> int:
+        with self._lock:
+            return sum(a[:self.n].nbytes for a in self._datos.values())
+
+
+_COLUMNAS_TUTOR = {
+    "id": np.int64, "institucion": np.int16, "sede": np.int16, "aula": np.int32, "tutor": np.int32,
+    "dia": np.int32, "dia_semana": np.int8, "marca": np.uint8,
+}
+_COLUMNAS_ESTUDIANTE = dict(_COLUMNAS_TUTOR, estudiante=np.int32)
+
+_SQL = {
+    "tutor": """
+        SELECT t.ID_ASISTENCIA, t.ID_INSTITUCION, t.ID_SEDE, t.ID_AULA, t.ID_TUTOR, -1,
+               TRUNC(t.FECHA) - DATE '1970-01-01', NVL(t.SE_DIO, 1)
+        FROM ASISTENCIA_AULA_TUTOR t
+        WHERE t.ID_ASISTENCIA > :ultimo
+        AND t.FECHA IS NOT NULL
+    """,
+    "estudiante": """
+        SELECT e.ID_ASISTENCIA, e.ID_INSTITUCION, e.ID_SEDE, e.ID_AULA, NVL(a.ID_TUTOR, -1), e.ID_ESTUDIANTE,
+               TRUNC(e.FECHA) - DATE '1970-01-01', NVL(e.PRESENTE, 1)
+        FROM ASISTENCIA_AULA_ESTUDIANTE e
+        LEFT JOIN AULA a
+            ON a.ID_AULA = e.ID_AULA
+            AND a.ID_SEDE = e.ID_SEDE
+            AND a.ID_INSTITUCION = e.ID_INSTITUCION
+        WHERE e.ID_ASISTENCIA > :ultimo
+        AND e.FECHA IS NOT NULL
+    """,
+}
+
+# marca actual de las filas ya cargadas que el MERGE reescribió
+_SQL_CAMBIOS = {
+    "tutor": """
+        SELECT ID_ASISTENCIA, NVL(SE_DIO, 1)
+        FROM ASISTENCIA_AULA_TUTOR
+        WHERE ACTUALIZADO >= :desde - :margen
+        AND ID_ASISTENCIA <= :ultimo
+    """,
+    "estudiante": """
+        SELECT ID_ASISTENCIA, NVL(PRESENTE, 1)
+        FROM ASISTENCIA_AULA_ESTUDIANTE
+        WHERE ACTUALIZADO >= :desde - :margen
+        AND ID_ASISTENCIA <= :ultimo
+    """,
+}
+
+
+# el día se guarda en 20 bits a partir de 1900-01-01 dentro de la llave del cubo
+_DIA_MINIMO = (date(1900, 1, 1) - _EPOCA).days
+
+
+def _cubo_vacio():
+    return {
+        "clave": np.empty(0, dtype=np.int64),
+        "institucion": np.empty(0, dtype=np.int16),
+        "sede": np.empty(0, dtype=np.int16),
+        "aula": np.empty(0, dtype=np.int32),
+        "tutor": np.empty(0, dtype=np.int32),
+        "dia": np.empty(0, dtype=np.int32),
+        "dia_semana": np.empty(0, dtype=np.int8),
+        "total": np.empty(0, dtype=np.int64),
+        "marcados": np.empty(0, dtype=np.int64),
+    }
+
+
+class AlmacenHechos:
+    """Tablas 'tutor' y 'estudiante' con diccionarios compartidos."""
+
+    def __init__(self):
+        self.diccionarios = {
+            "institucion": Diccionario(),
+            "sede": Diccionario(),
+            "aula": Diccionario(),
+            "tutor": Diccionario(),
+            "estudiante": Diccionario(),
+        }
+        self.tablas = {
+            "tutor": TablaHechos("tutor", _COLUMNAS_TUTOR),
+            "estudiante": TablaHechos("estudiante", _COLUMNAS_ESTUDIANTE),
+        }
+        # cubo por tabla: filas crudas sumadas por (aula, tutor, día)
+        self.cubos = {nombre: _cubo_vacio() for nombre in self.tablas}
+        # institución y sede (códigos) de cada código de aula
+        self._aula_institucion = np.empty(0, dtype=np.int16)
+        self._aula_sede = np.empty(0, dtype=np.int16)
+        self.cargado = False
+        # un solo refresco a la vez (los diccionarios solo se escriben aquí)
+        self._refresco = threading.Lock()
+
+    # ---------------- carga ----------------
+
+    def agregar_filas(self, tabla: str, datos: np.ndarray):
+        """
+        Agrega filas crudas (n, 8): id_asistencia, institucion, sede, aula, tutor,
+        estudiante, dia, marca. Es lo que usan la carga desde Oracle y el benchmark.
+        """
+        if datos.shape[0] == 0:
+            return
+        d = self.diccionarios
+        inst, sede, aula = datos[:, 1], datos[:, 2], datos[:, 3]
+        dia = datos[:, 6].astype(np.int32)
+        columnas = {
+            "id": datos[:, 0],
+            "institucion": d["institucion"].codificar(inst, np.int16),
+            "sede": d["sede"].codificar(np.stack([sede, inst], axis=1), np.int16),
+            "aula": d["aula"].codificar(np.stack([aula, sede, inst], axis=1), np.int32),
+            "tutor": d["tutor"].codificar(datos[:, 4], np.int32),
+            "dia": dia,
+            # 1970-01-01 fue jueves: (dia + 3) % 7 da 0 = lunes
+            "dia_semana": ((dia + 3) % 7).astype(np.int8),
+            "marca": np.where(datos[:, 7] != 0, MARCA_SI, 0).astype(np.uint8),
+        }
+        if "estudiante" in self.tablas[tabla].tipos:
+            columnas["estudiante"] = d["estudiante"].codificar(datos[:, 5], np.int32)
+        self._registrar_aulas()
+        self.tablas[tabla].agregar(columnas, int(datos[:, 0].max()))
+        self._acumular_cubo(tabla, columnas)
+
+    def _registrar_aulas(self):
+        """Completa las tablas aula -> institución/sede con los códigos de aula nuevos."""
+        d = self.diccionarios
+        conocidas = self._aula_institucion.size
+        total = len(d["aula"])
+        if total == conocidas:
+            return
+        nuevas = d["aula"].valores[conocidas:]
+        self._aula_institucion = np.concatenate([
+            self._aula_institucion,
+            np.array([d["institucion"].codigo(a[2]) for a in nuevas], dtype=np.int16),
+        ])
+        self._aula_sede = np.concatenate([
+            self._aula_sede,
+            np.array([d["sede"].codigo((a[1], a[2])) for a in nuevas], dtype=np.int16),
+        ])
+
+    def _acumular_cubo(self, tabla: str, columnas: Dict[str, np.ndarray]):
+        """Suma las filas nuevas al cubo (aula, tutor, día) y lo publica de una vez."""
+        clave = (
+            (columnas["aula"].astype(np.int64) << 40)
+            | (columnas["tutor"].astype(np.int64) << 20)
+            | (columnas["dia"].astype(np.int64) - _DIA_MINIMO)
+        )
+        marca = ((columnas["marca"] & MARCA_SI) != 0).astype(np.int64)
+
+        previo = self.cubos[tabla]
+        claves, inverso = np.unique(np.concatenate([previo["clave"], clave]), return_inverse=True)
+        inverso = inverso.reshape(-1)
+        total = np.bincount(
+            inverso, weights=np.concatenate([previo["total"], np.ones(clave.size, dtype=np.int64)]),
+            minlength=claves.size,
+        ).astype(np.int64)
+        marcados = np.bincount(
+            inverso, weights=np.concatenate([previo["marcados"], marca]), minlength=claves.size,
+        ).astype(np.int64)
+
+        aula = (claves >> 40).astype(np.int32)
+        dia = ((claves & 0xFFFFF) + _DIA_MINIMO).astype(np.int32)
+        self.cubos[tabla] = {
+            "clave": claves,
+            "institucion": self._aula_institucion[aula],
+            "sede": self._aula_sede[aula],
+            "aula": aula,
+            "tutor": ((claves >> 20) & 0xFFFFF).astype(np.int32),
+            "dia": dia,
+            "dia_semana": ((dia + 3) % 7).astype(np.int8),
+            "total": total,
+            "marcados": marcados,
+        }
+
+    def corregir_marcas(self, tabla: str, datos: np.ndarray) -> int:
+        """
+        Aplica la marca actual (n, 2): id_asistencia, marca, a las filas ya
+        cargadas y ajusta los marcados del cubo. Devuelve cuántas cambiaron.
+        """
+        t = self.tablas[tabla]
+        cols, n = t.instantanea()
+        if datos.shape[0] == 0 or n == 0:
+            return 0
+        posiciones = np.flatnonzero(np.isin(cols["id"], datos[:, 0]))
+        if posiciones.size == 0:
+            return 0
+        orden = np.argsort(datos[:, 0])
+        fila = orden[np.searchsorted(datos[:, 0], cols["id"][posiciones], sorter=orden)]
+        nueva = np.where(datos[fila, 1] != 0, MARCA_SI, 0).astype(np.uint8)
+        anterior = cols["marca"][posiciones]
+        cambio = ((nueva & MARCA_SI) != 0).astype(np.int64) - ((anterior & MARCA_SI) != 0).astype(np.int64)
+        distintas = cambio != 0
+        if not distintas.any():
+            return 0
+        posiciones, nueva, cambio = posiciones[distintas], nueva[distintas], cambio[distintas]
+        t.reemplazar("marca", posiciones, (anterior[distintas] & ~np.uint8(MARCA_SI)) | nueva)
+
+        # la fila no cambia de (aula, tutor, día): solo se mueven los marcados de su celda
+        clave = (
+            (cols["aula"][posiciones].astype(np.int64) << 40)
+            | (cols["tutor"][posiciones].astype(np.int64) << 20)
+            | (cols["dia"][posiciones].astype(np.int64) - _DIA_MINIMO)
+        )
+        cubo = self.cubos[tabla]
+        marcados = cubo["marcados"].copy()
+        np.add.at(marcados, np.searchsorted(cubo["clave"], clave), cambio)
+        self.cubos[tabla] = dict(cubo, marcados=marcados)
+        return int(posiciones.size)
+
+    def refrescar(self, conn) -> int:
+        """
+        Trae de Oracle las asistencias con ID mayor al último cargado y corrige
+        las ya cargadas que se reescribieron. Devuelve filas nuevas.
+        """
+        with self._refresco:
+            nuevas = 0
+            cur = conn.cursor()
+            try:
+                cur.execute("SELECT SYSDATE FROM DUAL")
+                ahora = cur.fetchone()[0]
+            finally:
+                cur.close()
+            for nombre, tabla in self.tablas.items():
+                cur = conn.cursor()
+                try:
+                    cur.arraysize = HECHOS_LOTE
+                    cur.prefetchrows = HECHOS_LOTE + 1
+                    cur.execute(_SQL[nombre], {"ultimo": tabla.ultimo_id})
+                    while True:
+                        filas = cur.fetchmany(HECHOS_LOTE)
+                        if not filas:
+                            break
+                        self.agregar_filas(nombre, np.array(filas, dtype=np.int64))
+                        nuevas += len(filas)
+                    if tabla.cambios_desde is not None:
+                        cur.execute(_SQL_CAMBIOS[nombre], {
+                            "desde": tabla.cambios_desde, "margen": HECHOS_MARGEN_SEGUNDOS / 86400,
+                            "ultimo": tabla.ultimo_id,
+                        })
+                        cambios = cur.fetchall()
+                        if cambios:
+                            corregidas = self.corregir_marcas(nombre, np.array(cambios, dtype=np.int64))
+                            if corregidas:
+                                logger.info(f"Hechos de asistencia: {corregidas} filas de {nombre} reescritas")
+                    tabla.cambios_desde = ahora
+                    tabla.marcar_actualizado()
+                finally:
+                    cur.close()
+            self.cargado = True
+            return nuevas
+
+    # ---------------- consulta ----------------
+
+    def _mascara(self, cols, n, filtros):
+        """Máscara booleana de las filas que cumplen los filtros; slice(None) si no hay filtros."""
+        mascara = None
+        for dim, valor in filtros.items():
+            if valor is None:
+                continue
+            if dim in ("desde", "hasta"):
+                dia = (valor - _EPOCA).days
+                condicion = (cols["dia"] >= dia) if dim == "desde" else (cols["dia"] <= dia)
+            elif dim == "dia_semana":
+                condicion = cols["dia_semana"] == valor
+            elif dim not in cols:
+                raise ValueError(f"Filtro '{dim}' no disponible")
+            else:
+                codigo = self.diccionarios[dim].codigo(valor)
+                if codigo < 0:
+                    return None
+                condicion = cols[dim] == codigo
+            mascara = condicion if mascara is None else (mascara & condicion)
+        return slice(None) if mascara is None else mascara
+
+    def _clave_grupo(self, cols, dim, mascara):
+        """
+        Para una dimensión de agrupación devuelve (códigos 0..tamaño-1 por fila,
+        tamaño, función que pasa un código al dict de salida).
+        """
+        if dim in ("fecha", "mes"):
+            dias = cols["dia"][mascara]
+            if dim == "mes":
+                dias = dias.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+            base = int(dias.min())
+            unidad = "D" if dim == "fecha" else "M"
+            return (
+                dias.astype(np.int64) - base,
+                int(dias.max()) - base + 1,
+                lambda c: {dim: str(np.datetime64(base + c, unidad))},
+            )
+        if dim == "dia_semana":
+            return cols["dia_semana"][mascara].astype(np.int64), 7, lambda c: {"dia_semana": c}
+
+        valores = self.diccionarios[dim].valores
+        campos = _CAMPOS_SALIDA[dim]
+        if len(campos) == 1:
+            decodificar = lambda c: {campos[0]: valores[c]}  # noqa: E731
+        else:
+            decodificar = lambda c: dict(zip(campos, valores[c]))  # noqa: E731
+        return cols[dim][mascara].astype(np.int64), len(valores), decodificar
+
+    def agregar(self, tabla: str, agrupar: List[str], filtros: Optional[dict] = None):
+        """
+        Cuenta registros (total) y registros marcados (presente / se dio) por grupo.
+        `filtros` usa ids reales: institucion, sede=(id_sede, id_inst),
+        aula=(id_aula, id_sede, id_inst), tutor, estudiante, dia_semana, desde, hasta.
+
+        Si la consulta no filtra ni agrupa por estudiante se responde con el cubo
+        (aula, tutor, día); si no, se recorren las filas crudas.
+        """
+        t = self.tablas[tabla]
+        filtros = filtros or {}
+        for dim in agrupar:
+            if dim not in DIMENSIONES or (dim not in t.tipos and dim not in ("fecha", "mes")):
+                raise ValueError(f"No se puede agrupar {tabla} por '{dim}'")
+
+        if "estudiante" in agrupar or filtros.get("estudiante") is not None:
+            cols, n = t.instantanea()
+        else:
+            cols = self.cubos[tabla]
+            n = cols["dia"].size
+
+        mascara = self._mascara(cols, n, filtros)
+        if mascara is None or n == 0:
+            return []
+        if "total" in cols:
+            pesos_total = cols["total"][mascara]
+            pesos_si = cols["marcados"][mascara]
+            marca = None
+            m = pesos_total.size
+        else:
+            marca = (cols["marca"][mascara] & MARCA_SI) != 0
+            m = marca.size
+        if m == 0:
+            return []
+
+        # llave única en base mixta: clave = c0 + t0 * (c1 + t1 * (c2 + ...))
+        clave = np.zeros(m, dtype=np.int64)
+        dims = []
+        paso = 1
+        for dim in agrupar:
+            codigos, tamano, decodificar = self._clave_grupo(cols, dim, mascara)
+            clave += codigos * paso
+            dims.append((paso, tamano, decodificar))
+            paso *= tamano
+
+        if paso <= _MAX_GRUPOS_DENSOS:
+            grupos = None
+            tamano = paso
+        else:
+            grupos, clave = np.unique(clave, return_inverse=True)
+            clave = clave.reshape(-1)
+            tamano = grupos.size
+
+        if marca is None:
+            totales = np.bincount(clave, weights=pesos_total, minlength=tamano).astype(np.int64)
+            marcados = np.bincount(clave, weights=pesos_si, minlength=tamano).astype(np.int64)
+        else:
+            # el bit de marca al final: total y marcados con un solo bincount
+            conteo = np.bincount(clave * 2 + marca, minlength=tamano * 2).reshape(tamano, 2)
+            totales = conteo.sum(axis=1)
+            marcados = conteo[:, 1]
+
+        if grupos is None:
+            grupos = np.flatnonzero(totales)
+            totales = totales[grupos]
+            marcados = marcados[grupos]
+
+        res = []
+        for k, total, si in zip(grupos.tolist(), totales.tolist(), marcados.tolist()):
+            d = {}
+            for paso, tamano, decodificar in dims:
+                d.update(decodificar((k // paso) % tamano))
+            d["total"] = total
+            d["marcados"] = si
+            d["tasa"] = si / total
+            res.append(d)
+        return res
+
+    def estado(self) -> dict:
+        return {
+            "cargado": self.cargado,
+            "tablas": {
+                nombre: {
+                    "filas": t.n,
+                    "ultimo_id": t.ultimo_id,
+                    "bytes": t.bytes(),
+                    "filas_cubo": int(self.cubos[nombre]["dia"].size),
+                    "actualizado": t.actualizado,
+                }
+                for nombre, t in self.tablas.items()
+            },
+        }
+
+
+# instancia del proceso
+hechos = AlmacenHechos()
+
+
+def tarea_refrescar():
+    conn = get_conn()
+    try:
+        nuevas = hechos.refrescar(conn)
+        if nuevas:
+            logger.info(f"Hechos de asistencia: {nuevas} filas nuevas")
+    finally:
+        conn.close()
+
+
+def tarea_recargar():
+    """Reconstruye el almacén completo y lo publica de una vez (toma las correcciones)."""
+    global hechos
+    nuevo = AlmacenHechos()
+    conn = get_conn()
+    try:
+        nuevo.refrescar(conn)
+    finally:
+        conn.close()
+    hechos = nuevo
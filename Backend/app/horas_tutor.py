@@ -0,0 +1,202 @@
+# app/horas_tutor.py
+"""
+Mantenimiento de RESUMEN_HORAS_TUTOR (horas dictadas por tutor/aula/día).
+
+Solo cuentan las clases con SE_DIO = 1 y, según las reglas del programa,
+cada clase vale 1 hora para reportes sin importar su duración (40-60 min).
+
+El refresco incremental usa la marca de agua CONTROL_REFRESCO.ULTIMO_ID:
+solo suma las filas de ASISTENCIA_AULA_TUTOR con ID_ASISTENCIA mayor a la
+última procesada. La fila de control se bloquea (ver control_refresco) para
+que dos workers no sumen el mismo rango.
+
+Un reenvío que actualiza una asistencia ya sumada (POST /asistencias/tutores
+hace MERGE, ver V011) no cambia su ID pero sí su ACTUALIZADO: cada refresco
+vuelve a contar los (tutor, aula, día) con filas reescritas desde el refresco
+anterior (CONTROL_REFRESCO.ACTUALIZADO), con un margen para las transacciones
+que confirmaron tarde. Recontar un grupo da lo mismo aunque se repita.
+
+Limitación conocida: un ID menor que confirma después de que otro mayor ya fue
+procesado queda fuera del incremental, igual que una reescritura que confirma
+después del margen; la reconstrucción nocturna de la ventana reciente
+(reconstruir) lo corrige.
+"""
+import logging
+import os
+from datetime import date, timedelta
+
+from . import archivo, control_refresco
+from .db import get_conn
+
+logger = logging.getLogger(__name__)
+
+RESUMEN = "RESUMEN_HORAS_TUTOR"
+
+HORAS_TUTOR_REFRESCO_SEGUNDOS = int(os.getenv("HORAS_TUTOR_REFRESCO_SEGUNDOS", "60"))
+HORAS_TUTOR_RECONSTRUCCION_HORA = os.getenv("HORAS_TUTOR_RECONSTRUCCION_HORA", "02:30")
+# filas reescritas hasta este margen antes del último refresco se vuelven a contar
+HORAS_TUTOR_MARGEN_SEGUNDOS = int(os.getenv("HORAS_TUTOR_MARGEN_SEGUNDOS", "300"))
+
+
+def _sumar_rango(cur, desde_id: int, hasta_id: int) -> int:
+    """Suma al resumen las asistencias con desde_id < ID_ASISTENCIA <= hasta_id."""
+    cur.execute("""
+        MERGE INTO RESUMEN_HORAS_TUTOR r
+        USING (
+            SELECT TRUNC(FECHA) AS FECHA, ID_TUTOR, ID_AULA, ID_SEDE, ID_INSTITUCION,
+                   COUNT(*) AS HORAS
+            FROM ASISTENCIA_AULA_TUTOR
+            WHERE ID_ASISTENCIA > :desde_id
+            AND ID_ASISTENCIA <= :hasta_id
+            AND SE_DIO = 1
+            AND FECHA IS NOT NULL
+            GROUP BY TRUNC(FECHA), ID_TUTOR, ID_AULA, ID_SEDE, ID_INSTITUCION
+        ) n
+        ON (r.FECHA = n.FECHA
+            AND r.ID_TUTOR = n.ID_TUTOR
+            AND r.ID_AULA = n.ID_AULA
+            AND r.ID_SEDE = n.ID_SEDE
+            AND r.ID_INSTITUCION = n.ID_INSTITUCION)
+        WHEN MATCHED THEN
+            UPDATE SET r.HORAS = r.HORAS + n.HORAS
+        WHEN NOT MATCHED THEN
+            INSERT (FECHA, ID_TUTOR, ID_AULA, ID_SEDE, ID_INSTITUCION, HORAS)
+            VALUES (n.FECHA, n.ID_TUTOR, n.ID_AULA, n.ID_SEDE, n.ID_INSTITUCION, n.HORAS)
+    """, {"desde_id": desde_id, "hasta_id": hasta_id})
+    return cur.rowcount
+
+
+def _recontar_cambios(cur, tope: int) -> int:
+    """
+    Recalcula los (tutor, aula, día) con filas reescritas desde el último
+    refresco (menos el margen). Cuenta solo ID_ASISTENCIA <= tope, lo mismo
+    que ya sumó el incremental, y quita los que quedaron en cero horas.
+    """
+    cur.execute("""
+        MERGE INTO RESUMEN_HORAS_TUTOR r
+        USING (
+            SELECT t.DIA AS FECHA, t.ID_TUTOR, t.ID_AULA, t.ID_SEDE, t.ID_INSTITUCION,
+                   SUM(CASE WHEN t.SE_DIO = 1 THEN 1 ELSE 0 END) AS HORAS
+            FROM ASISTENCIA_AULA_TUTOR t
+            WHERE t.ID_ASISTENCIA <= :tope
+            AND (t.ID_TUTOR, t.ID_AULA, t.ID_SEDE, t.ID_INSTITUCION, t.DIA) IN (
+                SELECT c.ID_TUTOR, c.ID_AULA, c.ID_SEDE, c.ID_INSTITUCION, c.DIA
+                FROM ASISTENCIA_AULA_TUTOR c
+                WHERE c.ACTUALIZADO >= (SELECT ACTUALIZADO FROM CONTROL_REFRESCO WHERE NOMBRE = :nombre) - :margen
+                AND c.ID_ASISTENCIA <= :tope
+            )
+            GROUP BY t.DIA, t.ID_TUTOR, t.ID_AULA, t.ID_SEDE, t.ID_INSTITUCION
+        ) n
+        ON (r.FECHA = n.FECHA
+            AND r.ID_TUTOR = n.ID_TUTOR
+            AND r.ID_AULA = n.ID_AULA
+            AND r.ID_SEDE = n.ID_SEDE
+            AND r.ID_INSTITUCION = n.ID_INSTITUCION)
+        WHEN MATCHED THEN
+            UPDATE SET r.HORAS = n.HORAS
+        WHEN NOT MATCHED THEN
+            INSERT (FECHA, ID_TUTOR, ID_AULA, ID_SEDE, ID_INSTITUCION, HORAS)
+            VALUES (n.FECHA, n.ID_TUTOR, n.ID_AULA, n.ID_SEDE, n.ID_INSTITUCION, n.HORAS)
+    """, {"tope": tope, "nombre": RESUMEN, "margen": HORAS_TUTOR_MARGEN_SEGUNDOS / 86400})
+    filas = cur.rowcount
+    if filas:
+        cur.execute("DELETE FROM RESUMEN_HORAS_TUTOR WHERE HORAS = 0")
+    return filas
+
+
+def refrescar(conn) -> int:
+    """
+    Incorpora al resumen las asistencias nuevas desde la marca de agua y
+    recuenta las reescritas. No hace commit (el lock de la marca se libera
+    con el commit del llamador). Devuelve cuántas filas del resumen se tocaron.
+    """
+    cur = conn.cursor()
+    try:
+        ultimo = control_refresco.bloquear(cur, RESUMEN)
+        cur.execute("SELECT NVL(MAX(ID_ASISTENCIA), 0) FROM ASISTENCIA_AULA_TUTOR")
+        tope = max(int(cur.fetchone()[0]), ultimo)
+        filas = 0
+        if tope > ultimo:
+            filas = _sumar_rango(cur, ultimo, tope)
+            logger.info(f"{RESUMEN}: asistencias {ultimo + 1}..{tope} incorporadas ({filas} filas)")
+        recontadas = _recontar_cambios(cur, tope)
+        if recontadas:
+            logger.info(f"{RESUMEN}: {recontadas} filas recontadas por asistencias reescritas")
+        # también guarda ACTUALIZADO: desde ahí se buscan las próximas reescrituras
+        control_refresco.guardar(cur, RESUMEN, tope)
+        return filas + recontadas
+    finally:
+        cur.close()
+
+
+def reconstruir(conn, desde: date) -> int:
+    """
+    Recalcula el resumen desde una fecha a partir de las asistencias crudas
+    (corrige borrados, correcciones y los IDs que el incremental no vio).
+    No hace commit. Devuelve cuántas filas quedaron en la ventana.
+    """
+    cur = conn.cursor()
+    try:
+        ultimo = control_refresco.bloquear(cur, RESUMEN)
+
+        # las asistencias de periodos archivados ya no están en la tabla:
+        # borrar su resumen lo dejaría en cero
+        archivado = archivo.ultima_fecha_archivada(conn)
+        if archivado is not None and desde <= archivado:
+            desde = archivado + timedelta(days=1)
+            logger.info(f"{RESUMEN}: reconstrucción limitada a partir de {desde} (periodos archivados)")
+
+        cur.execute("SELECT NVL(MAX(ID_ASISTENCIA), 0) FROM ASISTENCIA_AULA_TUTOR")
+        tope = max(int(cur.fetchone()[0]), ultimo)
+
+        # lo anterior a `desde` que aún no se había sumado o recontado también debe entrar
+        if tope > ultimo:
+            _sumar_rango(cur, ultimo, tope)
+        _recontar_cambios(cur, tope)
+
+        cur.execute("DELETE FROM RESUMEN_HORAS_TUTOR WHERE FECHA >= :1", (desde,))
+        cur.execute("""
+            INSERT INTO RESUMEN_HORAS_TUTOR (FECHA, ID_TUTOR, ID_AULA, ID_SEDE, ID_INSTITUCION, HORAS)
+            SELECT TRUNC(FECHA), ID_TUTOR, ID_AULA, ID_SEDE, ID_INSTITUCION, COUNT(*)
+            FROM ASISTENCIA_AULA_TUTOR
+            WHERE FECHA >= :desde
+            AND ID_ASISTENCIA <= :tope
+            AND SE_DIO = 1
+            GROUP BY TRUNC(FECHA), ID_TUTOR, ID_AULA, ID_SEDE, ID_INSTITUCION
+        """, {"desde": desde, "tope": tope})
+        filas = cur.rowcount
+        control_refresco.guardar(cur, RESUMEN, tope)
+        logger.info(f"{RESUMEN}: reconstruido desde {desde} ({filas} filas)")
+        return filas
+    finally:
+        cur.close()
+
+
+def inicio_ventana_reciente(hoy: date = None) -> date:
+    """Primer día del mes anterior: ventana que recalcula la tarea nocturna."""
+    hoy = hoy or date.today()
+    return (hoy.replace(day=1) - timedelta(days=1)).replace(day=1)
+
+
+def tarea_refrescar():
+    conn = get_conn()
+    try:
+        refrescar(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def tarea_reconstruir():
+    conn = get_conn()
+    try:
+        reconstruir(conn, inicio_ventana_reciente())
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
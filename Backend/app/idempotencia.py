@@ -0,0 +1,230 @@
+# app/idempotencia.py
+"""
+Cabecera Idempotency-Key en los POST que insertan asistencias y notas (y en
+los lotes que los agrupan): un reintento con la misma clave devuelve la
+respuesta original en lugar de insertar otra fila.
+
+La clave se guarda por usuario y ruta (hash de las dos cosas y de la clave)
+junto con el hash del cuerpo. El primer intento la reserva en IDEMPOTENCIA
+antes de ejecutar y guarda ahí la respuesta al terminar; los reintentos la
+toman de la caché del proceso o, si llegan a otro worker, de la tabla.
+
+- misma clave y otro cuerpo: 422;
+- misma clave mientras el primer intento sigue en curso: 409 con Retry-After;
+- solo se guardan las respuestas 2xx: con un error la reserva se borra y el
+  reintento vuelve a ejecutar (p. ej. después de renovar el token);
+- una reserva sin respuesta después de IDEMPOTENCIA_PENDIENTE_SEGUNDOS se da
+  por abandonada (el worker se cayó) y el siguiente intento la toma.
+
+Si la tabla no responde (p. ej. falta la migración) la petición sigue sin
+idempotencia: es mejor un duplicado posible que un POST caído.
+"""
+import hashlib
+import logging
+import os
+
+import oracledb
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
+
+from .cache import idempotencia as respuestas
+from .db import get_conn
+from .utils import decode_token
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCIA_TTL_HORAS = int(os.getenv("IDEMPOTENCIA_TTL_HORAS", "24"))
+IDEMPOTENCIA_PENDIENTE_SEGUNDOS = int(os.getenv("IDEMPOTENCIA_PENDIENTE_SEGUNDOS", "60"))
+IDEMPOTENCIA_PURGA_HORA = os.getenv("IDEMPOTENCIA_PURGA_HORA", "03:45")
+
+CABECERA = "idempotency-key"
+MAX_LARGO_CLAVE = 255
+
+RUTAS = {
+    ("POST", "/asistencias/tutores"),
+    ("POST", "/asistencias/estudiantes"),
+    ("POST", "/notas/"),
+    ("POST", "/batch"),
+    ("POST", "/sync"),
+}
+
+NUEVA, HECHA, EN_CURSO = "nueva", "hecha", "en_curso"
+
+
+def _hash(*partes) -> str:
+    return hashlib.sha256("\x1f".join(str(p) for p in partes).encode("utf-8")).hexdigest()
+
+
+def clave_de(request: Request):
+    """Clave de la petición (usuario + ruta + Idempotency-Key) o None si no aplica."""
+    valor = request.headers.get(CABECERA)
+    if not valor or (request.method, request.url.path) not in RUTAS:
+        return None
+    autorizacion = request.headers.get("authorization", "")
+    payload = decode_token(autorizacion[7:]) if autorizacion.lower().startswith("bearer ") else None
+    usuario = payload.get("sub") if payload else "-"
+    return _hash(usuario, request.method, request.url.path, valor)
+
+
+def reservar(clave: str, huella: str):
+    """
+    Reserva la clave para ejecutar la petición. Devuelve (NUEVA, None),
+    (HECHA, (huella, estado, tipo, cuerpo)) o (EN_CURSO, (huella, None, None, None)).
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+    try:
+        try:
+            cur.execute("INSERT INTO IDEMPOTENCIA (CLAVE, HUELLA) VALUES (:1, :2)", (clave, huella))
+            conn.commit()
+            return NUEVA, None
+        except oracledb.IntegrityError:
+            conn.rollback()
+
+        cur.execute("""
+            SELECT HUELLA, ESTADO, TIPO, CUERPO
+            FROM IDEMPOTENCIA
+            WHERE CLAVE = :clave
+        """, {"clave": clave})
+        fila = cur.fetchone()
+        if fila is None:
+            # se liberó entre el INSERT y el SELECT: que el cliente reintente
+            return EN_CURSO, (huella, None, None, None)
+        huella_guardada, estado, tipo, cuerpo = fila
+        if estado is not None:
+            if hasattr(cuerpo, "read"):
+                cuerpo = cuerpo.read()
+            return HECHA, (huella_guardada, int(estado), tipo, cuerpo)
+
+        # reserva abandonada: la toma el primero que llegue
+        cur.execute("""
+            UPDATE IDEMPOTENCIA SET CREADA = SYSDATE, HUELLA = :huella
+            WHERE CLAVE = :clave AND ESTADO IS NULL AND CREADA < SYSDATE - :dias
+        """, {"clave": clave, "huella": huella, "dias": IDEMPOTENCIA_PENDIENTE_SEGUNDOS / 86400})
+        if cur.rowcount == 1:
+            conn.commit()
+            logger.warning("Idempotency-Key abandonada retomada")
+            return NUEVA, None
+        return EN_CURSO, (huella_guardada, None, None, None)
+    finally:
+        cur.close()
+        conn.close()
+
+
+def guardar(clave: str, estado: int, tipo: str, cuerpo: str):
+    conn = get_conn()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "UPDATE IDEMPOTENCIA SET ESTADO = :1, TIPO = :2, CUERPO = :3 WHERE CLAVE = :4",
+            (estado, tipo, cuerpo, clave),
+        )
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+
+
+def liberar(clave: str):
+    conn = get_conn()
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM IDEMPOTENCIA WHERE CLAVE = :1 AND ESTADO IS NULL", (clave,))
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+
+
+async def _liberar(clave: str):
+    try:
+        await run_in_threadpool(liberar, clave)
+    except oracledb.DatabaseError as e:
+        logger.error(f"No se pudo liberar la Idempotency-Key: {str(e)}")
+
+
+def _repetir(guardada) -> Response:
+    _, estado, tipo, cuerpo = guardada
+    return Response(content=cuerpo, status_code=estado, media_type=tipo, headers={"Idempotent-Replayed": "true"})
+
+
+def _otro_cuerpo() -> Response:
+    return JSONResponse(status_code=422, content={"detail": "La Idempotency-Key ya se usó con otro cuerpo"})
+
+
+async def aplicar(request: Request, call_next):
+    """Middleware: ejecuta la petición una sola vez por Idempotency-Key."""
+    if len(request.headers.get(CABECERA, "")) > MAX_LARGO_CLAVE:
+        return JSONResponse(
+            status_code=400, content={"detail": f"Idempotency-Key admite hasta {MAX_LARGO_CLAVE} caracteres"}
+        )
+    clave = clave_de(request)
+    if clave is None:
+        return await call_next(request)
+    huella = hashlib.sha256(await request.body()).hexdigest()
+
+    guardada = respuestas.get(clave)
+    if guardada is None:
+        try:
+            resultado, guardada = await run_in_threadpool(reservar, clave, huella)
+        except oracledb.DatabaseError as e:
+            logger.error(f"Idempotency-Key no disponible, se ejecuta sin ella: {str(e)}")
+            return await call_next(request)
+        if resultado == EN_CURSO:
+            if guardada[0] != huella:
+                return _otro_cuerpo()
+            return JSONResponse(
+                status_code=409, headers={"Retry-After": "1"},
+                content={"detail": "Hay una petición en curso con la misma Idempotency-Key"},
+            )
+        if resultado == HECHA:
+            respuestas.set(clave, guardada)
+    if guardada is not None:
+        return _otro_cuerpo() if guardada[0] != huella else _repetir(guardada)
+
+    try:
+        response = await call_next(request)
+    except Exception:
+        await _liberar(clave)
+        raise
+    if not 200 <= response.status_code < 300:
+        await _liberar(clave)
+        return response
+
+    cuerpo = b"".join([parte async for parte in response.body_iterator])
+    tipo = response.headers.get("content-type")
+    guardada = (huella, response.status_code, tipo, cuerpo.decode("utf-8"))
+    respuestas.set(clave, guardada)
+    try:
+        await run_in_threadpool(guardar, clave, response.status_code, tipo, guardada[3])
+    except oracledb.DatabaseError as e:
+        # la escritura ya se hizo: en otro worker el reintento queda en curso hasta que venza la reserva
+        logger.error(f"No se pudo guardar la respuesta de la Idempotency-Key: {str(e)}")
+    return Response(content=cuerpo, status_code=response.status_code, headers=dict(response.headers))
+
+
+def purgar(conn) -> int:
+    """Borra las claves más viejas que IDEMPOTENCIA_TTL_HORAS. No hace commit."""
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "DELETE FROM IDEMPOTENCIA WHERE CREADA < SYSDATE - :dias", {"dias": IDEMPOTENCIA_TTL_HORAS / 24}
+        )
+        if cur.rowcount:
+            logger.info(f"IDEMPOTENCIA: {cur.rowcount} claves vencidas borradas")
+        return cur.rowcount
+    finally:
+        cur.close()
+
+
+def tarea_purgar():
+    conn = get_conn()
+    try:
+        purgar(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
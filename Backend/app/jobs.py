@@ -0,0 +1,89 @@
+# app/jobs.py
+"""
+Tareas de fondo del proceso (refrescos incrementales y recálculos nocturnos).
+
+Cada tarea corre en su propio hilo daemon. Con varios workers de uvicorn cada
+proceso corre sus tareas; por eso las tareas deben ser seguras ante ejecuciones
+concurrentes (los refrescos toman un lock en CONTROL_REFRESCO).
+
+Se desactivan con JOBS_HABILITADOS=0 (por ejemplo en scripts o pruebas de carga).
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+JOBS_HABILITADOS = os.getenv("JOBS_HABILITADOS", "1") == "1"
+
+_tareas = []
+_parar = threading.Event()
+_hilos = []
+
+
+def registrar_periodica(nombre: str, segundos: float, funcion, inmediata: bool = False):
+    """
+    Ejecuta funcion() cada `segundos`. La primera vez es tras un intervalo,
+    o apenas arranca el hilo si inmediata=True (cargas iniciales).
+    """
+    _tareas.append({
+        "nombre": nombre, "funcion": funcion, "segundos": segundos, "hora": None, "inmediata": inmediata,
+    })
+
+
+def registrar_diaria(nombre: str, hora: str, funcion):
+    """Ejecuta funcion() todos los días a la hora local indicada ("HH:MM")."""
+    datetime.strptime(hora, "%H:%M")  # valida el formato al registrar
+    _tareas.append({"nombre": nombre, "funcion": funcion, "segundos": None, "hora": hora, "inmediata": False})
+
+
+def _segundos_hasta(hora: str) -> float:
+    ahora = datetime.now()
+    h, m = (int(x) for x in hora.split(":"))
+    siguiente = ahora.replace(hour=h, minute=m, second=0, microsecond=0)
+    if siguiente <= ahora:
+        siguiente += timedelta(days=1)
+    return (siguiente - ahora).total_seconds()
+
+
+def _bucle(tarea):
+    primera = True
+    while True:
+        if primera and tarea["inmediata"]:
+            espera = 0
+        elif tarea["hora"] is None:
+            espera = tarea["segundos"]
+        else:
+            espera = _segundos_hasta(tarea["hora"])
+        primera = False
+        if _parar.wait(espera):
+            return
+        inicio = time.monotonic()
+        try:
+            tarea["funcion"]()
+            logger.info(f"Tarea {tarea['nombre']} terminada en {time.monotonic() - inicio:.2f}s")
+        except Exception as e:
+            # una falla no debe matar el hilo: se reintenta en la próxima vuelta
+            logger.error(f"Error en tarea {tarea['nombre']}: {str(e)}", exc_info=True)
+
+
+def iniciar():
+    """Arranca un hilo por tarea registrada. Llamar una vez en el startup."""
+    if not JOBS_HABILITADOS:
+        logger.info("Tareas de fondo deshabilitadas (JOBS_HABILITADOS=0)")
+        return
+    _parar.clear()
+    for tarea in _tareas:
+        hilo = threading.Thread(target=_bucle, args=(tarea,), name=f"job-{tarea['nombre']}", daemon=True)
+        hilo.start()
+        _hilos.append(hilo)
+
+
+def detener(timeout: float = 5.0):
+    """Pide a las tareas que terminen (no interrumpe una ejecución en curso)."""
+    _parar.set()
+    for hilo in _hilos:
+        hilo.join(timeout)
+    _hilos.clear()
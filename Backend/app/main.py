@@ -1,12 +1,24 @@
 # app/main.py
-from fastapi import FastAPI, HTTPException
+import json
+import logging
+import time
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
+from . import (
+    analitica_asistencia, cola_asistencia, db, hechos_asistencia, horas_tutor, idempotencia, jobs, metricas,
+    perfilado, registro_sync, resumen_admin, traza_sql,
+)
+from .cache import CACHES
 from .db import init_db, get_conn
 
 # importa routers
 from .routers import (
+    admin,
     auth,
+    bootstrap,
     persona,
     usuario,
     tutor,
@@ -22,6 +34,12 @@ from .routers import (
     motivo,
     registro_cambio,
     institucion,
+    festivo,
+    sesion,
+    reporte,
+    historico,
+    lote,
+    sincronizacion,
 )
 
 app = FastAPI(
@@ -40,6 +58,46 @@ app.add_middleware(
     allow_headers=["*"],        # Permitir todos los headers
 )
 
+# --------------------------
+# Traza de SQL y métricas por petición
+# --------------------------
+logger_traza = logging.getLogger("app.traza_sql")
+
+
+# Idempotency-Key en los POST de asistencias, notas y lotes (queda dentro de
+# medir_peticion: las respuestas repetidas también se miden)
+@app.middleware("http")
+async def idempotencia_post(request: Request, call_next):
+    return await idempotencia.aplicar(request, call_next)
+
+
+@app.middleware("http")
+async def medir_peticion(request: Request, call_next):
+    inicio = time.perf_counter()
+    metodo = (("metodo", request.method),)
+    metricas.sumar("http_peticiones_en_curso", metodo)
+    traza = traza_sql.iniciar(f"{request.method} {request.url.path}") if traza_sql.TRAZA_SQL_HABILITADA else None
+    # "X-Perfilar: 1" con token de ADMINISTRADOR: el endpoint corre bajo cProfile
+    pedido = perfilado.pedido_desde(request.method, request.url.path, request.headers)
+    estado = 500
+    try:
+        response = await call_next(request)
+        estado = response.status_code
+    finally:
+        metricas.sumar("http_peticiones_en_curso", metodo, -1)
+        # la plantilla de la ruta (no la URL) para no crear una serie por id
+        ruta = getattr(request.scope.get("route"), "path", "sin_ruta")
+        etiquetas = (("metodo", request.method), ("ruta", ruta))
+        metricas.observar("http_peticion_segundos", etiquetas, time.perf_counter() - inicio)
+        metricas.sumar("http_peticiones_total", etiquetas + (("estado", estado),))
+    if pedido is not None and pedido["archivo"]:
+        response.headers["X-Perfil"] = pedido["archivo"]
+    if traza is not None:
+        response.headers["Server-Timing"] = traza.server_timing()
+        if logger_traza.isEnabledFor(logging.DEBUG):
+            logger_traza.debug(json.dumps(traza.como_dict(), ensure_ascii=False))
+    return response
+
 # --------------------------
 # Eventos de inicio
 # --------------------------
@@ -48,6 +106,46 @@ def startup():
     # Inicializa el pool de conexiones a Oracle
     init_db()
 
+    # Tareas de fondo: resumen de horas de tutores (incremental + recálculo nocturno)
+    jobs.registrar_periodica(
+        "horas_tutor", horas_tutor.HORAS_TUTOR_REFRESCO_SEGUNDOS, horas_tutor.tarea_refrescar
+    )
+    jobs.registrar_diaria(
+        "horas_tutor_reconstruir", horas_tutor.HORAS_TUTOR_RECONSTRUCCION_HORA, horas_tutor.tarea_reconstruir
+    )
+    # Analítica de asistencia de estudiantes (tasas, rachas, en riesgo)
+    jobs.registrar_diaria(
+        "analitica_asistencia", analitica_asistencia.ANALITICA_HORA, analitica_asistencia.tarea_recalcular
+    )
+    # KPIs del dashboard administrativo: sedes marcadas por escrituras + reconstrucción diaria
+    jobs.registrar_periodica(
+        "resumen_admin", resumen_admin.RESUMEN_ADMIN_REFRESCO_SEGUNDOS, resumen_admin.tarea_refrescar
+    )
+    jobs.registrar_diaria(
+        "resumen_admin_reconstruir", resumen_admin.RESUMEN_ADMIN_RECONSTRUCCION_HORA,
+        resumen_admin.tarea_reconstruir,
+    )
+    # Registro de cambios de GET /sync y claves de Idempotency-Key: purga diaria de lo vencido
+    jobs.registrar_diaria("registro_sync_purgar", registro_sync.SYNC_PURGA_HORA, registro_sync.tarea_purgar)
+    jobs.registrar_diaria("idempotencia_purgar", idempotencia.IDEMPOTENCIA_PURGA_HORA, idempotencia.tarea_purgar)
+    # Almacén de asistencias en memoria: carga inicial, refresco incremental y recarga nocturna
+    if hechos_asistencia.HECHOS_HABILITADOS:
+        jobs.registrar_periodica(
+            "hechos_asistencia", hechos_asistencia.HECHOS_REFRESCO_SEGUNDOS,
+            hechos_asistencia.tarea_refrescar, inmediata=True,
+        )
+        jobs.registrar_diaria(
+            "hechos_asistencia_recarga", hechos_asistencia.HECHOS_RECARGA_HORA, hechos_asistencia.tarea_recargar
+        )
+    jobs.iniciar()
+    # Cola de escritura diferida de asistencias (opcional, COLA_ASISTENCIA_HABILITADA=1)
+    cola_asistencia.iniciar()
+
+@app.on_event("shutdown")
+def shutdown():
+    jobs.detener()
+    cola_asistencia.detener()
+
 # --------------------------
 # Endpoints de diagnóstico
 # --------------------------
@@ -77,6 +175,29 @@ def db_health():
     finally:
         conn.close()
 
+@app.get("/metrics", tags=["health"], response_class=PlainTextResponse)
+def metrics():
+    """
+    Métricas en formato de texto de Prometheus: latencia y peticiones por
+    ruta, peticiones en curso, estado y espera del pool, ejecuciones por
+    SQL_ID y aciertos/fallos de las cachés.
+    """
+    pool = db.pool
+    medidas = [
+        ("db_pool_conexiones", "gauge", "Conexiones del pool por estado", [
+            ((("estado", "abiertas"),), getattr(pool, "opened", 0) if pool else 0),
+            ((("estado", "ocupadas"),), getattr(pool, "busy", 0) if pool else 0),
+            ((("estado", "maximo"),), getattr(pool, "max", 0) if pool else 0),
+        ]),
+        ("cola_asistencia_pendientes", "gauge", "Asistencias encoladas que todavía no están en Oracle",
+         [((), cola_asistencia.pendientes())]),
+        ("cache_aciertos_total", "counter", "Lecturas de caché con valor vigente",
+         [((("cache", nombre),), c.aciertos) for nombre, c in sorted(CACHES.items())]),
+        ("cache_fallos_total", "counter", "Lecturas de caché sin valor o vencidas",
+         [((("cache", nombre),), c.fallos) for nombre, c in sorted(CACHES.items())]),
+    ]
+    return PlainTextResponse(metricas.exponer(medidas), media_type="text/plain; version=0.0.4")
+
 # --------------------------
 # Registrar routers
 # --------------------------
@@ -96,3 +217,11 @@ app.include_router(asistencia.router)
 app.include_router(motivo.router)
 app.include_router(registro_cambio.router)
 app.include_router(institucion.router)
+app.include_router(festivo.router)
+app.include_router(sesion.router)
+app.include_router(reporte.router)
+app.include_router(historico.router)
+app.include_router(admin.router)
+app.include_router(lote.router)
+app.include_router(bootstrap.router)
+app.include_router(sincronizacion.router)
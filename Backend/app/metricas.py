@@ -0,0 +1,129 @@
+# app/metricas.py
+import bisect
+import threading
+
+# -------------------------------
+# Métricas para /metrics (formato de texto de Prometheus)
+# -------------------------------
+# Cada hilo suma en su propia tabla (threading.local), sin locks en el camino
+# caliente: registrar es un par de búsquedas en un dict del hilo. El lock solo
+# se toma la primera vez que un hilo registra algo y al exponer, que suma las
+# tablas de todos los hilos. Los hilos del threadpool se reutilizan, así que
+# las tablas son pocas; las de hilos que terminan se conservan (los contadores
+# no pueden bajar).
+
+# límites de las cubetas, en segundos
+CUBETAS_PETICION = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CUBETAS_ESPERA_POOL = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# nombre -> (tipo, ayuda, cubetas)
+METRICAS = {
+    "http_peticiones_total": ("counter", "Peticiones atendidas por ruta y código", None),
+    "http_peticion_segundos": ("histogram", "Duración de las peticiones por ruta", CUBETAS_PETICION),
+    "http_peticiones_en_curso": ("gauge", "Peticiones que se están atendiendo", None),
+    "db_pool_espera_segundos": ("histogram", "Espera por una conexión del pool", CUBETAS_ESPERA_POOL),
+    "db_pool_esperando": ("gauge", "Hilos esperando una conexión del pool", None),
+    "db_sentencias_total": ("counter", "Ejecuciones por SQL_ID", None),
+    "db_sentencias_segundos_total": ("counter", "Tiempo de ejecución acumulado por SQL_ID", None),
+    "cola_asistencia_encoladas_total": ("counter", "Asistencias anotadas en la cola de escritura diferida", None),
+    "cola_asistencia_escritas_total": ("counter", "Asistencias de la cola escritas en Oracle", None),
+    "cola_asistencia_rechazadas_total": ("counter", "Asistencias de la cola que Oracle rechazó", None),
+}
+
+_local = threading.local()
+_tablas = []
+_lock = threading.Lock()
+
+
+def _tabla() -> dict:
+    try:
+        return _local.tabla
+    except AttributeError:
+        tabla = _local.tabla = {}
+        with _lock:
+            _tablas.append(tabla)
+        return tabla
+
+
+def sumar(nombre: str, etiquetas: tuple = (), valor: float = 1):
+    """Contador o gauge (valor negativo para bajar). etiquetas: ((clave, valor), ...)."""
+    tabla = _tabla()
+    clave = (nombre, etiquetas)
+    tabla[clave] = tabla.get(clave, 0) + valor
+
+
+def observar(nombre: str, etiquetas: tuple, valor: float):
+    """Histograma: cuenta `valor` en su cubeta, la suma y el total."""
+    tabla = _tabla()
+    clave = (nombre, etiquetas)
+    datos = tabla.get(clave)
+    if datos is None:
+        cubetas = METRICAS[nombre][2]
+        # un contador por cubeta + la de +Inf, la suma y el total
+        datos = tabla[clave] = [0] * (len(cubetas) + 3)
+    datos[bisect.bisect_left(METRICAS[nombre][2], valor)] += 1
+    datos[-2] += valor
+    datos[-1] += 1
+
+
+def _sumar_tablas() -> dict:
+    total = {}
+    with _lock:
+        tablas = list(_tablas)
+    for tabla in tablas:
+        for clave, valor in list(tabla.items()):
+            if isinstance(valor, list):
+                previo = total.get(clave)
+                total[clave] = list(valor) if previo is None else [a + b for a, b in zip(previo, valor)]
+            else:
+                total[clave] = total.get(clave, 0) + valor
+    return total
+
+
+def _etiquetas(etiquetas) -> str:
+    if not etiquetas:
+        return ""
+    partes = []
+    for clave, valor in etiquetas:
+        texto = str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        partes.append(f'{clave}="{texto}"')
+    return "{" + ",".join(partes) + "}"
+
+
+def _numero(valor) -> str:
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def exponer(medidas: list = ()) -> str:
+    """
+    Texto de /metrics. `medidas` son gauges leídos al momento, como
+    (nombre, tipo, ayuda, [(etiquetas, valor), ...]).
+    """
+    por_nombre = {}
+    for (nombre, etiquetas), valor in _sumar_tablas().items():
+        por_nombre.setdefault(nombre, []).append((etiquetas, valor))
+
+    lineas = []
+    for nombre, (tipo, ayuda, cubetas) in METRICAS.items():
+        series = sorted(por_nombre.get(nombre, []), key=lambda s: s[0])
+        if not series:
+            continue
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+        for etiquetas, valor in series:
+            if tipo != "histogram":
+                lineas.append(f"{nombre}{_etiquetas(etiquetas)} {_numero(valor)}")
+                continue
+            acumulado = 0
+            for limite, cantidad in zip(list(cubetas) + ["+Inf"], valor[:-2]):
+                acumulado += cantidad
+                lineas.append(f"{nombre}_bucket{_etiquetas(etiquetas + (('le', limite),))} {acumulado}")
+            lineas.append(f"{nombre}_sum{_etiquetas(etiquetas)} {_numero(valor[-2])}")
+            lineas.append(f"{nombre}_count{_etiquetas(etiquetas)} {valor[-1]}")
+
+    for nombre, tipo, ayuda, series in medidas:
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+        for etiquetas, valor in series:
+            lineas.append(f"{nombre}{_etiquetas(etiquetas)} {_numero(valor)}")
+    return "\n".join(lineas) + "\n"
@@ -0,0 +1,197 @@
+# app/perfilado.py
+import asyncio
+import contextvars
+import cProfile
+import functools
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from fastapi.routing import APIRoute
+
+from .utils import decode_token
+
+# -------------------------------
+# Perfilado bajo demanda en el worker
+# -------------------------------
+# Dos formas, las dos solo para ADMINISTRADOR:
+#  - una petición con la cabecera "X-Perfilar: 1" corre su endpoint bajo
+#    cProfile y deja un .pstats (la respuesta trae su nombre en X-Perfil);
+#  - POST /admin/perfilado/muestreo toma muestras de las pilas de todos los
+#    hilos durante unos segundos y deja un .folded (pilas colapsadas, el
+#    formato de flamegraph.pl / speedscope).
+# Los archivos se bajan por GET /admin/perfilado/{nombre}.
+#
+# Sin la cabecera el costo es leer un ContextVar por petición; con
+# PERFILADO=0 los endpoints ni siquiera se envuelven.
+
+PERFILADO_HABILITADO = os.getenv("PERFILADO", "1") == "1"
+PERFILADO_DIR = os.getenv("PERFILADO_DIR", os.path.join(tempfile.gettempdir(), "globalenglish-perfiles"))
+PERFILADO_MAX_ARCHIVOS = int(os.getenv("PERFILADO_MAX_ARCHIVOS", "50"))
+MUESTREO_MAX_SEGUNDOS = 300
+
+CABECERA = "x-perfilar"
+ROL_PERFILADO = "ADMINISTRADOR"
+
+_pedido = contextvars.ContextVar("perfil_pedido", default=None)
+_muestreo_lock = threading.Lock()
+
+
+def _nuevo_archivo(descripcion: str, extension: str) -> str:
+    os.makedirs(PERFILADO_DIR, exist_ok=True)
+    limpio = "".join(c if c.isalnum() or c in "-_" else "_" for c in descripcion).strip("_")[:60]
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{time.perf_counter_ns() % 10**6:06d}-{limpio}{extension}"
+
+
+def _podar():
+    """Deja solo los PERFILADO_MAX_ARCHIVOS más recientes."""
+    archivos = sorted(listar(), key=lambda a: a["creado"], reverse=True)
+    for archivo in archivos[PERFILADO_MAX_ARCHIVOS:]:
+        try:
+            os.remove(os.path.join(PERFILADO_DIR, archivo["nombre"]))
+        except OSError:
+            pass
+
+
+def listar() -> list:
+    if not os.path.isdir(PERFILADO_DIR):
+        return []
+    archivos = []
+    for nombre in os.listdir(PERFILADO_DIR):
+        if nombre.endswith((".pstats", ".folded")):
+            estado = os.stat(os.path.join(PERFILADO_DIR, nombre))
+            archivos.append({"nombre": nombre, "bytes": estado.st_size, "creado": estado.st_mtime})
+    return sorted(archivos, key=lambda a: a["nombre"])
+
+
+def ruta_de(nombre: str):
+    """Ruta del archivo si `nombre` es uno de los perfiles guardados; None si no."""
+    if nombre != os.path.basename(nombre) or not nombre.endswith((".pstats", ".folded")):
+        return None
+    ruta = os.path.join(PERFILADO_DIR, nombre)
+    return ruta if os.path.isfile(ruta) else None
+
+
+# ---------------------------------------------------------------------------
+# cProfile por petición
+# ---------------------------------------------------------------------------
+
+def pedido_desde(metodo: str, ruta: str, cabeceras) -> dict:
+    """
+    Si la petición pide perfilado y el token es de ADMINISTRADOR, lo deja
+    pedido para el endpoint y devuelve el pedido; si no, None.
+    """
+    if not PERFILADO_HABILITADO or cabeceras.get(CABECERA) != "1":
+        return None
+    autorizacion = cabeceras.get("authorization", "")
+    payload = decode_token(autorizacion[7:]) if autorizacion.lower().startswith("bearer ") else None
+    if not payload or payload.get("rol") != ROL_PERFILADO:
+        return None
+    pedido = {"descripcion": f"{metodo}-{ruta}", "archivo": None}
+    _pedido.set(pedido)
+    return pedido
+
+
+def _guardar(perfil: cProfile.Profile, pedido: dict):
+    nombre = _nuevo_archivo(pedido["descripcion"], ".pstats")
+    perfil.dump_stats(os.path.join(PERFILADO_DIR, nombre))
+    pedido["archivo"] = nombre
+    _podar()
+
+
+def envolver(endpoint):
+    """El endpoint tal cual, salvo que la petición en curso haya pedido perfilado."""
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def envoltura_async(*args, **kwargs):
+            pedido = _pedido.get()
+            if pedido is None:
+                return await endpoint(*args, **kwargs)
+            perfil = cProfile.Profile()
+            perfil.enable()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                perfil.disable()
+                _guardar(perfil, pedido)
+        return envoltura_async
+
+    @functools.wraps(endpoint)
+    def envoltura(*args, **kwargs):
+        # corre en el hilo del threadpool, que es donde hay que activar cProfile
+        pedido = _pedido.get()
+        if pedido is None:
+            return endpoint(*args, **kwargs)
+        perfil = cProfile.Profile()
+        try:
+            return perfil.runcall(endpoint, *args, **kwargs)
+        finally:
+            _guardar(perfil, pedido)
+    return envoltura
+
+
+class RutaPerfilable(APIRoute):
+    """APIRoute cuyo endpoint se puede perfilar con la cabecera X-Perfilar (route_class de los routers)."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if PERFILADO_HABILITADO:
+            endpoint = envolver(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+# ---------------------------------------------------------------------------
+# Muestreo de todo el worker
+# ---------------------------------------------------------------------------
+
+def _pila(frame) -> str:
+    marcos = []
+    while frame is not None:
+        codigo = frame.f_code
+        marcos.append(f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(marcos))
+
+
+def _muestrear(segundos: float, hz: int, nombre: str):
+    propio = threading.get_ident()
+    nombres = {}
+    pilas = Counter()
+    intervalo = 1.0 / hz
+    fin = time.monotonic() + segundos
+    try:
+        while time.monotonic() < fin:
+            for ident, frame in sys._current_frames().items():
+                if ident == propio:
+                    continue
+                if ident not in nombres:
+                    nombres = {h.ident: h.name for h in threading.enumerate()}
+                pilas[f"{nombres.get(ident, ident)};{_pila(frame)}"] += 1
+            time.sleep(intervalo)
+        with open(os.path.join(PERFILADO_DIR, nombre), "w", encoding="utf-8") as f:
+            for pila, cantidad in pilas.most_common():
+                f.write(f"{pila} {cantidad}\n")
+        _podar()
+    finally:
+        _muestreo_lock.release()
+
+
+def iniciar_muestreo(segundos: float, hz: int = 100) -> str:
+    """
+    Arranca el muestreo en un hilo aparte y devuelve el nombre del archivo que
+    va a quedar al terminar; None si ya hay uno corriendo.
+    """
+    if not _muestreo_lock.acquire(blocking=False):
+        return None
+    try:
+        nombre = _nuevo_archivo("muestreo", ".folded")
+        threading.Thread(
+            target=_muestrear, args=(min(segundos, MUESTREO_MAX_SEGUNDOS), hz, nombre),
+            name="perfilado-muestreo", daemon=True,
+        ).start()
+    except Exception:
+        _muestreo_lock.release()
+        raise
+    return nombre
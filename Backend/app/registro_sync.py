@@ -0,0 +1,82 @@
+# app/registro_sync.py
+"""
+Registro de cambios para la sincronización incremental (GET /sync).
+
+Cada escritura a AULA, HORARIO o ESTUDIANTE anota en REGISTRO_SYNC qué filas
+tocó, con el mismo cursor y antes del commit: si la escritura se deshace, la
+anotación también. No se guarda qué cambió ni si fue un borrado; GET /sync
+vuelve a leer esas filas y lo que ya no existe (o ya no le corresponde al
+tutor) va como borrado.
+
+El registro se purga a diario (lo más viejo que SYNC_RETENCION_DIAS); la fila
+REGISTRO_SYNC de CONTROL_REFRESCO guarda el último ID_CAMBIO purgado, y un
+token anterior a ese ya no alcanza para un delta.
+"""
+import logging
+import os
+
+from . import control_refresco
+from .db import get_conn
+
+logger = logging.getLogger(__name__)
+
+REGISTRO = "REGISTRO_SYNC"
+
+SYNC_RETENCION_DIAS = int(os.getenv("SYNC_RETENCION_DIAS", "30"))
+SYNC_PURGA_HORA = os.getenv("SYNC_PURGA_HORA", "03:30")
+
+TABLAS = ("AULA", "HORARIO", "ESTUDIANTE")
+
+
+def anotar(cur, tabla: str, *ids):
+    """Anota que cambiaron las filas `ids` de `tabla`. No hace commit."""
+    filas = [(tabla, int(i)) for i in ids if i is not None]
+    if len(filas) == 1:
+        cur.execute("INSERT INTO REGISTRO_SYNC (TABLA, ID_FILA) VALUES (:1, :2)", filas[0])
+    elif filas:
+        cur.executemany("INSERT INTO REGISTRO_SYNC (TABLA, ID_FILA) VALUES (:1, :2)", filas)
+
+
+def anotar_donde(cur, tabla: str, columna_id: str, donde: str, binds):
+    """
+    Anota las filas de `tabla` que cumplen `donde`, para las escrituras que
+    tocan varias filas sin saber cuáles (p. ej. UPDATE ... WHERE ID_TUTOR = :1).
+    Va antes de la escritura, con los mismos binds. No hace commit.
+    """
+    cur.execute(
+        f"INSERT INTO REGISTRO_SYNC (TABLA, ID_FILA) SELECT '{tabla}', {columna_id} FROM {tabla} WHERE {donde}",
+        binds,
+    )
+
+
+def purgar(conn) -> int:
+    """Borra lo más viejo que SYNC_RETENCION_DIAS. No hace commit. Devuelve cuántas filas borró."""
+    cur = conn.cursor()
+    try:
+        control_refresco.bloquear(cur, REGISTRO)
+        cur.execute(
+            "SELECT MAX(ID_CAMBIO) FROM REGISTRO_SYNC WHERE FECHA < SYSDATE - :dias",
+            {"dias": SYNC_RETENCION_DIAS},
+        )
+        hasta = cur.fetchone()[0]
+        if hasta is None:
+            return 0
+        cur.execute("DELETE FROM REGISTRO_SYNC WHERE ID_CAMBIO <= :1", (hasta,))
+        borradas = cur.rowcount
+        control_refresco.guardar(cur, REGISTRO, int(hasta))
+        logger.info(f"{REGISTRO}: {borradas} cambios purgados (hasta ID_CAMBIO {hasta})")
+        return borradas
+    finally:
+        cur.close()
+
+
+def tarea_purgar():
+    conn = get_conn()
+    try:
+        purgar(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
@@ -0,0 +1,241 @@
+# app/resumen_admin.py
+"""
+KPIs del dashboard administrativo (GET /admin/resumen) precalculados.
+
+RESUMEN_KPI_SEDE guarda los conteos de cada sede (estudiantes, aulas, aulas
+sin tutor, aulas con horario y asistencias de estudiantes de la semana) y
+RESUMEN_KPI una sola fila con los totales. El endpoint lee esa fila, así que
+cuesta lo mismo con una institución que con mil.
+
+Las escrituras que mueven algún KPI llaman marcar() después de su commit con
+la sede afectada (o sin sede si no la conocen); la tarea periódica recalcula
+solo las sedes marcadas y después la fila global a partir de las sedes. La
+reconstrucción nocturna recalcula todo: corrige lo que haya quedado marcado
+en otro worker que se reinició y arranca la semana nueva (el incremental
+también reconstruye si la semana guardada ya no es la actual).
+"""
+import logging
+import os
+import threading
+from datetime import date, timedelta
+
+from . import control_refresco
+from .db import al_confirmar, get_conn
+
+logger = logging.getLogger(__name__)
+
+RESUMEN = "RESUMEN_KPI"
+
+RESUMEN_ADMIN_REFRESCO_SEGUNDOS = int(os.getenv("RESUMEN_ADMIN_REFRESCO_SEGUNDOS", "30"))
+RESUMEN_ADMIN_RECONSTRUCCION_HORA = os.getenv("RESUMEN_ADMIN_RECONSTRUCCION_HORA", "00:05")
+
+# sedes con escrituras desde el último refresco de este worker
+_pendientes = set()
+_todas = False
+_lock = threading.Lock()
+
+_SQL_SEDES = """
+    MERGE INTO RESUMEN_KPI_SEDE r
+    USING (
+        SELECT s.ID_SEDE, s.ID_INSTITUCION,
+               (SELECT COUNT(*) FROM ESTUDIANTE e
+                WHERE e.ID_SEDE = s.ID_SEDE AND e.ID_INSTITUCION = s.ID_INSTITUCION) AS ESTUDIANTES,
+               (SELECT COUNT(*) FROM AULA a
+                WHERE a.ID_SEDE = s.ID_SEDE AND a.ID_INSTITUCION = s.ID_INSTITUCION) AS AULAS,
+               (SELECT COUNT(*) FROM AULA a
+                WHERE a.ID_SEDE = s.ID_SEDE AND a.ID_INSTITUCION = s.ID_INSTITUCION
+                AND a.ID_TUTOR IS NULL) AS AULAS_SIN_TUTOR,
+               (SELECT COUNT(*) FROM AULA a
+                WHERE a.ID_SEDE = s.ID_SEDE AND a.ID_INSTITUCION = s.ID_INSTITUCION
+                AND EXISTS (SELECT 1 FROM HORARIO h
+                            WHERE h.ID_AULA = a.ID_AULA
+                            AND h.ID_SEDE = a.ID_SEDE
+                            AND h.ID_INSTITUCION = a.ID_INSTITUCION)) AS AULAS_CON_HORARIO,
+               (SELECT COUNT(*) FROM ASISTENCIA_AULA_ESTUDIANTE x
+                WHERE x.ID_SEDE = s.ID_SEDE AND x.ID_INSTITUCION = s.ID_INSTITUCION
+                AND x.FECHA >= :lunes AND x.FECHA < :lunes_siguiente) AS ASISTENCIAS_SEMANA,
+               (SELECT COUNT(*) FROM ASISTENCIA_AULA_ESTUDIANTE x
+                WHERE x.ID_SEDE = s.ID_SEDE AND x.ID_INSTITUCION = s.ID_INSTITUCION
+                AND x.FECHA >= :lunes AND x.FECHA < :lunes_siguiente
+                AND NVL(x.PRESENTE, 1) = 1) AS PRESENTES_SEMANA,
+               :lunes AS SEMANA,
+               SYSDATE AS CALCULADO
+        FROM SEDE s{filtro}
+    ) n
+    ON (r.ID_SEDE = n.ID_SEDE AND r.ID_INSTITUCION = n.ID_INSTITUCION)
+    WHEN MATCHED THEN
+        UPDATE SET r.ESTUDIANTES = n.ESTUDIANTES, r.AULAS = n.AULAS, r.AULAS_SIN_TUTOR = n.AULAS_SIN_TUTOR,
+                   r.AULAS_CON_HORARIO = n.AULAS_CON_HORARIO, r.ASISTENCIAS_SEMANA = n.ASISTENCIAS_SEMANA,
+                   r.PRESENTES_SEMANA = n.PRESENTES_SEMANA, r.SEMANA = n.SEMANA, r.CALCULADO = n.CALCULADO
+    WHEN NOT MATCHED THEN
+        INSERT (ID_SEDE, ID_INSTITUCION, ESTUDIANTES, AULAS, AULAS_SIN_TUTOR, AULAS_CON_HORARIO,
+                ASISTENCIAS_SEMANA, PRESENTES_SEMANA, SEMANA, CALCULADO)
+        VALUES (n.ID_SEDE, n.ID_INSTITUCION, n.ESTUDIANTES, n.AULAS, n.AULAS_SIN_TUTOR, n.AULAS_CON_HORARIO,
+                n.ASISTENCIAS_SEMANA, n.PRESENTES_SEMANA, n.SEMANA, n.CALCULADO)
+"""
+
+_SQL_GLOBAL = """
+    MERGE INTO RESUMEN_KPI k
+    USING (
+        SELECT 1 AS ID,
+               COUNT(*) AS SEDES,
+               COUNT(DISTINCT ID_INSTITUCION) AS INSTITUCIONES,
+               NVL(SUM(ESTUDIANTES), 0) AS ESTUDIANTES,
+               NVL(SUM(AULAS), 0) AS AULAS,
+               NVL(SUM(AULAS_SIN_TUTOR), 0) AS AULAS_SIN_TUTOR,
+               NVL(SUM(AULAS_CON_HORARIO), 0) AS AULAS_CON_HORARIO,
+               NVL(SUM(ASISTENCIAS_SEMANA), 0) AS ASISTENCIAS_SEMANA,
+               NVL(SUM(PRESENTES_SEMANA), 0) AS PRESENTES_SEMANA,
+               :lunes AS SEMANA,
+               SYSDATE AS CALCULADO
+        FROM RESUMEN_KPI_SEDE
+    ) n
+    ON (k.ID = n.ID)
+    WHEN MATCHED THEN
+        UPDATE SET k.SEDES = n.SEDES, k.INSTITUCIONES = n.INSTITUCIONES, k.ESTUDIANTES = n.ESTUDIANTES,
+                   k.AULAS = n.AULAS, k.AULAS_SIN_TUTOR = n.AULAS_SIN_TUTOR,
+                   k.AULAS_CON_HORARIO = n.AULAS_CON_HORARIO, k.ASISTENCIAS_SEMANA = n.ASISTENCIAS_SEMANA,
+                   k.PRESENTES_SEMANA = n.PRESENTES_SEMANA, k.SEMANA = n.SEMANA, k.CALCULADO = n.CALCULADO
+    WHEN NOT MATCHED THEN
+        INSERT (ID, SEDES, INSTITUCIONES, ESTUDIANTES, AULAS, AULAS_SIN_TUTOR, AULAS_CON_HORARIO,
+                ASISTENCIAS_SEMANA, PRESENTES_SEMANA, SEMANA, CALCULADO)
+        VALUES (n.ID, n.SEDES, n.INSTITUCIONES, n.ESTUDIANTES, n.AULAS, n.AULAS_SIN_TUTOR, n.AULAS_CON_HORARIO,
+                n.ASISTENCIAS_SEMANA, n.PRESENTES_SEMANA, n.SEMANA, n.CALCULADO)
+"""
+
+
+def marcar(id_sede: int = None, id_institucion: int = None):
+    """
+    Anota que una escritura movió los KPIs de la sede; sin sede, los de
+    todas (p. ej. un borrado por id que no sabe de qué sede era). En un lote
+    transaccional espera al commit.
+    """
+    al_confirmar(_anotar, id_sede, id_institucion)
+
+
+def _anotar(id_sede, id_institucion):
+    global _todas
+    with _lock:
+        if id_sede is None or id_institucion is None:
+            _todas = True
+        else:
+            _pendientes.add((id_sede, id_institucion))
+
+
+def _tomar_pendientes():
+    """Devuelve (todas, sedes) y deja las marcas vacías."""
+    global _todas
+    with _lock:
+        todas, sedes = _todas, list(_pendientes)
+        _todas = False
+        _pendientes.clear()
+    return todas, sedes
+
+
+def _devolver_pendientes(todas: bool, sedes: list):
+    """Si el refresco falla, las marcas vuelven para la próxima vuelta."""
+    global _todas
+    with _lock:
+        _todas = _todas or todas
+        _pendientes.update(sedes)
+
+
+def semana_actual(hoy: date = None) -> date:
+    hoy = hoy or date.today()
+    return hoy - timedelta(days=hoy.weekday())
+
+
+def _recalcular(cur, lunes: date, sedes: list = None):
+    """Recalcula las sedes indicadas (todas si sedes es None) y luego la fila global."""
+    binds = {"lunes": lunes, "lunes_siguiente": lunes + timedelta(days=7)}
+    if sedes is None:
+        cur.execute(_SQL_SEDES.format(filtro=""), binds)
+    elif sedes:
+        cur.executemany(
+            _SQL_SEDES.format(filtro="\n        WHERE s.ID_SEDE = :id_sede AND s.ID_INSTITUCION = :id_institucion"),
+            [{**binds, "id_sede": s, "id_institucion": i} for s, i in sedes],
+        )
+    # sedes borradas (o cuya institución se borró)
+    cur.execute("""
+        DELETE FROM RESUMEN_KPI_SEDE
+        WHERE NOT EXISTS (SELECT 1 FROM SEDE s
+                          WHERE s.ID_SEDE = RESUMEN_KPI_SEDE.ID_SEDE
+                          AND s.ID_INSTITUCION = RESUMEN_KPI_SEDE.ID_INSTITUCION)
+    """)
+    cur.execute(_SQL_GLOBAL, {"lunes": lunes})
+
+
+def reconstruir(conn) -> int:
+    """
+    Recalcula todas las sedes y la fila global. No hace commit.
+    Devuelve cuántas sedes quedaron en el resumen.
+    """
+    lunes = semana_actual()
+    cur = conn.cursor()
+    try:
+        control_refresco.bloquear(cur, RESUMEN)
+        # lo marcado hasta acá queda cubierto por la reconstrucción
+        _tomar_pendientes()
+        _recalcular(cur, lunes)
+        cur.execute("SELECT SEDES FROM RESUMEN_KPI WHERE ID = 1")
+        sedes = int(cur.fetchone()[0])
+        control_refresco.guardar(cur, RESUMEN, 0)
+        logger.info(f"{RESUMEN}: reconstruido para la semana del {lunes} ({sedes} sedes)")
+        return sedes
+    finally:
+        cur.close()
+
+
+def refrescar(conn) -> tuple:
+    """
+    Recalcula las sedes marcadas desde el último refresco y la fila global.
+    No hace commit. Devuelve (completo, sedes): si tuvo que reconstruir todo
+    y cuántas sedes recalculó.
+    """
+    todas, sedes = _tomar_pendientes()
+    lunes = semana_actual()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT TO_CHAR(SEMANA, 'YYYY-MM-DD') FROM RESUMEN_KPI WHERE ID = 1")
+        fila = cur.fetchone()
+        if todas or fila is None or fila[0] != lunes.isoformat():
+            cur.close()
+            cur = None
+            return True, reconstruir(conn)
+        if not sedes:
+            return False, 0
+        control_refresco.bloquear(cur, RESUMEN)
+        _recalcular(cur, lunes, sedes)
+        control_refresco.guardar(cur, RESUMEN, 0)
+        logger.info(f"{RESUMEN}: {len(sedes)} sede(s) recalculadas")
+        return False, len(sedes)
+    except Exception:
+        _devolver_pendientes(todas, sedes)
+        raise
+    finally:
+        if cur:
+            cur.close()
+
+
+def tarea_refrescar():
+    conn = get_conn()
+    try:
+        refrescar(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def tarea_reconstruir():
+    conn = get_conn()
+    try:
+        reconstruir(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
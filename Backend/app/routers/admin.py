@@ -0,0 +1,151 @@
+# app/routers/admin.py
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+import oracledb
+import logging
+from typing import List
+from .. import perfilado, resumen_admin
+from ..db import get_conn
+from ..schemas import MuestreoResponse, PerfilArchivo, RefrescoResponse, ResumenAdminResponse
+from ..utils import require_roles
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/admin", tags=["admin"], route_class=perfilado.RutaPerfilable)
+
+# el perfilado es solo para ADMINISTRADOR; los KPIs los ve también el
+# dashboard de ADMINISTRATIVO
+SOLO_ADMINISTRADOR = [Depends(require_roles("ADMINISTRADOR"))]
+ROLES_ADMIN = ("ADMINISTRADOR", "ADMINISTRATIVO")
+
+
+@router.post("/perfilado/muestreo", status_code=202, response_model=MuestreoResponse, dependencies=SOLO_ADMINISTRADOR)
+def iniciar_muestreo(segundos: float = 30, hz: int = 100):
+    """
+    Muestrea las pilas de todos los hilos del worker durante `segundos` (máx.
+    300) y deja un .folded para flamegraph.pl / speedscope. Responde enseguida
+    con el nombre del archivo, que aparece en /admin/perfilado al terminar.
+    """
+    if segundos <= 0 or not 1 <= hz <= 1000:
+        raise HTTPException(status_code=400, detail="segundos debe ser > 0 y hz entre 1 y 1000")
+    nombre = perfilado.iniciar_muestreo(segundos, hz)
+    if nombre is None:
+        raise HTTPException(status_code=409, detail="Ya hay un muestreo en curso en este worker")
+    logger.info(f"Muestreo de {segundos}s a {hz} Hz -> {nombre}")
+    return {"archivo": nombre, "segundos": min(segundos, perfilado.MUESTREO_MAX_SEGUNDOS), "hz": hz}
+
+
+@router.get("/perfilado", response_model=List[PerfilArchivo], dependencies=SOLO_ADMINISTRADOR)
+def listar_perfiles():
+    """Perfiles guardados en este worker (.pstats por petición, .folded de muestreo)."""
+    return perfilado.listar()
+
+
+@router.get("/perfilado/{nombre}", dependencies=SOLO_ADMINISTRADOR)
+def descargar_perfil(nombre: str):
+    """Descarga un perfil: .pstats se abre con pstats/snakeviz, .folded con flamegraph.pl o speedscope."""
+    ruta = perfilado.ruta_de(nombre)
+    if ruta is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    return FileResponse(ruta, media_type="application/octet-stream", filename=nombre)
+
+
+@router.get("/resumen", response_model=ResumenAdminResponse, dependencies=[Depends(require_roles(*ROLES_ADMIN))])
+def resumen(por_sede: bool = False):
+    """
+    KPIs del dashboard administrativo desde el snapshot (RESUMEN_KPI): lee una
+    sola fila, sin importar cuántas instituciones haya. `calculado` es la hora
+    del snapshot. Con por_sede=true agrega el detalle de cada sede.
+    """
+    conn = None
+    cur = None
+
+    try:
+        conn = get_conn()
+        cur = conn.cursor()
+
+        cur.execute("""
+            SELECT CALCULADO, SEMANA, INSTITUCIONES, SEDES, ESTUDIANTES, AULAS, AULAS_SIN_TUTOR,
+                   AULAS_CON_HORARIO, ASISTENCIAS_SEMANA, PRESENTES_SEMANA
+            FROM RESUMEN_KPI
+            WHERE ID = 1
+        """)
+        r = cur.fetchone()
+        if r is None:
+            # todavía no corrió la primera reconstrucción
+            return {"por_sede": [] if por_sede else None}
+
+        aulas, asistencias = r[5], r[8]
+        respuesta = {
+            "calculado": r[0],
+            "semana": r[1].date() if hasattr(r[1], "date") else r[1],
+            "instituciones": r[2],
+            "sedes": r[3],
+            "estudiantes": r[4],
+            "aulas": aulas,
+            "aulas_sin_tutor": r[6],
+            "aulas_con_horario": r[7],
+            "cobertura_horario": round(r[7] / aulas, 4) if aulas else None,
+            "asistencias_semana": asistencias,
+            "presentes_semana": r[9],
+            "tasa_asistencia_semana": round(r[9] / asistencias, 4) if asistencias else None,
+        }
+
+        if por_sede:
+            cur.execute("""
+                SELECT ID_SEDE, ID_INSTITUCION, ESTUDIANTES, AULAS, AULAS_SIN_TUTOR, AULAS_CON_HORARIO,
+                       ASISTENCIAS_SEMANA, PRESENTES_SEMANA, CALCULADO
+                FROM RESUMEN_KPI_SEDE
+                ORDER BY ID_INSTITUCION, ID_SEDE
+            """)
+            respuesta["por_sede"] = [
+                {"id_sede": f[0], "id_institucion": f[1], "estudiantes": f[2], "aulas": f[3],
+                 "aulas_sin_tutor": f[4], "aulas_con_horario": f[5], "asistencias_semana": f[6],
+                 "presentes_semana": f[7], "calculado": f[8]}
+                for f in cur.fetchall()
+            ]
+
+        return respuesta
+
+    except oracledb.DatabaseError as e:
+        logger.error(f"Error de base de datos al leer el resumen administrativo: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error en la base de datos")
+
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+
+
+@router.post("/resumen/refrescar", response_model=RefrescoResponse, dependencies=[Depends(require_roles(*ROLES_ADMIN))])
+def refrescar_resumen(completo: bool = False):
+    """
+    Fuerza el refresco del snapshot de KPIs. Por defecto recalcula solo las
+    sedes con escrituras pendientes en este worker; con completo=true, todas.
+    `filas` es la cantidad de sedes recalculadas.
+    """
+    conn = None
+
+    try:
+        conn = get_conn()
+
+        if completo:
+            filas = resumen_admin.reconstruir(conn)
+        else:
+            # puede terminar reconstruyendo (semana nueva o sin snapshot)
+            completo, filas = resumen_admin.refrescar(conn)
+
+        conn.commit()
+
+        return {"completo": completo, "filas": filas}
+
+    except oracledb.DatabaseError as e:
+        if conn:
+            conn.rollback()
+        logger.error(f"Error de base de datos al refrescar el resumen administrativo: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error en la base de datos")
+
+    finally:
+        if conn:
+            conn.close()
@@ -2,25 +2,101 @@
 from fastapi import APIRouter, HTTPException
 import oracledb
 import logging
-from app.db import get_conn
+from app import cola_asistencia, resumen_admin
+from app.db import codigo_error, get_conn
+from app.perfilado import RutaPerfilable
 from app.schemas import (
     AsistenciaTutorCreate, AsistenciaTutorResponse,
-    AsistenciaEstudianteCreate, AsistenciaEstudianteResponse
+    AsistenciaEstudianteCreate, AsistenciaEstudianteResponse,
+    ReposicionPendiente
 )
+from datetime import date, datetime, timedelta
 from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/asistencias", tags=["Asistencias"])
+router = APIRouter(prefix="/asistencias", tags=["Asistencias"], route_class=RutaPerfilable)
+
+# Las tablas de asistencia están particionadas por mes (V006): toda consulta
+# lleva un rango de FECHA acotado para que Oracle solo lea esas particiones.
+MAX_DIAS_RANGO = 366
+
+
+def _rango_fechas(desde: Optional[date], hasta: Optional[date]):
+    """Rango [desde, hasta] a consultar; por defecto el mes actual."""
+    if desde is None:
+        desde = date.today().replace(day=1)
+    if hasta is None:
+        hasta = (desde.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    if hasta < desde:
+        raise HTTPException(status_code=400, detail="'hasta' debe ser posterior a 'desde'")
+    if (hasta - desde).days >= MAX_DIAS_RANGO:
+        raise HTTPException(status_code=400, detail=f"El rango no puede superar {MAX_DIAS_RANGO} días")
+    return desde, hasta
+
+
+# Una fila por llave natural (V011): estudiante o tutor + aula + día (DIA, la
+# columna virtual TRUNC(FECHA)) + clase (CLASE: el horario o 0 y, para
+# tutores, la reposición en negativo). Registrar es un MERGE sobre esa llave: un reenvío
+# actualiza la fila del día en lugar de duplicarla. MERGE no tiene RETURNING,
+# así que el id sale de una consulta por la misma llave, con la misma :fecha
+# (si fuera SYSDATE en cada sentencia, un POST que cruza la medianoche
+# buscaría en el día siguiente y no encontraría la fila). Con la cola de
+# escritura diferida habilitada (app/cola_asistencia.py) el POST solo anota la
+# fila y responde 202; el MERGE lo hace el hilo de la cola por lotes.
+
+SQL_REGISTRAR_TUTOR = cola_asistencia.MERGE_TUTOR
+
+SQL_ID_TUTOR = """
+    SELECT ID_ASISTENCIA
+    FROM ASISTENCIA_AULA_TUTOR
+    WHERE ID_AULA = :id_aula AND ID_SEDE = :id_sede AND ID_INSTITUCION = :id_institucion
+    AND DIA = TRUNC(:fecha) AND CLASE = COALESCE(-:id_asistencia_reposicion, :id_horario, 0)
+    AND ID_TUTOR = :id_tutor
+"""
+
+SQL_REGISTRAR_ESTUDIANTE = cola_asistencia.MERGE_ESTUDIANTE
+
+SQL_ID_ESTUDIANTE = """
+    SELECT ID_ASISTENCIA
+    FROM ASISTENCIA_AULA_ESTUDIANTE
+    WHERE ID_AULA = :id_aula AND ID_SEDE = :id_sede AND ID_INSTITUCION = :id_institucion
+    AND DIA = TRUNC(:fecha) AND CLASE = COALESCE(:id_horario, 0) AND ID_ESTUDIANTE = :id_estudiante
+"""
+
+
+def _registrar(cur, sql: str, datos: dict):
+    """
+    Ejecuta el MERGE de registro. Si otro POST insertó la misma llave entre
+    que este buscó y escribió (ORA-00001 en UQ_ASIST_*_NATURAL), el segundo
+    intento ya la encuentra y la actualiza.
+    """
+    try:
+        cur.execute(sql, datos)
+    except oracledb.IntegrityError as e:
+        if codigo_error(e) != "ORA-00001":
+            raise
+        cur.execute(sql, datos)
 
 
 # ------------------- TUTOR -----------------------
 
 @router.get("/tutores", response_model=List[AsistenciaTutorResponse])
-def listar_asistencia_tutor(limit: int = 500):
+def listar_asistencia_tutor(
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    id_tutor: Optional[int] = None,
+    id_aula: Optional[int] = None,
+    id_sede: Optional[int] = None,
+    id_institucion: Optional[int] = None,
+    limit: int = 500,
+):
     """
-    Lista todas las asistencias de tutores.
+    Lista las asistencias de tutores en un rango de fechas (por defecto el mes
+    actual), las más recientes primero.
     """
+    desde, hasta = _rango_fechas(desde, hasta)
+
     conn = None
     cur = None
 
@@ -28,19 +104,39 @@ def listar_asistencia_tutor(limit: int = 500):
         conn = get_conn()
         cur = conn.cursor()
 
-        logger.info("Listando asistencias de tutores")
-
-        cur.execute("""
+        logger.info(f"Listando asistencias de tutores ({desde} a {hasta})")
+
+        filtros = ["FECHA >= :desde", "FECHA < :hasta + 1"]
+        binds = {"desde": desde, "hasta": hasta, "limite": limit}
+        if id_tutor is not None:
+            filtros.append("ID_TUTOR = :id_tutor")
+            binds["id_tutor"] = id_tutor
+        if id_aula is not None:
+            filtros.append("ID_AULA = :id_aula")
+            binds["id_aula"] = id_aula
+        if id_sede is not None:
+            filtros.append("ID_SEDE = :id_sede")
+            binds["id_sede"] = id_sede
+        if id_institucion is not None:
+            filtros.append("ID_INSTITUCION = :id_institucion")
+            binds["id_institucion"] = id_institucion
+
+        cur.execute(f"""
             SELECT ID_ASISTENCIA, ID_TUTOR, ID_AULA, ID_SEDE, ID_INSTITUCION,
                    FECHA, HORA_ENTRADA, HORA_SALIDA, SE_DIO
             FROM ASISTENCIA_AULA_TUTOR
-            WHERE ROWNUM <= :1
-            ORDER BY ID_ASISTENCIA DESC
-        """, (limit,))
+            WHERE {" AND ".join(filtros)}
+            ORDER BY FECHA DESC, ID_ASISTENCIA DESC
+            FETCH FIRST :limite ROWS ONLY
+        """, binds)
 
         rows = cur.fetchall()
         cols = [x[0].lower() for x in cur.description]
-        res = [dict(zip(cols, r)) for r in rows]
+        res = []
+        for r in rows:
+            d = dict(zip(cols, r))
+            d["fecha"] = d["fecha"].isoformat()
+            res.append(d)
 
         return res
 
@@ -61,9 +157,27 @@ def listar_asistencia_tutor(limit: int = 500):
 @router.post("/tutores", response_model=AsistenciaTutorResponse, status_code=201)
 def registrar_asistencia_tutor(a: AsistenciaTutorCreate):
     """
-    Registra una nueva asistencia de tutor.
-    La fecha se registra automáticamente con SYSDATE.
+    Registra la asistencia de tutor de hoy (FECHA = hora del servidor de la app).
+    Si ya hay una del mismo tutor, aula, día y clase (horario o reposición)
+    la actualiza en vez de insertar otra: reenviar es seguro. Con la cola de
+    escritura diferida responde 202 {"encolada", "id_cola"}.
     """
+    se_dio = 1 if a.se_dio is None else a.se_dio
+    binds = {
+        "id_tutor": a.id_tutor,
+        "id_aula": a.id_aula,
+        "id_sede": a.id_sede,
+        "id_institucion": a.id_institucion,
+        "id_horario": a.id_horario,
+        "id_asistencia_reposicion": a.id_asistencia_reposicion,
+        "fecha": datetime.now().replace(microsecond=0),
+    }
+    datos = {**binds, "hora_entrada": a.hora_entrada, "hora_salida": a.hora_salida,
+             "se_dio": se_dio, "id_motivo": a.id_motivo}
+    encolada = cola_asistencia.encolar("tutor", datos)
+    if encolada is not None:
+        return encolada
+
     conn = None
     cur = None
 
@@ -73,33 +187,9 @@ def registrar_asistencia_tutor(a: AsistenciaTutorCreate):
 
         logger.info(f"Registrando asistencia de tutor {a.id_tutor} en aula {a.id_aula}")
 
-        id_var = cur.var(int)
-
-        # Sin fecha explícita, Oracle usará SYSDATE por defecto o NULL
-        cur.execute("""
-            INSERT INTO ASISTENCIA_AULA_TUTOR
-              (ID_TUTOR, ID_AULA, ID_SEDE, ID_INSTITUCION, FECHA, HORA_ENTRADA, HORA_SALIDA, SE_DIO, ID_MOTIVO, ID_ASISTENCIA_REPOSICION)
-            VALUES
-              (:id_tutor, :id_aula, :id_sede, :id_institucion, 
-               SYSDATE, :hora_entrada, :hora_salida, 
-               :se_dio, :id_motivo, :id_asistencia_reposicion)
-            RETURNING ID_ASISTENCIA INTO :id_out
-        """, {
-            "id_tutor": a.id_tutor,
-            "id_aula": a.id_aula,
-            "id_sede": a.id_sede,
-            "id_institucion": a.id_institucion,
-            "hora_entrada": a.hora_entrada,
-            "hora_salida": a.hora_salida,
-            "se_dio": 1,
-            "id_motivo": a.id_motivo,
-            "id_asistencia_reposicion": a.id_asistencia_reposicion,
-            "id_out": id_var
-        })
-
-        new_id = id_var.getvalue()
-        if isinstance(new_id, (list, tuple)):
-            new_id = new_id[0]
+        _registrar(cur, SQL_REGISTRAR_TUTOR, datos)
+        cur.execute(SQL_ID_TUTOR, binds)
+        new_id = cur.fetchone()[0]
 
         conn.commit()
 
@@ -114,7 +204,7 @@ def registrar_asistencia_tutor(a: AsistenciaTutorCreate):
             "fecha": None,
             "hora_entrada": a.hora_entrada,
             "hora_salida": a.hora_salida,
-            "se_dio": 1
+            "se_dio": se_dio
         }
 
     except oracledb.IntegrityError as e:
@@ -142,13 +232,148 @@ def registrar_asistencia_tutor(a: AsistenciaTutorCreate):
             conn.close()
 
 
+@router.get("/tutores/reposiciones-pendientes", response_model=List[ReposicionPendiente])
+def listar_reposiciones_pendientes(
+    id_institucion: Optional[int] = None,
+    id_tutor: Optional[int] = None,
+    id_aula: Optional[int] = None,
+    id_periodo: Optional[int] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+):
+    """
+    Lista las clases no dictadas (SE_DIO = 0) cuya cadena de reposiciones
+    (ID_ASISTENCIA_REPOSICION) todavía no termina en una clase dictada.
+    Toda la cadena se resuelve en una sola consulta recursiva.
+    Sin `desde` se revisan las clases de los últimos 12 meses.
+    """
+    if desde is None:
+        desde = date.today() - timedelta(days=MAX_DIAS_RANGO - 1)
+    if hasta is not None and hasta < desde:
+        raise HTTPException(status_code=400, detail="'hasta' debe ser posterior a 'desde'")
+
+    conn = None
+    cur = None
+
+    try:
+        conn = get_conn()
+        cur = conn.cursor()
+
+        logger.info(f"Listando reposiciones pendientes (institución={id_institucion}, tutor={id_tutor})")
+
+        # Los filtros van en el ancla (clase original) para no recorrer cadenas ajenas
+        filtros = ["r.FECHA >= :desde"]
+        binds = {"desde": desde}
+        if id_institucion is not None:
+            filtros.append("r.ID_INSTITUCION = :id_institucion")
+            binds["id_institucion"] = id_institucion
+        if id_tutor is not None:
+            filtros.append("r.ID_TUTOR = :id_tutor")
+            binds["id_tutor"] = id_tutor
+        if id_aula is not None:
+            filtros.append("r.ID_AULA = :id_aula")
+            binds["id_aula"] = id_aula
+        if hasta is not None:
+            filtros.append("r.FECHA < :hasta + 1")
+            binds["hasta"] = hasta
+        filtro_periodo = ""
+        if id_periodo is not None:
+            filtro_periodo = "AND p.ID_PERIODO = :id_periodo"
+            binds["id_periodo"] = id_periodo
+
+        where_ancla = "".join(f"\n                AND {f}" for f in filtros)
+
+        cur.execute(f"""
+            WITH cadena (ID_RAIZ, ID_ASISTENCIA, SE_DIO, NIVEL) AS (
+                SELECT r.ID_ASISTENCIA, r.ID_ASISTENCIA, r.SE_DIO, 0
+                FROM ASISTENCIA_AULA_TUTOR r
+                WHERE r.SE_DIO = 0
+                AND r.ID_ASISTENCIA_REPOSICION IS NULL{where_ancla}
+                UNION ALL
+                SELECT c.ID_RAIZ, h.ID_ASISTENCIA, h.SE_DIO, c.NIVEL + 1
+                FROM cadena c
+                JOIN ASISTENCIA_AULA_TUTOR h
+                    ON h.ID_ASISTENCIA_REPOSICION = c.ID_ASISTENCIA
+                    -- una reposición se registra después de la clase que repone
+                    AND h.FECHA >= :desde
+            )
+            CYCLE ID_ASISTENCIA SET EN_CICLO TO 'S' DEFAULT 'N',
+            resumen AS (
+                SELECT ID_RAIZ,
+                       COUNT(*) - 1 AS INTENTOS,
+                       MAX(CASE WHEN NIVEL > 0 AND SE_DIO = 1 THEN 1 ELSE 0 END) AS REPUESTA,
+                       MAX(ID_ASISTENCIA) KEEP (DENSE_RANK LAST ORDER BY NIVEL) AS ULTIMO
+                FROM cadena
+                GROUP BY ID_RAIZ
+            )
+            SELECT r.ID_ASISTENCIA, r.ID_TUTOR, r.ID_AULA, r.ID_SEDE, r.ID_INSTITUCION,
+                   r.FECHA, r.ID_MOTIVO, p.ID_PERIODO, x.INTENTOS, x.ULTIMO
+            FROM resumen x
+            JOIN ASISTENCIA_AULA_TUTOR r
+                ON r.ID_ASISTENCIA = x.ID_RAIZ
+                AND r.FECHA >= :desde
+            JOIN AULA a
+                ON a.ID_AULA = r.ID_AULA
+                AND a.ID_SEDE = r.ID_SEDE
+                AND a.ID_INSTITUCION = r.ID_INSTITUCION
+            LEFT JOIN PERIODO p
+                ON p.ID_PROGRAMA = a.ID_PROGRAMA
+                AND r.FECHA >= p.FECHA_INICIO
+                AND r.FECHA < p.FECHA_FIN + 1
+            WHERE x.REPUESTA = 0
+            {filtro_periodo}
+            ORDER BY r.ID_TUTOR, r.ID_AULA, p.ID_PERIODO, r.FECHA
+        """, binds)
+
+        return [
+            {
+                "id_asistencia": r[0],
+                "id_tutor": r[1],
+                "id_aula": r[2],
+                "id_sede": r[3],
+                "id_institucion": r[4],
+                "fecha": r[5],
+                "id_motivo": r[6],
+                "id_periodo": r[7],
+                "intentos": int(r[8]),
+                "id_ultima_asistencia": r[9],
+            }
+            for r in cur.fetchall()
+        ]
+
+    except oracledb.DatabaseError as e:
+        logger.error(f"Error de base de datos al listar reposiciones pendientes: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error al consultar la base de datos")
+
+    except Exception as e:
+        logger.exception(f"Error inesperado al listar reposiciones pendientes: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error interno del servidor")
+
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+
+
 # ------------------- ESTUDIANTE -----------------------
 
 @router.get("/estudiantes", response_model=List[AsistenciaEstudianteResponse])
-def listar_asistencia_estudiante(limit: int = 500):
+def listar_asistencia_estudiante(
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    id_estudiante: Optional[int] = None,
+    id_aula: Optional[int] = None,
+    id_sede: Optional[int] = None,
+    id_institucion: Optional[int] = None,
+    limit: int = 500,
+):
     """
-    Lista todas las asistencias de estudiantes.
+    Lista las asistencias de estudiantes en un rango de fechas (por defecto el
+    mes actual), las más recientes primero.
     """
+    desde, hasta = _rango_fechas(desde, hasta)
+
     conn = None
     cur = None
 
@@ -156,19 +381,39 @@ def listar_asistencia_estudiante(limit: int = 500):
         conn = get_conn()
         cur = conn.cursor()
 
-        logger.info("Listando asistencias de estudiantes")
-
-        cur.execute("""
+        logger.info(f"Listando asistencias de estudiantes ({desde} a {hasta})")
+
+        filtros = ["FECHA >= :desde", "FECHA < :hasta + 1"]
+        binds = {"desde": desde, "hasta": hasta, "limite": limit}
+        if id_estudiante is not None:
+            filtros.append("ID_ESTUDIANTE = :id_estudiante")
+            binds["id_estudiante"] = id_estudiante
+        if id_aula is not None:
+            filtros.append("ID_AULA = :id_aula")
+            binds["id_aula"] = id_aula
+        if id_sede is not None:
+            filtros.append("ID_SEDE = :id_sede")
+            binds["id_sede"] = id_sede
+        if id_institucion is not None:
+            filtros.append("ID_INSTITUCION = :id_institucion")
+            binds["id_institucion"] = id_institucion
+
+        cur.execute(f"""
             SELECT ID_ASISTENCIA, ID_ESTUDIANTE, ID_AULA, ID_SEDE, ID_INSTITUCION,
                    FECHA, HORA_ENTRADA, HORA_SALIDA, PRESENTE
             FROM ASISTENCIA_AULA_ESTUDIANTE
-            WHERE ROWNUM <= :1
-            ORDER BY ID_ASISTENCIA DESC
-        """, (limit,))
+            WHERE {" AND ".join(filtros)}
+            ORDER BY FECHA DESC, ID_ASISTENCIA DESC
+            FETCH FIRST :limite ROWS ONLY
+        """, binds)
 
         rows = cur.fetchall()
         cols = [x[0].lower() for x in cur.description]
-        res = [dict(zip(cols, r)) for r in rows]
+        res = []
+        for r in rows:
+            d = dict(zip(cols, r))
+            d["fecha"] = d["fecha"].isoformat()
+            res.append(d)
 
         return res
 
@@ -190,9 +435,24 @@ def listar_asistencia_estudiante(limit: int = 500):
 @router.post("/estudiantes", response_model=AsistenciaEstudianteResponse, status_code=201)
 def registrar_asistencia_estudiante(a: AsistenciaEstudianteCreate):
     """
-    Registra una nueva asistencia de estudiante.
-    La fecha se registra automáticamente con SYSDATE.
+    Registra la asistencia de estudiante de hoy (FECHA = hora del servidor de la app).
+    Si ya hay una del mismo estudiante, aula, día y clase (horario) la
+    actualiza en vez de insertar otra: reenviar la lista del día es seguro. Con la cola de
+    escritura diferida responde 202 {"encolada", "id_cola"}.
     """
+    binds = {
+        "id_estudiante": a.id_estudiante,
+        "id_aula": a.id_aula,
+        "id_sede": a.id_sede,
+        "id_institucion": a.id_institucion,
+        "id_horario": a.id_horario,
+        "fecha": datetime.now().replace(microsecond=0),
+    }
+    datos = {**binds, "hora_entrada": a.hora_entrada, "hora_salida": a.hora_salida, "presente": a.presente}
+    encolada = cola_asistencia.encolar("estudiante", datos)
+    if encolada is not None:
+        return encolada
+
     conn = None
     cur = None
 
@@ -202,32 +462,12 @@ def registrar_asistencia_estudiante(a: AsistenciaEstudianteCreate):
 
         logger.info(f"Registrando asistencia de estudiante {a.id_estudiante}")
 
-        id_var = cur.var(int)
-
-        # Sin fecha explícita, Oracle usará SYSDATE
-        cur.execute("""
-            INSERT INTO ASISTENCIA_AULA_ESTUDIANTE
-              (ID_ESTUDIANTE, ID_AULA, ID_SEDE, ID_INSTITUCION, FECHA, HORA_ENTRADA, HORA_SALIDA, PRESENTE)
-            VALUES
-              (:id_estudiante, :id_aula, :id_sede, :id_institucion, 
-               SYSDATE, :hora_entrada, :hora_salida, :presente)
-            RETURNING ID_ASISTENCIA INTO :id_out
-        """, {
-            "id_estudiante": a.id_estudiante,
-            "id_aula": a.id_aula,
-            "id_sede": a.id_sede,
-            "id_institucion": a.id_institucion,
-            "hora_entrada": a.hora_entrada,
-            "hora_salida": a.hora_salida,
-            "presente": a.presente,
-            "id_out": id_var
-        })
-
-        new_id = id_var.getvalue()
-        if isinstance(new_id, (list, tuple)):
-            new_id = new_id[0]
+        _registrar(cur, SQL_REGISTRAR_ESTUDIANTE, datos)
+        cur.execute(SQL_ID_ESTUDIANTE, binds)
+        new_id = cur.fetchone()[0]
 
         conn.commit()
+        resumen_admin.marcar(a.id_sede, a.id_institucion)
 
         logger.info(f"Asistencia de estudiante {new_id} registrada exitosamente")
 
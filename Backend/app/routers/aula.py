@@ -2,13 +2,17 @@
 from fastapi import APIRouter, HTTPException
 import oracledb
 import logging
-from app.db import get_conn
+from datetime import date
+from app import calendario, registro_sync, resumen_admin
+from app.cache import referencia, semana_tutor
+from app.db import armar_update, get_conn
+from app.perfilado import RutaPerfilable
 from app.schemas import AsignarTutorRequest, AulaCreate, AulaResponse, AulaUpdate
 from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/aulas", tags=["Aulas"])
+router = APIRouter(prefix="/aulas", tags=["Aulas"], route_class=RutaPerfilable)
 
 
 @router.get("/", response_model=List[AulaResponse])
@@ -109,8 +113,11 @@ def crear_aula(aula: AulaCreate):
                 new_id = val
         except Exception:
             new_id = None
+        registro_sync.anotar(cur, "AULA", new_id)
 
         conn.commit()
+        referencia.limpiar()
+        resumen_admin.marcar(aula.id_sede, aula.id_institucion)
 
         logger.info(f"Aula {new_id} creada exitosamente")
         
@@ -177,7 +184,8 @@ def crear_aula(aula: AulaCreate):
             conn.close()
 
 
-@router.put("/{id_aula}", response_model=AulaResponse)
+# ":int" para que PUT /aulas/asignar-tutor no caiga aquí
+@router.put("/{id_aula:int}", response_model=AulaResponse)
 def actualizar_aula(id_aula: int, aula: AulaUpdate):
     """
     Actualiza una aula existente.
@@ -192,59 +200,50 @@ def actualizar_aula(id_aula: int, aula: AulaUpdate):
 
         logger.info(f"Actualizando aula {id_aula}")
 
-        # Build update set only for provided fields
-        set_clauses = []
-        binds = {}
-        idx = 1
-
-        if aula.codigo_aula is not None:
-            set_clauses.append(f"CODIGO_AULA = :{idx}")
-            binds[str(idx)] = aula.codigo_aula
-            idx += 1
-        if aula.grado is not None:
-            set_clauses.append(f"GRADO = :{idx}")
-            binds[str(idx)] = aula.grado
-            idx += 1
-        if aula.capacidad is not None:
-            set_clauses.append(f"CAPACIDAD = :{idx}")
-            binds[str(idx)] = aula.capacidad
-            idx += 1
-        if aula.ubicacion is not None:
-            set_clauses.append(f"UBICACION = :{idx}")
-            binds[str(idx)] = aula.ubicacion
-            idx += 1
         # If both id_sede and id_institucion provided, update both; if only one, raise
-        if aula.id_sede is not None or aula.id_institucion is not None:
-            if aula.id_sede is None or aula.id_institucion is None:
-                raise HTTPException(status_code=400, detail="Para cambiar sede, envía id_sede e id_institucion juntos.")
-            set_clauses.append(f"ID_SEDE = :{idx}")
-            binds[str(idx)] = aula.id_sede
-            idx += 1
-            set_clauses.append(f"ID_INSTITUCION = :{idx}")
-            binds[str(idx)] = aula.id_institucion
-            idx += 1
-
-        if not set_clauses:
+        if (aula.id_sede is None) != (aula.id_institucion is None):
+            raise HTTPException(status_code=400, detail="Para cambiar sede, envía id_sede e id_institucion juntos.")
+
+        # Build update set only for provided fields
+        sql, binds = armar_update(
+            "AULA",
+            [("NOMBRE_AULA", aula.nombre_aula), ("GRADO", aula.grado), ("ID_PROGRAMA", aula.id_programa),
+             ("ID_TUTOR", aula.id_tutor), ("ID_SEDE", aula.id_sede), ("ID_INSTITUCION", aula.id_institucion)],
+            [("ID_AULA", id_aula)],
+        )
+        if sql is None:
             raise HTTPException(status_code=400, detail="No hay campos para actualizar.")
 
-        set_sql = ", ".join(set_clauses)
-        binds[str(idx)] = id_aula  # where bind
-        sql = f"UPDATE AULA SET {set_sql} WHERE ID_AULA = :{idx}"
+        programa_anterior = None
+        if aula.id_programa is not None:
+            cur.execute("SELECT ID_PROGRAMA FROM AULA WHERE ID_AULA = :1", (id_aula,))
+            row = cur.fetchone()
+            programa_anterior = row[0] if row else None
 
         cur.execute(sql, binds)
 
         if cur.rowcount == 0:
             logger.warning(f"Aula {id_aula} no encontrada")
             raise HTTPException(404, "Aula no encontrada")
+        # otro programa son otros periodos: las sesiones futuras se rearman con
+        # ellos, igual que al cambiar un horario (las pasadas se conservan)
+        if aula.id_programa is not None and aula.id_programa != programa_anterior:
+            calendario.rehacer_aula(conn, id_aula, desde=date.today())
+        registro_sync.anotar(cur, "AULA", id_aula)
 
         conn.commit()
+        # cambiar de sede cambia los nombres que muestra la semana del tutor
+        semana_tutor.limpiar()
+        referencia.limpiar()
+        # no sabemos la sede anterior sin otra consulta
+        resumen_admin.marcar()
 
         logger.info(f"Aula {id_aula} actualizada exitosamente")
 
         # Recuperar el estado actual para devolverlo
         cur2 = conn.cursor()
         cur2.execute("""
-            SELECT ID_AULA, CODIGO_AULA, GRADO, CAPACIDAD, UBICACION, ID_SEDE, ID_INSTITUCION
+            SELECT ID_AULA, NOMBRE_AULA, GRADO, ID_SEDE, ID_INSTITUCION, ID_PROGRAMA, ID_TUTOR
             FROM AULA
             WHERE ID_AULA = :1
         """, (id_aula,))
@@ -313,8 +312,13 @@ def borrar_aula(id_aula: int):
         if cur.rowcount == 0:
             logger.warning(f"Aula {id_aula} no encontrada")
             raise HTTPException(404, "Aula no encontrada")
+        registro_sync.anotar(cur, "AULA", id_aula)
 
         conn.commit()
+        # la semana de los tutores no puede seguir mostrando clases de esta aula
+        semana_tutor.limpiar()
+        referencia.limpiar()
+        resumen_admin.marcar()
 
         logger.info(f"Aula {id_aula} eliminada exitosamente")
 
@@ -377,7 +381,7 @@ def asignar_tutor_a_aula(payload: AsignarTutorRequest):
 
         # Verificar que el aula existe con la clave compuesta completa
         cur.execute("""
-            SELECT ID_AULA, ID_SEDE, ID_INSTITUCION 
+            SELECT ID_AULA, ID_SEDE, ID_INSTITUCION, ID_TUTOR 
             FROM AULA 
             WHERE ID_AULA = :1 
             AND ID_SEDE = :2 
@@ -422,8 +426,13 @@ def asignar_tutor_a_aula(payload: AsignarTutorRequest):
                 status_code=500,
                 detail="No se pudo actualizar el aula"
             )
+        registro_sync.anotar(cur, "AULA", payload.id_aula)
 
         conn.commit()
+        # la semana cambia tanto para el tutor anterior como para el nuevo
+        semana_tutor.invalidar(aula[3], payload.id_tutor)
+        referencia.limpiar()
+        resumen_admin.marcar(payload.id_sede, payload.id_institucion)
 
         mensaje = f"Tutor asignado exitosamente" if payload.id_tutor else "Tutor desasignado exitosamente"
         logger.info(mensaje)
@@ -3,12 +3,13 @@ from fastapi import APIRouter, HTTPException
 import oracledb
 import logging
 from ..db import get_conn
+from ..perfilado import RutaPerfilable
 from ..schemas import LoginRequest, LoginResponse
 from ..utils import create_token_for_user
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(prefix="/auth", tags=["auth"], route_class=RutaPerfilable)
 
 @router.post("/login", response_model=LoginResponse)
 def login(payload: LoginRequest):
@@ -45,7 +46,7 @@ def login(payload: LoginRequest):
             raise HTTPException(status_code=401, detail="Usuario o contraseña incorrectos")
 
         # crear token JWT (payload mínimo)
-        token = create_token_for_user(id_persona, nombre)
+        token = create_token_for_user(id_persona, nombre, rol)
         
         logger.info(f"Login exitoso para: {nombre} (ID: {id_persona})")
 
@@ -0,0 +1,154 @@
+# app/routers/bootstrap.py
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+import hashlib
+import json
+import logging
+import oracledb
+from ..cache import referencia
+from ..db import get_conn
+from ..perfilado import RutaPerfilable
+from ..utils import get_current_user
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["bootstrap"], route_class=RutaPerfilable)
+
+# Versión del formato del payload: subirla si cambian las colecciones o sus
+# columnas, así el cliente sabe que no puede usar lo que tenga guardado.
+FORMATO = 1
+
+ROLES_ADMIN = ("ADMINISTRADOR", "ADMINISTRATIVO")
+
+# colección -> (columnas del payload, SELECT con esas columnas en ese orden)
+# Los filtros {aulas} limitan al tutor: solo sus aulas y lo que cuelga de ellas.
+_AULAS_TUTOR = """
+    SELECT a.ID_AULA, a.ID_SEDE, a.ID_INSTITUCION
+    FROM AULA a
+    JOIN TUTOR t ON t.ID_TUTOR = a.ID_TUTOR
+    WHERE t.ID_PERSONA = :id_persona
+"""
+
+COLECCIONES = {
+    "instituciones": (
+        ["id_institucion", "nombre", "jornada", "duracion_hora"],
+        """
+        SELECT i.ID_INSTITUCION, i.NOMBRE, i.JORNADA, i.DURACIONHORA
+        FROM INSTITUCION i
+        {filtro}
+        ORDER BY i.ID_INSTITUCION
+        """,
+        "WHERE i.ID_INSTITUCION IN (SELECT ID_INSTITUCION FROM ({aulas}))",
+    ),
+    "sedes": (
+        ["id_sede", "id_institucion", "nombre_sede"],
+        """
+        SELECT s.ID_SEDE, s.ID_INSTITUCION, s.NOMBRE_SEDE
+        FROM SEDE s
+        {filtro}
+        ORDER BY s.ID_INSTITUCION, s.ID_SEDE
+        """,
+        "WHERE (s.ID_SEDE, s.ID_INSTITUCION) IN (SELECT ID_SEDE, ID_INSTITUCION FROM ({aulas}))",
+    ),
+    "programas": (
+        ["id_programa", "tipo"],
+        "SELECT ID_PROGRAMA, TIPO FROM PROGRAMA {filtro} ORDER BY ID_PROGRAMA",
+        "",
+    ),
+    "aulas": (
+        ["id_aula", "id_sede", "id_institucion", "nombre_aula", "grado", "id_programa", "id_tutor"],
+        """
+        SELECT a.ID_AULA, a.ID_SEDE, a.ID_INSTITUCION, a.NOMBRE_AULA, a.GRADO, a.ID_PROGRAMA, a.ID_TUTOR
+        FROM AULA a
+        {filtro}
+        ORDER BY a.ID_AULA
+        """,
+        "WHERE (a.ID_AULA, a.ID_SEDE, a.ID_INSTITUCION) IN ({aulas})",
+    ),
+    "horarios": (
+        ["id_horario", "id_aula", "id_sede", "id_institucion", "dia", "hora_inicio", "hora_fin"],
+        """
+        SELECT h.ID_HORARIO, h.ID_AULA, h.ID_SEDE, h.ID_INSTITUCION, h.DIA, h.HORA_INICIO, h.HORA_FIN
+        FROM HORARIO h
+        {filtro}
+        ORDER BY h.ID_HORARIO
+        """,
+        "WHERE (h.ID_AULA, h.ID_SEDE, h.ID_INSTITUCION) IN ({aulas})",
+    ),
+    # solo para roles administrativos
+    "personas": (
+        ["id_persona", "nombre", "rol", "correo", "id_tutor"],
+        """
+        SELECT p.ID_PERSONA, p.NOMBRE, p.ROL, p.CORREO, t.ID_TUTOR
+        FROM PERSONA p
+        LEFT JOIN TUTOR t ON t.ID_PERSONA = p.ID_PERSONA
+        ORDER BY p.ID_PERSONA
+        """,
+        None,
+    ),
+}
+
+
+def _armar(rol: str, id_persona: int) -> dict:
+    """Payload de bootstrap del rol: cada colección como {"columnas", "filas"}."""
+    es_admin = rol in ROLES_ADMIN
+    payload = {"formato": FORMATO, "rol": rol}
+    conn = get_conn()
+    cur = conn.cursor()
+    try:
+        for nombre, (columnas, sql, filtro_tutor) in COLECCIONES.items():
+            if filtro_tutor is None and not es_admin:
+                continue
+            if es_admin or not filtro_tutor:
+                cur.execute(sql.format(filtro=""))
+            else:
+                cur.execute(sql.format(filtro=filtro_tutor.format(aulas=_AULAS_TUTOR)), {"id_persona": id_persona})
+            payload[nombre] = {"columnas": columnas, "filas": [list(r) for r in cur.fetchall()]}
+    finally:
+        cur.close()
+        conn.close()
+    return payload
+
+
+def _coincide(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidatos = [c.strip() for c in if_none_match.split(",")]
+    # una validación débil (W/"...") también vale para GET
+    return "*" in candidatos or etag in [c[2:] if c.startswith("W/") else c for c in candidatos]
+
+
+@router.get("/bootstrap")
+def bootstrap(request: Request, user: dict = Depends(get_current_user)):
+    """
+    Lo que el SPA necesita después del login para llenar los selectores, en
+    una respuesta: instituciones, sedes, programas, aulas y horarios (los del
+    tutor si el rol es TUTOR) y, para roles administrativos, personas.
+
+    Cada colección viene como {"columnas": [...], "filas": [[...], ...]} y
+    `formato` indica la versión de esa forma. Sale de la caché de datos de
+    referencia con un ETag: si el cliente manda If-None-Match con el mismo
+    valor recibe 304 sin cuerpo.
+    """
+    rol = user.get("rol")
+    if rol not in ROLES_ADMIN and rol != "TUTOR":
+        raise HTTPException(status_code=403, detail="No tiene permisos para esta operación")
+    id_persona = int(user["sub"])
+    clave = rol if rol in ROLES_ADMIN else (rol, id_persona)
+
+    entrada = referencia.get(clave)
+    if entrada is None:
+        try:
+            payload = _armar(rol, id_persona)
+        except oracledb.DatabaseError as e:
+            logger.error(f"Error de base de datos al armar el bootstrap: {str(e)}")
+            raise HTTPException(status_code=500, detail="Error al consultar la base de datos")
+        cuerpo = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+        # el ETag sale del contenido: dos workers con los mismos datos dan el mismo
+        entrada = (f'"{hashlib.sha256(cuerpo).hexdigest()[:32]}"', cuerpo)
+        referencia.set(clave, entrada)
+
+    etag, cuerpo = entrada
+    cabeceras = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _coincide(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cabeceras)
+    return Response(content=cuerpo, media_type="application/json", headers=cabeceras)
@@ -3,11 +3,12 @@ from fastapi import APIRouter,HTTPException
 import oracledb
 import logging
 from ..db import get_conn
+from ..perfilado import RutaPerfilable
 from ..schemas import ComponenteCreate
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/componentes", tags=["componentes"])
+router = APIRouter(prefix="/componentes", tags=["componentes"], route_class=RutaPerfilable)
 
 @router.post("/", status_code=201)
 def create_componente(payload: ComponenteCreate):
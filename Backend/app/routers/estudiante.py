@@ -3,14 +3,16 @@ from fastapi import APIRouter, HTTPException, Depends
 from typing import List, Optional
 import oracledb
 import logging
+from .. import registro_sync, resumen_admin
 from ..db import get_conn
+from ..perfilado import RutaPerfilable
 from ..schemas import ActualizarScoreFinalRequest, CambiarAulaRequest, EstudianteCreate, EstudianteInfoRead, EstudianteRead
 from ..utils import get_current_user
 
 # Configurar logging
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/estudiantes", tags=["estudiantes"])
+router = APIRouter(prefix="/estudiantes", tags=["estudiantes"], route_class=RutaPerfilable)
 
 
 @router.post("/", response_model=EstudianteRead)
@@ -32,8 +34,10 @@ def create_estudiante(payload: EstudianteCreate):
             INSERT INTO estudiante (id_estudiante, tipo_documento, nombre, grado, score_inicial, id_aula, id_sede, id_institucion)
             VALUES (:1, :2, :3, :4, :5, :6, :7, :8)
         """, (payload.id_estudiante, payload.tipo_documento, payload.nombre, payload.grado, payload.score_inicial, payload.id_aula, payload.id_sede, payload.id_institucion))
+        registro_sync.anotar(cur, "ESTUDIANTE", payload.id_estudiante)
         
         conn.commit()
+        resumen_admin.marcar(payload.id_sede, payload.id_institucion)
         
         #TIPO_DOCUMENTO, NOMBRE, GRADO, SCORE_INICIAL, ID_AULA, ID_SEDE, ID_INSTITUCION
 
@@ -262,14 +266,15 @@ def cambiar_aula_estudiante(id_estudiante: int, payload: CambiarAulaRequest):
         
         logger.info(f"Cambiando estudiante {id_estudiante} a aula {payload.id_aula}")
         
-        # Verificar que el estudiante existe
+        # Verificar que el estudiante existe (y de qué sede sale)
         cur.execute("""
-            SELECT id_estudiante 
+            SELECT id_estudiante, id_sede, id_institucion
             FROM estudiante 
             WHERE id_estudiante = :1
         """, (id_estudiante,))
         
-        if not cur.fetchone():
+        anterior = cur.fetchone()
+        if not anterior:
             logger.error(f"Estudiante {id_estudiante} no encontrado")
             raise HTTPException(
                 status_code=404, 
@@ -302,8 +307,11 @@ def cambiar_aula_estudiante(id_estudiante: int, payload: CambiarAulaRequest):
                 status_code=500,
                 detail="No se pudo actualizar el estudiante"
             )
+        registro_sync.anotar(cur, "ESTUDIANTE", id_estudiante)
         
         conn.commit()
+        resumen_admin.marcar(anterior[1], anterior[2])
+        resumen_admin.marcar(payload.id_sede, payload.id_institucion)
         
         logger.info(f"Estudiante {id_estudiante} cambiado exitosamente a aula {payload.id_aula}")
         
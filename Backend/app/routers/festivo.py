@@ -0,0 +1,164 @@
+# app/routers/festivo.py
+from fastapi import APIRouter, HTTPException
+import oracledb
+import logging
+from datetime import date
+from typing import List
+from .. import calendario
+from ..db import get_conn
+from ..perfilado import RutaPerfilable
+from ..schemas import FestivoCreate, FestivoRead
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/festivos", tags=["festivos"], route_class=RutaPerfilable)
+
+
+@router.get("/", response_model=List[FestivoRead])
+def listar_festivos():
+    """
+    Lista los festivos ordenados por fecha.
+    """
+    conn = None
+    cur = None
+
+    try:
+        conn = get_conn()
+        cur = conn.cursor()
+
+        cur.execute("""
+            SELECT ID_FESTIVO, FECHA_FESTIVO, DESCRIPCION
+            FROM FESTIVO
+            ORDER BY FECHA_FESTIVO
+        """)
+
+        return [
+            {"id_festivo": r[0], "fecha_festivo": r[1].date(), "descripcion": r[2]}
+            for r in cur.fetchall()
+        ]
+
+    except oracledb.DatabaseError as e:
+        logger.error(f"Error de base de datos al listar festivos: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error al consultar la base de datos")
+
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+
+
+@router.post("/", response_model=FestivoRead, status_code=201)
+def crear_festivo(payload: FestivoCreate):
+    """
+    Crea un festivo (fecha YYYY-MM-DD) y retira las sesiones de clase de ese día.
+    """
+    conn = None
+    cur = None
+
+    try:
+        fecha = date.fromisoformat(payload.fecha_festivo)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato de fecha inválido. Use YYYY-MM-DD")
+
+    try:
+        conn = get_conn()
+        cur = conn.cursor()
+
+        logger.info(f"Creando festivo {fecha}")
+
+        id_var = cur.var(int)
+        cur.execute("""
+            INSERT INTO FESTIVO (FECHA_FESTIVO, DESCRIPCION)
+            VALUES (:1, :2)
+            RETURNING ID_FESTIVO INTO :3
+        """, (fecha, payload.descripcion, id_var))
+
+        new_id = id_var.getvalue()
+        if isinstance(new_id, (list, tuple)):
+            new_id = new_id[0]
+
+        borradas = calendario.quitar_sesiones_fecha(conn, fecha)
+
+        conn.commit()
+
+        logger.info(f"Festivo {new_id} creado; {borradas} sesiones retiradas")
+
+        return {"id_festivo": int(new_id), "fecha_festivo": fecha, "descripcion": payload.descripcion}
+
+    except oracledb.DatabaseError as e:
+        if conn:
+            conn.rollback()
+        logger.error(f"Error de base de datos al crear festivo: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error en la base de datos")
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        logger.error(f"Error inesperado al crear festivo: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Error interno del servidor")
+
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+
+
+@router.delete("/{id_festivo}")
+def eliminar_festivo(id_festivo: int):
+    """
+    Elimina un festivo y vuelve a materializar las sesiones de ese día.
+    """
+    conn = None
+    cur = None
+
+    try:
+        conn = get_conn()
+        cur = conn.cursor()
+
+        logger.info(f"Eliminando festivo {id_festivo}")
+
+        fecha_var = cur.var(oracledb.DATETIME)
+        cur.execute("""
+            DELETE FROM FESTIVO WHERE ID_FESTIVO = :1
+            RETURNING FECHA_FESTIVO INTO :2
+        """, (id_festivo, fecha_var))
+
+        if cur.rowcount == 0:
+            raise HTTPException(status_code=404, detail="Festivo no encontrado")
+
+        fecha = fecha_var.getvalue()
+        if isinstance(fecha, (list, tuple)):
+            fecha = fecha[0]
+
+        creadas = calendario.materializar(conn, fecha=fecha)
+
+        conn.commit()
+
+        logger.info(f"Festivo {id_festivo} eliminado; {creadas} sesiones restauradas")
+
+        return {"mensaje": "Festivo eliminado correctamente", "sesiones_restauradas": creadas}
+
+    except HTTPException:
+        if conn:
+            conn.rollback()
+        raise
+
+    except oracledb.DatabaseError as e:
+        if conn:
+            conn.rollback()
+        logger.error(f"Error de base de datos al eliminar festivo: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error en la base de datos")
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        logger.error(f"Error inesperado al eliminar festivo: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Error interno del servidor")
+
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
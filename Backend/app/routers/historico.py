@@ -0,0 +1,86 @@
+# app/routers/historico.py
+from fastapi import APIRouter, HTTPException
+import logging
+from datetime import date
+from typing import List, Optional
+from .. import archivo
+from ..schemas import AgregadoHistorico, NotaArchivada, PeriodoArchivado
+from ..perfilado import RutaPerfilable
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/historico", tags=["historico"], route_class=RutaPerfilable)
+
+
+@router.get("/periodos", response_model=List[PeriodoArchivado])
+def listar_periodos_archivados():
+    """Periodos cerrados que ya están en el archivo local (leídos de sus manifest)."""
+    res = []
+    for a in archivo.listar():
+        m = a.manifest
+        res.append({
+            "id_periodo": m["id_periodo"],
+            "fecha_inicio": m["fecha_inicio"],
+            "fecha_fin": m["fecha_fin"],
+            "id_programa": m["id_programa"],
+            "creado": m["creado"],
+            "filas_tutor": m["tablas"]["tutor"]["filas"],
+            "filas_estudiante": m["tablas"]["estudiante"]["filas"],
+            "filas_nota": m["tablas"]["nota"]["filas"],
+        })
+    return res
+
+
+@router.get("/asistencia", response_model=List[AgregadoHistorico])
+def asistencia_historica(
+    tabla: str = "estudiante",
+    agrupar: Optional[str] = None,
+    id_periodo: Optional[int] = None,
+    id_institucion: Optional[int] = None,
+    id_sede: Optional[int] = None,
+    id_aula: Optional[int] = None,
+    id_tutor: Optional[int] = None,
+    id_estudiante: Optional[int] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+):
+    """
+    Asistencia de periodos archivados (multi-año) agrupada por periodo,
+    institucion, sede, aula, tutor o estudiante (según la tabla) y mes.
+    """
+    if tabla not in ("estudiante", "tutor"):
+        raise HTTPException(status_code=400, detail="tabla debe ser 'estudiante' o 'tutor'")
+
+    dimensiones = [d.strip() for d in agrupar.split(",") if d.strip()] if agrupar else []
+    filtros = {
+        "id_institucion": id_institucion,
+        "id_sede": id_sede,
+        "id_aula": id_aula,
+        "id_tutor": id_tutor,
+        "id_estudiante": id_estudiante,
+        "desde": desde,
+        "hasta": hasta,
+    }
+
+    try:
+        return archivo.agregar_asistencia(tabla, dimensiones, filtros, id_periodo=id_periodo)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/notas", response_model=List[NotaArchivada])
+def notas_historicas(
+    id_estudiante: Optional[int] = None,
+    id_componente: Optional[int] = None,
+    id_tutor: Optional[int] = None,
+    id_periodo: Optional[int] = None,
+    limit: int = 1000,
+):
+    """Notas de periodos archivados."""
+    filtros = {"id_estudiante": id_estudiante, "id_componente": id_componente, "id_tutor": id_tutor}
+    try:
+        return archivo.notas(filtros, id_periodo=id_periodo, limite=limit)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
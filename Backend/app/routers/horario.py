@@ -3,8 +3,11 @@ from fastapi import APIRouter, HTTPException, Depends
 import oracledb
 import logging
 from typing import List, Optional
-from datetime import datetime, time
-from ..db import get_conn
+from datetime import date, datetime, time
+from .. import calendario, registro_sync, resumen_admin
+from ..cache import referencia, semana_tutor
+from ..db import armar_update, get_conn
+from ..perfilado import RutaPerfilable
 from ..schemas import (
     HorarioCreate, 
     HorarioRead, 
@@ -14,27 +17,22 @@ from ..schemas import (
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/horarios", tags=["Horarios"])
+router = APIRouter(prefix="/horarios", tags=["Horarios"], route_class=RutaPerfilable)
 
+# Días en el orden en que se muestran (la semana escolar va de Lunes a Sábado)
+DIAS_SEMANA = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado"]
 
-def validar_horario_negocio(
+
+def validar_reglas_horario(
     grado: str,
     dia: str,
     hora_inicio: str,
     hora_fin: str,
-    duracion_minutos: int,
-    id_aula: int,
-    conn,
-    exclude_horario_id: Optional[int] = None
-):
+    duracion_minutos: int
+) -> int:
     """
-    Valida las reglas de negocio para horarios según el documento.
-    
-    Reglas:
-    - Horarios entre 06:00 y 18:00
-    - 4° y 5°: Lunes-Viernes, máx 2 horas semanales (INSIDECLASSROOM)
-    - 9° y 10°: Lunes-Sábado, máx 3 horas semanales (OUTSIDECLASSROOM)
-    - Duraciones válidas: 40, 45, 50, 55, 60 minutos (todas = 1 hora para reportes)
+    Reglas de un horario que no dependen de la base (grado, duración, día y
+    rango 06:00 - 18:00). Devuelve el grado como entero.
     """
     
     # Validar grado
@@ -50,8 +48,8 @@ def validar_horario_negocio(
         )
     
     # Validar día según grado
-    dias_validos_primaria = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes"]
-    dias_validos_secundaria = dias_validos_primaria + ["Sábado"]
+    dias_validos_primaria = DIAS_SEMANA[:5]
+    dias_validos_secundaria = DIAS_SEMANA
     
     if grado_int in [4, 5]:
         if dia not in dias_validos_primaria:
@@ -87,6 +85,30 @@ def validar_horario_negocio(
             
     except ValueError:
         raise HTTPException(400, "Formato de hora inválido. Use HH:MM")
+
+    return grado_int
+
+
+def validar_horario_negocio(
+    grado: str,
+    dia: str,
+    hora_inicio: str,
+    hora_fin: str,
+    duracion_minutos: int,
+    id_aula: int,
+    conn,
+    exclude_horario_id: Optional[int] = None
+):
+    """
+    Valida las reglas de negocio para horarios según el documento.
+    
+    Reglas:
+    - Horarios entre 06:00 y 18:00
+    - 4° y 5°: Lunes-Viernes, máx 2 horas semanales (INSIDECLASSROOM)
+    - 9° y 10°: Lunes-Sábado, máx 3 horas semanales (OUTSIDECLASSROOM)
+    - Duraciones válidas: 40, 45, 50, 55, 60 minutos (todas = 1 hora para reportes)
+    """
+    grado_int = validar_reglas_horario(grado, dia, hora_inicio, hora_fin, duracion_minutos)
     
     # Calcular horas totales del aula (excluyendo el horario actual si es update)
     cur = conn.cursor()
@@ -142,8 +164,11 @@ def listar_horarios(
         if id_tutor:
             # Obtener horarios del tutor a través de sus aulas
             logger.info(f"Listando horarios del tutor {id_tutor}")
+            # El join es por la PK completa del aula, así que no hay filas
+            # repetidas (no hace falta DISTINCT) y el límite se aplica
+            # después de ordenar.
             cur.execute("""
-                SELECT DISTINCT h.ID_HORARIO, h.DIA, h.HORA_INICIO, h.HORA_FIN,
+                SELECT h.ID_HORARIO, h.DIA, h.HORA_INICIO, h.HORA_FIN,
                        h.ID_AULA, h.ID_SEDE, h.ID_INSTITUCION,
                        a.GRADO, a.NOMBRE_AULA
                 FROM HORARIO h
@@ -151,7 +176,6 @@ def listar_horarios(
                     AND h.ID_SEDE = a.ID_SEDE 
                     AND h.ID_INSTITUCION = a.ID_INSTITUCION
                 WHERE a.ID_TUTOR = :1
-                AND ROWNUM <= :2
                 ORDER BY 
                     CASE h.DIA
                         WHEN 'Lunes' THEN 1
@@ -162,6 +186,7 @@ def listar_horarios(
                         WHEN 'Sábado' THEN 6
                     END,
                     h.HORA_INICIO
+                FETCH FIRST :2 ROWS ONLY
             """, (id_tutor, limit))
             
         elif id_aula:
@@ -197,8 +222,8 @@ def listar_horarios(
                 INNER JOIN AULA a ON h.ID_AULA = a.ID_AULA 
                     AND h.ID_SEDE = a.ID_SEDE 
                     AND h.ID_INSTITUCION = a.ID_INSTITUCION
-                WHERE ROWNUM <= :1
                 ORDER BY h.ID_HORARIO
+                FETCH FIRST :1 ROWS ONLY
             """, (limit,))
         
         rows = cur.fetchall()
@@ -294,7 +319,7 @@ def crear_horario(payload: HorarioCreate):
         
         # Obtener información del aula para validaciones
         cur.execute("""
-            SELECT GRADO, ID_SEDE, ID_INSTITUCION 
+            SELECT GRADO, ID_SEDE, ID_INSTITUCION, ID_TUTOR 
             FROM AULA 
             WHERE ID_AULA = :1
         """, (payload.id_aula,))
@@ -304,7 +329,7 @@ def crear_horario(payload: HorarioCreate):
         if not aula_row:
             raise HTTPException(404, f"Aula {payload.id_aula} no encontrada")
         
-        grado, id_sede, id_institucion = aula_row
+        grado, id_sede, id_institucion, id_tutor = aula_row
         
         # Validar reglas de negocio
         validar_horario_negocio(
@@ -341,7 +366,14 @@ def crear_horario(payload: HorarioCreate):
         if isinstance(new_id, (list, tuple)):
             new_id = new_id[0]
         
+        # Sesiones concretas del nuevo horario (desde hoy, misma transacción)
+        calendario.materializar(conn, id_horario=int(new_id), desde=date.today())
+        registro_sync.anotar(cur, "HORARIO", new_id)
+        
         conn.commit()
+        semana_tutor.invalidar(id_tutor)
+        referencia.limpiar()
+        resumen_admin.marcar(id_sede, id_institucion)
         
         logger.info(f"Horario {new_id} creado exitosamente")
         
@@ -407,9 +439,11 @@ def actualizar_horario(id_horario: int, payload: HorarioUpdate):
         
         # Obtener horario actual
         cur.execute("""
-            SELECT h.ID_AULA, a.GRADO, h.ID_SEDE, h.ID_INSTITUCION
+            SELECT h.ID_AULA, a.GRADO, h.ID_SEDE, h.ID_INSTITUCION, a.ID_TUTOR
             FROM HORARIO h
             INNER JOIN AULA a ON h.ID_AULA = a.ID_AULA
+                AND h.ID_SEDE = a.ID_SEDE
+                AND h.ID_INSTITUCION = a.ID_INSTITUCION
             WHERE h.ID_HORARIO = :1
         """, (id_horario,))
         
@@ -417,29 +451,15 @@ def actualizar_horario(id_horario: int, payload: HorarioUpdate):
         if not row:
             raise HTTPException(404, "Horario no encontrado")
         
-        id_aula, grado, id_sede, id_institucion = row
+        id_aula, grado, id_sede, id_institucion, id_tutor = row
         
         # Preparar campos a actualizar
-        set_clauses = []
-        binds = {}
-        idx = 1
-        
-        if payload.dia is not None:
-            set_clauses.append(f"DIA = :{idx}")
-            binds[str(idx)] = payload.dia
-            idx += 1
-            
-        if payload.hora_inicio is not None:
-            set_clauses.append(f"HORA_INICIO = :{idx}")
-            binds[str(idx)] = payload.hora_inicio
-            idx += 1
-            
-        if payload.hora_fin is not None:
-            set_clauses.append(f"HORA_FIN = :{idx}")
-            binds[str(idx)] = payload.hora_fin
-            idx += 1
-        
-        if not set_clauses:
+        sql, binds = armar_update(
+            "HORARIO",
+            [("DIA", payload.dia), ("HORA_INICIO", payload.hora_inicio), ("HORA_FIN", payload.hora_fin)],
+            [("ID_HORARIO", id_horario)],
+        )
+        if sql is None:
             raise HTTPException(400, "No hay campos para actualizar")
         
         # Validar con los nuevos valores
@@ -474,15 +494,18 @@ def actualizar_horario(id_horario: int, payload: HorarioUpdate):
         )
         
         # Actualizar
-        binds[str(idx)] = id_horario
-        sql = f"UPDATE HORARIO SET {', '.join(set_clauses)} WHERE ID_HORARIO = :{idx}"
-        
         cur.execute(sql, binds)
         
         if cur.rowcount == 0:
             raise HTTPException(404, "Horario no encontrado")
         
+        # Las sesiones pasadas se conservan; las futuras siguen el nuevo horario
+        calendario.rehacer_horario(conn, id_horario, desde=date.today())
+        registro_sync.anotar(cur, "HORARIO", id_horario)
+        
         conn.commit()
+        semana_tutor.invalidar(id_tutor)
+        referencia.limpiar()
         
         logger.info(f"Horario {id_horario} actualizado exitosamente")
         
@@ -531,8 +554,13 @@ def eliminar_horario(id_horario: int):
         
         if cur.rowcount == 0:
             raise HTTPException(404, "Horario no encontrado")
+        registro_sync.anotar(cur, "HORARIO", id_horario)
         
         conn.commit()
+        # No sabemos de qué tutor era sin otra consulta; borrar es poco frecuente
+        semana_tutor.limpiar()
+        referencia.limpiar()
+        resumen_admin.marcar()
         
         logger.info(f"Horario {id_horario} eliminado exitosamente")
         
@@ -1,12 +1,18 @@
 # backend/app/routers/institucion.py
-from fastapi import APIRouter, HTTPException, logger
+from fastapi import APIRouter, HTTPException
 from typing import List
 
+import logging
 import oracledb
+from .. import resumen_admin
+from ..cache import referencia
 from ..db import get_conn
+from ..perfilado import RutaPerfilable
 from ..schemas import InstitucionCreate, InstitucionRead
 
-router = APIRouter(prefix="/instituciones", tags=["instituciones"])
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/instituciones", tags=["instituciones"], route_class=RutaPerfilable)
 
 @router.post("/", response_model=InstitucionRead, status_code=201)
 def crear_institucion(payload: InstitucionCreate):
@@ -15,6 +21,7 @@ def crear_institucion(payload: InstitucionCreate):
     try:
         cur.execute("INSERT INTO INSTITUCION (NOMBRE, DURACIONHORA, JORNADA) VALUES (:1, :2, :3)", (payload.nombre, payload.duracion_hora, payload.jornada))
         conn.commit()
+        referencia.limpiar()
         # obtener id creado (asumiendo ID_AUTOINCREMENTAL o SEQUENCE)
         cur2 = conn.cursor()
         cur2.execute("""
@@ -65,6 +72,8 @@ def eliminar_institucion(id_institucion: int):
             raise HTTPException(status_code=404, detail="Institución no encontrada")
         
         conn.commit()
+        referencia.limpiar()
+        resumen_admin.marcar()
         
         logger.info(f"Institución {id_institucion} eliminada exitosamente")
         
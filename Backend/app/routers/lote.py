@@ -0,0 +1,183 @@
+# app/routers/lote.py
+from fastapi import APIRouter, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from urllib.parse import urlencode
+import asyncio
+import json
+import logging
+import os
+from typing import List
+import oracledb
+from .. import db
+from ..perfilado import RutaPerfilable
+from ..schemas import LoteRequest, LoteResultado
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Lote de peticiones (POST /batch)
+# -------------------------------
+# Cada sub-petición pasa por la app completa (middleware, auth, validación)
+# como si hubiera llegado por HTTP, con el Authorization del lote, pero sin
+# otra conexión HTTP ni otro parseo del token en el cliente. Las lecturas
+# seguidas corren en paralelo (hasta LOTE_CONCURRENCIA a la vez); cada
+# escritura espera a que termine lo anterior, así el orden del lote se respeta.
+#
+# Con transaccion=true todo corre en orden sobre una sola conexión y se
+# confirma al final: si alguna responde >= 400 se deshace todo y las
+# siguientes no se ejecutan (424). Es decir, un resultado >= 400 en un lote
+# transaccional significa que no quedó nada escrito.
+
+LOTE_MAX_PETICIONES = int(os.getenv("LOTE_MAX_PETICIONES", "25"))
+LOTE_CONCURRENCIA = int(os.getenv("LOTE_CONCURRENCIA", "4"))
+
+METODOS = {"GET", "POST", "PUT", "PATCH", "DELETE"}
+CABECERAS_HEREDADAS = (b"authorization", b"accept-language")
+NO_EJECUTADA = {"detail": "No se ejecutó: falló una petición anterior del lote"}
+
+router = APIRouter(tags=["lote"], route_class=RutaPerfilable)
+
+
+def _validar(peticiones):
+    if len(peticiones) > LOTE_MAX_PETICIONES:
+        raise HTTPException(
+            status_code=413, detail=f"El lote admite hasta {LOTE_MAX_PETICIONES} peticiones"
+        )
+    for i, peticion in enumerate(peticiones):
+        ruta = peticion.url.split("?", 1)[0]
+        if peticion.metodo.upper() not in METODOS:
+            raise HTTPException(status_code=400, detail=f"Petición {i}: método {peticion.metodo} no permitido")
+        if not ruta.startswith("/") or ruta.startswith("//"):
+            raise HTTPException(status_code=400, detail=f"Petición {i}: la url debe ser una ruta de la API")
+        if ruta.rstrip("/") == "/batch":
+            raise HTTPException(status_code=400, detail=f"Petición {i}: no se permiten lotes anidados")
+
+
+async def _despachar(request: Request, peticion) -> dict:
+    """Corre una sub-petición contra la app (ASGI) y devuelve {"estado", "cuerpo"}."""
+    ruta, _, query = peticion.url.partition("?")
+    if peticion.params:
+        query = "&".join(q for q in (query, urlencode(peticion.params, doseq=True)) if q)
+    cuerpo = b"" if peticion.cuerpo is None else json.dumps(peticion.cuerpo).encode()
+    cabeceras = [(k, v) for k, v in request.scope["headers"] if k in CABECERAS_HEREDADAS]
+    cabeceras += [(b"content-type", b"application/json"), (b"content-length", str(len(cuerpo)).encode())]
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": "1.1",
+        "method": peticion.metodo.upper(),
+        "scheme": request.scope.get("scheme", "http"),
+        "path": ruta,
+        "raw_path": ruta.encode(),
+        "root_path": request.scope.get("root_path", ""),
+        "query_string": query.encode(),
+        "headers": cabeceras,
+        "client": request.scope.get("client"),
+        "server": request.scope.get("server"),
+    }
+
+    leido = False
+    terminada = asyncio.Event()
+    estado = {"codigo": 500, "tipo": b""}
+    partes = []
+
+    async def recibir():
+        nonlocal leido
+        if not leido:
+            leido = True
+            return {"type": "http.request", "body": cuerpo, "more_body": False}
+        # como un cliente que sigue conectado hasta recibir la respuesta
+        await terminada.wait()
+        return {"type": "http.disconnect"}
+
+    async def enviar(mensaje):
+        if mensaje["type"] == "http.response.start":
+            estado["codigo"] = mensaje["status"]
+            estado["tipo"] = dict(mensaje.get("headers") or []).get(b"content-type", b"")
+        elif mensaje["type"] == "http.response.body":
+            partes.append(mensaje.get("body", b""))
+            if not mensaje.get("more_body"):
+                terminada.set()
+
+    try:
+        await request.app(scope, recibir, enviar)
+    except Exception as e:
+        # el middleware de errores ya respondió 500 y vuelve a lanzar la excepción
+        logger.error(f"Error en sub-petición {peticion.metodo} {peticion.url} del lote: {str(e)}")
+    finally:
+        terminada.set()
+
+    datos = b"".join(partes)
+    if not datos:
+        contenido = None
+    elif estado["tipo"].startswith(b"application/json"):
+        contenido = json.loads(datos)
+    else:
+        contenido = datos.decode("utf-8", errors="replace")
+    return {"estado": estado["codigo"], "cuerpo": contenido}
+
+
+async def _sin_transaccion(request: Request, peticiones) -> list:
+    semaforo = asyncio.Semaphore(LOTE_CONCURRENCIA)
+
+    async def leer(peticion):
+        async with semaforo:
+            return await _despachar(request, peticion)
+
+    resultados = []
+    lecturas = []
+    for peticion in peticiones:
+        if peticion.metodo.upper() == "GET":
+            lecturas.append(leer(peticion))
+            continue
+        if lecturas:
+            resultados += await asyncio.gather(*lecturas)
+            lecturas = []
+        # en su propia tarea: cada sub-petición tiene su traza y su contexto
+        resultados.append(await asyncio.create_task(_despachar(request, peticion)))
+    if lecturas:
+        resultados += await asyncio.gather(*lecturas)
+    return resultados
+
+
+async def _con_transaccion(request: Request, peticiones) -> list:
+    try:
+        compartida = await run_in_threadpool(db.abrir_transaccion)
+    except oracledb.DatabaseError as e:
+        logger.error(f"Error de base de datos al abrir la transacción del lote: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error en la base de datos")
+
+    resultados = []
+    fallo = False
+    try:
+        with db.en_transaccion(compartida):
+            for peticion in peticiones:
+                if fallo:
+                    resultados.append({"estado": 424, "cuerpo": NO_EJECUTADA})
+                    continue
+                resultado = await asyncio.create_task(_despachar(request, peticion))
+                resultados.append(resultado)
+                fallo = resultado["estado"] >= 400 or compartida.fallida
+    finally:
+        try:
+            await run_in_threadpool(db.cerrar_transaccion, compartida, not fallo)
+        except oracledb.DatabaseError as e:
+            logger.error(f"Error de base de datos al confirmar el lote: {str(e)}")
+            raise HTTPException(status_code=500, detail="No se pudo confirmar el lote")
+    return resultados
+
+
+@router.post("/batch", response_model=List[LoteResultado])
+async def ejecutar_lote(lote: LoteRequest, request: Request):
+    """
+    Ejecuta varias peticiones a la API en una sola ida y devuelve un resultado
+    por petición, en el mismo orden: {"id", "estado", "cuerpo"}. Cada una
+    lleva el Authorization del lote y pasa por los mismos permisos que si
+    llegara sola. Máximo LOTE_MAX_PETICIONES por lote.
+    """
+    _validar(lote.peticiones)
+    if lote.transaccion:
+        resultados = await _con_transaccion(request, lote.peticiones)
+    else:
+        resultados = await _sin_transaccion(request, lote.peticiones)
+    return [{"id": p.id, **r} for p, r in zip(lote.peticiones, resultados)]
@@ -3,12 +3,13 @@ from fastapi import APIRouter, HTTPException
 import oracledb
 import logging
 from app.db import get_conn
+from app.perfilado import RutaPerfilable
 from app.schemas import NotaCreate, NotaResponse, NotaUpdate
 from typing import List
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/notas", tags=["Notas"])
+router = APIRouter(prefix="/notas", tags=["Notas"], route_class=RutaPerfilable)
 
 
 @router.get("/", response_model=List[NotaResponse])
@@ -26,15 +27,16 @@ def listar_notas():
         logger.info("Listando todas las notas")
         
         cur.execute("""
-            SELECT ID_NOTA, ID_ESTUDIANTE, ID_COMPONENTE, CALIFICACION
+            SELECT ID_NOTA, ID_ESTUDIANTE, ID_COMPONENTE, VALOR
             FROM NOTA 
             ORDER BY ID_NOTA
         """)
         
-        res = [dict(zip([x[0].lower() for x in cur.description], r)) 
-               for r in cur.fetchall()]
-        
-        return res
+        # la columna es VALOR; se devuelve también como calificacion
+        return [
+            {"id_nota": r[0], "id_estudiante": r[1], "id_componente": r[2], "valor": r[3], "calificacion": r[3]}
+            for r in cur.fetchall()
+        ]
         
     except oracledb.DatabaseError as e:
         logger.error(f"Error de base de datos al listar notas: {str(e)}")
@@ -71,20 +73,23 @@ def crear_nota(nota: NotaCreate):
         
         logger.info(f"Creando nota para estudiante {nota.id_estudiante}")
         
+        valor = nota.valor if nota.valor is not None else nota.calificacion
+        id_var = cur.var(int)
         cur.execute("""
-            INSERT INTO NOTA (ID_ESTUDIANTE, ID_COMPONENTE, CALIFICACION)
-            VALUES (:1, :2, :3) 
-            RETURNING ID_NOTA INTO :4
-        """, [nota.id_estudiante, nota.id_componente, nota.calificacion,
-              conn.cursor().var(int)])
+            INSERT INTO NOTA (VALOR, ID_ESTUDIANTE, ID_PERIODO, ID_COMPONENTE, ID_TUTOR)
+            VALUES (:1, :2, :3, :4, :5) 
+            RETURNING ID_NOTA INTO :6
+        """, [valor, nota.id_estudiante, nota.id_periodo, nota.id_componente, nota.id_tutor, id_var])
         
-        new_id = cur.getimplicitresults()[0][0]
+        new_id = id_var.getvalue()
+        if isinstance(new_id, (list, tuple)):
+            new_id = new_id[0]
         
         conn.commit()
         
         logger.info(f"Nota {new_id} creada exitosamente")
         
-        return {"id_nota": new_id, **nota.dict()}
+        return {**nota.dict(), "id_nota": new_id, "valor": valor, "calificacion": valor}
         
     except oracledb.IntegrityError as e:
         if conn:
@@ -136,7 +141,7 @@ def actualizar_nota(id_nota: int, nota: NotaUpdate):
         
         cur.execute("""
             UPDATE NOTA 
-            SET ID_ESTUDIANTE = :1, ID_COMPONENTE = :2, CALIFICACION = :3
+            SET ID_ESTUDIANTE = :1, ID_COMPONENTE = :2, VALOR = :3
             WHERE ID_NOTA = :4
         """, [nota.id_estudiante, nota.id_componente, nota.calificacion, id_nota])
         
@@ -148,7 +153,7 @@ def actualizar_nota(id_nota: int, nota: NotaUpdate):
         
         logger.info(f"Nota {id_nota} actualizada exitosamente")
         
-        return {"id_nota": id_nota, **nota.dict()}
+        return {"id_nota": id_nota, **nota.dict(), "valor": nota.calificacion}
         
     except HTTPException:
         if conn:
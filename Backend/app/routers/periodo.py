@@ -2,12 +2,14 @@
 from fastapi import APIRouter, HTTPException
 import oracledb
 import logging
+from .. import calendario
 from ..db import get_conn
+from ..perfilado import RutaPerfilable
 from ..schemas import PeriodoCreate
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/periodos", tags=["periodos"])
+router = APIRouter(prefix="/periodos", tags=["periodos"], route_class=RutaPerfilable)
 
 @router.post("/", status_code=201)
 def create_periodo(payload: PeriodoCreate):
@@ -23,16 +25,26 @@ def create_periodo(payload: PeriodoCreate):
         
         logger.info(f"Creando periodo para programa {payload.id_programa}")
         
+        id_var = cur.var(int)
+        
         cur.execute("""
             INSERT INTO PERIODO (FECHA_INICIO, FECHA_FIN, ID_PROGRAMA) 
             VALUES (TO_DATE(:1, 'YYYY-MM-DD'), TO_DATE(:2, 'YYYY-MM-DD'), :3)
-        """, (payload.fecha_inicio, payload.fecha_fin, payload.id_programa))
+            RETURNING ID_PERIODO INTO :4
+        """, (payload.fecha_inicio, payload.fecha_fin, payload.id_programa, id_var))
+        
+        new_id = id_var.getvalue()
+        if isinstance(new_id, (list, tuple)):
+            new_id = new_id[0]
+        
+        # Expandir los horarios del programa sobre el nuevo periodo
+        sesiones = calendario.materializar(conn, id_periodo=int(new_id))
         
         conn.commit()
         
-        logger.info("Periodo creado exitosamente")
+        logger.info(f"Periodo {new_id} creado exitosamente con {sesiones} sesiones")
         
-        return {"status": "ok"}
+        return {"status": "ok", "id_periodo": int(new_id), "sesiones": sesiones}
         
     except oracledb.IntegrityError as e:
         if conn:
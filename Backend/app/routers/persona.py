@@ -2,12 +2,14 @@
 from fastapi import APIRouter, HTTPException
 import oracledb
 import logging
+from ..cache import referencia
 from ..db import get_conn
+from ..perfilado import RutaPerfilable
 from ..schemas import PersonaCreate, PersonaRead
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/personas", tags=["personas"])
+router = APIRouter(prefix="/personas", tags=["personas"], route_class=RutaPerfilable)
 
 @router.post("/", response_model=PersonaRead)
 def create_persona(payload: PersonaCreate):
@@ -48,6 +50,7 @@ def create_persona(payload: PersonaCreate):
         """, (payload.id_persona, payload.nombre, payload.rol, payload.correo))
         
         conn.commit()
+        referencia.limpiar()
         
         logger.info(f"Persona {payload.id_persona} creada exitosamente")
         
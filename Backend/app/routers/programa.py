@@ -2,12 +2,14 @@
 from fastapi import APIRouter, HTTPException
 import oracledb
 import logging
+from ..cache import referencia
 from ..db import get_conn
+from ..perfilado import RutaPerfilable
 from ..schemas import ProgramaCreate
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/programas", tags=["programas"])
+router = APIRouter(prefix="/programas", tags=["programas"], route_class=RutaPerfilable)
 
 @router.post("/", status_code=201)
 def create_programa(payload: ProgramaCreate):
@@ -29,6 +31,7 @@ def create_programa(payload: ProgramaCreate):
         """, (payload.tipo,))
         
         conn.commit()
+        referencia.limpiar()
         
         logger.info("Programa creado exitosamente")
         
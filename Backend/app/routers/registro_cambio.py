@@ -3,11 +3,12 @@ from fastapi import APIRouter, HTTPException
 import oracledb
 import logging
 from ..db import get_conn
+from ..perfilado import RutaPerfilable
 from ..schemas import RegistroCambioCreate
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/registros", tags=["registros"])
+router = APIRouter(prefix="/registros", tags=["registros"], route_class=RutaPerfilable)
 
 @router.post("/", status_code=201)
 def create_registro(payload: RegistroCambioCreate):
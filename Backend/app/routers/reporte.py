@@ -0,0 +1,315 @@
+# app/routers/reporte.py
+from fastapi import APIRouter, HTTPException
+import oracledb
+import logging
+from datetime import date, datetime
+from typing import List, Optional
+from .. import analitica_asistencia, hechos_asistencia, horas_tutor
+from ..db import get_conn
+from ..perfilado import RutaPerfilable
+from ..schemas import (
+    AgregadosAsistenciaResponse, AnaliticaResponse, HorasTutorResponse, RefrescoResponse,
+    ResumenAsistenciaAula, ResumenAsistenciaEstudiante,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/reportes", tags=["reportes"], route_class=RutaPerfilable)
+
+
+def _rango_mes(mes: str):
+    """'YYYY-MM' -> (primer día del mes, primer día del mes siguiente)."""
+    try:
+        inicio = datetime.strptime(mes, "%Y-%m").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato de mes inválido. Use YYYY-MM")
+    if inicio.month == 12:
+        fin = inicio.replace(year=inicio.year + 1, month=1)
+    else:
+        fin = inicio.replace(month=inicio.month + 1)
+    return inicio, fin
+
+
+@router.get("/horas-tutor", response_model=HorasTutorResponse)
+def horas_por_tutor(
+    mes: Optional[str] = None,
+    id_tutor: Optional[int] = None,
+    id_institucion: Optional[int] = None,
+):
+    """
+    Horas dictadas (clases con SE_DIO = 1) por tutor y aula en un mes (YYYY-MM,
+    por defecto el actual). Lee RESUMEN_HORAS_TUTOR, no la tabla de asistencias.
+    """
+    if mes is None:
+        mes = date.today().strftime("%Y-%m")
+    inicio, fin = _rango_mes(mes)
+
+    conn = None
+    cur = None
+
+    try:
+        conn = get_conn()
+        cur = conn.cursor()
+
+        filtros = ["r.FECHA >= :inicio", "r.FECHA < :fin"]
+        binds = {"inicio": inicio, "fin": fin}
+        if id_tutor is not None:
+            filtros.append("r.ID_TUTOR = :id_tutor")
+            binds["id_tutor"] = id_tutor
+        if id_institucion is not None:
+            filtros.append("r.ID_INSTITUCION = :id_institucion")
+            binds["id_institucion"] = id_institucion
+
+        cur.execute(f"""
+            SELECT r.ID_TUTOR, p.NOMBRE, r.ID_AULA, r.ID_SEDE, r.ID_INSTITUCION,
+                   SUM(r.HORAS) AS HORAS
+            FROM RESUMEN_HORAS_TUTOR r
+            LEFT JOIN TUTOR t ON t.ID_TUTOR = r.ID_TUTOR
+            LEFT JOIN PERSONA p ON p.ID_PERSONA = t.ID_PERSONA
+            WHERE {" AND ".join(filtros)}
+            GROUP BY r.ID_TUTOR, p.NOMBRE, r.ID_AULA, r.ID_SEDE, r.ID_INSTITUCION
+            ORDER BY r.ID_TUTOR, r.ID_INSTITUCION, r.ID_SEDE, r.ID_AULA
+        """, binds)
+
+        tutores = {}
+        total = 0
+        for id_t, nombre, id_aula, id_sede, id_inst, horas in cur.fetchall():
+            horas = int(horas)
+            total += horas
+            tutor = tutores.get(id_t)
+            if tutor is None:
+                tutor = tutores[id_t] = {"id_tutor": id_t, "nombre": nombre, "horas": 0, "aulas": []}
+            tutor["horas"] += horas
+            tutor["aulas"].append({
+                "id_aula": id_aula,
+                "id_sede": id_sede,
+                "id_institucion": id_inst,
+                "horas": horas,
+            })
+
+        return {"mes": mes, "total_horas": total, "tutores": list(tutores.values())}
+
+    except oracledb.DatabaseError as e:
+        logger.error(f"Error de base de datos al consultar horas de tutores: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error al consultar la base de datos")
+
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+
+
+@router.post("/horas-tutor/refrescar", response_model=RefrescoResponse)
+def refrescar_horas_tutor(completo: bool = False, desde: Optional[date] = None):
+    """
+    Fuerza el refresco del resumen de horas. Por defecto es incremental;
+    con completo=true recalcula desde `desde` (por defecto el mes anterior).
+    """
+    conn = None
+
+    try:
+        conn = get_conn()
+
+        if completo:
+            desde = desde or horas_tutor.inicio_ventana_reciente()
+            filas = horas_tutor.reconstruir(conn, desde)
+        else:
+            desde = None
+            filas = horas_tutor.refrescar(conn)
+
+        conn.commit()
+
+        return {"completo": completo, "desde": desde, "filas": filas}
+
+    except oracledb.DatabaseError as e:
+        if conn:
+            conn.rollback()
+        logger.error(f"Error de base de datos al refrescar horas de tutores: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error en la base de datos")
+
+    finally:
+        if conn:
+            conn.close()
+
+
+@router.get("/asistencia/estudiantes", response_model=List[ResumenAsistenciaEstudiante])
+def asistencia_estudiantes(
+    id_aula: Optional[int] = None,
+    id_sede: Optional[int] = None,
+    id_institucion: Optional[int] = None,
+    en_riesgo: Optional[bool] = None,
+    limit: int = 500,
+):
+    """
+    Tasa de asistencia y rachas de faltas por estudiante (último cálculo).
+    Con en_riesgo=true devuelve la lista de alertas, peores primero.
+    """
+    conn = None
+    cur = None
+
+    try:
+        conn = get_conn()
+        cur = conn.cursor()
+
+        filtros = []
+        binds = {"limite": limit}
+        if id_aula is not None:
+            filtros.append("r.ID_AULA = :id_aula")
+            binds["id_aula"] = id_aula
+        if id_sede is not None:
+            filtros.append("r.ID_SEDE = :id_sede")
+            binds["id_sede"] = id_sede
+        if id_institucion is not None:
+            filtros.append("r.ID_INSTITUCION = :id_institucion")
+            binds["id_institucion"] = id_institucion
+        if en_riesgo is not None:
+            filtros.append("r.EN_RIESGO = :en_riesgo")
+            binds["en_riesgo"] = 1 if en_riesgo else 0
+        where = ("WHERE " + " AND ".join(filtros)) if filtros else ""
+
+        cur.execute(f"""
+            SELECT r.ID_ESTUDIANTE, e.NOMBRE, r.ID_AULA, r.ID_SEDE, r.ID_INSTITUCION,
+                   r.CLASES, r.PRESENTES, r.TASA, r.RACHA_ACTUAL, r.RACHA_MAXIMA,
+                   r.ULTIMA_FECHA, r.EN_RIESGO, r.CALCULADO
+            FROM RESUMEN_ASISTENCIA_ESTUDIANTE r
+            LEFT JOIN ESTUDIANTE e ON e.ID_ESTUDIANTE = r.ID_ESTUDIANTE
+            {where}
+            ORDER BY r.EN_RIESGO DESC, r.RACHA_ACTUAL DESC, r.TASA, r.ID_ESTUDIANTE
+            FETCH FIRST :limite ROWS ONLY
+        """, binds)
+
+        cols = [c[0].lower() for c in cur.description]
+        res = []
+        for r in cur.fetchall():
+            d = dict(zip(cols, r))
+            if d["ultima_fecha"] is not None:
+                d["ultima_fecha"] = d["ultima_fecha"].date()
+            d["en_riesgo"] = bool(d["en_riesgo"])
+            res.append(d)
+        return res
+
+    except oracledb.DatabaseError as e:
+        logger.error(f"Error de base de datos al consultar resumen de asistencia: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error al consultar la base de datos")
+
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+
+
+@router.get("/asistencia/aulas", response_model=List[ResumenAsistenciaAula])
+def asistencia_aulas(id_institucion: Optional[int] = None, id_sede: Optional[int] = None):
+    """Tasa de asistencia y número de estudiantes en riesgo por aula (último cálculo)."""
+    conn = None
+    cur = None
+
+    try:
+        conn = get_conn()
+        cur = conn.cursor()
+
+        filtros = []
+        binds = {}
+        if id_institucion is not None:
+            filtros.append("ID_INSTITUCION = :id_institucion")
+            binds["id_institucion"] = id_institucion
+        if id_sede is not None:
+            filtros.append("ID_SEDE = :id_sede")
+            binds["id_sede"] = id_sede
+        where = ("WHERE " + " AND ".join(filtros)) if filtros else ""
+
+        cur.execute(f"""
+            SELECT ID_AULA, ID_SEDE, ID_INSTITUCION, ESTUDIANTES, CLASES, PRESENTES,
+                   TASA, EN_RIESGO, CALCULADO
+            FROM RESUMEN_ASISTENCIA_AULA
+            {where}
+            ORDER BY ID_INSTITUCION, ID_SEDE, ID_AULA
+        """, binds)
+
+        cols = [c[0].lower() for c in cur.description]
+        return [dict(zip(cols, r)) for r in cur.fetchall()]
+
+    except oracledb.DatabaseError as e:
+        logger.error(f"Error de base de datos al consultar resumen por aula: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error al consultar la base de datos")
+
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+
+
+@router.post("/asistencia/recalcular", response_model=AnaliticaResponse)
+def recalcular_asistencia():
+    """Recalcula ya los resúmenes de asistencia (normalmente lo hace la tarea nocturna)."""
+    conn = None
+
+    try:
+        conn = get_conn()
+        resultado = analitica_asistencia.recalcular(conn)
+        conn.commit()
+        return resultado
+
+    except oracledb.DatabaseError as e:
+        if conn:
+            conn.rollback()
+        logger.error(f"Error de base de datos al recalcular asistencia: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error en la base de datos")
+
+    finally:
+        if conn:
+            conn.close()
+
+
+@router.get("/asistencia/agregados", response_model=AgregadosAsistenciaResponse)
+def agregados_asistencia(
+    tabla: str = "estudiante",
+    agrupar: Optional[str] = None,
+    id_institucion: Optional[int] = None,
+    id_sede: Optional[int] = None,
+    id_aula: Optional[int] = None,
+    id_tutor: Optional[int] = None,
+    id_estudiante: Optional[int] = None,
+    dia_semana: Optional[int] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+):
+    """
+    Conteos de asistencia filtrados y agrupados desde el almacén en memoria
+    (no consulta Oracle). tabla = estudiante | tutor; agrupar es una lista
+    separada por comas de: institucion, sede, aula, tutor, estudiante,
+    dia_semana (0 = lunes), fecha, mes.
+    """
+    if tabla not in ("estudiante", "tutor"):
+        raise HTTPException(status_code=400, detail="tabla debe ser 'estudiante' o 'tutor'")
+    if (id_sede is not None or id_aula is not None) and id_institucion is None:
+        raise HTTPException(status_code=400, detail="Para filtrar por sede o aula indique id_institucion")
+    if id_aula is not None and id_sede is None:
+        raise HTTPException(status_code=400, detail="Para filtrar por aula indique id_sede")
+
+    almacen = hechos_asistencia.hechos
+    if not almacen.cargado:
+        raise HTTPException(status_code=503, detail="Los datos de asistencia se están cargando")
+
+    dimensiones = [d.strip() for d in agrupar.split(",") if d.strip()] if agrupar else []
+    filtros = {
+        "institucion": id_institucion,
+        "sede": (id_sede, id_institucion) if id_sede is not None else None,
+        "aula": (id_aula, id_sede, id_institucion) if id_aula is not None else None,
+        "tutor": id_tutor,
+        "estudiante": id_estudiante,
+        "dia_semana": dia_semana,
+        "desde": desde,
+        "hasta": hasta,
+    }
+
+    try:
+        grupos = almacen.agregar(tabla, dimensiones, filtros)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    t = almacen.tablas[tabla]
+    return {"tabla": tabla, "filas_en_memoria": t.n, "actualizado": t.actualizado, "grupos": grupos}
@@ -1,10 +1,13 @@
 # backend/app/routers/sede.py
 from fastapi import APIRouter, HTTPException
 from typing import List
+from .. import resumen_admin
+from ..cache import referencia
 from ..db import get_conn
+from ..perfilado import RutaPerfilable
 from ..schemas import SedeCreate, SedeRead
 
-router = APIRouter(prefix="/sedes", tags=["sedes"])
+router = APIRouter(prefix="/sedes", tags=["sedes"], route_class=RutaPerfilable)
 
 @router.post("/", response_model=SedeRead, status_code=201)
 def crear_sede(payload: SedeCreate):
@@ -15,6 +18,7 @@ def crear_sede(payload: SedeCreate):
             (payload.nombre_sede, payload.direccion, payload.id_institucion, payload.telefono)
         )
         conn.commit()
+        referencia.limpiar()
         cur2 = conn.cursor()
         cur2.execute("""
             SELECT ID_SEDE, ID_INSTITUCION, NOMBRE_SEDE, DIRECCION, TELEFONO
@@ -25,6 +29,7 @@ def crear_sede(payload: SedeCreate):
         row = cur2.fetchone()
         if not row:
             raise HTTPException(status_code=500, detail="No se pudo recuperar la sede creada")
+        resumen_admin.marcar(row[0], row[1])
         return {"id_sede": row[0], "id_institucion": row[1], "nombre_sede": row[2], "direccion": row[3], "telefono": row[4]}
     finally:
         cur.close(); conn.close()
@@ -61,6 +66,8 @@ def borrar_sede(id_sede: int, id_institucion: int):
         if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail="Sede no encontrada")
         conn.commit()
+        referencia.limpiar()
+        resumen_admin.marcar(id_sede, id_institucion)
         return {"msg": "Sede eliminada"}
     finally:
         cur.close(); conn.close()
@@ -0,0 +1,132 @@
+# app/routers/sesion.py
+from fastapi import APIRouter, HTTPException
+import oracledb
+import logging
+from datetime import date, timedelta
+from typing import List, Optional
+from .. import calendario
+from ..db import get_conn
+from ..perfilado import RutaPerfilable
+from ..schemas import MaterializarResponse, SesionRead
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/sesiones", tags=["sesiones"], route_class=RutaPerfilable)
+
+
+@router.get("/", response_model=List[SesionRead])
+def listar_sesiones(
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    id_aula: Optional[int] = None,
+    id_sede: Optional[int] = None,
+    id_institucion: Optional[int] = None,
+    id_tutor: Optional[int] = None,
+    limit: int = 2000,
+):
+    """
+    Lista las sesiones de clase que debían dictarse en un rango de fechas
+    (por defecto el mes actual), con el SE_DIO registrado por el tutor ese día.
+    """
+    hoy = date.today()
+    if desde is None:
+        desde = hoy.replace(day=1)
+    if hasta is None:
+        hasta = (desde.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    if hasta < desde:
+        raise HTTPException(status_code=400, detail="'hasta' debe ser posterior a 'desde'")
+
+    conn = None
+    cur = None
+
+    try:
+        conn = get_conn()
+        cur = conn.cursor()
+
+        filtros = ["s.FECHA BETWEEN :desde AND :hasta"]
+        binds = {"desde": desde, "hasta": hasta, "limite": limit}
+        join_aula = ""
+        if id_aula is not None:
+            filtros.append("s.ID_AULA = :id_aula")
+            binds["id_aula"] = id_aula
+        if id_sede is not None:
+            filtros.append("s.ID_SEDE = :id_sede")
+            binds["id_sede"] = id_sede
+        if id_institucion is not None:
+            filtros.append("s.ID_INSTITUCION = :id_institucion")
+            binds["id_institucion"] = id_institucion
+        if id_tutor is not None:
+            join_aula = """
+            JOIN AULA a
+                ON a.ID_AULA = s.ID_AULA
+                AND a.ID_SEDE = s.ID_SEDE
+                AND a.ID_INSTITUCION = s.ID_INSTITUCION"""
+            filtros.append("a.ID_TUTOR = :id_tutor")
+            binds["id_tutor"] = id_tutor
+
+        cur.execute(f"""
+            SELECT s.ID_SESION, s.ID_HORARIO, s.ID_PERIODO, s.FECHA, s.HORA_INICIO, s.HORA_FIN,
+                   s.ID_AULA, s.ID_SEDE, s.ID_INSTITUCION,
+                   (SELECT MAX(t.SE_DIO)
+                    FROM ASISTENCIA_AULA_TUTOR t
+                    WHERE t.ID_AULA = s.ID_AULA
+                    AND t.ID_SEDE = s.ID_SEDE
+                    AND t.ID_INSTITUCION = s.ID_INSTITUCION
+                    AND t.FECHA >= s.FECHA AND t.FECHA < s.FECHA + 1) AS SE_DIO
+            FROM SESION_CLASE s{join_aula}
+            WHERE {" AND ".join(filtros)}
+            ORDER BY s.FECHA, s.HORA_INICIO, s.ID_SESION
+            FETCH FIRST :limite ROWS ONLY
+        """, binds)
+
+        cols = [c[0].lower() for c in cur.description]
+        res = []
+        for r in cur.fetchall():
+            d = dict(zip(cols, r))
+            d["fecha"] = d["fecha"].date()
+            res.append(d)
+        return res
+
+    except oracledb.DatabaseError as e:
+        logger.error(f"Error de base de datos al listar sesiones: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error al consultar la base de datos")
+
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+
+
+@router.post("/materializar", response_model=MaterializarResponse)
+def materializar_sesiones(id_periodo: Optional[int] = None, reconstruir: bool = False):
+    """
+    Genera las sesiones que falten (todas o las de un periodo).
+    Con reconstruir=true borra primero las sesiones del periodo y las vuelve a crear.
+    """
+    if reconstruir and id_periodo is None:
+        raise HTTPException(status_code=400, detail="Para reconstruir indique id_periodo")
+
+    conn = None
+
+    try:
+        conn = get_conn()
+
+        borradas = 0
+        if reconstruir:
+            borradas = calendario.quitar_sesiones_periodo(conn, id_periodo)
+        creadas = calendario.materializar(conn, id_periodo=id_periodo)
+
+        conn.commit()
+
+        return {"id_periodo": id_periodo, "sesiones_borradas": borradas, "sesiones_creadas": creadas}
+
+    except oracledb.DatabaseError as e:
+        if conn:
+            conn.rollback()
+        logger.error(f"Error de base de datos al materializar sesiones: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error en la base de datos")
+
+    finally:
+        if conn:
+            conn.close()
@@ -0,0 +1,297 @@
+# app/routers/sincronizacion.py
+from fastapi import APIRouter, Depends, HTTPException, Query
+import logging
+import os
+from typing import Optional
+import oracledb
+from .. import resumen_admin
+from ..db import get_conn
+from ..perfilado import RutaPerfilable
+from ..registro_sync import REGISTRO
+from ..schemas import SyncSubida, SyncSubidaResponse
+from ..utils import require_roles
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Sincronización para tomar asistencia sin conexión
+# -------------------------------
+# GET /sync?since=<token> devuelve lo que cambió en aulas, horarios y
+# estudiantes desde ese token (ver app/registro_sync.py); sin token, o con
+# uno purgado o con demasiados cambios detrás, la foto completa. El cliente:
+#  - reemplaza por id las filas que llegan;
+#  - quita los ids de "borrados" (borrados de verdad o que ya no son suyos);
+#  - descarta los horarios y estudiantes de las aulas que ya no tiene;
+#  - guarda "token" para la próxima vez.
+# POST /sync sube la cola de marcas de asistencia tomadas sin conexión. Se
+# guardan con MERGE sobre la llave natural (estudiante + aula + día, V011): una
+# marca del mismo día que otra ya guardada la actualiza, así reenviar la cola
+# después de un corte no duplica. Cada marca trae su id_cliente para que el
+# cliente sepa cuáles puede sacar de la cola.
+
+SYNC_MAX_CAMBIOS = int(os.getenv("SYNC_MAX_CAMBIOS", "1000"))
+SYNC_MAX_MARCAS = int(os.getenv("SYNC_MAX_MARCAS", "500"))
+# Un cambio con ID_CAMBIO menor que el token puede confirmar después de que el
+# cliente leyó el token: se reenvía lo anotado hasta este margen antes.
+SYNC_MARGEN_SEGUNDOS = int(os.getenv("SYNC_MARGEN_SEGUNDOS", "120"))
+
+ROLES_ADMIN = ("ADMINISTRADOR", "ADMINISTRATIVO")
+
+router = APIRouter(prefix="/sync", tags=["sync"], route_class=RutaPerfilable)
+
+_ALCANCE_TUTOR = "a.ID_TUTOR IN (SELECT ID_TUTOR FROM TUTOR WHERE ID_PERSONA = :id_persona)"
+
+# colección -> (tabla en REGISTRO_SYNC, columnas del payload, SELECT con esas columnas)
+# Horarios y estudiantes solo si cuelgan de un aula: es lo que se usa para tomar asistencia.
+COLECCIONES = {
+    "aulas": (
+        "AULA",
+        ["id_aula", "id_sede", "id_institucion", "nombre_aula", "grado", "id_programa", "id_tutor"],
+        """
+        SELECT a.ID_AULA, a.ID_SEDE, a.ID_INSTITUCION, a.NOMBRE_AULA, a.GRADO, a.ID_PROGRAMA, a.ID_TUTOR
+        FROM AULA a
+        WHERE {filtro}
+        ORDER BY a.ID_AULA
+        """,
+    ),
+    "horarios": (
+        "HORARIO",
+        ["id_horario", "id_aula", "id_sede", "id_institucion", "dia", "hora_inicio", "hora_fin"],
+        """
+        SELECT h.ID_HORARIO, h.ID_AULA, h.ID_SEDE, h.ID_INSTITUCION, h.DIA, h.HORA_INICIO, h.HORA_FIN
+        FROM HORARIO h
+        JOIN AULA a ON a.ID_AULA = h.ID_AULA AND a.ID_SEDE = h.ID_SEDE AND a.ID_INSTITUCION = h.ID_INSTITUCION
+        WHERE {filtro}
+        ORDER BY h.ID_HORARIO
+        """,
+    ),
+    "estudiantes": (
+        "ESTUDIANTE",
+        ["id_estudiante", "id_aula", "id_sede", "id_institucion", "nombre", "tipo_documento", "grado"],
+        """
+        SELECT e.ID_ESTUDIANTE, e.ID_AULA, e.ID_SEDE, e.ID_INSTITUCION, e.NOMBRE, e.TIPO_DOCUMENTO, e.GRADO
+        FROM ESTUDIANTE e
+        JOIN AULA a ON a.ID_AULA = e.ID_AULA AND a.ID_SEDE = e.ID_SEDE AND a.ID_INSTITUCION = e.ID_INSTITUCION
+        WHERE {filtro}
+        ORDER BY e.ID_ESTUDIANTE
+        """,
+    ),
+}
+_COLUMNA_ID = {"aulas": "a.ID_AULA", "horarios": "h.ID_HORARIO", "estudiantes": "e.ID_ESTUDIANTE"}
+
+SQL_TOKEN = f"""
+    SELECT (SELECT NVL(MAX(ID_CAMBIO), 0) FROM REGISTRO_SYNC),
+           (SELECT NVL(MAX(ULTIMO_ID), 0) FROM CONTROL_REFRESCO WHERE NOMBRE = '{REGISTRO}')
+    FROM DUAL
+"""
+
+SQL_CAMBIOS = """
+    SELECT DISTINCT TABLA, ID_FILA
+    FROM REGISTRO_SYNC
+    WHERE ID_CAMBIO <= :hasta
+    AND (ID_CAMBIO > :desde
+         OR FECHA >= (SELECT FECHA FROM REGISTRO_SYNC
+                      WHERE ID_CAMBIO = (SELECT MAX(ID_CAMBIO) FROM REGISTRO_SYNC WHERE ID_CAMBIO <= :desde))
+                     - :margen)
+    FETCH FIRST :limite ROWS ONLY
+"""
+
+SQL_SUBIR_MARCA = """
+    MERGE INTO ASISTENCIA_AULA_ESTUDIANTE x
+    USING (
+        SELECT :id_cliente AS ID_CLIENTE, e.ID_ESTUDIANTE, a.ID_AULA, a.ID_SEDE, a.ID_INSTITUCION,
+               :fecha AS FECHA, :hora_entrada AS HORA_ENTRADA, :hora_salida AS HORA_SALIDA,
+               :presente AS PRESENTE, TRUNC(:fecha) AS DIA, COALESCE(:id_horario, 0) AS CLASE,
+               :id_horario AS ID_HORARIO
+        FROM ESTUDIANTE e, AULA a
+        WHERE e.ID_ESTUDIANTE = :id_estudiante
+        AND a.ID_AULA = :id_aula
+        AND a.ID_SEDE = :id_sede
+        AND a.ID_INSTITUCION = :id_institucion
+        AND :fecha < SYSDATE + 1
+        {alcance}
+    ) n
+    ON (x.ID_AULA = n.ID_AULA AND x.ID_SEDE = n.ID_SEDE AND x.ID_INSTITUCION = n.ID_INSTITUCION
+        AND x.DIA = n.DIA AND x.CLASE = n.CLASE AND x.ID_ESTUDIANTE = n.ID_ESTUDIANTE)
+    WHEN MATCHED THEN
+        UPDATE SET x.ID_CLIENTE = n.ID_CLIENTE, x.HORA_ENTRADA = n.HORA_ENTRADA, x.HORA_SALIDA = n.HORA_SALIDA,
+                   x.PRESENTE = n.PRESENTE, x.ACTUALIZADO = SYSDATE
+    WHEN NOT MATCHED THEN
+        INSERT (ID_CLIENTE, ID_ESTUDIANTE, ID_AULA, ID_SEDE, ID_INSTITUCION, FECHA, HORA_ENTRADA, HORA_SALIDA, PRESENTE,
+                ID_HORARIO)
+        VALUES (n.ID_CLIENTE, n.ID_ESTUDIANTE, n.ID_AULA, n.ID_SEDE, n.ID_INSTITUCION, n.FECHA, n.HORA_ENTRADA,
+                n.HORA_SALIDA, n.PRESENTE, n.ID_HORARIO)
+"""
+
+
+def _llave(marca) -> tuple:
+    """Llave natural de la asistencia que guarda la marca: estudiante, aula, día y clase."""
+    return (marca.id_estudiante, marca.id_aula, marca.id_sede, marca.id_institucion, marca.fecha.date(),
+            marca.id_horario or 0)
+
+
+def _en(columna: str, ids, prefijo: str, binds: dict) -> str:
+    """`columna IN (:p0, :p1, ...)` con los ids agregados a binds."""
+    nombres = []
+    for i, valor in enumerate(ids):
+        binds[f"{prefijo}{i}"] = valor
+        nombres.append(f":{prefijo}{i}")
+    return f"{columna} IN ({', '.join(nombres)})"
+
+
+def _leer(cur, nombre: str, alcance: dict, cambios: dict = None) -> dict:
+    """
+    Filas de la colección dentro del alcance; con `cambios` ({tabla: set(ids)}),
+    solo las que cambiaron y, para horarios y estudiantes, todas las de las
+    aulas que cambiaron (un aula recién asignada llega con lo suyo).
+    """
+    tabla, columnas, sql = COLECCIONES[nombre]
+    binds = dict(alcance)
+    filtros = [_ALCANCE_TUTOR] if alcance else ["1 = 1"]
+    if cambios is not None:
+        propios = cambios.get(tabla, set())
+        aulas = cambios.get("AULA", set()) if tabla != "AULA" else set()
+        if not propios and not aulas:
+            return {"columnas": columnas, "filas": []}
+        condiciones = []
+        if propios:
+            condiciones.append(_en(_COLUMNA_ID[nombre], sorted(propios), "c", binds))
+        if aulas:
+            condiciones.append(_en("a.ID_AULA", sorted(aulas), "a", binds))
+        filtros.append(f"({' OR '.join(condiciones)})")
+    cur.execute(sql.format(filtro=" AND ".join(filtros)), binds)
+    return {"columnas": columnas, "filas": [list(r) for r in cur.fetchall()]}
+
+
+@router.get("")
+def sincronizar(
+    since: Optional[int] = Query(None, description="token de la sincronización anterior"),
+    user: dict = Depends(require_roles("TUTOR", *ROLES_ADMIN)),
+):
+    """
+    Aulas, horarios y estudiantes que cambiaron desde `since` (los del tutor si
+    el rol es TUTOR; todos para roles administrativos). Sin `since`, con un
+    token ya purgado o con más de SYNC_MAX_CAMBIOS filas cambiadas devuelve la
+    foto completa y `completo: true`. Cada colección viene como
+    {"columnas", "filas"} y `borrados` trae, por colección, los ids que el
+    cliente tiene que quitar. `token` es lo que hay que mandar la próxima vez.
+    """
+    alcance = {} if user.get("rol") in ROLES_ADMIN else {"id_persona": int(user["sub"])}
+
+    conn = None
+    cur = None
+
+    try:
+        conn = get_conn()
+        cur = conn.cursor()
+
+        cur.execute(SQL_TOKEN)
+        hasta, purgado = (int(v) for v in cur.fetchone())
+
+        cambios = None
+        if since is not None and purgado <= since <= hasta:
+            cur.execute(SQL_CAMBIOS, {
+                "hasta": hasta, "desde": since, "margen": SYNC_MARGEN_SEGUNDOS / 86400,
+                "limite": SYNC_MAX_CAMBIOS + 1,
+            })
+            filas = cur.fetchall()
+            if len(filas) <= SYNC_MAX_CAMBIOS:
+                cambios = {}
+                for tabla, id_fila in filas:
+                    cambios.setdefault(tabla, set()).add(int(id_fila))
+
+        logger.info(
+            f"Sincronización {'completa' if cambios is None else 'incremental'} desde {since} hasta {hasta}"
+        )
+
+        respuesta = {"token": hasta, "completo": cambios is None}
+        borrados = {}
+        for nombre, (tabla, _, _) in COLECCIONES.items():
+            coleccion = _leer(cur, nombre, alcance, cambios)
+            respuesta[nombre] = coleccion
+            if cambios is not None:
+                # lo que cambió y ya no se ve: se borró o dejó de ser del tutor
+                vistos = {fila[0] for fila in coleccion["filas"]}
+                borrados[nombre] = sorted(cambios.get(tabla, set()) - vistos)
+        respuesta["borrados"] = borrados
+        return respuesta
+
+    except oracledb.DatabaseError as e:
+        logger.error(f"Error de base de datos al sincronizar: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error al consultar la base de datos")
+
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+
+
+@router.post("", response_model=SyncSubidaResponse)
+def subir_marcas(payload: SyncSubida, user: dict = Depends(require_roles("TUTOR", *ROLES_ADMIN))):
+    """
+    Guarda de una vez la cola de marcas de asistencia tomadas sin conexión.
+    Es idempotente: hay una sola asistencia por estudiante, aula y día, y una
+    marca de un día ya guardado la actualiza (gana la última de la cola), así
+    el cliente puede reenviar la cola entera si no le llegó la respuesta.
+    Devuelve los id_cliente que quedaron guardados (puede borrarlos de la
+    cola) y los rechazados (aula que no es del tutor, estudiante o aula
+    inexistente, fecha futura), que no conviene reintentar.
+    """
+    if len(payload.marcas) > SYNC_MAX_MARCAS:
+        raise HTTPException(status_code=413, detail=f"Se admiten hasta {SYNC_MAX_MARCAS} marcas por subida")
+    # la misma marca dos veces en la cola cuenta una sola
+    marcas = list({m.id_cliente: m for m in payload.marcas}.values())
+    if not marcas:
+        return {"guardadas": 0, "registradas": [], "rechazadas": []}
+    # de varias marcas del mismo estudiante, aula y día se sube la última; las
+    # anteriores quedan registradas o rechazadas con ella
+    ultima = {_llave(m): m for m in marcas}
+    subir = list(ultima.values())
+
+    alcance = {} if user.get("rol") in ROLES_ADMIN else {"id_persona": int(user["sub"])}
+
+    conn = None
+    cur = None
+
+    try:
+        conn = get_conn()
+        cur = conn.cursor()
+
+        logger.info(f"Subiendo {len(marcas)} marcas de asistencia sin conexión")
+
+        cur.executemany(
+            SQL_SUBIR_MARCA.format(alcance=f"AND {_ALCANCE_TUTOR}" if alcance else ""),
+            [{**m.model_dump(), **alcance} for m in subir],
+        )
+        guardadas = cur.rowcount
+
+        binds = {}
+        cur.execute(
+            f"SELECT ID_CLIENTE FROM ASISTENCIA_AULA_ESTUDIANTE "
+            f"WHERE {_en('ID_CLIENTE', [m.id_cliente for m in subir], 'm', binds)}",
+            binds,
+        )
+        registradas = {r[0] for r in cur.fetchall()}
+
+        conn.commit()
+        for id_sede, id_institucion in {(m.id_sede, m.id_institucion) for m in subir if m.id_cliente in registradas}:
+            resumen_admin.marcar(id_sede, id_institucion)
+
+        return {
+            "guardadas": guardadas,
+            "registradas": [m.id_cliente for m in marcas if ultima[_llave(m)].id_cliente in registradas],
+            "rechazadas": [m.id_cliente for m in marcas if ultima[_llave(m)].id_cliente not in registradas],
+        }
+
+    except oracledb.DatabaseError as e:
+        if conn:
+            conn.rollback()
+        logger.error(f"Error de base de datos al subir marcas de asistencia: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error en la base de datos")
+
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
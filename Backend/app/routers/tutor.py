@@ -1,9 +1,14 @@
 # app/routers/tutor.py
 from fastapi import APIRouter, HTTPException, Depends, Query
+from datetime import date, timedelta
 from typing import List, Optional
 import oracledb
 import logging
+from .. import registro_sync, resumen_admin
+from ..cache import referencia, semana_tutor
 from ..db import get_conn
+from ..perfilado import RutaPerfilable
+from ..utils import get_current_user
 from ..schemas import (
     TutorAssignRequest,
     TutorAssignResponse,
@@ -17,16 +22,162 @@ from ..schemas import (
     AulaStudentCount,
     StudentSimple,
     HorarioSimple,
+    SemanaTutorResponse,
     LoginRequest,
     LoginResponse,
     TutorListInfoItem,
     TutorListItem,
     TutorUnlinkResponse,
+    TutorDashboardResponse,
 )
+from .horario import DIAS_SEMANA
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/tutores", tags=["tutores"])
+router = APIRouter(prefix="/tutores", tags=["tutores"], route_class=RutaPerfilable)
+
+
+# 0) Dashboard del tutor que inició sesión, en una sola consulta
+# Una fila por cosa, con TIPO: T = el tutor, A = aula (con su número de
+# estudiantes), H = horario semanal, S = sesión de esta semana (con SE_DIO).
+# Las columnas que no aplican a un tipo van en NULL.
+SQL_DASHBOARD = """
+    WITH este_tutor AS (
+        SELECT ID_TUTOR FROM TUTOR WHERE ID_PERSONA = :id_persona
+    ),
+    sus_aulas AS (
+        SELECT a.ID_AULA, a.ID_SEDE, a.ID_INSTITUCION, a.NOMBRE_AULA, a.GRADO, a.ID_PROGRAMA, a.ID_TUTOR
+        FROM AULA a
+        JOIN este_tutor t ON t.ID_TUTOR = a.ID_TUTOR
+    )
+    SELECT 'T' AS TIPO, t.ID_TUTOR, CAST(NULL AS NUMBER) AS ID_AULA, CAST(NULL AS NUMBER) AS ID_SEDE,
+           CAST(NULL AS NUMBER) AS ID_INSTITUCION, CAST(NULL AS NUMBER) AS ID_REF,
+           CAST(NULL AS VARCHAR2(10)) AS FECHA, CAST(NULL AS VARCHAR2(20)) AS DIA,
+           CAST(NULL AS VARCHAR2(10)) AS HORA_INICIO, CAST(NULL AS VARCHAR2(10)) AS HORA_FIN,
+           CAST(NULL AS VARCHAR2(100)) AS NOMBRE_AULA, CAST(NULL AS VARCHAR2(10)) AS GRADO,
+           CAST(NULL AS VARCHAR2(100)) AS NOMBRE_SEDE, CAST(NULL AS VARCHAR2(100)) AS NOMBRE_INSTITUCION,
+           CAST(NULL AS NUMBER) AS ID_PROGRAMA, CAST(NULL AS NUMBER) AS NUMERO
+    FROM este_tutor t
+    UNION ALL
+    SELECT 'A', a.ID_TUTOR, a.ID_AULA, a.ID_SEDE, a.ID_INSTITUCION, NULL,
+           NULL, NULL, NULL, NULL,
+           a.NOMBRE_AULA, a.GRADO, s.NOMBRE_SEDE, i.NOMBRE, a.ID_PROGRAMA,
+           (SELECT COUNT(*)
+            FROM ESTUDIANTE e
+            WHERE e.ID_AULA = a.ID_AULA
+            AND e.ID_SEDE = a.ID_SEDE
+            AND e.ID_INSTITUCION = a.ID_INSTITUCION)
+    FROM sus_aulas a
+    JOIN SEDE s
+        ON s.ID_SEDE = a.ID_SEDE
+        AND s.ID_INSTITUCION = a.ID_INSTITUCION
+    JOIN INSTITUCION i
+        ON i.ID_INSTITUCION = a.ID_INSTITUCION
+    UNION ALL
+    SELECT 'H', a.ID_TUTOR, h.ID_AULA, h.ID_SEDE, h.ID_INSTITUCION, h.ID_HORARIO,
+           NULL, h.DIA, h.HORA_INICIO, h.HORA_FIN,
+           NULL, NULL, NULL, NULL, NULL, NULL
+    FROM HORARIO h
+    JOIN sus_aulas a
+        ON a.ID_AULA = h.ID_AULA
+        AND a.ID_SEDE = h.ID_SEDE
+        AND a.ID_INSTITUCION = h.ID_INSTITUCION
+    UNION ALL
+    SELECT 'S', a.ID_TUTOR, s.ID_AULA, s.ID_SEDE, s.ID_INSTITUCION, s.ID_SESION,
+           TO_CHAR(s.FECHA, 'YYYY-MM-DD'), NULL, s.HORA_INICIO, s.HORA_FIN,
+           a.NOMBRE_AULA, NULL, NULL, NULL, s.ID_HORARIO,
+           (SELECT MAX(t.SE_DIO)
+            FROM ASISTENCIA_AULA_TUTOR t
+            WHERE t.ID_AULA = s.ID_AULA
+            AND t.ID_SEDE = s.ID_SEDE
+            AND t.ID_INSTITUCION = s.ID_INSTITUCION
+            AND t.FECHA >= s.FECHA AND t.FECHA < s.FECHA + 1
+            -- dos sesiones del aula el mismo día: cada una con su asistencia
+            AND NVL(t.ID_HORARIO, s.ID_HORARIO) = s.ID_HORARIO)
+    FROM SESION_CLASE s
+    JOIN sus_aulas a
+        ON a.ID_AULA = s.ID_AULA
+        AND a.ID_SEDE = s.ID_SEDE
+        AND a.ID_INSTITUCION = s.ID_INSTITUCION
+    WHERE s.FECHA >= :lunes AND s.FECHA < :lunes_siguiente
+"""
+# filas que trae el execute sin otra ida a la base (un tutor tiene pocas aulas)
+DASHBOARD_FILAS = 500
+
+
+@router.get("/me/dashboard", response_model=TutorDashboardResponse)
+def dashboard_tutor(user: dict = Depends(get_current_user)):
+    """
+    Todo lo que muestra el dashboard del tutor (aulas con su número de
+    estudiantes, horario semanal, sesiones de esta semana y las de hoy sin
+    asistencia) en una petición y una ida a la base. El tutor sale del token.
+    """
+    id_persona = int(user["sub"])
+    hoy = date.today()
+    lunes = hoy - timedelta(days=hoy.weekday())
+
+    conn = None
+    cur = None
+    try:
+        conn = get_conn()
+        cur = conn.cursor()
+        cur.prefetchrows = DASHBOARD_FILAS
+        cur.arraysize = DASHBOARD_FILAS
+        cur.execute(SQL_DASHBOARD, {
+            "id_persona": id_persona, "lunes": lunes, "lunes_siguiente": lunes + timedelta(days=7),
+        })
+        rows = cur.fetchall()
+    except oracledb.DatabaseError as e:
+        logger.error(f"Error de base de datos en el dashboard del tutor: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error al consultar la base de datos")
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+
+    id_tutor = None
+    aulas, horarios, sesiones = [], [], []
+    for (tipo, tutor, id_aula, id_sede, id_institucion, id_ref, fecha, dia, hora_inicio, hora_fin,
+         nombre_aula, grado, nombre_sede, nombre_institucion, id_programa, numero) in rows:
+        if tipo == "T":
+            id_tutor = tutor
+        elif tipo == "A":
+            aulas.append({
+                "id_aula": id_aula, "nombre_aula": nombre_aula, "grado": grado,
+                "id_sede": id_sede, "nombre_sede": nombre_sede,
+                "id_institucion": id_institucion, "nombre_institucion": nombre_institucion,
+                "id_programa": id_programa, "id_tutor": tutor, "numero_estudiantes": numero or 0,
+            })
+        elif tipo == "H":
+            horarios.append({
+                "id_horario": id_ref, "dia": dia, "hora_inicio": hora_inicio, "hora_fin": hora_fin,
+                "id_aula": id_aula, "id_tutor": tutor,
+            })
+        else:
+            sesiones.append({
+                "id_sesion": id_ref, "id_horario": id_programa, "fecha": date.fromisoformat(fecha),
+                "hora_inicio": hora_inicio, "hora_fin": hora_fin, "id_aula": id_aula,
+                "id_sede": id_sede, "id_institucion": id_institucion, "nombre_aula": nombre_aula,
+                "se_dio": numero,
+            })
+
+    if id_tutor is None:
+        raise HTTPException(status_code=404, detail="El usuario no es tutor")
+
+    aulas.sort(key=lambda a: a["id_aula"])
+    orden_dia = {d: i for i, d in enumerate(DIAS_SEMANA)}
+    horarios.sort(key=lambda h: (orden_dia.get(h["dia"], len(DIAS_SEMANA)), h["hora_inicio"] or "", h["id_horario"]))
+    sesiones.sort(key=lambda s: (s["fecha"], s["hora_inicio"] or "", s["id_sesion"]))
+    return {
+        "id_tutor": id_tutor,
+        "id_persona": id_persona,
+        "aulas": aulas,
+        "total_estudiantes": sum(a["numero_estudiantes"] for a in aulas),
+        "horarios": horarios,
+        "sesiones_semana": sesiones,
+        "pendientes_hoy": [s for s in sesiones if s["fecha"] == hoy and s["se_dio"] is None],
+    }
 
 
 # 1) Con id_persona -> obtener id_tutor (si existe)
@@ -248,6 +399,77 @@ def horarios_by_tutors(
         conn.close()
 
 
+# 7+1) Con id_tutor -> semana de clases lista para pintar (Lunes a Sábado)
+@router.get("/{id_tutor}/semana", response_model=SemanaTutorResponse)
+def semana_by_tutor(id_tutor: int):
+    """
+    Devuelve la grilla semanal del tutor: un elemento por día (Lunes a Sábado)
+    con sus clases ordenadas por hora, incluyendo nombres de aula, sede e institución.
+    Se cachea por tutor; se invalida al cambiar HORARIO o AULA.ID_TUTOR.
+    """
+    cached = semana_tutor.get(id_tutor)
+    if cached is not None:
+        return cached
+
+    conn = get_conn()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT h.ID_HORARIO, h.DIA, h.HORA_INICIO, h.HORA_FIN,
+                   a.ID_AULA, a.NOMBRE_AULA, a.GRADO,
+                   s.ID_SEDE, s.NOMBRE_SEDE, i.ID_INSTITUCION, i.NOMBRE
+            FROM AULA a
+            JOIN HORARIO h
+                ON h.ID_AULA = a.ID_AULA
+                AND h.ID_SEDE = a.ID_SEDE
+                AND h.ID_INSTITUCION = a.ID_INSTITUCION
+            JOIN SEDE s
+                ON a.ID_SEDE = s.ID_SEDE
+                AND a.ID_INSTITUCION = s.ID_INSTITUCION
+            JOIN INSTITUCION i
+                ON i.ID_INSTITUCION = a.ID_INSTITUCION
+            WHERE a.ID_TUTOR = :1
+            ORDER BY h.HORA_INICIO, h.ID_HORARIO
+        """,
+            (id_tutor,),
+        )
+        rows = cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+
+    # las filas ya vienen ordenadas por hora: basta repartirlas por día
+    clases_por_dia = {dia: [] for dia in DIAS_SEMANA}
+    for r in rows:
+        clases = clases_por_dia.get(r[1])
+        if clases is None:
+            logger.warning(f"Horario {r[0]} con día inválido: {r[1]}")
+            continue
+        clases.append(
+            {
+                "id_horario": r[0],
+                "hora_inicio": r[2],
+                "hora_fin": r[3],
+                "id_aula": r[4],
+                "nombre_aula": r[5],
+                "grado": r[6],
+                "id_sede": r[7],
+                "nombre_sede": r[8],
+                "id_institucion": r[9],
+                "nombre_institucion": r[10],
+            }
+        )
+
+    semana = {
+        "id_tutor": id_tutor,
+        "total_clases": sum(len(c) for c in clases_por_dia.values()),
+        "dias": [{"dia": dia, "clases": clases_por_dia[dia]} for dia in DIAS_SEMANA],
+    }
+    semana_tutor.set(id_tutor, semana)
+    return semana
+
+
 # 8) listar todos los tutores con su id_persona
 @router.get("/all", response_model=List[TutorListItem])
 def listar_todos_tutores():
@@ -315,7 +537,10 @@ def asignar_persona_a_tutor(id_tutor: int, payload: TutorAssignRequest):
             "UPDATE TUTOR SET ID_PERSONA = :1 WHERE ID_TUTOR = :2",
             (payload.id_persona, id_tutor),
         )
+        # sus aulas pasan a otra persona: cambian para la sincronización de las dos
+        registro_sync.anotar_donde(cur, "AULA", "ID_AULA", "ID_TUTOR = :1", (id_tutor,))
         conn.commit()
+        referencia.limpiar()
 
         return {
             "id_tutor": id_tutor,
@@ -346,6 +571,7 @@ def crear_tutor(payload: TutorCreate):
             "INSERT INTO TUTOR (ID_PERSONA) VALUES (:1)", (payload.id_persona,)
         )
         conn.commit()
+        referencia.limpiar()
 
         cur2 = conn.cursor()
         cur2.execute(
@@ -407,6 +633,7 @@ def eliminar_tutor(id_tutor: int, force: Optional[bool] = Query(False, descripti
             if cur.rowcount == 0:
                 raise HTTPException(status_code=500, detail="Error al eliminar tutor (sin filas afectadas)")
             conn.commit()
+            referencia.limpiar()
             return {"id_tutor": id_tutor, "mensaje": "Tutor eliminado correctamente (sin dependencias)"}
 
         # -----------------------
@@ -423,6 +650,7 @@ def eliminar_tutor(id_tutor: int, force: Optional[bool] = Query(False, descripti
         cant_notas = cur.rowcount
 
         # 3c) desvincular el tutor de las aulas (poner NULL en ID_TUTOR)
+        registro_sync.anotar_donde(cur, "AULA", "ID_AULA", "ID_TUTOR = :1", (id_tutor,))
         cur.execute("UPDATE AULA SET ID_TUTOR = NULL WHERE ID_TUTOR = :1", (id_tutor,))
         cant_aulas_actualizadas = cur.rowcount
 
@@ -436,6 +664,10 @@ def eliminar_tutor(id_tutor: int, force: Optional[bool] = Query(False, descripti
             raise HTTPException(status_code=500, detail="No se pudo borrar el tutor incluso tras borrar dependencias")
 
         conn.commit()
+        semana_tutor.invalidar(id_tutor)
+        referencia.limpiar()
+        if cant_aulas_actualizadas:
+            resumen_admin.marcar()
         return {"id_tutor": id_tutor, "mensaje": "Tutor eliminado correctamente"}
     finally:
         cur.close(); conn.close()
@@ -456,7 +688,9 @@ def desvincular_persona_de_tutor(id_tutor: int):
         cur.execute(
             "UPDATE TUTOR SET ID_PERSONA = NULL WHERE ID_TUTOR = :1", (id_tutor,)
         )
+        registro_sync.anotar_donde(cur, "AULA", "ID_AULA", "ID_TUTOR = :1", (id_tutor,))
         conn.commit()
+        referencia.limpiar()
         return {
             "id_tutor": id_tutor,
             "id_persona": None,
@@ -493,7 +727,7 @@ def asignar_tutor_a_aula(payload: TutorAulaAssignRequest):
 
         cur.execute(
             """
-            SELECT ID_AULA FROM AULA
+            SELECT ID_AULA, ID_TUTOR FROM AULA
             WHERE ID_AULA = :1 AND ID_SEDE = :2 AND ID_INSTITUCION = :3
         """,
             (payload.id_aula, payload.id_sede, payload.id_institucion),
@@ -525,8 +759,12 @@ def asignar_tutor_a_aula(payload: TutorAulaAssignRequest):
                 status_code=500,
                 detail="No se pudo asignar el tutor a la aula",
             )
+        registro_sync.anotar(cur, "AULA", payload.id_aula)
 
         conn.commit()
+        semana_tutor.invalidar(aula_exists[1], payload.id_tutor)
+        referencia.limpiar()
+        resumen_admin.marcar(payload.id_sede, payload.id_institucion)
 
         cur2 = conn.cursor()
         cur2.execute(
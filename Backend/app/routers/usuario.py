@@ -3,11 +3,12 @@ from fastapi import APIRouter, HTTPException
 import oracledb
 import logging
 from ..db import get_conn
+from ..perfilado import RutaPerfilable
 from ..schemas import UsuarioCreate
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/usuarios", tags=["usuarios"])
+router = APIRouter(prefix="/usuarios", tags=["usuarios"], route_class=RutaPerfilable)
 
 @router.post("/", status_code=201)
 def create_usuario(payload: UsuarioCreate):
@@ -21,12 +22,18 @@ def create_usuario(payload: UsuarioCreate):
         conn = get_conn()
         cur = conn.cursor()
         
-        logger.info(f"Creando usuario para persona {payload.id_persona}")
+        logger.info(f"Creando usuario para {payload.correo}")
         
+        # la persona se identifica por su correo
         cur.execute("""
-            INSERT INTO USUARIO (CONTRASENA, ID_PERSONA) 
-            VALUES (:1, :2)
-        """, (payload.contrasena, payload.id_persona))
+            INSERT INTO USUARIO (CONTRASENA, ID_PERSONA)
+            SELECT :1, ID_PERSONA
+            FROM PERSONA
+            WHERE LOWER(CORREO) = LOWER(:2)
+        """, (payload.contrasena, payload.correo))
+        
+        if cur.rowcount == 0:
+            raise HTTPException(status_code=404, detail="No hay una persona con ese correo")
         
         conn.commit()
         
@@ -34,6 +41,9 @@ def create_usuario(payload: UsuarioCreate):
         
         return {"status": "ok"}
         
+    except HTTPException:
+        raise
+        
     except oracledb.IntegrityError as e:
         if conn:
             conn.rollback()
@@ -1,6 +1,7 @@
 # backend/app/schemas.py
 from pydantic import BaseModel
-from typing import Optional
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
 
 # -----------------
 # Institución / Sede / Programa / Aula
@@ -267,6 +268,10 @@ class AsistenciaTutorCreate(BaseModel):
     hora_salida: Optional[str] = None
     id_motivo: Optional[int] = None
     id_asistencia_reposicion: Optional[int] = None
+    # 1 = la clase se dio (por defecto), 0 = no se dio (queda pendiente de reposición)
+    se_dio: Optional[int] = None
+    # clase del día a la que corresponde; sin horario, una sola por tutor, aula y día
+    id_horario: Optional[int] = None
 
 class AsistenciaTutorResponse(BaseModel):
     id_asistencia: int
@@ -279,6 +284,20 @@ class AsistenciaTutorResponse(BaseModel):
     hora_salida: Optional[str] = None
     se_dio: Optional[int] = None
 
+class ReposicionPendiente(BaseModel):
+    # clase no dictada que abre la cadena de reposiciones
+    id_asistencia: int
+    id_tutor: int
+    id_aula: int
+    id_sede: int
+    id_institucion: int
+    fecha: Optional[datetime] = None
+    id_motivo: Optional[int] = None
+    id_periodo: Optional[int] = None
+    # reposiciones intentadas (ninguna con SE_DIO = 1) y último eslabón de la cadena
+    intentos: int = 0
+    id_ultima_asistencia: int
+
 class AsistenciaEstudianteCreate(BaseModel):
     id_estudiante: int
     id_aula: int
@@ -288,6 +307,8 @@ class AsistenciaEstudianteCreate(BaseModel):
     hora_entrada: Optional[str] = None
     hora_salida: Optional[str] = None
     presente: Optional[int] = None
+    # clase del día a la que corresponde; sin horario, una sola por estudiante, aula y día
+    id_horario: Optional[int] = None
 
 class AsistenciaEstudianteResponse(BaseModel):
     id_asistencia: int
@@ -307,6 +328,141 @@ class FestivoCreate(BaseModel):
     fecha_festivo: str
     descripcion: Optional[str] = None
 
+class FestivoRead(BaseModel):
+    id_festivo: int
+    fecha_festivo: date
+    descripcion: Optional[str] = None
+
+class SesionRead(BaseModel):
+    id_sesion: int
+    id_horario: int
+    id_periodo: int
+    fecha: date
+    hora_inicio: Optional[str] = None
+    hora_fin: Optional[str] = None
+    id_aula: int
+    id_sede: int
+    id_institucion: int
+    # SE_DIO de la asistencia del tutor ese día (None = sin registrar)
+    se_dio: Optional[int] = None
+
+class MaterializarResponse(BaseModel):
+    id_periodo: Optional[int] = None
+    sesiones_borradas: int = 0
+    sesiones_creadas: int
+
+# -----------------
+# Reportes
+# -----------------
+
+class HorasTutorAula(BaseModel):
+    id_aula: int
+    id_sede: int
+    id_institucion: int
+    horas: int
+
+class HorasTutor(BaseModel):
+    id_tutor: int
+    nombre: Optional[str] = None
+    horas: int
+    aulas: List[HorasTutorAula] = []
+
+class HorasTutorResponse(BaseModel):
+    mes: str
+    total_horas: int
+    tutores: List[HorasTutor]
+
+class RefrescoResponse(BaseModel):
+    completo: bool
+    desde: Optional[date] = None
+    filas: int
+
+class ResumenAsistenciaEstudiante(BaseModel):
+    id_estudiante: int
+    nombre: Optional[str] = None
+    id_aula: Optional[int] = None
+    id_sede: Optional[int] = None
+    id_institucion: Optional[int] = None
+    clases: int
+    presentes: int
+    tasa: float
+    racha_actual: int
+    racha_maxima: int
+    ultima_fecha: Optional[date] = None
+    en_riesgo: bool
+    calculado: Optional[datetime] = None
+
+class ResumenAsistenciaAula(BaseModel):
+    id_aula: int
+    id_sede: int
+    id_institucion: int
+    estudiantes: int
+    clases: int
+    presentes: int
+    tasa: float
+    en_riesgo: int
+    calculado: Optional[datetime] = None
+
+class AnaliticaResponse(BaseModel):
+    registros: int
+    estudiantes: int
+    aulas: int
+    en_riesgo: int
+
+class AgregadoAsistencia(BaseModel):
+    id_institucion: Optional[int] = None
+    id_sede: Optional[int] = None
+    id_aula: Optional[int] = None
+    id_tutor: Optional[int] = None
+    id_estudiante: Optional[int] = None
+    dia_semana: Optional[int] = None
+    fecha: Optional[str] = None
+    mes: Optional[str] = None
+    total: int
+    # presentes (estudiantes) o clases dadas (tutores)
+    marcados: int
+    tasa: float
+
+class AgregadosAsistenciaResponse(BaseModel):
+    tabla: str
+    filas_en_memoria: int
+    actualizado: Optional[float] = None
+    grupos: List[AgregadoAsistencia]
+
+# -----------------
+# Histórico (periodos archivados)
+# -----------------
+
+class PeriodoArchivado(BaseModel):
+    id_periodo: int
+    fecha_inicio: Optional[date] = None
+    fecha_fin: Optional[date] = None
+    id_programa: Optional[int] = None
+    creado: Optional[str] = None
+    filas_tutor: int
+    filas_estudiante: int
+    filas_nota: int
+
+class AgregadoHistorico(BaseModel):
+    id_periodo: Optional[int] = None
+    id_institucion: Optional[int] = None
+    id_sede: Optional[int] = None
+    id_aula: Optional[int] = None
+    id_tutor: Optional[int] = None
+    id_estudiante: Optional[int] = None
+    mes: Optional[str] = None
+    total: int
+    marcados: int
+    tasa: float
+
+class NotaArchivada(BaseModel):
+    id_nota: int
+    valor: Optional[float] = None
+    id_estudiante: Optional[int] = None
+    id_periodo: Optional[int] = None
+    id_componente: Optional[int] = None
+    id_tutor: Optional[int] = None
+
 class RegistroCambioCreate(BaseModel):
     fecha: Optional[str] = None
     hora: Optional[str] = None
@@ -366,6 +522,54 @@ class HorarioSimple(BaseModel):
     id_aula: Optional[int] = None
     id_tutor: Optional[int] = None
 
+class AulaDashboard(AulaSimple):
+    numero_estudiantes: int = 0
+
+class SesionDashboard(BaseModel):
+    id_sesion: int
+    id_horario: int
+    fecha: date
+    hora_inicio: Optional[str] = None
+    hora_fin: Optional[str] = None
+    id_aula: int
+    id_sede: int
+    id_institucion: int
+    nombre_aula: Optional[str] = None
+    # SE_DIO de la asistencia del tutor ese día (None = sin registrar)
+    se_dio: Optional[int] = None
+
+class TutorDashboardResponse(BaseModel):
+    id_tutor: int
+    id_persona: int
+    aulas: List[AulaDashboard]
+    total_estudiantes: int
+    horarios: List[HorarioSimple]
+    # sesiones de Lunes a Domingo de la semana en curso
+    sesiones_semana: List[SesionDashboard]
+    # sesiones de hoy sin asistencia del tutor registrada
+    pendientes_hoy: List[SesionDashboard]
+
+class SemanaClase(BaseModel):
+    id_horario: int
+    hora_inicio: Optional[str] = None
+    hora_fin: Optional[str] = None
+    id_aula: Optional[int] = None
+    nombre_aula: Optional[str] = None
+    grado: Optional[str] = None
+    id_sede: Optional[int] = None
+    nombre_sede: Optional[str] = None
+    id_institucion: Optional[int] = None
+    nombre_institucion: Optional[str] = None
+
+class SemanaDia(BaseModel):
+    dia: str
+    clases: List[SemanaClase] = []
+
+class SemanaTutorResponse(BaseModel):
+    id_tutor: int
+    total_clases: int
+    dias: List[SemanaDia]
+
 
 # -----------------
 # Sede
@@ -385,3 +589,86 @@ class SedeCreate(BaseModel):
     telefono: Optional[str] = None
 
 
+
+
+# -----------------
+# Admin: perfilado
+# -----------------
+
+class PerfilArchivo(BaseModel):
+    nombre: str
+    bytes: int
+    creado: float
+
+class MuestreoResponse(BaseModel):
+    archivo: str
+    segundos: float
+    hz: int
+
+class ResumenKpiSede(BaseModel):
+    id_sede: int
+    id_institucion: int
+    estudiantes: int
+    aulas: int
+    aulas_sin_tutor: int
+    aulas_con_horario: int
+    asistencias_semana: int
+    presentes_semana: int
+    calculado: Optional[datetime] = None
+
+class ResumenAdminResponse(BaseModel):
+    calculado: Optional[datetime] = None  # momento del snapshot
+    semana: Optional[date] = None         # lunes de la semana de las asistencias
+    instituciones: int = 0
+    sedes: int = 0
+    estudiantes: int = 0
+    aulas: int = 0
+    aulas_sin_tutor: int = 0
+    aulas_con_horario: int = 0
+    cobertura_horario: Optional[float] = None        # aulas con horario / aulas
+    asistencias_semana: int = 0
+    presentes_semana: int = 0
+    tasa_asistencia_semana: Optional[float] = None   # presentes / asistencias
+    por_sede: Optional[List[ResumenKpiSede]] = None  # solo con ?por_sede=true
+
+# -----------------
+# Lote de peticiones (POST /batch)
+# -----------------
+class LotePeticion(BaseModel):
+    id: Optional[str] = None              # lo devuelve tal cual en el resultado
+    metodo: str = "GET"
+    url: str                              # ruta de la API, p. ej. "/tutores/1/aulas?x=1"
+    params: Optional[Dict[str, Any]] = None
+    cuerpo: Optional[Any] = None          # JSON del cuerpo (POST/PUT/PATCH)
+
+class LoteRequest(BaseModel):
+    peticiones: List[LotePeticion]
+    transaccion: bool = False             # las escrituras confirman juntas o ninguna
+
+class LoteResultado(BaseModel):
+    id: Optional[str] = None
+    estado: int
+    cuerpo: Optional[Any] = None
+
+# -----------------
+# Sincronización sin conexión (GET/POST /sync)
+# -----------------
+class MarcaAsistenciaSync(BaseModel):
+    id_cliente: str                       # id único que le puso el cliente a la marca (p. ej. un UUID)
+    id_estudiante: int
+    id_aula: int
+    id_sede: int
+    id_institucion: int
+    fecha: datetime                       # cuándo se tomó, no cuándo se sube
+    hora_entrada: Optional[str] = None
+    hora_salida: Optional[str] = None
+    presente: Optional[int] = 1
+    id_horario: Optional[int] = None      # clase del día (como en POST /asistencias/estudiantes)
+
+class SyncSubida(BaseModel):
+    marcas: List[MarcaAsistenciaSync]
+
+class SyncSubidaResponse(BaseModel):
+    guardadas: int                        # filas insertadas o actualizadas por esta subida
+    registradas: List[str]                # id_cliente ya guardados (ahora o en una subida anterior)
+    rechazadas: List[str]                 # aula ajena, estudiante inexistente o fecha futura
@@ -0,0 +1,237 @@
+# app/traza_sql.py
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import re
+import struct
+import time
+
+from . import metricas
+
+# -------------------------------
+# Traza de SQL por petición
+# -------------------------------
+# get_conn() envuelve la conexión en ConexionTrazada: cada execute/fetch se
+# mide y se anota en la traza de la petición en curso (un ContextVar que abre
+# el middleware de main.py y que llega a los handlers síncronos del
+# threadpool). Con eso la respuesta lleva un Server-Timing con el tiempo de
+# base vs. Python, y las sentencias que pasan de SQL_LENTO_MS van al log
+# "app.sql_lento" en JSON, con el SQL_ID de Oracle y sin valores de binds.
+
+TRAZA_SQL_HABILITADA = os.getenv("TRAZA_SQL", "1") == "1"
+SQL_LENTO_MS = float(os.getenv("SQL_LENTO_MS", "200"))
+
+logger_lento = logging.getLogger("app.sql_lento")
+
+_traza_actual = contextvars.ContextVar("traza_sql", default=None)
+
+_ALFABETO_SQL_ID = "0123456789abcdfghjkmnpqrstuvwxyz"
+_ESPACIOS = re.compile(r"\s+")
+
+
+def sql_id(sql: str) -> str:
+    """
+    SQL_ID como lo calcula Oracle (V$SQL.SQL_ID): últimos 8 bytes del MD5 del
+    texto exacto más un NUL, en base 32. Sirve para buscar la sentencia en
+    V$SQL / AWR.
+    """
+    digest = hashlib.md5(sql.encode("utf-8") + b"\x00").digest()
+    alto, bajo = struct.unpack("<II", digest[8:16])
+    numero = (alto << 32) | bajo
+    caracteres = []
+    for _ in range(13):
+        numero, resto = divmod(numero, 32)
+        caracteres.append(_ALFABETO_SQL_ID[resto])
+    return "".join(reversed(caracteres))
+
+
+def _binds_redactados(parametros):
+    """Solo el tipo de cada bind: los valores pueden ser datos personales."""
+    if parametros is None:
+        return None
+    if isinstance(parametros, dict):
+        return {k: type(v).__name__ for k, v in parametros.items()}
+    if isinstance(parametros, (list, tuple)):
+        return [type(v).__name__ for v in parametros]
+    return type(parametros).__name__
+
+
+class TrazaPeticion:
+    """Sentencias de una petición con sus tiempos (ms) y filas leídas."""
+
+    def __init__(self, ruta: str = None):
+        self.ruta = ruta
+        self.inicio = time.perf_counter()
+        self.espera_pool_ms = 0.0
+        self.db_ms = 0.0
+        # sql_id -> {"sql_id", "ejecuciones", "ms", "filas"}
+        self.sentencias = {}
+
+    def anotar(self, id_sql: str, ms: float, filas: int = 0, ejecucion: bool = True):
+        self.db_ms += ms
+        entrada = self.sentencias.get(id_sql)
+        if entrada is None:
+            entrada = self.sentencias[id_sql] = {"sql_id": id_sql, "ejecuciones": 0, "ms": 0.0, "filas": 0}
+        entrada["ejecuciones"] += ejecucion
+        entrada["ms"] += ms
+        entrada["filas"] += filas
+
+    def server_timing(self) -> str:
+        total_ms = (time.perf_counter() - self.inicio) * 1000
+        app_ms = max(total_ms - self.db_ms - self.espera_pool_ms, 0.0)
+        ejecuciones = sum(s["ejecuciones"] for s in self.sentencias.values())
+        return (
+            f'db;dur={self.db_ms:.1f};desc="{ejecuciones} sentencias", '
+            f"pool;dur={self.espera_pool_ms:.1f}, app;dur={app_ms:.1f}"
+        )
+
+    def como_dict(self) -> dict:
+        return {
+            "ruta": self.ruta,
+            "db_ms": round(self.db_ms, 2),
+            "espera_pool_ms": round(self.espera_pool_ms, 2),
+            "sentencias": [
+                {**s, "ms": round(s["ms"], 2)}
+                for s in sorted(self.sentencias.values(), key=lambda s: -s["ms"])
+            ],
+        }
+
+
+def iniciar(ruta: str = None) -> TrazaPeticion:
+    traza = TrazaPeticion(ruta)
+    _traza_actual.set(traza)
+    return traza
+
+
+def actual():
+    return _traza_actual.get()
+
+
+def anotar_espera_pool(segundos: float):
+    traza = _traza_actual.get()
+    if traza is not None:
+        traza.espera_pool_ms += segundos * 1000
+
+
+def _registrar(sql: str, id_sql: str, ms: float, filas: int, parametros, ejecucion: bool = True):
+    traza = _traza_actual.get()
+    if traza is not None:
+        traza.anotar(id_sql, ms, filas, ejecucion)
+    if not ejecucion:
+        return
+    etiquetas = (("sql_id", id_sql),)
+    metricas.sumar("db_sentencias_total", etiquetas)
+    metricas.sumar("db_sentencias_segundos_total", etiquetas, ms / 1000)
+    if ms >= SQL_LENTO_MS:
+        logger_lento.warning(json.dumps({
+            "sql_id": id_sql,
+            "ms": round(ms, 2),
+            "ruta": traza.ruta if traza else None,
+            "sql": _ESPACIOS.sub(" ", sql).strip()[:2000],
+            "binds": _binds_redactados(parametros),
+        }, ensure_ascii=False))
+
+
+class CursorTrazado:
+    """Cursor de oracledb que mide execute y fetch; el resto pasa directo."""
+
+    def __init__(self, cursor):
+        object.__setattr__(self, "_cursor", cursor)
+        object.__setattr__(self, "_sql", None)
+        object.__setattr__(self, "_id", None)
+
+    def _medir(self, metodo, sql, parametros, *args, **kwargs):
+        if sql is not None:
+            object.__setattr__(self, "_sql", sql)
+            object.__setattr__(self, "_id", sql_id(sql))
+        t0 = time.perf_counter()
+        try:
+            return metodo(*args, **kwargs)
+        finally:
+            _registrar(self._sql or "", self._id or "", (time.perf_counter() - t0) * 1000, 0, parametros)
+
+    def execute(self, sql, parametros=None, **kwargs):
+        if parametros is None:
+            return self._medir(self._cursor.execute, sql, kwargs or None, sql, **kwargs)
+        return self._medir(self._cursor.execute, sql, parametros, sql, parametros, **kwargs)
+
+    def executemany(self, sql, filas, **kwargs):
+        return self._medir(self._cursor.executemany, sql, filas[0] if filas else None, sql, filas, **kwargs)
+
+    def callproc(self, nombre, *args, **kwargs):
+        return self._medir(self._cursor.callproc, f"CALL {nombre}", None, nombre, *args, **kwargs)
+
+    def _leer(self, metodo, *args):
+        t0 = time.perf_counter()
+        resultado = metodo(*args)
+        filas = 0 if resultado is None else (len(resultado) if isinstance(resultado, list) else 1)
+        _registrar(self._sql or "", self._id or "", (time.perf_counter() - t0) * 1000, filas, None, ejecucion=False)
+        return resultado
+
+    def fetchone(self):
+        return self._leer(self._cursor.fetchone)
+
+    def fetchmany(self, *args):
+        return self._leer(self._cursor.fetchmany, *args)
+
+    def fetchall(self):
+        return self._leer(self._cursor.fetchall)
+
+    def __iter__(self):
+        while True:
+            fila = self.fetchone()
+            if fila is None:
+                return
+            yield fila
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def __setattr__(self, nombre, valor):
+        # arraysize, prefetchrows, rowfactory... van al cursor real
+        setattr(self._cursor, nombre, valor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self._cursor.close()
+
+
+class ConexionTrazada:
+    """Conexión de oracledb cuyos cursores y commits quedan en la traza."""
+
+    def __init__(self, conexion):
+        self._conexion = conexion
+
+    def cursor(self, *args, **kwargs):
+        return CursorTrazado(self._conexion.cursor(*args, **kwargs))
+
+    def commit(self):
+        t0 = time.perf_counter()
+        try:
+            return self._conexion.commit()
+        finally:
+            _registrar("COMMIT", "commit", (time.perf_counter() - t0) * 1000, 0, None)
+
+    def rollback(self):
+        t0 = time.perf_counter()
+        try:
+            return self._conexion.rollback()
+        finally:
+            _registrar("ROLLBACK", "rollback", (time.perf_counter() - t0) * 1000, 0, None)
+
+    def __getattr__(self, nombre):
+        return getattr(self._conexion, nombre)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self._conexion.close()
+
+
+def envolver(conexion):
+    return ConexionTrazada(conexion) if TRAZA_SQL_HABILITADA else conexion
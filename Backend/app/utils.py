@@ -3,7 +3,7 @@ import os
 from datetime import datetime, timedelta
 
 import jwt
-from fastapi import HTTPException, Security
+from fastapi import Depends, HTTPException, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 # Configuración (se puede sobreescribir con .env)
@@ -14,17 +14,19 @@ JWT_EXPIRES_MINUTES = int(os.getenv("JWT_EXPIRES_MINUTES", 60 * 24))  # por defe
 security = HTTPBearer()
 
 
-def create_token_for_user(id_persona: int, nombre: str) -> str:
+def create_token_for_user(id_persona: int, nombre: str, rol: str = None) -> str:
     """
     Crea un JWT con payload mínimo.
     - sub: id_persona (string)
     - nombre: nombre del usuario
+    - rol: TUTOR, ADMINISTRATIVO o ADMINISTRADOR (lo usan las rutas restringidas)
     - exp: tiempo de expiración
     """
     expire = datetime.utcnow() + timedelta(minutes=JWT_EXPIRES_MINUTES)
     payload = {
         "sub": str(id_persona),
         "nombre": nombre,
+        "rol": rol,
         "exp": expire
     }
     token = jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGO)
@@ -43,9 +45,31 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Security(securi
     token = credentials.credentials
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGO])
-        # payload mínimo: {"sub": "...", "nombre": "...", "exp": ...}
+        # payload mínimo: {"sub": "...", "nombre": "...", "rol": "...", "exp": ...}
         return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expirado")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Token inválido")
+
+
+def decode_token(token: str) -> dict:
+    """Payload del token, o None si no es válido o venció (sin lanzar HTTPException)."""
+    try:
+        return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGO])
+    except jwt.InvalidTokenError:
+        return None
+
+
+def require_roles(*roles: str):
+    """
+    Dependencia para endpoints restringidos a ciertos roles.
+    Uso: user = Depends(require_roles("ADMINISTRADOR"))
+    Los tokens emitidos antes de incluir el rol no pasan: hay que volver a iniciar sesión.
+    """
+    def dependencia(user: dict = Depends(get_current_user)):
+        if user.get("rol") not in roles:
+            raise HTTPException(status_code=403, detail="No tiene permisos para esta operación")
+        return user
+
+    return dependencia
@@ -0,0 +1,73 @@
+# scripts/archivar.py
+"""
+Archiva periodos cerrados: exporta sus asistencias y notas a ARCHIVO_DIR
+(ver app/archivo.py) y las borra de las tablas calientes por lotes.
+
+Uso (desde la carpeta Backend, con las mismas variables de entorno de la app):
+    python -m scripts.archivar --listar           # periodos que se archivarían
+    python -m scripts.archivar                    # archiva todos los pendientes
+    python -m scripts.archivar --periodo 12       # solo ese periodo
+    python -m scripts.archivar --solo-exportar    # exporta sin borrar
+    python -m scripts.archivar --periodo 12 --forzar   # aunque no haya terminado antes del límite
+
+Por defecto solo se archivan periodos terminados antes del inicio del mes
+anterior: así la reconstrucción nocturna de RESUMEN_HORAS_TUTOR (que recalcula
+desde esa fecha) nunca pierde filas ya archivadas. --periodo respeta el mismo
+límite salvo con --forzar.
+"""
+import argparse
+import sys
+from datetime import date
+
+import oracledb
+
+from app import archivo, horas_tutor
+from app.db import get_conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archiva periodos cerrados")
+    parser.add_argument("--periodo", type=int, help="archivar solo este ID_PERIODO")
+    parser.add_argument("--antes-de", type=date.fromisoformat,
+                        help="archivar periodos con FECHA_FIN anterior a esta fecha (YYYY-MM-DD)")
+    parser.add_argument("--listar", action="store_true", help="solo listar periodos pendientes")
+    parser.add_argument("--solo-exportar", action="store_true", help="no borrar de las tablas calientes")
+    parser.add_argument("--forzar", action="store_true",
+                        help="archivar --periodo aunque no haya terminado antes del límite")
+    args = parser.parse_args()
+
+    limite = horas_tutor.inicio_ventana_reciente()
+    antes_de = min(args.antes_de, limite) if args.antes_de else limite
+
+    conn = get_conn()
+    try:
+        if args.periodo is not None:
+            periodos = [args.periodo]
+        else:
+            periodos = archivo.periodos_para_archivar(conn, antes_de)
+
+        if not periodos:
+            print("No hay periodos para archivar.")
+            return 0
+
+        for id_periodo in periodos:
+            if args.listar:
+                print(f"Pendiente: periodo {id_periodo} (estado: {archivo.estado_archivo(conn, id_periodo) or '-'})")
+                continue
+            print(f"Archivando periodo {id_periodo} ...")
+            try:
+                resultado = archivo.archivar_periodo(
+                    conn, id_periodo, borrar=not args.solo_exportar, antes_de=antes_de, forzar=args.forzar
+                )
+            except (oracledb.DatabaseError, ValueError, OSError) as e:
+                conn.rollback()
+                print(f"Error archivando periodo {id_periodo}: {e}")
+                return 1
+            print(f"  exportado: {resultado['exportado']}, borradas: {resultado['borradas']}")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+# scripts/asesor_indices.py
+"""
+Asesor de índices: extrae las sentencias SQL de app/routers, pide a Oracle su
+plan (EXPLAIN PLAN) y marca los accesos completos (TABLE ACCESS FULL,
+INDEX FULL/FAST FULL SCAN) con las columnas filtradas que convendría indexar.
+
+El SQL se toma del código (ast), no de una ejecución:
+- los f-strings se resuelven con las variables y listas literales de la misma
+  función; los filtros opcionales (`filtros.append("...")`) se incluyen todos;
+- lo que no se puede resolver se reemplaza por algo neutro (1=1, NULL o vacío)
+  y, si aun así Oracle no lo entiende, la sentencia se lista como no analizable.
+
+Usar una base con datos de ejemplo y estadísticas recientes: con tablas casi
+vacías el optimizador prefiere recorrerlas completas aunque haya índice.
+
+Uso (desde la carpeta Backend, con las mismas variables de entorno de la app):
+    python -m scripts.asesor_indices --listar      # solo muestra el SQL extraído
+    python -m scripts.asesor_indices               # EXPLAIN PLAN de cada sentencia
+    python -m scripts.asesor_indices --min-filas 1000
+"""
+import argparse
+import ast
+import os
+import re
+import sys
+
+import oracledb
+
+from app.db import get_conn
+
+CARPETA_ROUTERS = os.path.join(os.path.dirname(__file__), "..", "app", "routers")
+
+_ANALIZABLE = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE|MERGE|INSERT\s+INTO\s+\w+\s*(\([^)]*\))?\s*SELECT)\b",
+                         re.IGNORECASE | re.DOTALL)
+# "A"."ID_TUTOR"=TO_NUMBER(:1), LOWER("CORREO")=LOWER(:1), ...
+_COLUMNA = re.compile(r'"([A-Z0-9_$#]+)"\)?\s*(=|<|>|<=|>=|IN|LIKE|IS)')
+
+
+# ---------------- extracción ----------------
+
+class _Resolutor:
+    """
+    Recorre una función en orden de código y evalúa el texto de cada
+    cur.execute con las variables y listas conocidas hasta ese punto.
+    """
+
+    def __init__(self, funcion: ast.AST):
+        self.variables = {}
+        self.listas = {}
+        self.sentencias = []
+        nodos = sorted(
+            (n for n in ast.walk(funcion) if hasattr(n, "lineno")),
+            key=lambda n: (n.lineno, n.col_offset),
+        )
+        for nodo in nodos:
+            if isinstance(nodo, ast.Assign) and len(nodo.targets) == 1 and isinstance(nodo.targets[0], ast.Name):
+                nombre = nodo.targets[0].id
+                if isinstance(nodo.value, ast.List):
+                    self.listas[nombre] = [self.texto(e) for e in nodo.value.elts]
+                else:
+                    valor = self.texto(nodo.value)
+                    # se queda la última asignación conocida: la rama "con filtros"
+                    if valor is not None:
+                        self.variables[nombre] = valor
+            elif isinstance(nodo, ast.Call) and isinstance(nodo.func, ast.Attribute) and nodo.args:
+                if nodo.func.attr == "append" and isinstance(nodo.func.value, ast.Name):
+                    self.listas.setdefault(nodo.func.value.id, []).append(self.texto(nodo.args[0]))
+                elif nodo.func.attr in ("execute", "executemany"):
+                    self.sentencias.append((nodo.lineno, self.texto(nodo.args[0])))
+
+    def texto(self, nodo):
+        """Texto de la expresión o None si no se puede saber."""
+        if isinstance(nodo, ast.Constant) and isinstance(nodo.value, str):
+            return nodo.value
+        if isinstance(nodo, ast.JoinedStr):
+            partes = []
+            for v in nodo.values:
+                if isinstance(v, ast.Constant):
+                    partes.append(v.value)
+                else:
+                    valor = self.texto(v.value)
+                    partes.append(valor if valor is not None else _neutro("".join(partes)))
+            return "".join(partes)
+        if isinstance(nodo, ast.BinOp) and isinstance(nodo.op, ast.Add):
+            a, b = self.texto(nodo.left), self.texto(nodo.right)
+            return a + b if a is not None and b is not None else None
+        if isinstance(nodo, ast.IfExp):
+            return self.texto(nodo.body)
+        if isinstance(nodo, ast.Name):
+            return self.variables.get(nodo.id)
+        if isinstance(nodo, ast.Call) and isinstance(nodo.func, ast.Attribute) and nodo.func.attr == "join" \
+                and isinstance(nodo.func.value, ast.Constant) and len(nodo.args) == 1 \
+                and isinstance(nodo.args[0], ast.Name):
+            elementos = self.listas.get(nodo.args[0].id)
+            if elementos and all(e is not None for e in elementos):
+                return nodo.func.value.value.join(elementos)
+        return None
+
+
+def _neutro(anterior: str) -> str:
+    """Reemplazo de una parte desconocida de un f-string según lo que la precede."""
+    final = anterior.rstrip().upper()
+    if final.endswith("WHERE") or final.endswith("AND"):
+        return "1=1"
+    if anterior.endswith(":"):
+        return "1"
+    if final.endswith("("):
+        return "NULL"
+    return ""
+
+
+def extraer_sentencias(carpeta: str = CARPETA_ROUTERS):
+    """[(archivo, línea, función, sql)] de cada cur.execute/executemany con SQL analizable."""
+    sentencias = []
+    for nombre in sorted(os.listdir(carpeta)):
+        if not nombre.endswith(".py"):
+            continue
+        ruta = os.path.join(carpeta, nombre)
+        with open(ruta, encoding="utf-8") as f:
+            arbol = ast.parse(f.read(), filename=ruta)
+
+        for funcion in ast.walk(arbol):
+            if not isinstance(funcion, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                continue
+            for linea, sql in _Resolutor(funcion).sentencias:
+                if sql and _ANALIZABLE.match(sql):
+                    sentencias.append((nombre, linea, funcion.name, sql.strip()))
+    return sentencias
+
+
+# ---------------- plan ----------------
+
+def explicar(cur, sql: str, id_sentencia: str):
+    """Filas de PLAN_TABLE para la sentencia (los binds no necesitan valor)."""
+    cur.execute("DELETE FROM PLAN_TABLE WHERE STATEMENT_ID = :1", (id_sentencia,))
+    cur.execute(f"EXPLAIN PLAN SET STATEMENT_ID = '{id_sentencia}' FOR {sql}")
+    cur.execute("""
+        SELECT ID, DEPTH, OPERATION, OPTIONS, OBJECT_NAME, OBJECT_TYPE,
+               ACCESS_PREDICATES, FILTER_PREDICATES
+        FROM PLAN_TABLE
+        WHERE STATEMENT_ID = :1
+        ORDER BY ID
+    """, (id_sentencia,))
+    cols = [c[0].lower() for c in cur.description]
+    plan = [dict(zip(cols, r)) for r in cur.fetchall()]
+    cur.execute("DELETE FROM PLAN_TABLE WHERE STATEMENT_ID = :1", (id_sentencia,))
+    return plan
+
+
+def accesos_completos(plan):
+    return [
+        p for p in plan
+        if (p["operation"] == "TABLE ACCESS" and p["options"] == "FULL")
+        or (p["operation"] == "INDEX" and p["options"] in ("FULL SCAN", "FAST FULL SCAN"))
+    ]
+
+
+def columnas_filtradas(paso) -> list:
+    """Columnas comparadas en los predicados del paso, en orden de aparición."""
+    columnas = []
+    for predicado in (paso.get("filter_predicates"), paso.get("access_predicates")):
+        for col, _ in _COLUMNA.findall(predicado or ""):
+            if col not in columnas:
+                columnas.append(col)
+    return columnas
+
+
+def cargar_catalogo(cur):
+    """({tabla: filas}, {tabla: [columnas iniciales de cada índice]}, {índice: tabla})."""
+    cur.execute("SELECT TABLE_NAME, NUM_ROWS FROM USER_TABLES")
+    filas = {t: n for t, n in cur.fetchall()}
+    cur.execute("""
+        SELECT c.TABLE_NAME, c.INDEX_NAME, c.COLUMN_NAME, e.COLUMN_EXPRESSION
+        FROM USER_IND_COLUMNS c
+        LEFT JOIN USER_IND_EXPRESSIONS e
+            ON e.INDEX_NAME = c.INDEX_NAME AND e.COLUMN_POSITION = c.COLUMN_POSITION
+        WHERE c.COLUMN_POSITION = 1
+    """)
+    iniciales = {}
+    for tabla, _, columna, expresion in cur.fetchall():
+        iniciales.setdefault(tabla, []).append(columna if expresion is None else expresion.upper())
+    cur.execute("SELECT INDEX_NAME, TABLE_NAME FROM USER_INDEXES")
+    indices = dict(cur.fetchall())
+    return filas, iniciales, indices
+
+
+def recomendar(paso, filas, iniciales, indices, min_filas: int):
+    """(tabla, mensaje) para un acceso completo, o None si no vale la pena."""
+    tabla = paso["object_name"] if paso["operation"] == "TABLE ACCESS" else indices.get(paso["object_name"])
+    n = filas.get(tabla)
+    if n is not None and n < min_filas:
+        return None
+    columnas = columnas_filtradas(paso)
+    if not columnas:
+        return tabla, "sin filtro sobre la tabla (lectura completa esperada)"
+    existentes = [c for c in columnas if any(c in i for i in iniciales.get(tabla, []))]
+    if existentes:
+        return tabla, (f"ya hay índice que empieza por {', '.join(existentes)}: "
+                       f"revise estadísticas (filas={n})")
+    return tabla, f"sugerido: CREATE INDEX IDX_{tabla}_{columnas[0]} ON {tabla}({', '.join(columnas)})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Busca accesos completos en el SQL de los routers")
+    parser.add_argument("--listar", action="store_true", help="solo listar el SQL extraído (sin base)")
+    parser.add_argument("--min-filas", type=int, default=0,
+                        help="ignorar tablas con menos filas según las estadísticas")
+    parser.add_argument("--plan", action="store_true", help="imprimir el plan de cada sentencia")
+    args = parser.parse_args()
+
+    sentencias = extraer_sentencias()
+    if args.listar:
+        for archivo, linea, funcion, sql in sentencias:
+            print(f"{archivo}:{linea} {funcion}\n    {' '.join(sql.split())}")
+        print(f"{len(sentencias)} sentencias")
+        return 0
+
+    conn = get_conn()
+    cur = conn.cursor()
+    marcadas = 0
+    try:
+        filas, iniciales, indices = cargar_catalogo(cur)
+        for i, (archivo, linea, funcion, sql) in enumerate(sentencias):
+            ubicacion = f"{archivo}:{linea} {funcion}"
+            try:
+                plan = explicar(cur, sql, f"ASESOR_{i}")
+            except oracledb.DatabaseError as e:
+                print(f"NO ANALIZABLE  {ubicacion}: {str(e).splitlines()[0]}")
+                continue
+
+            hallazgos = [r for r in (recomendar(p, filas, iniciales, indices, args.min_filas)
+                                     for p in accesos_completos(plan)) if r]
+            if hallazgos:
+                marcadas += 1
+                print(f"FULL  {ubicacion}")
+                for tabla, mensaje in hallazgos:
+                    print(f"      {tabla}: {mensaje}")
+            else:
+                print(f"OK    {ubicacion}")
+            if args.plan or hallazgos:
+                for p in plan:
+                    print(f"        {'  ' * p['depth']}{p['operation']} {p['options'] or ''} {p['object_name'] or ''}")
+        conn.rollback()
+    finally:
+        cur.close()
+        conn.close()
+
+    print(f"{len(sentencias)} sentencias, {marcadas} con accesos completos")
+    return 1 if marcadas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
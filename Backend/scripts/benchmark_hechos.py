@@ -0,0 +1,102 @@
+# scripts/benchmark_hechos.py
+"""
+Benchmark del almacén columnar de asistencias (app/hechos_asistencia.py).
+
+Genera filas sintéticas (sin Oracle), las carga por lotes como lo hace el
+refresco y mide consultas típicas de los dashboards.
+
+Uso (desde la carpeta Backend):
+    python -m scripts.benchmark_hechos                 # 10 millones de filas
+    python -m scripts.benchmark_hechos --filas 1000000 --repeticiones 20
+"""
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.hechos_asistencia import AlmacenHechos
+
+INSTITUCIONES = 20
+SEDES_POR_INSTITUCION = 3
+AULAS_POR_SEDE = 10
+TUTORES = 200
+ESTUDIANTES = 15000
+DIAS = 730
+LOTE = 1_000_000
+
+
+def generar_lote(rng, inicio_id: int, m: int, dia_inicial: int) -> np.ndarray:
+    inst = rng.integers(1, INSTITUCIONES + 1, m)
+    sede = rng.integers(1, SEDES_POR_INSTITUCION + 1, m) + inst * 100
+    aula = rng.integers(1, AULAS_POR_SEDE + 1, m) + sede * 100
+    datos = np.empty((m, 8), dtype=np.int64)
+    datos[:, 0] = np.arange(inicio_id, inicio_id + m)
+    datos[:, 1] = inst
+    datos[:, 2] = sede
+    datos[:, 3] = aula
+    datos[:, 4] = aula % TUTORES + 1
+    datos[:, 5] = rng.integers(1, ESTUDIANTES + 1, m)
+    datos[:, 6] = dia_inicial + rng.integers(0, DIAS, m)
+    datos[:, 7] = rng.random(m) < 0.85
+    return datos
+
+
+def medir(nombre: str, funcion, repeticiones: int):
+    funcion()  # calentamiento
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        grupos = len(funcion())
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    tiempos.sort()
+    p50 = tiempos[len(tiempos) // 2]
+    p95 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))]
+    print(f"{nombre:<48} {grupos:>8} grupos  p50 {p50:8.2f} ms  p95 {p95:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del almacén columnar de asistencias")
+    parser.add_argument("--filas", type=int, default=10_000_000)
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.semilla)
+    dia_inicial = (date.today() - timedelta(days=DIAS) - date(1970, 1, 1)).days
+    almacen = AlmacenHechos()
+
+    t0 = time.perf_counter()
+    cargadas = 0
+    while cargadas < args.filas:
+        m = min(LOTE, args.filas - cargadas)
+        almacen.agregar_filas("estudiante", generar_lote(rng, cargadas + 1, m, dia_inicial))
+        cargadas += m
+    carga = time.perf_counter() - t0
+    estado = almacen.estado()["tablas"]["estudiante"]
+    print(
+        f"Carga: {cargadas:,} filas en {carga:.2f}s "
+        f"({estado['bytes'] / 1024 / 1024:.0f} MiB, {estado['bytes'] / max(cargadas, 1):.1f} B/fila)"
+    )
+
+    hoy = date.today()
+    mes_pasado = hoy - timedelta(days=30)
+    consultas = [
+        ("total", [], {}),
+        ("por institución", ["institucion"], {}),
+        ("por institución x día de semana", ["institucion", "dia_semana"], {}),
+        ("institución 7, último mes, por aula", ["aula"], {"institucion": 7, "desde": mes_pasado, "hasta": hoy}),
+        ("sede (702, 7), por tutor y mes", ["tutor", "mes"], {"sede": (702, 7)}),
+        ("por fecha", ["fecha"], {}),
+        ("por estudiante", ["estudiante"], {}),
+        ("aula (70203, 702, 7), viernes, por estudiante", ["estudiante"],
+         {"aula": (70203, 702, 7), "dia_semana": 4}),
+    ]
+    for nombre, agrupar, filtros in consultas:
+        medir(nombre, lambda: almacen.agregar("estudiante", agrupar, filtros), args.repeticiones)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
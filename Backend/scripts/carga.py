@@ -0,0 +1,322 @@
+# scripts/carga.py
+"""
+Prueba de carga de la API con el tráfico de un día de clases.
+
+Cada usuario virtual es un worker asyncio con su propio httpx.AsyncClient
+que repite la secuencia de llamadas del frontend para su perfil:
+
+  inicio_clase  (TomarAsistencia) login -> id_tutor -> aulas -> horarios ->
+                roster -> asistencia del tutor -> asistencia de cada
+                estudiante, todas a la vez como el Promise.all del frontend
+  horario       (MiHorario) login -> instituciones -> tutores -> aulas ->
+                horarios -> semana del tutor
+
+El pico de inicio de clase es todos los tutores entrando en el mismo minuto:
+por eso por defecto arrancan todos a la vez (--rampa 0).
+
+Corre contra una API levantada (--url, con Oracle detrás) o dentro del mismo
+proceso contra la base offline (--offline, scripts/oracle_offline.py). En
+offline las peticiones se atienden de a una, sirve para comparar builds, no
+para estimar la capacidad de Oracle.
+
+Escribe en --salida:
+  resumen.json      por paso: peticiones, errores, p50/p90/p99/máx, throughput
+  histogramas.csv   latencias por paso en cubetas logarítmicas de ms
+  muestras.csv      cada petición (segundo, paso, estado, ms)
+y con --comparar muestra la diferencia contra el resumen.json de otra corrida.
+
+Uso (desde la carpeta Backend):
+    python -m scripts.carga --offline --usuarios 20 --duracion 30
+    python -m scripts.carga --url http://127.0.0.1:8000 --usuarios 200 --duracion 120 \\
+        --credenciales tutores.csv --salida resultados/antes
+    python -m scripts.carga --offline --comparar resultados/antes/resumen.json
+
+--credenciales es un CSV con correo,contrasena,perfil (perfil = inicio_clase
+u horario). Sin él se usan los usuarios de seed_full.sql.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import sys
+import time
+from datetime import date
+
+import httpx
+
+# usuarios de seed_full.sql
+CREDENCIALES_SEED = [
+    ("sergio.tutor@demo.com", "123", "inicio_clase"),
+    ("carlos.tutor@demo.com", "789", "inicio_clase"),
+    ("sebastian.admin@demo.com", "456", "horario"),
+    ("andrea.secretaria@demo.com", "000", "horario"),
+]
+
+# límites superiores de las cubetas del histograma, en ms
+CUBETAS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+
+class Registro:
+    """Latencias de todas las peticiones de la corrida, por paso."""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.muestras = []  # (segundo, paso, estado, ms)
+
+    async def pedir(self, cliente: httpx.AsyncClient, paso: str, metodo: str, url: str, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            respuesta = await cliente.request(metodo, url, **kwargs)
+            estado = respuesta.status_code
+        except httpx.HTTPError:
+            respuesta, estado = None, 0
+        t1 = time.perf_counter()
+        self.muestras.append((round(t0 - self.inicio, 3), paso, estado, (t1 - t0) * 1000))
+        if respuesta is None or estado >= 400:
+            return None
+        return respuesta.json()
+
+
+def _percentil(ordenados: list, p: float) -> float:
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def resumir(muestras: list, segundos: float) -> dict:
+    pasos = {}
+    for _, paso, estado, ms in muestras:
+        pasos.setdefault(paso, []).append((estado, ms))
+    resumen = {}
+    for paso, filas in sorted(pasos.items()):
+        tiempos = sorted(ms for _, ms in filas)
+        resumen[paso] = {
+            "peticiones": len(filas),
+            "errores": sum(1 for estado, _ in filas if estado == 0 or estado >= 400),
+            "por_segundo": round(len(filas) / segundos, 2),
+            "p50_ms": round(_percentil(tiempos, 0.50), 2),
+            "p90_ms": round(_percentil(tiempos, 0.90), 2),
+            "p99_ms": round(_percentil(tiempos, 0.99), 2),
+            "max_ms": round(tiempos[-1], 2),
+        }
+    return resumen
+
+
+def histogramas(muestras: list) -> dict:
+    conteos = {}
+    for _, paso, _, ms in muestras:
+        fila = conteos.setdefault(paso, [0] * (len(CUBETAS_MS) + 1))
+        fila[next((i for i, limite in enumerate(CUBETAS_MS) if ms <= limite), len(CUBETAS_MS))] += 1
+    return conteos
+
+
+# ---------------------------------------------------------------------------
+# perfiles: la secuencia de llamadas de cada pantalla del frontend
+# ---------------------------------------------------------------------------
+
+async def _login(reg: Registro, cliente, correo: str, contrasena: str):
+    return await reg.pedir(cliente, "POST /auth/login", "POST", "/auth/login",
+                           json={"email": correo, "password": contrasena})
+
+
+async def inicio_clase(reg: Registro, cliente, rng: random.Random, correo: str, contrasena: str, pausa):
+    """TomarAsistencia: el tutor entra, elige su aula y guarda la asistencia."""
+    sesion = await _login(reg, cliente, correo, contrasena)
+    if not sesion:
+        return
+    await pausa()
+    tutor = await reg.pedir(cliente, "GET /tutores/by-persona/{id_persona}", "GET",
+                            f"/tutores/by-persona/{sesion['id_persona']}")
+    if not tutor or tutor.get("id_tutor") is None:
+        return
+    id_tutor = tutor["id_tutor"]
+    aulas = await reg.pedir(cliente, "GET /tutores/{id_tutor}/aulas", "GET", f"/tutores/{id_tutor}/aulas")
+    horarios = await reg.pedir(cliente, "GET /tutores/horarios", "GET", "/tutores/horarios",
+                               params={"tutors": id_tutor})
+    if not aulas:
+        return
+    await pausa()
+    roster = await reg.pedir(cliente, "GET /tutores/{id_tutor}/aulas/students", "GET",
+                             f"/tutores/{id_tutor}/aulas/students")
+    aula = rng.choice(aulas)
+    estudiantes = next((a["estudiantes"] for a in roster or [] if a["id_aula"] == aula["id_aula"]), [])
+    clase = next((h for h in horarios or [] if h["id_aula"] == aula["id_aula"]), None)
+    base = {
+        "id_aula": aula["id_aula"],
+        "id_sede": aula["id_sede"],
+        "id_institucion": aula["id_institucion"],
+        "fecha": date.today().isoformat(),
+        "hora_entrada": clase["hora_inicio"] if clase else "07:00",
+        "hora_salida": clase["hora_fin"] if clase else "08:00",
+    }
+    await pausa()
+    if not await reg.pedir(cliente, "POST /asistencias/tutores", "POST", "/asistencias/tutores",
+                           json={**base, "id_tutor": id_tutor}):
+        return
+    await asyncio.gather(*(
+        reg.pedir(cliente, "POST /asistencias/estudiantes", "POST", "/asistencias/estudiantes",
+                  json={**base, "id_estudiante": e["id_estudiante"], "presente": int(rng.random() < 0.9)})
+        for e in estudiantes
+    ))
+
+
+async def horario(reg: Registro, cliente, rng: random.Random, correo: str, contrasena: str, pausa):
+    """MiHorario: el coordinador abre el horario y revisa el de algún tutor."""
+    sesion = await _login(reg, cliente, correo, contrasena)
+    if not sesion:
+        return
+    await pausa()
+    await asyncio.gather(
+        reg.pedir(cliente, "GET /instituciones/", "GET", "/instituciones/"),
+        reg.pedir(cliente, "GET /personas/", "GET", "/personas/", params={"rol": "TUTOR"}),
+        reg.pedir(cliente, "GET /aulas/", "GET", "/aulas/"),
+    )
+    await reg.pedir(cliente, "GET /horarios/", "GET", "/horarios/", params={"limit": 1000})
+    await pausa()
+    tutores = await reg.pedir(cliente, "GET /tutores/all", "GET", "/tutores/all")
+    if tutores:
+        id_tutor = rng.choice(tutores)["id_tutor"]
+        await reg.pedir(cliente, "GET /tutores/{id_tutor}/semana", "GET", f"/tutores/{id_tutor}/semana")
+
+
+PERFILES = {"inicio_clase": inicio_clase, "horario": horario}
+
+
+# ---------------------------------------------------------------------------
+
+def leer_credenciales(ruta: str) -> list:
+    if not ruta:
+        return CREDENCIALES_SEED
+    with open(ruta, encoding="utf-8", newline="") as f:
+        return [(fila["correo"], fila["contrasena"], fila.get("perfil") or "inicio_clase")
+                for fila in csv.DictReader(f)]
+
+
+async def usuario_virtual(reg: Registro, crear_cliente, n: int, credencial, args, fin: float):
+    correo, contrasena, perfil = credencial
+    rng = random.Random(args.semilla * 1000 + n)
+
+    async def pausa():
+        # tiempo que el usuario pasa mirando la pantalla antes del siguiente clic
+        if args.pausa:
+            await asyncio.sleep(rng.uniform(0, 2 * args.pausa))
+
+    if args.rampa:
+        await asyncio.sleep(args.rampa * n / args.usuarios)
+    async with crear_cliente() as cliente:
+        while time.perf_counter() < fin:
+            await PERFILES[perfil](reg, cliente, rng, correo, contrasena, pausa)
+            await pausa()
+
+
+async def correr(args, crear_cliente) -> Registro:
+    credenciales = leer_credenciales(args.credenciales)
+    if args.perfil:
+        credenciales = [c for c in credenciales if c[2] == args.perfil] or [
+            (correo, clave, args.perfil) for correo, clave, _ in credenciales
+        ]
+    reg = Registro()
+    fin = reg.inicio + args.rampa + args.duracion
+    await asyncio.gather(*(
+        usuario_virtual(reg, crear_cliente, n, credenciales[n % len(credenciales)], args, fin)
+        for n in range(args.usuarios)
+    ))
+    return reg
+
+
+def cliente_offline():
+    """Cliente que llama la app en el mismo proceso, con la base offline."""
+    os.environ.setdefault("JOBS_HABILITADOS", "0")
+    os.environ.setdefault("HECHOS_HABILITADOS", "0")
+    from app import db
+    from app.main import app
+    from scripts.oracle_offline import PoolOffline
+
+    db.pool = PoolOffline()
+    transporte = httpx.ASGITransport(app=app)
+    return lambda: httpx.AsyncClient(transport=transporte, base_url="http://offline")
+
+
+def guardar(carpeta: str, args, reg: Registro, segundos: float) -> dict:
+    os.makedirs(carpeta, exist_ok=True)
+    resumen = {
+        "parametros": {
+            "destino": "offline" if args.offline else args.url,
+            "usuarios": args.usuarios, "duracion": args.duracion, "rampa": args.rampa,
+            "pausa": args.pausa, "perfil": args.perfil or "todos", "semilla": args.semilla,
+        },
+        "segundos": round(segundos, 2),
+        "peticiones": len(reg.muestras),
+        "por_segundo": round(len(reg.muestras) / segundos, 2),
+        "pasos": resumir(reg.muestras, segundos),
+    }
+    with open(os.path.join(carpeta, "resumen.json"), "w", encoding="utf-8") as f:
+        json.dump(resumen, f, indent=2, ensure_ascii=False)
+    with open(os.path.join(carpeta, "histogramas.csv"), "w", encoding="utf-8", newline="") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(["paso"] + [f"<={c}ms" for c in CUBETAS_MS] + [f">{CUBETAS_MS[-1]}ms"])
+        for paso, fila in sorted(histogramas(reg.muestras).items()):
+            escritor.writerow([paso] + fila)
+    with open(os.path.join(carpeta, "muestras.csv"), "w", encoding="utf-8", newline="") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(["segundo", "paso", "estado", "ms"])
+        escritor.writerows((s, p, e, round(ms, 3)) for s, p, e, ms in reg.muestras)
+    return resumen
+
+
+def imprimir(resumen: dict, anterior: dict = None):
+    print(f"{resumen['peticiones']} peticiones en {resumen['segundos']}s ({resumen['por_segundo']}/s)")
+    print(f"{'paso':<44} {'pet':>6} {'err':>5} {'p50':>9} {'p90':>9} {'p99':>9} {'máx':>9}"
+          + ("   p50 / p99 antes" if anterior else ""))
+    for paso, d in resumen["pasos"].items():
+        linea = (f"{paso:<44} {d['peticiones']:>6} {d['errores']:>5} {d['p50_ms']:>9.2f} "
+                 f"{d['p90_ms']:>9.2f} {d['p99_ms']:>9.2f} {d['max_ms']:>9.2f}")
+        previo = (anterior or {}).get("pasos", {}).get(paso)
+        if previo:
+            linea += (f"   {previo['p50_ms']:.2f} / {previo['p99_ms']:.2f}"
+                      f" ({(d['p99_ms'] - previo['p99_ms']) / max(previo['p99_ms'], 1e-9):+.0%})")
+        print(linea)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga con el tráfico de un día de clases")
+    destino = parser.add_mutually_exclusive_group(required=True)
+    destino.add_argument("--url", help="URL de una API levantada, p. ej. http://127.0.0.1:8000")
+    destino.add_argument("--offline", action="store_true", help="la app en este proceso, sin Oracle")
+    parser.add_argument("--usuarios", type=int, default=20, help="usuarios virtuales concurrentes")
+    parser.add_argument("--duracion", type=float, default=30, help="segundos de carga sostenida")
+    parser.add_argument("--rampa", type=float, default=0,
+                        help="segundos en que van entrando los usuarios (0 = todos a la vez)")
+    parser.add_argument("--pausa", type=float, default=0.5, help="segundos medios entre clics")
+    parser.add_argument("--perfil", choices=sorted(PERFILES), help="solo este perfil")
+    parser.add_argument("--credenciales", help="CSV correo,contrasena,perfil")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", help="carpeta de resultados (por defecto resultados_carga/<fecha>)")
+    parser.add_argument("--comparar", help="resumen.json de otra corrida")
+    args = parser.parse_args()
+
+    if args.offline:
+        crear_cliente = cliente_offline()
+    else:
+        limites = httpx.Limits(max_connections=args.usuarios, max_keepalive_connections=args.usuarios)
+        crear_cliente = lambda: httpx.AsyncClient(base_url=args.url, timeout=30, limits=limites)  # noqa: E731
+
+    reg = asyncio.run(correr(args, crear_cliente))
+    segundos = time.perf_counter() - reg.inicio
+    if not reg.muestras:
+        print("No se hizo ninguna petición", file=sys.stderr)
+        return 1
+
+    carpeta = args.salida or os.path.join("resultados_carga", time.strftime("%Y%m%d-%H%M%S"))
+    resumen = guardar(carpeta, args, reg, segundos)
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            anterior = json.load(f)
+    imprimir(resumen, anterior)
+    print(f"Resultados en {carpeta}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
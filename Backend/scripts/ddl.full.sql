@@ -1,5 +1,6 @@
 -- ddl_full.sql
--- Script a ejecutar en Oracle (SQL Developer). Crea las 17 tablas del modelo.
+-- Script a ejecutar en Oracle (SQL Developer). Crea las 17 tablas del modelo
+-- y las tablas de apoyo agregadas por las migraciones de scripts/migraciones.
 SET SERVEROUTPUT ON;
 
 -- DROP tablas si existen (intento seguro)
@@ -8,7 +9,10 @@ BEGIN
     'NOTA','COMPONENTE','PERIODO','HORARIO','GRUPO','MATERIA',
     'ASISTENCIA_AULA_ESTUDIANTE','ASISTENCIA_AULA_TUTOR','REGISTRO_DE_CAMBIO',
     'FESTIVO','MOTIVO','ESTUDIANTE','TUTOR','USUARIO','PERSONA',
-    'AULA','PROGRAMA','SEDE','INSTITUCION'
+    'AULA','PROGRAMA','SEDE','INSTITUCION',
+    'SESION_CLASE','MIGRACION_APLICADA','RESUMEN_HORAS_TUTOR','CONTROL_REFRESCO',
+    'RESUMEN_ASISTENCIA_ESTUDIANTE','RESUMEN_ASISTENCIA_AULA','ARCHIVO_PERIODO',
+    'RESUMEN_KPI_SEDE','RESUMEN_KPI','REGISTRO_SYNC','IDEMPOTENCIA'
   )) LOOP
     BEGIN
       EXECUTE IMMEDIATE 'DROP TABLE ' || t.table_name || ' CASCADE CONSTRAINTS';
@@ -152,19 +156,27 @@ CREATE TABLE ASISTENCIA_AULA_TUTOR (
     ID_AULA                       NUMBER NOT NULL,
     ID_SEDE                       NUMBER NOT NULL,
     ID_INSTITUCION                NUMBER NOT NULL,
-    FECHA                         DATE,
+    FECHA                         DATE DEFAULT SYSDATE NOT NULL,
     HORA_ENTRADA                   VARCHAR2(10),
     HORA_SALIDA                    VARCHAR2(10),
     SE_DIO                        NUMBER(1) DEFAULT 1,
     ID_MOTIVO                     NUMBER,
     ID_ASISTENCIA_REPOSICION      NUMBER,
     ID_HORARIO                    NUMBER,
+    -- llave natural (ver V011): día y clase (reposición en negativo, horario o 0)
+    DIA                           DATE GENERATED ALWAYS AS (TRUNC(FECHA)) VIRTUAL,
+    CLASE                         NUMBER GENERATED ALWAYS AS (COALESCE(-ID_ASISTENCIA_REPOSICION, ID_HORARIO, 0)) VIRTUAL,
+    -- última reescritura por MERGE (refrescos de resúmenes, ver V011)
+    ACTUALIZADO                   DATE,
   CONSTRAINT FK_AATT_TUTOR FOREIGN KEY (ID_TUTOR) REFERENCES TUTOR(ID_TUTOR) ON DELETE CASCADE,
   CONSTRAINT FK_AAT_AULA_COMPO FOREIGN KEY (ID_AULA, ID_SEDE, ID_INSTITUCION) REFERENCES AULA (ID_AULA, ID_SEDE, ID_INSTITUCION) ON DELETE CASCADE,
   CONSTRAINT FK_AATT_HORARIO FOREIGN KEY (ID_HORARIO) REFERENCES HORARIO(ID_HORARIO),
   CONSTRAINT FK_AATT_MOTIVO FOREIGN KEY (ID_MOTIVO) REFERENCES MOTIVO(ID_MOTIVO),
   CONSTRAINT FK_AATT_REPOSICION FOREIGN KEY (ID_ASISTENCIA_REPOSICION) REFERENCES ASISTENCIA_AULA_TUTOR(ID_ASISTENCIA)
-);
+)
+-- particiones mensuales por FECHA (ver V006)
+PARTITION BY RANGE (FECHA) INTERVAL (NUMTOYMINTERVAL(1, 'MONTH'))
+(PARTITION P_INICIAL VALUES LESS THAN (DATE '2000-01-01'));
 
 -- 15. ASISTENCIA_AULA_ESTUDIANTE
 CREATE TABLE ASISTENCIA_AULA_ESTUDIANTE (
@@ -173,10 +185,17 @@ CREATE TABLE ASISTENCIA_AULA_ESTUDIANTE (
     ID_AULA                 NUMBER NOT NULL,
     ID_SEDE                 NUMBER NOT NULL,
     ID_INSTITUCION          NUMBER NOT NULL,
-    FECHA                   DATE,
+    FECHA                   DATE DEFAULT SYSDATE NOT NULL,
     HORA_ENTRADA             VARCHAR2(10),
     HORA_SALIDA              VARCHAR2(10),
     PRESENTE                NUMBER(1) DEFAULT 1,
+    -- id de la marca tomada sin conexión (POST /sync, ver V009)
+    ID_CLIENTE              VARCHAR2(64),
+    -- clase de la lista; con el día, parte de la llave natural (ver V011)
+    ID_HORARIO              NUMBER,
+    DIA                     DATE GENERATED ALWAYS AS (TRUNC(FECHA)) VIRTUAL,
+    CLASE                   NUMBER GENERATED ALWAYS AS (COALESCE(ID_HORARIO, 0)) VIRTUAL,
+    ACTUALIZADO             DATE,
 
     -- FK hacia ESTUDIANTE
     CONSTRAINT FK_AAE_ESTUDIANTE FOREIGN KEY (ID_ESTUDIANTE)
@@ -185,8 +204,13 @@ CREATE TABLE ASISTENCIA_AULA_ESTUDIANTE (
     -- FK compuesta hacia AULA (ID_AULA, ID_SEDE, ID_INSTITUCION)
     CONSTRAINT FK_AAE_AULA_COMPO FOREIGN KEY (ID_AULA, ID_SEDE, ID_INSTITUCION)
         REFERENCES AULA (ID_AULA, ID_SEDE, ID_INSTITUCION)
-        ON DELETE CASCADE
-);
+        ON DELETE CASCADE,
+
+    CONSTRAINT FK_AAE_HORARIO FOREIGN KEY (ID_HORARIO) REFERENCES HORARIO(ID_HORARIO)
+)
+-- particiones mensuales por FECHA (ver V006)
+PARTITION BY RANGE (FECHA) INTERVAL (NUMTOYMINTERVAL(1, 'MONTH'))
+(PARTITION P_INICIAL VALUES LESS THAN (DATE '2000-01-01'));
 
 -- 16. FESTIVO
 CREATE TABLE FESTIVO (
@@ -207,6 +231,139 @@ CREATE TABLE REGISTRO_DE_CAMBIO (
   CONSTRAINT FK_REGCAM_TUTOR FOREIGN KEY (ID_TUTOR) REFERENCES TUTOR(ID_TUTOR)
 );
 
+-- 18. SESION_CLASE (sesiones concretas: HORARIO x PERIODO menos FESTIVO)
+-- La llena app/calendario.py; una fila por clase que debería dictarse.
+CREATE TABLE SESION_CLASE (
+  ID_SESION      NUMBER GENERATED BY DEFAULT ON NULL AS IDENTITY PRIMARY KEY,
+  ID_HORARIO     NUMBER NOT NULL,
+  ID_PERIODO     NUMBER NOT NULL,
+  FECHA          DATE NOT NULL,
+  HORA_INICIO    VARCHAR2(10),
+  HORA_FIN       VARCHAR2(10),
+  ID_AULA        NUMBER NOT NULL,
+  ID_SEDE        NUMBER NOT NULL,
+  ID_INSTITUCION NUMBER NOT NULL,
+  CONSTRAINT UQ_SESION_HORARIO_FECHA UNIQUE (ID_HORARIO, FECHA),
+  CONSTRAINT FK_SESION_HORARIO FOREIGN KEY (ID_HORARIO) REFERENCES HORARIO(ID_HORARIO) ON DELETE CASCADE,
+  CONSTRAINT FK_SESION_PERIODO FOREIGN KEY (ID_PERIODO) REFERENCES PERIODO(ID_PERIODO) ON DELETE CASCADE,
+  CONSTRAINT FK_SESION_AULA FOREIGN KEY (ID_AULA, ID_SEDE, ID_INSTITUCION) REFERENCES AULA (ID_AULA, ID_SEDE, ID_INSTITUCION) ON DELETE CASCADE
+);
+
+-- 19. RESUMEN_HORAS_TUTOR (horas dictadas por tutor/aula/día, SE_DIO = 1)
+-- Index-organized: el reporte mensual es un range scan sobre FECHA.
+CREATE TABLE RESUMEN_HORAS_TUTOR (
+  FECHA          DATE NOT NULL,
+  ID_TUTOR       NUMBER NOT NULL,
+  ID_AULA        NUMBER NOT NULL,
+  ID_SEDE        NUMBER NOT NULL,
+  ID_INSTITUCION NUMBER NOT NULL,
+  HORAS          NUMBER NOT NULL,
+  CONSTRAINT PK_RESUMEN_HORAS_TUTOR PRIMARY KEY (FECHA, ID_TUTOR, ID_AULA, ID_SEDE, ID_INSTITUCION)
+) ORGANIZATION INDEX;
+
+-- 20. CONTROL_REFRESCO (marca de agua de ID_ASISTENCIA por resumen)
+CREATE TABLE CONTROL_REFRESCO (
+  NOMBRE      VARCHAR2(100) PRIMARY KEY,
+  ULTIMO_ID   NUMBER DEFAULT 0 NOT NULL,
+  ACTUALIZADO DATE
+);
+
+-- 21. RESUMEN_ASISTENCIA_ESTUDIANTE (tasa y rachas de faltas por estudiante)
+-- La llena app/analitica_asistencia.py; se reemplaza completa en cada cálculo.
+CREATE TABLE RESUMEN_ASISTENCIA_ESTUDIANTE (
+  ID_ESTUDIANTE  NUMBER PRIMARY KEY,
+  ID_AULA        NUMBER,
+  ID_SEDE        NUMBER,
+  ID_INSTITUCION NUMBER,
+  CLASES         NUMBER NOT NULL,
+  PRESENTES      NUMBER NOT NULL,
+  TASA           NUMBER(5,4) NOT NULL,
+  RACHA_ACTUAL   NUMBER NOT NULL,
+  RACHA_MAXIMA   NUMBER NOT NULL,
+  ULTIMA_FECHA   DATE,
+  EN_RIESGO      NUMBER(1) DEFAULT 0 NOT NULL,
+  CALCULADO      DATE
+);
+
+-- 22. RESUMEN_ASISTENCIA_AULA (tasa por aula y estudiantes en riesgo)
+CREATE TABLE RESUMEN_ASISTENCIA_AULA (
+  ID_AULA        NUMBER NOT NULL,
+  ID_SEDE        NUMBER NOT NULL,
+  ID_INSTITUCION NUMBER NOT NULL,
+  ESTUDIANTES    NUMBER NOT NULL,
+  CLASES         NUMBER NOT NULL,
+  PRESENTES      NUMBER NOT NULL,
+  TASA           NUMBER(5,4) NOT NULL,
+  EN_RIESGO      NUMBER NOT NULL,
+  CALCULADO      DATE,
+  CONSTRAINT PK_RESUMEN_ASISTENCIA_AULA PRIMARY KEY (ID_AULA, ID_SEDE, ID_INSTITUCION)
+);
+
+-- 23. ARCHIVO_PERIODO (periodos cerrados exportados a archivos columnares)
+CREATE TABLE ARCHIVO_PERIODO (
+  ID_PERIODO       NUMBER PRIMARY KEY,
+  FECHA_INICIO     DATE,
+  FECHA_FIN        DATE,
+  RUTA             VARCHAR2(500) NOT NULL,
+  FILAS_TUTOR      NUMBER DEFAULT 0 NOT NULL,
+  FILAS_ESTUDIANTE NUMBER DEFAULT 0 NOT NULL,
+  FILAS_NOTA       NUMBER DEFAULT 0 NOT NULL,
+  ESTADO           VARCHAR2(20) NOT NULL,
+  ARCHIVADO        DATE,
+  CONSTRAINT FK_ARCHIVO_PERIODO FOREIGN KEY (ID_PERIODO) REFERENCES PERIODO(ID_PERIODO),
+  CONSTRAINT CK_ARCHIVO_ESTADO CHECK (ESTADO IN ('EXPORTADO', 'BORRANDO', 'BORRADO'))
+);
+
+-- 24. RESUMEN_KPI_SEDE (KPIs del dashboard administrativo por sede)
+-- La mantiene app/resumen_admin.py: sedes marcadas por escrituras + reconstrucción nocturna.
+CREATE TABLE RESUMEN_KPI_SEDE (
+  ID_SEDE            NUMBER NOT NULL,
+  ID_INSTITUCION     NUMBER NOT NULL,
+  ESTUDIANTES        NUMBER DEFAULT 0 NOT NULL,
+  AULAS              NUMBER DEFAULT 0 NOT NULL,
+  AULAS_SIN_TUTOR    NUMBER DEFAULT 0 NOT NULL,
+  AULAS_CON_HORARIO  NUMBER DEFAULT 0 NOT NULL,
+  ASISTENCIAS_SEMANA NUMBER DEFAULT 0 NOT NULL,
+  PRESENTES_SEMANA   NUMBER DEFAULT 0 NOT NULL,
+  SEMANA             DATE,
+  CALCULADO          DATE,
+  CONSTRAINT PK_RESUMEN_KPI_SEDE PRIMARY KEY (ID_SEDE, ID_INSTITUCION)
+);
+
+-- 25. RESUMEN_KPI (totales de RESUMEN_KPI_SEDE, una sola fila: lo que lee GET /admin/resumen)
+CREATE TABLE RESUMEN_KPI (
+  ID                 NUMBER(1) PRIMARY KEY,
+  SEDES              NUMBER DEFAULT 0 NOT NULL,
+  INSTITUCIONES      NUMBER DEFAULT 0 NOT NULL,
+  ESTUDIANTES        NUMBER DEFAULT 0 NOT NULL,
+  AULAS              NUMBER DEFAULT 0 NOT NULL,
+  AULAS_SIN_TUTOR    NUMBER DEFAULT 0 NOT NULL,
+  AULAS_CON_HORARIO  NUMBER DEFAULT 0 NOT NULL,
+  ASISTENCIAS_SEMANA NUMBER DEFAULT 0 NOT NULL,
+  PRESENTES_SEMANA   NUMBER DEFAULT 0 NOT NULL,
+  SEMANA             DATE,
+  CALCULADO          DATE,
+  CONSTRAINT CK_RESUMEN_KPI_UNICA CHECK (ID = 1)
+);
+
+-- 26. REGISTRO_SYNC (cambios a AULA/HORARIO/ESTUDIANTE para GET /sync, ver V009)
+CREATE TABLE REGISTRO_SYNC (
+  ID_CAMBIO  NUMBER GENERATED BY DEFAULT ON NULL AS IDENTITY PRIMARY KEY,
+  TABLA      VARCHAR2(30) NOT NULL,
+  ID_FILA    NUMBER NOT NULL,
+  FECHA      DATE DEFAULT SYSDATE NOT NULL
+);
+
+-- 27. IDEMPOTENCIA (respuestas por Idempotency-Key de los POST de asistencias y notas, ver V010)
+CREATE TABLE IDEMPOTENCIA (
+  CLAVE   VARCHAR2(64) PRIMARY KEY,
+  HUELLA  VARCHAR2(64) NOT NULL,
+  ESTADO  NUMBER(3),
+  TIPO    VARCHAR2(100),
+  CUERPO  CLOB,
+  CREADA  DATE DEFAULT SYSDATE NOT NULL
+);
+
 -- ahora añadimos FK AULA -> TUTOR (se creó TUTOR)
 BEGIN
   BEGIN
@@ -221,7 +378,55 @@ CREATE INDEX IDX_PERSONA_NOMBRE ON PERSONA(NOMBRE);
 CREATE INDEX IDX_ESTUDIANTE_NOMBRE ON ESTUDIANTE(NOMBRE);
 CREATE INDEX IDX_ESTUDIANTE_AULA ON ESTUDIANTE(ID_AULA, ID_SEDE);
 CREATE INDEX IDX_HORARIO_AULA ON HORARIO(ID_AULA, ID_SEDE);
-CREATE INDEX IDX_ASIST_FECHA ON ASISTENCIA_AULA_TUTOR(FECHA);
+CREATE INDEX IDX_ASIST_FECHA ON ASISTENCIA_AULA_TUTOR(FECHA) LOCAL;
+CREATE INDEX IDX_ASIST_TUTOR_REPOSICION ON ASISTENCIA_AULA_TUTOR(ID_ASISTENCIA_REPOSICION);
+CREATE INDEX IDX_ASIST_TUTOR_FECHA ON ASISTENCIA_AULA_TUTOR(ID_TUTOR, FECHA) LOCAL;
+CREATE INDEX IDX_ASIST_TUTOR_AULA_FECHA ON ASISTENCIA_AULA_TUTOR(ID_AULA, ID_SEDE, ID_INSTITUCION, FECHA) LOCAL;
+CREATE INDEX IDX_ASIST_EST_AULA_FECHA ON ASISTENCIA_AULA_ESTUDIANTE(ID_AULA, ID_SEDE, ID_INSTITUCION, FECHA) LOCAL;
+CREATE INDEX IDX_ASIST_EST_ESTUDIANTE ON ASISTENCIA_AULA_ESTUDIANTE(ID_ESTUDIANTE, FECHA) LOCAL;
 CREATE INDEX IDX_NOTA_ESTUDIANTE ON NOTA(ID_ESTUDIANTE);
+CREATE INDEX IDX_NOTA_COMPONENTE ON NOTA(ID_COMPONENTE);
+CREATE INDEX IDX_NOTA_TUTOR ON NOTA(ID_TUTOR);
+CREATE INDEX IDX_NOTA_PERIODO ON NOTA(ID_PERIODO);
+CREATE INDEX IDX_AULA_TUTOR ON AULA(ID_TUTOR);
+CREATE INDEX IDX_PERSONA_CORREO_LOWER ON PERSONA(LOWER(CORREO));
+CREATE INDEX IDX_PERSONA_ROL ON PERSONA(ROL);
+CREATE INDEX IDX_SESION_AULA_FECHA ON SESION_CLASE(ID_AULA, ID_SEDE, ID_INSTITUCION, FECHA);
+CREATE INDEX IDX_SESION_FECHA ON SESION_CLASE(FECHA);
+CREATE INDEX IDX_FESTIVO_FECHA ON FESTIVO(FECHA_FESTIVO);
+CREATE INDEX IDX_RAE_AULA ON RESUMEN_ASISTENCIA_ESTUDIANTE(ID_AULA, ID_SEDE, ID_INSTITUCION);
+CREATE INDEX IDX_RAE_RIESGO ON RESUMEN_ASISTENCIA_ESTUDIANTE(EN_RIESGO, ID_INSTITUCION);
+CREATE INDEX IDX_RAA_INSTITUCION ON RESUMEN_ASISTENCIA_AULA(ID_INSTITUCION);
+CREATE INDEX IDX_REGISTRO_SYNC_FECHA ON REGISTRO_SYNC(FECHA);
+CREATE UNIQUE INDEX UQ_ASIST_EST_CLIENTE ON ASISTENCIA_AULA_ESTUDIANTE(ID_CLIENTE);
+CREATE UNIQUE INDEX UQ_ASIST_TUTOR_NATURAL ON ASISTENCIA_AULA_TUTOR(ID_AULA, ID_SEDE, ID_INSTITUCION, DIA, CLASE, ID_TUTOR);
+CREATE UNIQUE INDEX UQ_ASIST_EST_NATURAL ON ASISTENCIA_AULA_ESTUDIANTE(ID_AULA, ID_SEDE, ID_INSTITUCION, DIA, CLASE, ID_ESTUDIANTE);
+CREATE INDEX IDX_ASIST_TUTOR_ACTUALIZADO ON ASISTENCIA_AULA_TUTOR(ACTUALIZADO) LOCAL;
+CREATE INDEX IDX_ASIST_EST_ACTUALIZADO ON ASISTENCIA_AULA_ESTUDIANTE(ACTUALIZADO) LOCAL;
+CREATE INDEX IDX_IDEMPOTENCIA_CREADA ON IDEMPOTENCIA(CREADA);
+
+INSERT INTO CONTROL_REFRESCO (NOMBRE, ULTIMO_ID) VALUES ('RESUMEN_HORAS_TUTOR', 0);
+INSERT INTO CONTROL_REFRESCO (NOMBRE, ULTIMO_ID) VALUES ('RESUMEN_ASISTENCIA_ESTUDIANTE', 0);
+INSERT INTO CONTROL_REFRESCO (NOMBRE, ULTIMO_ID) VALUES ('RESUMEN_KPI', 0);
+INSERT INTO CONTROL_REFRESCO (NOMBRE, ULTIMO_ID) VALUES ('REGISTRO_SYNC', 0);
+
+-- Control de migraciones (scripts/migrar.py).
+-- Este script ya incluye todas las migraciones, así que se marcan como aplicadas.
+CREATE TABLE MIGRACION_APLICADA (
+  VERSION  NUMBER PRIMARY KEY,
+  NOMBRE   VARCHAR2(200) NOT NULL,
+  APLICADA DATE DEFAULT SYSDATE
+);
+INSERT INTO MIGRACION_APLICADA (VERSION, NOMBRE) VALUES (1, 'V001__sesion_clase.sql');
+INSERT INTO MIGRACION_APLICADA (VERSION, NOMBRE) VALUES (2, 'V002__indices_reposicion.sql');
+INSERT INTO MIGRACION_APLICADA (VERSION, NOMBRE) VALUES (3, 'V003__resumen_horas_tutor.sql');
+INSERT INTO MIGRACION_APLICADA (VERSION, NOMBRE) VALUES (4, 'V004__resumen_asistencia_estudiante.sql');
+INSERT INTO MIGRACION_APLICADA (VERSION, NOMBRE) VALUES (5, 'V005__archivo_periodo.sql');
+INSERT INTO MIGRACION_APLICADA (VERSION, NOMBRE) VALUES (6, 'V006__particiones_asistencia.sql');
+INSERT INTO MIGRACION_APLICADA (VERSION, NOMBRE) VALUES (7, 'V007__indices_acceso.sql');
+INSERT INTO MIGRACION_APLICADA (VERSION, NOMBRE) VALUES (8, 'V008__resumen_kpi.sql');
+INSERT INTO MIGRACION_APLICADA (VERSION, NOMBRE) VALUES (9, 'V009__registro_sync.sql');
+INSERT INTO MIGRACION_APLICADA (VERSION, NOMBRE) VALUES (10, 'V010__idempotencia.sql');
+INSERT INTO MIGRACION_APLICADA (VERSION, NOMBRE) VALUES (11, 'V011__llave_natural_asistencia.sql');
 
 COMMIT;
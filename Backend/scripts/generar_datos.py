@@ -0,0 +1,430 @@
+# scripts/generar_datos.py
+"""
+Generador determinista de datos sintéticos para pruebas de escala.
+
+Crea instituciones, sedes, aulas, tutores (con PERSONA y USUARIO),
+estudiantes, horarios, periodos, componentes, festivos, sesiones
+(calendario.materializar), asistencias de tutores y estudiantes y notas,
+respetando las reglas del negocio:
+- grados 4 y 5 → INSIDECLASSROOM, Lunes a Viernes, 2 clases semanales;
+- grados 9 y 10 → OUTSIDECLASSROOM, Lunes a Sábado, 3 clases semanales;
+- clases de DURACIONHORA minutos (40-60) entre 06:00 y 18:00, en la jornada
+  de la institución y sin que un tutor tenga dos clases a la misma hora;
+- solo hay asistencia en días de clase que no son festivos y ya pasaron;
+- las clases no dictadas (SE_DIO = 0) llevan motivo y la mayoría se repone.
+
+La misma semilla y escala producen siempre los mismos datos. Los IDs empiezan
+después de los existentes, así que se puede correr sobre una base con el seed.
+Carga por lotes con executemany (array DML).
+
+Escala 1 ≈ una instalación real: 20 instituciones, ~480 aulas, ~12.000
+estudiantes y ~1 millón de asistencias de estudiantes por año.
+
+Uso (desde la carpeta Backend, con las mismas variables de entorno de la app):
+    python -m scripts.generar_datos --escala 0.1             # prueba rápida
+    python -m scripts.generar_datos --escala 10 --anios 3
+"""
+import argparse
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from app import calendario
+from app.db import get_conn
+
+DIAS_SEMANA = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado"]
+NOMBRES = ["Ana", "Luis", "María", "Carlos", "Laura", "Andrés", "Sofía", "Mateo", "Valentina",
+           "Juan", "Camila", "Santiago", "Daniela", "Sebastián", "Isabella", "Nicolás"]
+APELLIDOS = ["García", "Rodríguez", "Martínez", "López", "Gómez", "Pérez", "Díaz", "Torres",
+             "Ramírez", "Rojas", "Moreno", "Vargas", "Castro", "Ortiz", "Ruiz", "Niño"]
+# festivos fijos (mes, día); los móviles no cambian nada para las pruebas
+FESTIVOS_FIJOS = [(1, 1), (5, 1), (7, 20), (8, 7), (12, 8), (12, 25)]
+
+SEDES_POR_INSTITUCION = 3
+AULAS_POR_SEDE = 8
+ESTUDIANTES_POR_AULA = 25
+AULAS_POR_TUTOR = 4
+PROB_SE_DIO = 0.93
+PROB_REPOSICION = 0.7
+
+
+# ---------------- utilidades ----------------
+
+def siguiente_id(cur, tabla: str, columna: str) -> int:
+    cur.execute(f"SELECT NVL(MAX({columna}), 0) + 1 FROM {tabla}")
+    return int(cur.fetchone()[0])
+
+
+def sincronizar_identidad(cur, tabla: str, columna: str):
+    """La identidad sigue desde el mayor ID (se insertaron IDs explícitos)."""
+    cur.execute(
+        f"ALTER TABLE {tabla} MODIFY {columna} GENERATED BY DEFAULT ON NULL AS IDENTITY (START WITH LIMIT VALUE)"
+    )
+
+
+class Cargador:
+    """Acumula filas por sentencia y las inserta con executemany por lotes."""
+
+    def __init__(self, conn, lote: int):
+        self.conn = conn
+        self.cur = conn.cursor()
+        self.lote = lote
+        self.pendientes = {}
+        self.totales = {}
+
+    def agregar(self, sql: str, filas):
+        pendientes = self.pendientes.setdefault(sql, [])
+        pendientes.extend(filas)
+        if len(pendientes) >= self.lote:
+            self.vaciar()
+
+    def vaciar(self):
+        # en el orden en que se vio cada sentencia: los padres antes que los hijos (FK)
+        for sql, filas in self.pendientes.items():
+            if filas:
+                self.cur.executemany(sql, filas)
+                self.totales[sql] = self.totales.get(sql, 0) + len(filas)
+                self.pendientes[sql] = []
+        self.conn.commit()
+
+    def cerrar(self):
+        self.vaciar()
+        self.cur.close()
+
+
+def _nombre(rng) -> str:
+    return f"{NOMBRES[rng.integers(len(NOMBRES))]} {APELLIDOS[rng.integers(len(APELLIDOS))]}"
+
+
+def _hhmm(minutos: int) -> str:
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+# ---------------- estructura ----------------
+
+def programas(cur):
+    """{'INSIDECLASSROOM': id, 'OUTSIDECLASSROOM': id}, creándolos si faltan."""
+    resultado = {}
+    for tipo in ("INSIDECLASSROOM", "OUTSIDECLASSROOM"):
+        cur.execute("SELECT MIN(ID_PROGRAMA) FROM PROGRAMA WHERE TIPO = :1", (tipo,))
+        id_programa = cur.fetchone()[0]
+        if id_programa is None:
+            id_var = cur.var(int)
+            cur.execute("INSERT INTO PROGRAMA (TIPO) VALUES (:1) RETURNING ID_PROGRAMA INTO :2", (tipo, id_var))
+            id_programa = id_var.getvalue()[0]
+        resultado[tipo] = int(id_programa)
+    return resultado
+
+
+def generar_estructura(conn, cargador: Cargador, rng, escala: float, id_programa: dict):
+    """Inserta instituciones, sedes, tutores, aulas, estudiantes y horarios. Devuelve las aulas."""
+    cur = conn.cursor()
+    try:
+        id_inst = siguiente_id(cur, "INSTITUCION", "ID_INSTITUCION")
+        id_sede = siguiente_id(cur, "SEDE", "ID_SEDE")
+        id_aula = siguiente_id(cur, "AULA", "ID_AULA")
+        id_persona = siguiente_id(cur, "PERSONA", "ID_PERSONA")
+        id_tutor = siguiente_id(cur, "TUTOR", "ID_TUTOR")
+        id_est = siguiente_id(cur, "ESTUDIANTE", "ID_ESTUDIANTE")
+        id_horario = siguiente_id(cur, "HORARIO", "ID_HORARIO")
+    finally:
+        cur.close()
+
+    n_inst = max(1, round(20 * escala))
+    aulas = []
+    tutores = []  # [id_tutor, jornada, {(dia, minuto)} ocupados, aulas asignadas]
+
+    for _ in range(n_inst):
+        duracion = int(rng.choice([40, 45, 50, 55, 60]))
+        jornada = "MAÑANA" if rng.random() < 0.6 else "TARDE"
+        cargador.agregar(
+            "INSERT INTO INSTITUCION (ID_INSTITUCION, NOMBRE, DURACIONHORA, JORNADA) VALUES (:1, :2, :3, :4)",
+            [(id_inst, f"Institución Educativa {id_inst}", duracion, jornada)],
+        )
+        for s in range(SEDES_POR_INSTITUCION):
+            cargador.agregar(
+                "INSERT INTO SEDE (ID_SEDE, ID_INSTITUCION, NOMBRE_SEDE, DIRECCION, TELEFONO) VALUES (:1, :2, :3, :4, :5)",
+                [(id_sede, id_inst, f"Sede {s + 1}", f"Calle {int(rng.integers(1, 200))} #{int(rng.integers(1, 99))}-{int(rng.integers(1, 99))}",
+                  f"605{int(rng.integers(1_000_000, 9_999_999))}")],
+            )
+            for _ in range(AULAS_POR_SEDE):
+                grado = int(rng.choice([4, 5, 9, 10]))
+                programa = "INSIDECLASSROOM" if grado in (4, 5) else "OUTSIDECLASSROOM"
+
+                # tutor de la misma jornada con cupo, o uno nuevo
+                tutor = next((t for t in tutores if t[1] == jornada and t[3] < AULAS_POR_TUTOR), None)
+                if tutor is None:
+                    nombre = _nombre(rng)
+                    cargador.agregar(
+                        "INSERT INTO PERSONA (ID_PERSONA, NOMBRE, ROL, CORREO) VALUES (:1, :2, :3, :4)",
+                        [(id_persona, nombre, "TUTOR", f"tutor{id_persona}@demo.com")],
+                    )
+                    cargador.agregar(
+                        "INSERT INTO USUARIO (CONTRASENA, ID_PERSONA) VALUES (:1, :2)",
+                        [(f"clave{id_persona}", id_persona)],
+                    )
+                    cargador.agregar(
+                        "INSERT INTO TUTOR (ID_TUTOR, ID_PERSONA) VALUES (:1, :2)",
+                        [(id_tutor, id_persona)],
+                    )
+                    tutor = [id_tutor, jornada, set(), 0]
+                    tutores.append(tutor)
+                    id_persona += 1
+                    id_tutor += 1
+                tutor[3] += 1
+
+                cargador.agregar(
+                    "INSERT INTO AULA (ID_AULA, NOMBRE_AULA, GRADO, ID_SEDE, ID_INSTITUCION, ID_TUTOR, ID_PROGRAMA) "
+                    "VALUES (:1, :2, :3, :4, :5, :6, :7)",
+                    [(id_aula, f"{grado}-{id_aula}", str(grado), id_sede, id_inst, tutor[0], id_programa[programa])],
+                )
+
+                estudiantes = list(range(id_est, id_est + ESTUDIANTES_POR_AULA))
+                cargador.agregar(
+                    "INSERT INTO ESTUDIANTE (ID_ESTUDIANTE, TIPO_DOCUMENTO, NOMBRE, GRADO, SCORE_INICIAL, "
+                    "ID_AULA, ID_SEDE, ID_INSTITUCION) VALUES (:1, :2, :3, :4, :5, :6, :7, :8)",
+                    [(e, "TI" if grado < 9 else "CC", _nombre(rng), str(grado), int(rng.integers(40, 100)),
+                      id_aula, id_sede, id_inst) for e in estudiantes],
+                )
+                id_est += ESTUDIANTES_POR_AULA
+
+                # clases semanales en huecos libres del tutor dentro de la jornada
+                dias = DIAS_SEMANA[:5] if grado in (4, 5) else DIAS_SEMANA
+                clases = 2 if grado in (4, 5) else 3
+                inicio_jornada, fin_jornada = (6 * 60, 12 * 60) if jornada == "MAÑANA" else (12 * 60, 18 * 60)
+                huecos = [(d, m) for d in dias for m in range(inicio_jornada, fin_jornada - duracion + 1, 60)
+                          if (d, m) not in tutor[2]]
+                horarios = []
+                for k in rng.permutation(len(huecos))[:clases]:
+                    dia, minuto = huecos[k]
+                    tutor[2].add((dia, minuto))
+                    horarios.append((id_horario, dia, _hhmm(minuto), _hhmm(minuto + duracion)))
+                    id_horario += 1
+                cargador.agregar(
+                    "INSERT INTO HORARIO (ID_HORARIO, DIA, HORA_INICIO, HORA_FIN, ID_AULA, ID_SEDE, ID_INSTITUCION) "
+                    "VALUES (:1, :2, :3, :4, :5, :6, :7)",
+                    [(h, d, hi, hf, id_aula, id_sede, id_inst) for h, d, hi, hf in horarios],
+                )
+
+                aulas.append({
+                    "id_aula": id_aula, "id_sede": id_sede, "id_institucion": id_inst,
+                    "id_tutor": tutor[0], "programa": id_programa[programa],
+                    "estudiantes": estudiantes, "horarios": horarios,
+                })
+                id_aula += 1
+            id_sede += 1
+        id_inst += 1
+
+    cargador.vaciar()
+    return aulas
+
+
+def generar_calendario(conn, cargador: Cargador, id_programa: dict, anio_inicio: int, anios: int):
+    """Periodos (dos por año y programa), componentes y festivos. Devuelve {programa: [periodos]}."""
+    cur = conn.cursor()
+    try:
+        id_periodo = siguiente_id(cur, "PERIODO", "ID_PERIODO")
+        id_componente = siguiente_id(cur, "COMPONENTE", "ID_COMPONENTE")
+        cur.execute("SELECT TRUNC(FECHA_FESTIVO) FROM FESTIVO")
+        festivos = {r[0].date() for r in cur.fetchall()}
+    finally:
+        cur.close()
+
+    periodos = {}
+    componentes = {}
+    for programa in id_programa.values():
+        for nombre, porcentaje in (("Seguimiento", 30), ("Parcial", 30), ("Proyecto final", 40)):
+            cargador.agregar(
+                "INSERT INTO COMPONENTE (ID_COMPONENTE, NOMBRE, PORCENTAJE, ID_PROGRAMA) VALUES (:1, :2, :3, :4)",
+                [(id_componente, nombre, porcentaje, programa)],
+            )
+            componentes.setdefault(programa, []).append(id_componente)
+            id_componente += 1
+
+        for anio in range(anio_inicio, anio_inicio + anios):
+            for inicio, fin in ((date(anio, 2, 1), date(anio, 6, 15)), (date(anio, 7, 15), date(anio, 11, 30))):
+                cargador.agregar(
+                    "INSERT INTO PERIODO (ID_PERIODO, FECHA_INICIO, FECHA_FIN, ID_PROGRAMA) VALUES (:1, :2, :3, :4)",
+                    [(id_periodo, inicio, fin, programa)],
+                )
+                periodos.setdefault(programa, []).append((id_periodo, inicio, fin))
+                id_periodo += 1
+
+    nuevos = []
+    for anio in range(anio_inicio, anio_inicio + anios):
+        for mes, dia in FESTIVOS_FIJOS:
+            f = date(anio, mes, dia)
+            if f not in festivos:
+                festivos.add(f)
+                nuevos.append((f, "Festivo"))
+    cargador.agregar("INSERT INTO FESTIVO (FECHA_FESTIVO, DESCRIPCION) VALUES (:1, :2)", nuevos)
+    cargador.vaciar()
+    return periodos, componentes, festivos
+
+
+# ---------------- hechos ----------------
+
+SQL_ASIST_TUTOR = (
+    "INSERT INTO ASISTENCIA_AULA_TUTOR (ID_TUTOR, ID_AULA, ID_SEDE, ID_INSTITUCION, FECHA, "
+    "HORA_ENTRADA, HORA_SALIDA, SE_DIO, ID_MOTIVO, ID_HORARIO) VALUES (:1, :2, :3, :4, :5, :6, :7, :8, :9, :10)"
+)
+SQL_ASIST_ESTUDIANTE = (
+    "INSERT INTO ASISTENCIA_AULA_ESTUDIANTE (ID_ESTUDIANTE, ID_AULA, ID_SEDE, ID_INSTITUCION, FECHA, "
+    "HORA_ENTRADA, HORA_SALIDA, PRESENTE, ID_HORARIO) VALUES (:1, :2, :3, :4, :5, :6, :7, :8, :9)"
+)
+SQL_NOTA = (
+    "INSERT INTO NOTA (VALOR, ID_ESTUDIANTE, ID_PERIODO, ID_COMPONENTE, ID_TUTOR) VALUES (:1, :2, :3, :4, :5)"
+)
+
+
+def _fechas_clase(dia: str, inicio: date, fin: date, festivos, hasta: date):
+    d = inicio + timedelta(days=(DIAS_SEMANA.index(dia) - inicio.weekday()) % 7)
+    fin = min(fin, hasta)
+    while d <= fin:
+        if d not in festivos:
+            yield d
+        d += timedelta(days=7)
+
+
+def generar_hechos(cargador: Cargador, rng, aulas, periodos, componentes, festivos, motivos, hasta: date):
+    """Asistencias de tutores y estudiantes y notas de cada aula, hasta la fecha `hasta`."""
+    for aula in aulas:
+        claves = (aula["id_aula"], aula["id_sede"], aula["id_institucion"])
+        estudiantes = aula["estudiantes"]
+        # propensión a asistir de cada estudiante (media ~0.85, con una cola en riesgo)
+        propension = rng.beta(8, 1.5, len(estudiantes))
+
+        sesiones = []
+        for id_periodo, inicio, fin in periodos[aula["programa"]]:
+            for id_horario, dia, hora_inicio, hora_fin in aula["horarios"]:
+                for f in _fechas_clase(dia, inicio, fin, festivos, hasta):
+                    sesiones.append((f, id_horario, hora_inicio, hora_fin))
+        sesiones.sort()
+        if not sesiones:
+            continue
+
+        se_dio = rng.random(len(sesiones)) < PROB_SE_DIO
+        filas_tutor = []
+        filas_est = []
+        for j, (f, id_horario, hora_inicio, hora_fin) in enumerate(sesiones):
+            momento = datetime.combine(f, datetime.strptime(hora_inicio, "%H:%M").time())
+            dio = bool(se_dio[j])
+            filas_tutor.append((aula["id_tutor"], *claves, momento, hora_inicio if dio else None,
+                                hora_fin if dio else None, int(dio),
+                                None if dio else motivos[int(rng.integers(len(motivos)))], id_horario))
+            if dio:
+                presentes = rng.random(len(estudiantes)) < propension
+                filas_est.extend(
+                    (e, *claves, momento, hora_inicio if p else None, hora_fin if p else None, int(p), id_horario)
+                    for e, p in zip(estudiantes, presentes.tolist())
+                )
+        cargador.agregar(SQL_ASIST_TUTOR, filas_tutor)
+        cargador.agregar(SQL_ASIST_ESTUDIANTE, filas_est)
+
+        # notas de los periodos ya empezados, correlacionadas con la asistencia
+        filas_nota = []
+        for id_periodo, inicio, _ in periodos[aula["programa"]]:
+            if inicio > hasta:
+                continue
+            for id_componente in componentes[aula["programa"]]:
+                valores = np.clip(rng.normal(45 + 45 * propension, 8), 0, 100).round(1)
+                filas_nota.extend(
+                    (float(v), e, id_periodo, id_componente, aula["id_tutor"])
+                    for e, v in zip(estudiantes, valores)
+                )
+        cargador.agregar(SQL_NOTA, filas_nota)
+    cargador.vaciar()
+
+
+def generar_reposiciones(conn, desde_id: int) -> int:
+    """Repone (una semana después, ya dictada) una parte fija de las clases no dictadas nuevas."""
+    cur = conn.cursor()
+    try:
+        cur.execute(f"""
+            INSERT INTO ASISTENCIA_AULA_TUTOR
+              (ID_TUTOR, ID_AULA, ID_SEDE, ID_INSTITUCION, FECHA, HORA_ENTRADA, HORA_SALIDA,
+               SE_DIO, ID_ASISTENCIA_REPOSICION, ID_HORARIO)
+            SELECT t.ID_TUTOR, t.ID_AULA, t.ID_SEDE, t.ID_INSTITUCION, t.FECHA + 7,
+                   h.HORA_INICIO, h.HORA_FIN, 1, t.ID_ASISTENCIA, t.ID_HORARIO
+            FROM ASISTENCIA_AULA_TUTOR t
+            JOIN HORARIO h ON h.ID_HORARIO = t.ID_HORARIO
+            WHERE t.ID_ASISTENCIA >= :desde_id
+            AND t.SE_DIO = 0
+            AND t.FECHA + 7 <= SYSDATE
+            AND ORA_HASH(t.ID_ASISTENCIA, 99) < {int(PROB_REPOSICION * 100)}
+        """, {"desde_id": desde_id})
+        filas = cur.rowcount
+        conn.commit()
+        return filas
+    finally:
+        cur.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos deterministas")
+    parser.add_argument("--escala", type=float, default=1.0, help="1 ≈ una instalación real (20 instituciones)")
+    parser.add_argument("--anios", type=int, default=2, help="años de periodos, asistencias y notas")
+    parser.add_argument("--anio-inicio", type=int, help="primer año (por defecto: termina en el año actual)")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--lote", type=int, default=50_000, help="filas por executemany")
+    parser.add_argument("--sin-sesiones", action="store_true", help="no materializar SESION_CLASE")
+    parser.add_argument("--sin-estadisticas", action="store_true", help="no recolectar estadísticas al final")
+    args = parser.parse_args()
+
+    hoy = date.today()
+    anio_inicio = args.anio_inicio or hoy.year - args.anios + 1
+    rng = np.random.default_rng(args.semilla)
+
+    conn = get_conn()
+    cargador = Cargador(conn, args.lote)
+    t0 = time.perf_counter()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT ID_MOTIVO FROM MOTIVO ORDER BY ID_MOTIVO")
+        motivos = [r[0] for r in cur.fetchall()]
+        if not motivos:
+            cur.execute("INSERT INTO MOTIVO (DESCRIPCION) VALUES ('Actividad institucional')")
+            cur.execute("SELECT ID_MOTIVO FROM MOTIVO")
+            motivos = [r[0] for r in cur.fetchall()]
+        primer_asistencia = siguiente_id(cur, "ASISTENCIA_AULA_TUTOR", "ID_ASISTENCIA")
+
+        id_programa = programas(cur)
+        aulas = generar_estructura(conn, cargador, rng, args.escala, id_programa)
+        print(f"Estructura: {len(aulas)} aulas ({time.perf_counter() - t0:.1f}s)")
+
+        periodos, componentes, festivos = generar_calendario(conn, cargador, id_programa, anio_inicio, args.anios)
+        print(f"Calendario: {anio_inicio}-{anio_inicio + args.anios - 1} ({time.perf_counter() - t0:.1f}s)")
+
+        generar_hechos(cargador, rng, aulas, periodos, componentes, festivos, motivos, hoy)
+        repuestas = generar_reposiciones(conn, primer_asistencia)
+        print(f"Asistencias y notas cargadas, {repuestas} reposiciones ({time.perf_counter() - t0:.1f}s)")
+
+        if not args.sin_sesiones:
+            creadas = calendario.materializar(conn)
+            conn.commit()
+            print(f"Sesiones: {creadas} ({time.perf_counter() - t0:.1f}s)")
+
+        for tabla, columna in (("INSTITUCION", "ID_INSTITUCION"), ("SEDE", "ID_SEDE"), ("AULA", "ID_AULA"),
+                               ("TUTOR", "ID_TUTOR"), ("ESTUDIANTE", "ID_ESTUDIANTE"), ("HORARIO", "ID_HORARIO"),
+                               ("PERIODO", "ID_PERIODO"), ("COMPONENTE", "ID_COMPONENTE")):
+            sincronizar_identidad(cur, tabla, columna)
+
+        if not args.sin_estadisticas:
+            cur.execute("SELECT USER FROM DUAL")
+            cur.callproc("DBMS_STATS.GATHER_SCHEMA_STATS", [cur.fetchone()[0]], {"force": True})
+        cur.close()
+    finally:
+        cargador.cerrar()
+        conn.close()
+
+    for sql, n in cargador.totales.items():
+        tabla = sql.split()[2]
+        print(f"  {tabla:<28} {n:>12,} filas")
+    print(f"Total: {time.perf_counter() - t0:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+# scripts/mantenimiento_particiones.py
+"""
+Mantenimiento de las particiones mensuales de ASISTENCIA_AULA_TUTOR y
+ASISTENCIA_AULA_ESTUDIANTE (ver migración V006).
+
+- Borra las particiones de meses ya archivados (ARCHIVO_PERIODO, ver
+  scripts/archivar.py) que quedaron vacías.
+- Comprime (ROW STORE COMPRESS BASIC) las particiones de meses anteriores a
+  --comprimir-meses que todavía tienen filas: esos meses ya casi no cambian.
+
+Nunca borra una partición con filas: primero hay que archivar el periodo.
+Oracle no deja borrar particiones (ORA-02266) de una tabla a la que apunta
+una FK habilitada, aunque ninguna fila la use, y ASISTENCIA_AULA_TUTOR se
+referencia a sí misma (FK_AATT_REPOSICION): esas FK se deshabilitan durante
+el DROP y se vuelven a habilitar con NOVALIDATE (la partición estaba vacía,
+así que ninguna fila podía apuntar a ella). Mientras tanto la FK no se
+verifica: correrlo fuera del horario de clases.
+
+Uso (desde la carpeta Backend, con las mismas variables de entorno de la app):
+    python -m scripts.mantenimiento_particiones --listar   # estado, sin cambios
+    python -m scripts.mantenimiento_particiones            # borra y comprime
+    python -m scripts.mantenimiento_particiones --comprimir-meses 12 --sin-borrar
+"""
+import argparse
+import re
+import sys
+from datetime import date, datetime, timedelta
+
+import oracledb
+
+from app import archivo
+from app.db import get_conn
+
+TABLAS = ("ASISTENCIA_AULA_TUTOR", "ASISTENCIA_AULA_ESTUDIANTE")
+
+# HIGH_VALUE de USER_TAB_PARTITIONS es el texto del límite, p. ej.
+# TO_DATE(' 2024-02-01 00:00:00', 'SYYYY-MM-DD HH24:MI:SS', 'NLS_CALENDAR=GREGORIAN')
+_LIMITE = re.compile(r"TO_DATE\('\s*(\d{4}-\d{2}-\d{2})")
+
+
+def listar_particiones(cur, tabla: str):
+    """
+    [{nombre, limite, intervalo, comprimida, filas, vacia}] ordenadas por fecha.
+    `filas` es la estimación de las estadísticas; `vacia` se comprueba leyendo.
+    """
+    cur.execute("""
+        SELECT PARTITION_NAME, HIGH_VALUE, INTERVAL, COMPRESSION, NUM_ROWS
+        FROM USER_TAB_PARTITIONS
+        WHERE TABLE_NAME = :1
+        ORDER BY PARTITION_POSITION
+    """, (tabla,))
+    particiones = []
+    for nombre, alto, intervalo, compresion, filas in cur.fetchall():
+        m = _LIMITE.search(alto or "")
+        if not m:
+            continue
+        particiones.append({
+            "nombre": nombre,
+            # la partición guarda FECHA < limite
+            "limite": datetime.strptime(m.group(1), "%Y-%m-%d").date(),
+            "intervalo": intervalo == "YES",
+            "comprimida": compresion == "ENABLED",
+            "filas": filas,
+        })
+
+    for p in particiones:
+        # el nombre viene del diccionario de datos, no del usuario
+        cur.execute(f'SELECT COUNT(*) FROM {tabla} PARTITION ("{p["nombre"]}") WHERE ROWNUM = 1')
+        p["vacia"] = cur.fetchone()[0] == 0
+    return particiones
+
+
+def _restar_meses(d: date, meses: int) -> date:
+    total = d.year * 12 + d.month - 1 - meses
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def planificar(particiones, archivado_hasta, comprimir_antes_de: date, borrar: bool):
+    """Devuelve [(accion, particion)] con accion en 'borrar' o 'comprimir'."""
+    acciones = []
+    for p in particiones:
+        # la partición inicial (no INTERVAL) no se puede borrar
+        if borrar and p["intervalo"] and archivado_hasta is not None \
+                and p["limite"] <= archivado_hasta and p["vacia"]:
+            acciones.append(("borrar", p))
+        elif p["limite"] <= comprimir_antes_de and not p["comprimida"] and not p["vacia"]:
+            acciones.append(("comprimir", p))
+    return acciones
+
+
+def fks_que_apuntan_a(cur, tabla: str):
+    """[(tabla_hija, constraint)] de las FK habilitadas que referencian a `tabla` (incluida ella misma)."""
+    cur.execute("""
+        SELECT h.TABLE_NAME, h.CONSTRAINT_NAME
+        FROM USER_CONSTRAINTS h
+        JOIN USER_CONSTRAINTS p ON p.CONSTRAINT_NAME = h.R_CONSTRAINT_NAME
+        WHERE h.CONSTRAINT_TYPE = 'R' AND h.STATUS = 'ENABLED' AND p.TABLE_NAME = :1
+    """, (tabla,))
+    return cur.fetchall()
+
+
+def ejecutar(cur, tabla: str, accion: str, particion: dict):
+    nombre = particion["nombre"]
+    if accion == "borrar":
+        fks = fks_que_apuntan_a(cur, tabla)
+        for hija, fk in fks:
+            cur.execute(f'ALTER TABLE {hija} DISABLE CONSTRAINT "{fk}"')
+        try:
+            cur.execute(f'ALTER TABLE {tabla} DROP PARTITION "{nombre}" UPDATE GLOBAL INDEXES')
+        finally:
+            for hija, fk in fks:
+                cur.execute(f'ALTER TABLE {hija} ENABLE NOVALIDATE CONSTRAINT "{fk}"')
+    else:
+        cur.execute(
+            f'ALTER TABLE {tabla} MOVE PARTITION "{nombre}" ROW STORE COMPRESS BASIC ONLINE UPDATE INDEXES'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Borra o comprime particiones viejas de asistencia")
+    parser.add_argument("--comprimir-meses", type=int, default=6,
+                        help="comprimir particiones de meses anteriores a N meses atrás (por defecto 6)")
+    parser.add_argument("--sin-borrar", action="store_true", help="no borrar particiones archivadas vacías")
+    parser.add_argument("--listar", action="store_true", help="solo mostrar las particiones y lo que se haría")
+    args = parser.parse_args()
+
+    comprimir_antes_de = _restar_meses(date.today(), args.comprimir_meses)
+
+    conn = get_conn()
+    cur = conn.cursor()
+    try:
+        fin_archivado = archivo.ultima_fecha_archivada(conn)
+        # un mes se puede borrar si termina antes del día siguiente al último archivado
+        archivado_hasta = fin_archivado + timedelta(days=1) if fin_archivado else None
+
+        errores = 0
+        for tabla in TABLAS:
+            particiones = listar_particiones(cur, tabla)
+            acciones = planificar(particiones, archivado_hasta, comprimir_antes_de, not args.sin_borrar)
+
+            if args.listar:
+                print(f"{tabla}:")
+                marcadas = {p["nombre"]: a for a, p in acciones}
+                for p in particiones:
+                    estado = "vacía" if p["vacia"] else ("comprimida" if p["comprimida"] else "")
+                    filas = "?" if p["filas"] is None else p["filas"]
+                    print(f"  {p['nombre']:<16} < {p['limite']}  ~{filas:>10} filas  "
+                          f"{estado:<10} {marcadas.get(p['nombre'], '')}")
+                continue
+
+            for accion, p in acciones:
+                print(f"{tabla}: {accion} {p['nombre']} (< {p['limite']}) ...")
+                try:
+                    ejecutar(cur, tabla, accion, p)
+                except oracledb.DatabaseError as e:
+                    # p. ej. ORA-00054 si otra sesión tiene la tabla bloqueada
+                    print(f"  Error: {e}")
+                    errores += 1
+        return 1 if errores else 0
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+# scripts/microbenchmarks.py
+"""
+Microbenchmarks de los caminos en Python puro que corren en cada petición:
+reglas de horario (strptime), JWT (crear y validar), filas -> dict ->
+pydantic de los listados de aulas y estudiantes, el armado de los UPDATE
+parciales de aulas y horarios, y el registro de métricas del middleware.
+
+Cada caso se mide con timeit (mejor de --repeticiones) y se guarda en
+microbenchmarks_base.json dividido por una vuelta de calibración (un bucle
+fijo de Python puro), así la línea base sirve entre máquinas parecidas.
+Falla (código 1) si algún caso quedó más de --umbral por encima de la base
+(los que se pasan se miden una segunda vez antes de marcarlos).
+
+Uso (desde la carpeta Backend; no necesita Oracle):
+    python -m scripts.microbenchmarks                  # compara contra la línea base
+    python -m scripts.microbenchmarks --actualizar     # guarda la línea base
+    python -m scripts.microbenchmarks --solo jwt --umbral 0.3
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from typing import List
+
+from fastapi.security import HTTPAuthorizationCredentials
+from pydantic import TypeAdapter
+
+from app import metricas
+from app.db import armar_update
+from app.routers.horario import validar_reglas_horario
+from app.schemas import AulaResponse, EstudianteInfoRead
+from app.utils import create_token_for_user, get_current_user
+
+CARPETA_SCRIPTS = os.path.dirname(__file__)
+LINEA_BASE = os.path.join(CARPETA_SCRIPTS, "microbenchmarks_base.json")
+
+# filas como las devuelve cur.fetchall() en los listados
+FILAS = 500
+FILAS_AULA = [(i, f"A-{i}", "4", 1, "Sede Norte", 1, "Colegio Demo", 1, i % 40) for i in range(FILAS)]
+FILAS_ESTUDIANTE = [
+    (i, "TI", f"Estudiante {i}", "4", 50, None, i // 30, f"A-{i // 30}", 1, "Sede Norte", 1, "Colegio Demo")
+    for i in range(FILAS)
+]
+LISTA_AULAS = TypeAdapter(List[AulaResponse])
+LISTA_ESTUDIANTES = TypeAdapter(List[EstudianteInfoRead])
+TOKEN = create_token_for_user(1, "Sergio Tutor")
+
+
+def calibracion():
+    total = 0
+    for i in range(10_000):
+        total += i % 7
+    return total
+
+
+def listado_aulas():
+    # lo que hace el router (dicts) y luego FastAPI con response_model
+    datos = [
+        {"id_aula": r[0], "nombre_aula": r[1], "grado": r[2], "id_sede": r[3], "nombre_sede": r[4],
+         "id_institucion": r[5], "nombre_institucion": r[6], "id_programa": r[7], "id_tutor": r[8]}
+        for r in FILAS_AULA
+    ]
+    return LISTA_AULAS.dump_python(LISTA_AULAS.validate_python(datos), mode="json")
+
+
+def listado_estudiantes():
+    datos = [
+        {"id_estudiante": r[0], "tipo_documento": r[1], "nombre": r[2], "grado": r[3], "score_inicial": r[4],
+         "score_final": r[5], "id_aula": r[6], "nombre_aula": r[7], "id_sede": r[8], "nombre_sede": r[9],
+         "id_institucion": r[10], "nombre_institucion": r[11]}
+        for r in FILAS_ESTUDIANTE
+    ]
+    return LISTA_ESTUDIANTES.dump_python(LISTA_ESTUDIANTES.validate_python(datos), mode="json")
+
+
+CASOS = {
+    "horario.validar_reglas": lambda: validar_reglas_horario("9", "Sábado", "07:00", "07:45", 45),
+    "jwt.crear": lambda: create_token_for_user(1, "Sergio Tutor"),
+    "jwt.validar": lambda: get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=TOKEN)),
+    f"aulas.listado_{FILAS}": listado_aulas,
+    f"estudiantes.listado_{FILAS}": listado_estudiantes,
+    "aula.armar_update": lambda: armar_update(
+        "AULA",
+        [("NOMBRE_AULA", "A-4A"), ("GRADO", None), ("ID_PROGRAMA", 1), ("ID_TUTOR", 2),
+         ("ID_SEDE", None), ("ID_INSTITUCION", None)],
+        [("ID_AULA", 101)],
+    ),
+    "horario.armar_update": lambda: armar_update(
+        "HORARIO", [("DIA", "Lunes"), ("HORA_INICIO", None), ("HORA_FIN", "08:00")], [("ID_HORARIO", 1)]
+    ),
+    # lo que agrega el middleware de main.py a cada petición (debe quedar bien debajo de 1 µs)
+    "metricas.sumar": lambda: metricas.sumar("http_peticiones_total", (("metodo", "GET"), ("ruta", "/aulas/"))),
+    "metricas.observar": lambda: metricas.observar(
+        "http_peticion_segundos", (("metodo", "GET"), ("ruta", "/aulas/")), 0.012
+    ),
+}
+
+
+def medir(funcion, repeticiones: int) -> float:
+    """Segundos por llamada: mejor de `repeticiones` tandas de ~0.2 s."""
+    temporizador = timeit.Timer(funcion)
+    numero, _ = temporizador.autorange()
+    return min(temporizador.repeat(repeat=repeticiones, number=numero)) / numero
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks de caminos calientes en Python puro")
+    parser.add_argument("--actualizar", action="store_true", help="guardar los tiempos actuales como línea base")
+    parser.add_argument("--umbral", type=float, default=0.25,
+                        help="fracción por encima de la base que cuenta como regresión (0.25 = 25%%)")
+    parser.add_argument("--repeticiones", type=int, default=7)
+    parser.add_argument("--solo", metavar="TEXTO", help="solo los casos cuyo nombre contenga TEXTO")
+    args = parser.parse_args()
+
+    if not args.actualizar and not os.path.exists(LINEA_BASE):
+        print(f"No existe {LINEA_BASE}: ejecute primero con --actualizar")
+        return 1
+
+    unidad = medir(calibracion, args.repeticiones)
+    actuales = {
+        nombre: medir(funcion, args.repeticiones) / unidad
+        for nombre, funcion in CASOS.items()
+        if not args.solo or args.solo in nombre
+    }
+
+    if args.actualizar:
+        guardados = {}
+        if args.solo and os.path.exists(LINEA_BASE):
+            # con --solo se conservan los demás casos de la línea base
+            with open(LINEA_BASE, encoding="utf-8") as f:
+                guardados = json.load(f)
+        guardados.update({n: float(f"{v:.4g}") for n, v in actuales.items()})
+        with open(LINEA_BASE, "w", encoding="utf-8") as f:
+            json.dump(guardados, f, indent=1, sort_keys=True)
+        print(f"Línea base guardada: {len(actuales)} casos en {LINEA_BASE}")
+        return 0
+
+    with open(LINEA_BASE, encoding="utf-8") as f:
+        base = json.load(f)
+    regresiones = 0
+    print(f"{'caso':<32} {'µs':>10} {'relativo':>10} {'base':>10} {'cambio':>8}")
+    for nombre, relativo in actuales.items():
+        previo = base.get(nombre)
+        if previo and (relativo - previo) / previo > args.umbral:
+            # una segunda medición antes de marcarlo: descarta ruido puntual de la máquina
+            relativo = min(relativo, medir(CASOS[nombre], args.repeticiones) / unidad)
+        cambio = (relativo - previo) / previo if previo else None
+        estado = ""
+        if previo is None:
+            estado = "SIN BASE"
+        elif cambio > args.umbral:
+            estado = "REGRESIÓN"
+            regresiones += 1
+        print(f"{nombre:<32} {relativo * unidad * 1e6:>10.2f} {relativo:>10.4f} "
+              f"{previo if previo is not None else '-':>10} "
+              f"{f'{cambio:+.0%}' if cambio is not None else '-':>8}  {estado}")
+    if regresiones:
+        print(f"{regresiones} caso(s) más de {args.umbral:.0%} por encima de la línea base")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+-- V001: sesiones concretas de clase (HORARIO x PERIODO menos FESTIVO).
+-- Después de aplicarla, poblar con: POST /sesiones/materializar
+
+CREATE TABLE SESION_CLASE (
+  ID_SESION      NUMBER GENERATED BY DEFAULT ON NULL AS IDENTITY PRIMARY KEY,
+  ID_HORARIO     NUMBER NOT NULL,
+  ID_PERIODO     NUMBER NOT NULL,
+  FECHA          DATE NOT NULL,
+  HORA_INICIO    VARCHAR2(10),
+  HORA_FIN       VARCHAR2(10),
+  ID_AULA        NUMBER NOT NULL,
+  ID_SEDE        NUMBER NOT NULL,
+  ID_INSTITUCION NUMBER NOT NULL,
+  CONSTRAINT UQ_SESION_HORARIO_FECHA UNIQUE (ID_HORARIO, FECHA),
+  CONSTRAINT FK_SESION_HORARIO FOREIGN KEY (ID_HORARIO) REFERENCES HORARIO(ID_HORARIO) ON DELETE CASCADE,
+  CONSTRAINT FK_SESION_PERIODO FOREIGN KEY (ID_PERIODO) REFERENCES PERIODO(ID_PERIODO) ON DELETE CASCADE,
+  CONSTRAINT FK_SESION_AULA FOREIGN KEY (ID_AULA, ID_SEDE, ID_INSTITUCION) REFERENCES AULA (ID_AULA, ID_SEDE, ID_INSTITUCION) ON DELETE CASCADE
+);
+
+CREATE INDEX IDX_SESION_AULA_FECHA ON SESION_CLASE(ID_AULA, ID_SEDE, ID_INSTITUCION, FECHA);
+CREATE INDEX IDX_SESION_FECHA ON SESION_CLASE(FECHA);
+CREATE INDEX IDX_FESTIVO_FECHA ON FESTIVO(FECHA_FESTIVO);
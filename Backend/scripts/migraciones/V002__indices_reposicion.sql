@@ -0,0 +1,5 @@
+-- V002: índices para seguir las cadenas de reposición de ASISTENCIA_AULA_TUTOR
+-- (GET /asistencias/tutores/reposiciones-pendientes).
+
+CREATE INDEX IDX_ASIST_TUTOR_REPOSICION ON ASISTENCIA_AULA_TUTOR(ID_ASISTENCIA_REPOSICION);
+CREATE INDEX IDX_ASIST_TUTOR_FECHA ON ASISTENCIA_AULA_TUTOR(ID_TUTOR, FECHA);
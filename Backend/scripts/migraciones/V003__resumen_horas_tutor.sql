@@ -0,0 +1,21 @@
+-- V003: acumulado de horas dictadas por tutor/aula/día para nómina
+-- y tabla de marcas de agua para los refrescos incrementales.
+-- Después de aplicarla, poblar con: POST /reportes/horas-tutor/refrescar?completo=true
+
+CREATE TABLE RESUMEN_HORAS_TUTOR (
+  FECHA          DATE NOT NULL,
+  ID_TUTOR       NUMBER NOT NULL,
+  ID_AULA        NUMBER NOT NULL,
+  ID_SEDE        NUMBER NOT NULL,
+  ID_INSTITUCION NUMBER NOT NULL,
+  HORAS          NUMBER NOT NULL,
+  CONSTRAINT PK_RESUMEN_HORAS_TUTOR PRIMARY KEY (FECHA, ID_TUTOR, ID_AULA, ID_SEDE, ID_INSTITUCION)
+) ORGANIZATION INDEX;
+
+CREATE TABLE CONTROL_REFRESCO (
+  NOMBRE      VARCHAR2(100) PRIMARY KEY,
+  ULTIMO_ID   NUMBER DEFAULT 0 NOT NULL,
+  ACTUALIZADO DATE
+);
+
+INSERT INTO CONTROL_REFRESCO (NOMBRE, ULTIMO_ID) VALUES ('RESUMEN_HORAS_TUTOR', 0);
@@ -0,0 +1,36 @@
+-- V004: resúmenes de asistencia de estudiantes (tasa, rachas de faltas, en riesgo).
+-- Los llena app/analitica_asistencia.py (tarea nocturna o POST /reportes/asistencia/recalcular).
+
+CREATE TABLE RESUMEN_ASISTENCIA_ESTUDIANTE (
+  ID_ESTUDIANTE  NUMBER PRIMARY KEY,
+  ID_AULA        NUMBER,
+  ID_SEDE        NUMBER,
+  ID_INSTITUCION NUMBER,
+  CLASES         NUMBER NOT NULL,
+  PRESENTES      NUMBER NOT NULL,
+  TASA           NUMBER(5,4) NOT NULL,
+  RACHA_ACTUAL   NUMBER NOT NULL,
+  RACHA_MAXIMA   NUMBER NOT NULL,
+  ULTIMA_FECHA   DATE,
+  EN_RIESGO      NUMBER(1) DEFAULT 0 NOT NULL,
+  CALCULADO      DATE
+);
+
+CREATE TABLE RESUMEN_ASISTENCIA_AULA (
+  ID_AULA        NUMBER NOT NULL,
+  ID_SEDE        NUMBER NOT NULL,
+  ID_INSTITUCION NUMBER NOT NULL,
+  ESTUDIANTES    NUMBER NOT NULL,
+  CLASES         NUMBER NOT NULL,
+  PRESENTES      NUMBER NOT NULL,
+  TASA           NUMBER(5,4) NOT NULL,
+  EN_RIESGO      NUMBER NOT NULL,
+  CALCULADO      DATE,
+  CONSTRAINT PK_RESUMEN_ASISTENCIA_AULA PRIMARY KEY (ID_AULA, ID_SEDE, ID_INSTITUCION)
+);
+
+CREATE INDEX IDX_RAE_AULA ON RESUMEN_ASISTENCIA_ESTUDIANTE(ID_AULA, ID_SEDE, ID_INSTITUCION);
+CREATE INDEX IDX_RAE_RIESGO ON RESUMEN_ASISTENCIA_ESTUDIANTE(EN_RIESGO, ID_INSTITUCION);
+CREATE INDEX IDX_RAA_INSTITUCION ON RESUMEN_ASISTENCIA_AULA(ID_INSTITUCION);
+
+INSERT INTO CONTROL_REFRESCO (NOMBRE, ULTIMO_ID) VALUES ('RESUMEN_ASISTENCIA_ESTUDIANTE', 0);
@@ -0,0 +1,16 @@
+-- V005: registro de periodos archivados en archivos columnares (app/archivo.py).
+-- ESTADO: EXPORTADO (archivo escrito y verificado), BORRANDO, BORRADO.
+
+CREATE TABLE ARCHIVO_PERIODO (
+  ID_PERIODO       NUMBER PRIMARY KEY,
+  FECHA_INICIO     DATE,
+  FECHA_FIN        DATE,
+  RUTA             VARCHAR2(500) NOT NULL,
+  FILAS_TUTOR      NUMBER DEFAULT 0 NOT NULL,
+  FILAS_ESTUDIANTE NUMBER DEFAULT 0 NOT NULL,
+  FILAS_NOTA       NUMBER DEFAULT 0 NOT NULL,
+  ESTADO           VARCHAR2(20) NOT NULL,
+  ARCHIVADO        DATE,
+  CONSTRAINT FK_ARCHIVO_PERIODO FOREIGN KEY (ID_PERIODO) REFERENCES PERIODO(ID_PERIODO),
+  CONSTRAINT CK_ARCHIVO_ESTADO CHECK (ESTADO IN ('EXPORTADO', 'BORRANDO', 'BORRADO'))
+);
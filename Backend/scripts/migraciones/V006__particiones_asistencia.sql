@@ -0,0 +1,32 @@
+-- V006: particiones mensuales (INTERVAL) por FECHA en las tablas de asistencia.
+-- Los listados de /asistencias siempre filtran por rango de fechas, así Oracle
+-- solo lee los meses pedidos. Requiere Oracle 12.2+ (MODIFY ... ONLINE).
+-- La PK (ID_ASISTENCIA) y el índice de reposiciones quedan globales porque se
+-- consultan sin fecha; los demás índices pasan a ser locales.
+-- Mantenimiento de particiones viejas: scripts/mantenimiento_particiones.py.
+
+-- La clave de partición no puede ser NULL (los inserts ya usan SYSDATE).
+UPDATE ASISTENCIA_AULA_TUTOR SET FECHA = SYSDATE WHERE FECHA IS NULL;
+UPDATE ASISTENCIA_AULA_ESTUDIANTE SET FECHA = SYSDATE WHERE FECHA IS NULL;
+COMMIT;
+
+ALTER TABLE ASISTENCIA_AULA_TUTOR MODIFY (FECHA DEFAULT SYSDATE NOT NULL);
+ALTER TABLE ASISTENCIA_AULA_ESTUDIANTE MODIFY (FECHA DEFAULT SYSDATE NOT NULL);
+
+ALTER TABLE ASISTENCIA_AULA_TUTOR MODIFY
+  PARTITION BY RANGE (FECHA) INTERVAL (NUMTOYMINTERVAL(1, 'MONTH'))
+  (PARTITION P_INICIAL VALUES LESS THAN (DATE '2000-01-01'))
+  ONLINE
+  UPDATE INDEXES (
+    IDX_ASIST_FECHA LOCAL,
+    IDX_ASIST_TUTOR_FECHA LOCAL,
+    IDX_ASIST_TUTOR_REPOSICION GLOBAL
+  );
+
+ALTER TABLE ASISTENCIA_AULA_ESTUDIANTE MODIFY
+  PARTITION BY RANGE (FECHA) INTERVAL (NUMTOYMINTERVAL(1, 'MONTH'))
+  (PARTITION P_INICIAL VALUES LESS THAN (DATE '2000-01-01'))
+  ONLINE;
+
+CREATE INDEX IDX_ASIST_EST_AULA_FECHA ON ASISTENCIA_AULA_ESTUDIANTE(ID_AULA, ID_SEDE, ID_INSTITUCION, FECHA) LOCAL;
+CREATE INDEX IDX_ASIST_EST_ESTUDIANTE ON ASISTENCIA_AULA_ESTUDIANTE(ID_ESTUDIANTE, FECHA) LOCAL;
@@ -0,0 +1,17 @@
+-- V007: índices para los filtros que usan los routers y que no tenían índice
+-- (ver scripts/asesor_indices.py). ASISTENCIA_AULA_ESTUDIANTE ya los recibió en V006.
+
+-- tutor: aulas, horarios, estudiantes y borrado por ID_TUTOR
+CREATE INDEX IDX_AULA_TUTOR ON AULA(ID_TUTOR);
+
+-- notas por componente, por tutor (borrado de tutor) y por periodo (archivo)
+CREATE INDEX IDX_NOTA_COMPONENTE ON NOTA(ID_COMPONENTE);
+CREATE INDEX IDX_NOTA_TUTOR ON NOTA(ID_TUTOR);
+CREATE INDEX IDX_NOTA_PERIODO ON NOTA(ID_PERIODO);
+
+-- SE_DIO de cada sesión (GET /sesiones) y asistencias por aula
+CREATE INDEX IDX_ASIST_TUTOR_AULA_FECHA ON ASISTENCIA_AULA_TUTOR(ID_AULA, ID_SEDE, ID_INSTITUCION, FECHA) LOCAL;
+
+-- login: WHERE LOWER(CORREO) = LOWER(:1)
+CREATE INDEX IDX_PERSONA_CORREO_LOWER ON PERSONA(LOWER(CORREO));
+CREATE INDEX IDX_PERSONA_ROL ON PERSONA(ROL);
@@ -0,0 +1,34 @@
+-- V008: KPIs del dashboard administrativo precalculados (app/resumen_admin.py).
+-- RESUMEN_KPI_SEDE: conteos por sede; RESUMEN_KPI: una sola fila con los totales.
+-- Después de aplicarla, poblar con: POST /admin/resumen/refrescar?completo=true
+
+CREATE TABLE RESUMEN_KPI_SEDE (
+  ID_SEDE            NUMBER NOT NULL,
+  ID_INSTITUCION     NUMBER NOT NULL,
+  ESTUDIANTES        NUMBER DEFAULT 0 NOT NULL,
+  AULAS              NUMBER DEFAULT 0 NOT NULL,
+  AULAS_SIN_TUTOR    NUMBER DEFAULT 0 NOT NULL,
+  AULAS_CON_HORARIO  NUMBER DEFAULT 0 NOT NULL,
+  ASISTENCIAS_SEMANA NUMBER DEFAULT 0 NOT NULL,
+  PRESENTES_SEMANA   NUMBER DEFAULT 0 NOT NULL,
+  SEMANA             DATE,
+  CALCULADO          DATE,
+  CONSTRAINT PK_RESUMEN_KPI_SEDE PRIMARY KEY (ID_SEDE, ID_INSTITUCION)
+);
+
+CREATE TABLE RESUMEN_KPI (
+  ID                 NUMBER(1) PRIMARY KEY,
+  SEDES              NUMBER DEFAULT 0 NOT NULL,
+  INSTITUCIONES      NUMBER DEFAULT 0 NOT NULL,
+  ESTUDIANTES        NUMBER DEFAULT 0 NOT NULL,
+  AULAS              NUMBER DEFAULT 0 NOT NULL,
+  AULAS_SIN_TUTOR    NUMBER DEFAULT 0 NOT NULL,
+  AULAS_CON_HORARIO  NUMBER DEFAULT 0 NOT NULL,
+  ASISTENCIAS_SEMANA NUMBER DEFAULT 0 NOT NULL,
+  PRESENTES_SEMANA   NUMBER DEFAULT 0 NOT NULL,
+  SEMANA             DATE,
+  CALCULADO          DATE,
+  CONSTRAINT CK_RESUMEN_KPI_UNICA CHECK (ID = 1)
+);
+
+INSERT INTO CONTROL_REFRESCO (NOMBRE, ULTIMO_ID) VALUES ('RESUMEN_KPI', 0);
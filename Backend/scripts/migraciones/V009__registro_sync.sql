@@ -0,0 +1,22 @@
+-- V009: sincronización incremental para tomar asistencia sin conexión (GET/POST /sync).
+-- REGISTRO_SYNC: una fila por cambio a AULA, HORARIO o ESTUDIANTE, escrita en la
+-- misma transacción que el cambio (app/registro_sync.py). El token del cliente
+-- es el último ID_CAMBIO que vio; la purga diaria deja en CONTROL_REFRESCO el
+-- último ID borrado, y un token anterior a ese recibe la foto completa.
+-- ID_CLIENTE: id que el cliente le pone a cada marca de asistencia tomada sin
+-- conexión; reenviar la misma marca no la duplica.
+
+CREATE TABLE REGISTRO_SYNC (
+  ID_CAMBIO  NUMBER GENERATED BY DEFAULT ON NULL AS IDENTITY PRIMARY KEY,
+  TABLA      VARCHAR2(30) NOT NULL,
+  ID_FILA    NUMBER NOT NULL,
+  FECHA      DATE DEFAULT SYSDATE NOT NULL
+);
+
+CREATE INDEX IDX_REGISTRO_SYNC_FECHA ON REGISTRO_SYNC(FECHA);
+
+ALTER TABLE ASISTENCIA_AULA_ESTUDIANTE ADD (ID_CLIENTE VARCHAR2(64));
+-- global: ID_CLIENTE no incluye la clave de partición
+CREATE UNIQUE INDEX UQ_ASIST_EST_CLIENTE ON ASISTENCIA_AULA_ESTUDIANTE(ID_CLIENTE);
+
+INSERT INTO CONTROL_REFRESCO (NOMBRE, ULTIMO_ID) VALUES ('REGISTRO_SYNC', 0);
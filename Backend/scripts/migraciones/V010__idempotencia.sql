@@ -0,0 +1,15 @@
+-- V010: respuestas guardadas por Idempotency-Key (app/idempotencia.py).
+-- Una fila por usuario + ruta + clave (CLAVE es el hash de las tres); ESTADO
+-- queda en NULL mientras el primer intento está en curso. La purga diaria
+-- borra lo más viejo que IDEMPOTENCIA_TTL_HORAS.
+
+CREATE TABLE IDEMPOTENCIA (
+  CLAVE   VARCHAR2(64) PRIMARY KEY,
+  HUELLA  VARCHAR2(64) NOT NULL,
+  ESTADO  NUMBER(3),
+  TIPO    VARCHAR2(100),
+  CUERPO  CLOB,
+  CREADA  DATE DEFAULT SYSDATE NOT NULL
+);
+
+CREATE INDEX IDX_IDEMPOTENCIA_CREADA ON IDEMPOTENCIA(CREADA);
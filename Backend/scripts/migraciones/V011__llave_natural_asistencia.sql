@@ -0,0 +1,101 @@
+-- V011: una sola fila de asistencia por llave natural. Reenviar la lista de un
+-- día actualiza las filas en vez de duplicarlas: POST /asistencias/tutores,
+-- POST /asistencias/estudiantes y POST /sync hacen MERGE sobre estas llaves.
+-- DIA: el día de FECHA (columna virtual, no ocupa espacio en la tabla).
+-- Estudiantes: estudiante + aula + día + CLASE, que es el horario (el nuevo
+-- ID_HORARIO) o 0 si no se indicó: dos clases del aula el mismo día tienen
+-- cada una su lista.
+-- Tutores: tutor + aula + día + CLASE, que es la reposición de
+-- ID_ASISTENCIA_REPOSICION (en negativo), el horario, o 0 si no se indicó.
+-- ACTUALIZADO: cuándo el MERGE reescribió la fila. Los refrescos por
+-- ID_ASISTENCIA no ven esos cambios; horas_tutor y hechos_asistencia los
+-- buscan por esta columna.
+-- Antes de crear los índices se deja la fila más reciente de cada llave; las
+-- reposiciones que apuntaban a una fila borrada pasan a la que queda. Los
+-- resúmenes (horas de tutores, analítica, KPIs) se corrigen con su
+-- reconstrucción nocturna o forzándola después de aplicar la migración.
+
+ALTER TABLE ASISTENCIA_AULA_TUTOR ADD (
+  DIA    DATE GENERATED ALWAYS AS (TRUNC(FECHA)) VIRTUAL,
+  CLASE  NUMBER GENERATED ALWAYS AS (COALESCE(-ID_ASISTENCIA_REPOSICION, ID_HORARIO, 0)) VIRTUAL,
+  ACTUALIZADO  DATE
+);
+
+ALTER TABLE ASISTENCIA_AULA_ESTUDIANTE ADD (
+  ID_HORARIO  NUMBER,
+  DIA         DATE GENERATED ALWAYS AS (TRUNC(FECHA)) VIRTUAL,
+  CLASE       NUMBER GENERATED ALWAYS AS (COALESCE(ID_HORARIO, 0)) VIRTUAL,
+  ACTUALIZADO DATE,
+  CONSTRAINT FK_AAE_HORARIO FOREIGN KEY (ID_HORARIO) REFERENCES HORARIO(ID_HORARIO)
+);
+
+-- Repuntar una reposición le cambia CLASE, y eso puede juntar en una llave
+-- dos reposiciones que antes eran distintas: se repite hasta que no quedan
+-- duplicados. En cada vuelta la fila que queda de cada llave se calcula antes
+-- de tocar nada, y se borra solo lo que ya nadie referencia.
+DECLARE
+  TYPE t_ids IS TABLE OF NUMBER;
+  sobran  t_ids;
+  quedan  t_ids;
+BEGIN
+  LOOP
+    SELECT ID_ASISTENCIA, QUEDA BULK COLLECT INTO sobran, quedan
+    FROM (
+      SELECT ID_ASISTENCIA,
+             MAX(ID_ASISTENCIA) OVER (PARTITION BY ID_AULA, ID_SEDE, ID_INSTITUCION, DIA, CLASE, ID_TUTOR) AS QUEDA
+      FROM ASISTENCIA_AULA_TUTOR
+    )
+    WHERE ID_ASISTENCIA <> QUEDA;
+    EXIT WHEN sobran.COUNT = 0;
+
+    FORALL i IN 1 .. sobran.COUNT
+      UPDATE ASISTENCIA_AULA_TUTOR
+      SET ID_ASISTENCIA_REPOSICION = quedan(i)
+      WHERE ID_ASISTENCIA_REPOSICION = sobran(i);
+
+    FORALL i IN 1 .. sobran.COUNT
+      DELETE FROM ASISTENCIA_AULA_TUTOR WHERE ID_ASISTENCIA = sobran(i);
+  END LOOP;
+END;
+/
+
+-- Las listas anteriores no guardan el horario. Donde un estudiante tiene más
+-- de una el mismo día, cada una pasa a la sesión del aula que ya había
+-- empezado a esa hora (o a la primera del día, si fue antes): así las de dos
+-- clases distintas no se toman por duplicados. Solo se borran los reenvíos
+-- dentro de la misma clase.
+UPDATE ASISTENCIA_AULA_ESTUDIANTE e
+SET ID_HORARIO = NVL(
+    (SELECT MAX(s.ID_HORARIO) KEEP (DENSE_RANK LAST ORDER BY s.HORA_INICIO)
+     FROM SESION_CLASE s
+     WHERE s.ID_AULA = e.ID_AULA AND s.ID_SEDE = e.ID_SEDE AND s.ID_INSTITUCION = e.ID_INSTITUCION
+     AND s.FECHA = e.DIA AND s.HORA_INICIO <= TO_CHAR(e.FECHA, 'HH24:MI')),
+    (SELECT MIN(s.ID_HORARIO) KEEP (DENSE_RANK FIRST ORDER BY s.HORA_INICIO)
+     FROM SESION_CLASE s
+     WHERE s.ID_AULA = e.ID_AULA AND s.ID_SEDE = e.ID_SEDE AND s.ID_INSTITUCION = e.ID_INSTITUCION
+     AND s.FECHA = e.DIA))
+WHERE ID_HORARIO IS NULL
+AND EXISTS (
+    SELECT 1 FROM ASISTENCIA_AULA_ESTUDIANTE o
+    WHERE o.ID_AULA = e.ID_AULA AND o.ID_SEDE = e.ID_SEDE AND o.ID_INSTITUCION = e.ID_INSTITUCION
+    AND o.DIA = e.DIA AND o.ID_ESTUDIANTE = e.ID_ESTUDIANTE AND o.ID_ASISTENCIA <> e.ID_ASISTENCIA
+);
+
+DELETE FROM ASISTENCIA_AULA_ESTUDIANTE
+WHERE ID_ASISTENCIA NOT IN (
+    SELECT MAX(ID_ASISTENCIA)
+    FROM ASISTENCIA_AULA_ESTUDIANTE
+    GROUP BY ID_AULA, ID_SEDE, ID_INSTITUCION, DIA, CLASE, ID_ESTUDIANTE
+);
+
+COMMIT;
+
+-- globales: la llave no incluye FECHA, que es la clave de partición
+CREATE UNIQUE INDEX UQ_ASIST_TUTOR_NATURAL
+  ON ASISTENCIA_AULA_TUTOR(ID_AULA, ID_SEDE, ID_INSTITUCION, DIA, CLASE, ID_TUTOR);
+CREATE UNIQUE INDEX UQ_ASIST_EST_NATURAL
+  ON ASISTENCIA_AULA_ESTUDIANTE(ID_AULA, ID_SEDE, ID_INSTITUCION, DIA, CLASE, ID_ESTUDIANTE);
+
+-- filas reescritas desde el último refresco (solo las actualizadas tienen valor)
+CREATE INDEX IDX_ASIST_TUTOR_ACTUALIZADO ON ASISTENCIA_AULA_TUTOR(ACTUALIZADO) LOCAL;
+CREATE INDEX IDX_ASIST_EST_ACTUALIZADO ON ASISTENCIA_AULA_ESTUDIANTE(ACTUALIZADO) LOCAL;
@@ -0,0 +1,140 @@
+# scripts/migrar.py
+"""
+Aplica en orden las migraciones de scripts/migraciones (VNNN__descripcion.sql)
+que todavía no estén registradas en MIGRACION_APLICADA.
+
+Uso (desde la carpeta Backend, con las mismas variables de entorno de la app):
+    python -m scripts.migrar            # aplica las pendientes
+    python -m scripts.migrar --estado   # solo muestra qué falta
+
+Una base creada con ddl.full.sql ya trae todas las migraciones marcadas.
+Ojo: en Oracle el DDL hace commit implícito, así que si una migración falla
+a mitad hay que revisar a mano lo que alcanzó a crear antes de reintentar.
+"""
+import argparse
+import os
+import re
+import sys
+
+import oracledb
+
+from app.db import get_conn
+
+CARPETA_MIGRACIONES = os.path.join(os.path.dirname(__file__), "migraciones")
+
+_NOMBRE_MIGRACION = re.compile(r"^V(\d+)__.+\.sql$")
+_INICIO_BLOQUE = re.compile(
+    r"^(BEGIN|DECLARE|CREATE\s+(OR\s+REPLACE\s+)?(TRIGGER|PROCEDURE|FUNCTION|PACKAGE|TYPE))\b",
+    re.IGNORECASE,
+)
+
+
+def listar_migraciones():
+    """Devuelve [(version, nombre, ruta)] ordenadas por versión."""
+    migraciones = []
+    for nombre in os.listdir(CARPETA_MIGRACIONES):
+        m = _NOMBRE_MIGRACION.match(nombre)
+        if m:
+            migraciones.append((int(m.group(1)), nombre, os.path.join(CARPETA_MIGRACIONES, nombre)))
+    return sorted(migraciones)
+
+
+def separar_sentencias(texto: str):
+    """
+    Parte un script estilo SQL Developer en sentencias ejecutables:
+    - las sentencias normales terminan en ';' al final de la línea;
+    - los bloques PL/SQL (BEGIN/DECLARE/CREATE TRIGGER...) terminan en una línea con '/'.
+    Se ignoran comentarios de línea y comandos de cliente como SET SERVEROUTPUT.
+    """
+    sentencias = []
+    actual = []
+    en_bloque = False
+
+    for linea in texto.splitlines():
+        limpia = linea.strip()
+
+        if not actual:
+            if not limpia or limpia.startswith("--"):
+                continue
+            if re.match(r"^SET\s", limpia, re.IGNORECASE):
+                continue
+            en_bloque = bool(_INICIO_BLOQUE.match(limpia))
+
+        if en_bloque:
+            if limpia == "/":
+                sentencias.append("\n".join(actual).strip())
+                actual = []
+                en_bloque = False
+            else:
+                actual.append(linea)
+            continue
+
+        actual.append(linea)
+        if limpia.endswith(";"):
+            sentencia = "\n".join(actual).strip()
+            sentencias.append(sentencia[:-1].rstrip())
+            actual = []
+
+    if "".join(actual).strip():
+        sentencias.append("\n".join(actual).strip().rstrip(";"))
+    return sentencias
+
+
+def asegurar_tabla_control(cur):
+    cur.execute("SELECT COUNT(*) FROM USER_TABLES WHERE TABLE_NAME = 'MIGRACION_APLICADA'")
+    if cur.fetchone()[0] == 0:
+        cur.execute("""
+            CREATE TABLE MIGRACION_APLICADA (
+              VERSION  NUMBER PRIMARY KEY,
+              NOMBRE   VARCHAR2(200) NOT NULL,
+              APLICADA DATE DEFAULT SYSDATE
+            )
+        """)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aplica migraciones pendientes")
+    parser.add_argument("--estado", action="store_true", help="solo listar migraciones pendientes")
+    args = parser.parse_args()
+
+    conn = get_conn()
+    cur = conn.cursor()
+    try:
+        asegurar_tabla_control(cur)
+        cur.execute("SELECT VERSION FROM MIGRACION_APLICADA")
+        aplicadas = {r[0] for r in cur.fetchall()}
+
+        pendientes = [m for m in listar_migraciones() if m[0] not in aplicadas]
+        if not pendientes:
+            print("No hay migraciones pendientes.")
+            return 0
+
+        for version, nombre, ruta in pendientes:
+            if args.estado:
+                print(f"Pendiente: {nombre}")
+                continue
+
+            print(f"Aplicando {nombre} ...")
+            with open(ruta, encoding="utf-8") as f:
+                sentencias = separar_sentencias(f.read())
+            try:
+                for sentencia in sentencias:
+                    cur.execute(sentencia)
+                cur.execute(
+                    "INSERT INTO MIGRACION_APLICADA (VERSION, NOMBRE) VALUES (:1, :2)",
+                    (version, nombre),
+                )
+                conn.commit()
+            except oracledb.DatabaseError as e:
+                conn.rollback()
+                print(f"Error aplicando {nombre}: {e}")
+                print(f"Sentencia:\n{sentencia}")
+                return 1
+        return 0
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,659 @@
+# scripts/oracle_offline.py
+"""
+Reemplazo de python-oracledb para correr la app sin base Oracle: un pool,
+conexiones y cursores con la misma interfaz que usan los routers (acquire,
+cursor, execute, fetch*, var, rowcount, commit...), sobre SQLite en memoria
+con el esquema de ddl.full.sql y los datos de seed_full.sql.
+
+Uso:
+    from app import db
+    from scripts.oracle_offline import PoolOffline
+    db.pool = PoolOffline()          # get_conn() ahora entrega conexiones offline
+    ...
+    db.pool.contadores.como_dict()   # idas, ejecuciones, commits, filas...
+
+Traduce el dialecto que usa este proyecto: binds :1/:nombre, SYSDATE, TRUNC,
+NVL, TO_DATE, DATE '...', FETCH FIRST/OFFSET, ROWNUM, RETURNING ... INTO,
+FOR UPDATE, CONNECT BY LEVEL, WITH recursivo (CYCLE se ignora) y KEEP
+(DENSE_RANK ...), que se aproxima con el agregado sin KEEP. Las fechas se
+guardan como días desde 0001-01-01 (date.toordinal), así la aritmética de
+fechas (FECHA + 7, TRUNC(x) - DATE '1970-01-01') da lo mismo que en Oracle.
+MERGE se convierte en INSERT ... ON CONFLICT (las columnas del ON deben
+ser una PK o índice único). Lo que no se traduce (LISTAGG, PIVOT...) falla
+en SQLite y llega al código como oracledb.DatabaseError, igual que un error
+de Oracle.
+
+Las idas a la base (round trips) se cuentan como en python-oracledb: una por
+execute/executemany/callproc/commit/rollback, y una por cada arraysize filas
+que haya que traer después de las `prefetchrows` que llegan con el execute.
+
+Todas las conexiones comparten la misma base SQLite y su transacción, así
+que el pool se comporta como uno de tamaño 1: acquire() espera a que la
+conexión anterior vuelva (close). Con carga concurrente las peticiones se
+atienden de a una; sirve para comparar código, no para medir Oracle.
+Devolver una conexión al pool (close) deshace lo no confirmado, como en
+Oracle.
+"""
+import math
+import os
+import re
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+
+import oracledb
+
+from scripts.migrar import separar_sentencias
+
+CARPETA_SCRIPTS = os.path.dirname(__file__)
+
+
+# ---------------- fechas ----------------
+
+def _a_dias(valor):
+    """datetime/date → días desde 0001-01-01 (con fracción para la hora)."""
+    if isinstance(valor, datetime):
+        return valor.toordinal() + (valor.hour * 3600 + valor.minute * 60 + valor.second) / 86400
+    return float(valor.toordinal())
+
+
+def _de_dias(dias) -> datetime:
+    entero = math.floor(dias)
+    return datetime.fromordinal(entero) + timedelta(seconds=round((dias - entero) * 86400))
+
+
+def _convertir_fecha(texto: bytes):
+    try:
+        return _de_dias(float(texto))
+    except ValueError:
+        # una fecha guardada como texto (p. ej. un bind de string sin TO_DATE)
+        return datetime.fromisoformat(texto.decode())
+
+
+sqlite3.register_adapter(datetime, _a_dias)
+sqlite3.register_adapter(date, _a_dias)
+sqlite3.register_converter("DATE", _convertir_fecha)
+
+_FORMATOS = [("YYYY", "%Y"), ("MM", "%m"), ("DD", "%d"), ("HH24", "%H"), ("MI", "%M"), ("SS", "%S")]
+
+
+def _formato_python(formato: str) -> str:
+    for oracle, python in _FORMATOS:
+        formato = formato.replace(oracle, python)
+    return formato
+
+
+def _sysdate():
+    return _a_dias(datetime.now())
+
+
+def _trunc(valor, formato=None):
+    if valor is None:
+        return None
+    if isinstance(valor, str):
+        valor = _a_dias(datetime.fromisoformat(valor))
+    dia = math.floor(valor)
+    if formato is None:
+        return float(dia)
+    formato = formato.upper()
+    if formato == "IW":
+        return float(dia - date.fromordinal(dia).weekday())
+    if formato in ("MM", "MON", "MONTH"):
+        return float(date.fromordinal(dia).replace(day=1).toordinal())
+    if formato in ("YYYY", "YEAR"):
+        return float(date.fromordinal(dia).replace(month=1, day=1).toordinal())
+    return float(dia)
+
+
+def _to_date(texto, formato="YYYY-MM-DD"):
+    if texto is None:
+        return None
+    if isinstance(texto, (int, float)):
+        return texto
+    return _a_dias(datetime.strptime(texto, _formato_python(formato)))
+
+
+def _to_char(valor, formato=None):
+    if valor is None:
+        return None
+    if formato is None or not isinstance(valor, (int, float)) or set(formato.upper()) <= set("FM90.,"):
+        # las columnas DATE pueden devolver el número de días como entero
+        return str(valor)
+    return _de_dias(valor).strftime(_formato_python(formato))
+
+
+def _funciones(conn: sqlite3.Connection):
+    conn.create_function("SYSDATE", 0, _sysdate)
+    conn.create_function("TRUNC", 1, _trunc, deterministic=True)
+    conn.create_function("TRUNC", 2, _trunc, deterministic=True)
+    conn.create_function("TO_DATE", 1, _to_date, deterministic=True)
+    conn.create_function("TO_DATE", 2, _to_date, deterministic=True)
+    conn.create_function("TO_CHAR", 1, _to_char, deterministic=True)
+    conn.create_function("TO_CHAR", 2, _to_char, deterministic=True)
+    conn.create_function("TO_NUMBER", 1, lambda x: None if x is None else float(x), deterministic=True)
+    conn.create_function("CEIL", 1, lambda x: None if x is None else math.ceil(x), deterministic=True)
+    conn.create_function("FLOOR", 1, lambda x: None if x is None else math.floor(x), deterministic=True)
+    conn.create_function("ORA_HASH", 2, lambda x, m: None if x is None else hash(x) % (m + 1), deterministic=True)
+
+
+# ---------------- traducción de SQL ----------------
+
+_LITERAL = re.compile(r"('(?:[^']|'')*')")
+_BIND = re.compile(r"(?<![:\w]):(\w+)")
+_RETURNING = re.compile(r"\bRETURNING\s+(.+?)\s+INTO\s+(:\w+(?:\s*,\s*:\w+)*)\s*$", re.IGNORECASE | re.DOTALL)
+_ROWNUM = re.compile(r"\bROWNUM\s*(<=|<|=)\s*(:\w+|\d+)", re.IGNORECASE)
+_INSERT = re.compile(r"^\s*INSERT\s+INTO\s+(\w+)\s*\(([^)]*)\)\s*VALUES\s*\(", re.IGNORECASE)
+
+# (patrón, reemplazo) aplicados fuera de los literales, en orden
+_REEMPLAZOS = [
+    (re.compile(r"\bSELECT\s+LEVEL\s*-\s*1\s+AS\s+(\w+)\s+FROM\s+DUAL\s+CONNECT\s+BY\s+LEVEL\s*<=\s*(:\w+|\d+)",
+                re.IGNORECASE),
+     r"WITH RECURSIVE _niveles(\1) AS (SELECT 0 UNION ALL SELECT \1 + 1 FROM _niveles WHERE \1 + 1 < \2) "
+     r"SELECT \1 FROM _niveles"),
+    (re.compile(r"^\s*WITH\b(?!\s+RECURSIVE)", re.IGNORECASE), "WITH RECURSIVE"),
+    (re.compile(r"\bFROM\s+DUAL\b", re.IGNORECASE), ""),
+    (re.compile(r"\bSYS(DATE|TIMESTAMP)\b", re.IGNORECASE), "SYSDATE()"),
+    (re.compile(r"\bNVL\s*\(", re.IGNORECASE), "IFNULL("),
+    (re.compile(r"\bGREATEST\s*\(", re.IGNORECASE), "MAX("),
+    (re.compile(r"\bLEAST\s*\(", re.IGNORECASE), "MIN("),
+    (re.compile(r"\bMINUS\b", re.IGNORECASE), "EXCEPT"),
+    (re.compile(r"\bKEEP\s*\(\s*DENSE_RANK\s+(FIRST|LAST)\s+ORDER\s+BY[^)]*\)", re.IGNORECASE), ""),
+    (re.compile(r"\bFOR\s+UPDATE(\s+OF\s+[\w.,\s]+?)?(\s+NOWAIT|\s+WAIT\s+\d+|\s+SKIP\s+LOCKED)?\s*$",
+                re.IGNORECASE), ""),
+    (re.compile(r"\bOFFSET\s+(:\w+|\d+)\s+ROWS?\s+FETCH\s+(?:FIRST|NEXT)\s+(:\w+|\d+)\s+ROWS?\s+ONLY\b",
+                re.IGNORECASE), r"LIMIT \2 OFFSET \1"),
+    (re.compile(r"\bFETCH\s+(?:FIRST|NEXT)\s+(:\w+|\d+)\s+ROWS?\s+ONLY\b", re.IGNORECASE), r"LIMIT \1"),
+    # en Oracle la división entre enteros no trunca
+    (re.compile(r"(?<![/*])/(?![/*])"), "* 1.0 /"),
+]
+# sobre el texto completo (incluyen literales)
+_DATE_LITERAL = re.compile(r"\bDATE\s*('\d{4}-\d{2}-\d{2}')", re.IGNORECASE)
+_CYCLE = re.compile(r"\bCYCLE\s+\w+(\s*,\s*\w+)*\s+SET\s+\w+\s+TO\s+'[^']*'\s+DEFAULT\s+'[^']*'", re.IGNORECASE)
+
+
+_MERGE = re.compile(r"^\s*MERGE\s+INTO\s+(\w+)\s+(\w+)\s+USING\s+", re.IGNORECASE)
+_MERGE_ON = re.compile(r"\s*(\w+)\s+ON\s*\(", re.IGNORECASE)
+_MERGE_UPDATE = re.compile(r"WHEN\s+MATCHED\s+THEN\s+UPDATE\s+SET\s+(.*?)\s*(?=WHEN\s+NOT\s+MATCHED|$)",
+                           re.IGNORECASE | re.DOTALL)
+_MERGE_INSERT = re.compile(r"WHEN\s+NOT\s+MATCHED\s+THEN\s+INSERT\s*\(", re.IGNORECASE)
+
+
+def _cierre(texto: str, abre: int) -> int:
+    """Posición del paréntesis que cierra el que está en `abre`."""
+    nivel = 0
+    for i in range(abre, len(texto)):
+        if texto[i] == "(":
+            nivel += 1
+        elif texto[i] == ")":
+            nivel -= 1
+            if nivel == 0:
+                return i
+    raise ValueError("paréntesis sin cerrar")
+
+
+def _separar_comas(texto: str) -> list:
+    """Parte por las comas de primer nivel (no las de dentro de paréntesis)."""
+    partes, nivel, actual = [], 0, ""
+    for ch in texto:
+        if ch == "," and nivel == 0:
+            partes.append(actual.strip())
+            actual = ""
+            continue
+        nivel += (ch == "(") - (ch == ")")
+        actual += ch
+    if actual.strip():
+        partes.append(actual.strip())
+    return partes
+
+
+def _traducir_merge(texto: str) -> str:
+    """
+    MERGE INTO t x USING (...) s ON (x.a = s.a ...) WHEN MATCHED ... WHEN NOT MATCHED ...
+    como INSERT ... SELECT ... ON CONFLICT (a, ...) DO UPDATE/NOTHING de SQLite. Las
+    columnas del ON tienen que ser una PK o un índice único, como pide SQLite.
+    """
+    m = _MERGE.match(texto)
+    tabla, alias = m.group(1), m.group(2)
+    resto = texto[m.end():]
+    if resto.startswith("("):
+        fin = _cierre(resto, 0)
+        origen, resto = resto[:fin + 1], resto[fin + 1:]
+    else:
+        origen, resto = resto.split(None, 1)
+    m = _MERGE_ON.match(resto)
+    fuente = m.group(1)
+    fin = _cierre(resto, m.end() - 1)
+    condicion, resto = resto[m.end():fin], resto[fin + 1:]
+    conflicto = re.findall(rf"\b{alias}\.(\w+)\s*=", condicion, re.IGNORECASE)
+
+    m = _MERGE_INSERT.search(resto)
+    fin = _cierre(resto, m.end() - 1)
+    columnas = _separar_comas(resto[m.end():fin])
+    valores_inicio = resto.index("(", fin + 1)
+    valores = _separar_comas(resto[valores_inicio + 1:_cierre(resto, valores_inicio)])
+
+    accion = "DO NOTHING"
+    m = _MERGE_UPDATE.search(resto)
+    if m:
+        # s.COL del origen es el valor que se iba a insertar en esa columna
+        excluidos = {v.upper(): f"excluded.{c}" for c, v in zip(columnas, valores)}
+
+        def del_origen(expresion: str) -> str:
+            return re.sub(rf"\b{fuente}\.\w+", lambda x: excluidos.get(x.group(0).upper(), x.group(0)),
+                          expresion, flags=re.IGNORECASE).strip()
+
+        # UPDATE SET ... WHERE cond: SQLite acepta el mismo WHERE en DO UPDATE
+        asignaciones_sql, condicion_update = m.group(1), None
+        w = re.search(r"\s+WHERE\s+", asignaciones_sql, re.IGNORECASE)
+        if w:
+            asignaciones_sql, condicion_update = asignaciones_sql[:w.start()], asignaciones_sql[w.end():]
+        asignaciones = []
+        for asignacion in _separar_comas(asignaciones_sql):
+            columna, expresion = asignacion.split("=", 1)
+            asignaciones.append(f"{columna.strip().split('.')[-1]} = {del_origen(expresion)}")
+        accion = "DO UPDATE SET " + ", ".join(asignaciones)
+        if condicion_update:
+            accion += f" WHERE {del_origen(condicion_update)}"
+
+    return (f"INSERT INTO {tabla} AS {alias} ({', '.join(columnas)}) "
+            f"SELECT {', '.join(valores)} FROM {origen} {fuente} WHERE 1=1 "
+            f"ON CONFLICT ({', '.join(conflicto)}) {accion}")
+
+
+class _Traduccion:
+    """SQL para SQLite, nombres de bind en orden de aparición y binds de RETURNING INTO."""
+
+    def __init__(self, sql: str, binds: list, retorno: list):
+        self.sql = sql
+        self.binds = binds
+        self.retorno = retorno
+
+
+def traducir(sql: str, identidades: dict = None) -> _Traduccion:
+    """Traduce una sentencia Oracle del proyecto a SQLite."""
+    texto = _DATE_LITERAL.sub(r"TO_DATE(\1)", sql.strip().rstrip(";"))
+    texto = _CYCLE.sub("", texto)
+    if _MERGE.match(texto):
+        texto = _traducir_merge(texto)
+
+    retorno = []
+    m = _RETURNING.search(texto)
+    if m:
+        retorno = [b.strip()[1:].lower() for b in m.group(2).split(",")]
+        texto = texto[:m.start()] + f"RETURNING {m.group(1)}"
+
+    # identidades que no son la única PK (SQLite solo numera INTEGER PRIMARY KEY)
+    m = _INSERT.match(texto)
+    if m and identidades and m.group(1).upper() in identidades:
+        tabla = m.group(1).upper()
+        columna = identidades[tabla]
+        if columna not in [c.strip().upper() for c in m.group(2).split(",")]:
+            texto = (f"INSERT INTO {tabla} ({columna}, {m.group(2)}) VALUES "
+                     f"((SELECT IFNULL(MAX({columna}), 0) + 1 FROM {tabla}), " + texto[m.end():])
+
+    limite = None
+    partes = _LITERAL.split(texto)
+    binds = []
+    for i in range(0, len(partes), 2):
+        parte = partes[i]
+        for patron, reemplazo in _REEMPLAZOS:
+            parte = patron.sub(reemplazo, parte)
+        for nombre in _BIND.findall(parte):
+            nombre = nombre.lower()
+            if nombre not in binds and nombre not in retorno:
+                binds.append(nombre)
+        m = _ROWNUM.search(parte)
+        if m:
+            limite = m.group(2) if m.group(1) != "<" else f"({m.group(2)}) - 1"
+            parte = _ROWNUM.sub("1=1", parte)
+        parte = _BIND.sub(lambda b: f":b_{b.group(1).lower()}", parte)
+        partes[i] = parte
+    texto = "".join(partes)
+    if limite is not None:
+        texto += f" LIMIT {_BIND.sub(lambda b: f':b_{b.group(1).lower()}', limite)}"
+    return _Traduccion(texto, binds, retorno)
+
+
+def traducir_ddl(sentencia: str, identidades: dict):
+    """CREATE TABLE/INDEX de ddl.full.sql para SQLite, o None si no aplica (PL/SQL, ALTER...)."""
+    cabeza = sentencia.lstrip().upper()
+    if cabeza.startswith("CREATE INDEX") or cabeza.startswith("CREATE UNIQUE INDEX"):
+        return re.sub(r"\)\s*(LOCAL|ONLINE|COMPRESS(\s+\d+)?)(\s+(LOCAL|ONLINE|COMPRESS(\s+\d+)?))*\s*$", ")",
+                      sentencia.strip())
+    if not cabeza.startswith("CREATE TABLE"):
+        return None
+
+    tabla = re.match(r"\s*CREATE\s+TABLE\s+(\w+)", sentencia, re.IGNORECASE).group(1).upper()
+    texto = re.sub(r"\bNUMBER\s+GENERATED\s+(ALWAYS|BY\s+DEFAULT(\s+ON\s+NULL)?)\s+AS\s+IDENTITY\s+PRIMARY\s+KEY",
+                   "INTEGER PRIMARY KEY", sentencia, flags=re.IGNORECASE)
+    m = re.search(r"(\w+)\s+NUMBER\s+GENERATED\s+(ALWAYS|BY\s+DEFAULT(\s+ON\s+NULL)?)\s+AS\s+IDENTITY",
+                  texto, re.IGNORECASE)
+    if m:
+        identidades[tabla] = m.group(1).upper()
+        texto = texto[:m.start()] + f"{m.group(1)} INTEGER" + texto[m.end():]
+    texto = re.sub(r"\bDEFAULT\s+SYSDATE\b", "DEFAULT (SYSDATE())", texto, flags=re.IGNORECASE)
+    # particiones, IOT y compresión no existen en SQLite
+    texto = re.sub(r"\)\s*(--[^\n]*\n\s*)*PARTITION\s+BY\b.*$", ")", texto, flags=re.IGNORECASE | re.DOTALL)
+    texto = re.sub(r"\)\s*ORGANIZATION\s+INDEX\b.*$", ")", texto, flags=re.IGNORECASE | re.DOTALL)
+    return texto
+
+
+def _error(e: Exception):
+    """Excepción de oracledb equivalente a un error de SQLite."""
+    if isinstance(e, sqlite3.IntegrityError):
+        return oracledb.IntegrityError(f"ORA-00001: {e}")
+    return oracledb.DatabaseError(f"ORA-00900: {e}")
+
+
+# ---------------- contadores ----------------
+
+class Contadores:
+    """Trabajo contra la base desde el último reiniciar()."""
+
+    def __init__(self):
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.idas = 0
+        self.ejecuciones = 0
+        self.commits = 0
+        self.rollbacks = 0
+        self.filas = 0
+        self.sentencias = []
+
+    def como_dict(self) -> dict:
+        return {
+            "idas": self.idas,
+            "ejecuciones": self.ejecuciones,
+            "commits": self.commits,
+            "rollbacks": self.rollbacks,
+            "filas": self.filas,
+        }
+
+
+# ---------------- API tipo oracledb ----------------
+
+class VariableOffline:
+    """cur.var(...): recibe los valores de RETURNING ... INTO."""
+
+    def __init__(self, tipo=None):
+        self.tipo = tipo
+        self.valores = []
+
+    def getvalue(self, pos: int = 0):
+        return self.valores
+
+    def setvalue(self, pos: int, valor):
+        self.valores = [valor]
+
+
+class CursorOffline:
+
+    def __init__(self, conexion: "ConexionOffline"):
+        self._conexion = conexion
+        self._cur = None
+        self._filas = []
+        self._leidas = 0
+        self._traidas = 0
+        self._agotado = True
+        self.arraysize = 100
+        self.prefetchrows = 2
+        self.rowcount = 0
+        self.description = None
+
+    # -- ejecución --
+
+    def _parametros(self, traduccion: _Traduccion, parametros, variables: list):
+        if parametros is None:
+            parametros = ()
+        if isinstance(parametros, dict):
+            valores = {k.lower(): v for k, v in parametros.items()}
+        else:
+            nombres = traduccion.binds + traduccion.retorno
+            if len(parametros) < len(traduccion.binds):
+                raise oracledb.DatabaseError("DPY-4010: faltan variables de bind")
+            valores = dict(zip(nombres, parametros))
+        for nombre in traduccion.retorno:
+            variables.append(valores.pop(nombre, None))
+        return {f"b_{k}": v for k, v in valores.items()}
+
+    def execute(self, sql: str, parametros=None, **kwargs):
+        if kwargs:
+            parametros = kwargs
+        contadores = self._conexion.contadores
+        contadores.ejecuciones += 1
+        contadores.idas += 1
+        contadores.sentencias.append(sql)
+
+        traduccion = self._conexion.traducir(sql)
+        variables = []
+        binds = self._parametros(traduccion, parametros, variables)
+        try:
+            self._cur = self._conexion.sqlite.execute(traduccion.sql, binds)
+            filas = self._cur.fetchall() if self._cur.description else []
+        except (sqlite3.Error, OverflowError) as e:
+            raise _error(e) from e
+
+        if traduccion.retorno:
+            for variable, valor in zip(variables, filas[0] if filas else [None] * len(variables)):
+                if isinstance(variable, VariableOffline):
+                    variable.valores = [valor]
+            filas = []
+            self.description = None
+        else:
+            self.description = [(c[0].upper(), None, None, None, None, None, None)
+                                for c in self._cur.description] if self._cur.description else None
+        self.rowcount = self._cur.rowcount if self.description is None else 0
+        self._filas = filas
+        self._leidas = 0
+        # el execute ya trae las primeras `prefetchrows` filas
+        self._traidas = min(self.prefetchrows, len(filas))
+        self._agotado = len(filas) < self.prefetchrows
+        return self if self.description else None
+
+    def executemany(self, sql: str, filas, **kwargs):
+        contadores = self._conexion.contadores
+        contadores.ejecuciones += 1
+        contadores.idas += 1
+        contadores.sentencias.append(sql)
+        traduccion = self._conexion.traducir(sql)
+        lote = [self._parametros(traduccion, f, []) for f in filas]
+        try:
+            self._cur = self._conexion.sqlite.executemany(traduccion.sql, lote)
+        except sqlite3.Error as e:
+            raise _error(e) from e
+        self.rowcount = self._cur.rowcount
+        self.description = None
+        self._filas = []
+
+    def callproc(self, nombre: str, parametros=None, kwparametros=None):
+        # procedimientos PL/SQL (DBMS_STATS...): solo se cuenta la ida
+        self._conexion.contadores.ejecuciones += 1
+        self._conexion.contadores.idas += 1
+        self._conexion.contadores.sentencias.append(f"CALL {nombre}")
+        return list(parametros or [])
+
+    def var(self, tipo=None, *args, **kwargs):
+        return VariableOffline(tipo)
+
+    def setinputsizes(self, *args, **kwargs):
+        pass
+
+    # -- lectura --
+
+    def _tomar(self, pedidas):
+        """Hasta `pedidas` filas (todas si es None); trae del "servidor" de a arraysize."""
+        quiere = math.inf if pedidas is None else pedidas
+        while self._traidas - self._leidas < quiere and not self._agotado:
+            self._conexion.contadores.idas += 1
+            nuevas = min(self.arraysize, len(self._filas) - self._traidas)
+            self._traidas += nuevas
+            self._agotado = nuevas < self.arraysize
+        filas = self._filas[self._leidas:min(self._leidas + quiere, self._traidas)]
+        self._leidas += len(filas)
+        self._conexion.contadores.filas += len(filas)
+        return filas
+
+    def fetchone(self):
+        filas = self._tomar(1)
+        return filas[0] if filas else None
+
+    def fetchmany(self, cantidad: int = None):
+        return self._tomar(cantidad or self.arraysize)
+
+    def fetchall(self):
+        return self._tomar(None)
+
+    def __iter__(self):
+        while True:
+            fila = self.fetchone()
+            if fila is None:
+                return
+            yield fila
+
+    def close(self):
+        self._filas = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class _EnUso:
+    """
+    Como threading.RLock (un hilo puede tomar una segunda conexión sin
+    bloquearse), pero se puede soltar desde otro hilo: la conexión de un
+    POST /batch transaccional la toma un hilo del threadpool y la cierra otro.
+    """
+
+    def __init__(self):
+        self._condicion = threading.Condition()
+        self._dueno = None
+        self._cuenta = 0
+
+    def acquire(self):
+        propio = threading.get_ident()
+        with self._condicion:
+            while self._cuenta and self._dueno != propio:
+                self._condicion.wait()
+            self._dueno = propio
+            self._cuenta += 1
+
+    def release(self):
+        with self._condicion:
+            self._cuenta -= 1
+            if not self._cuenta:
+                self._dueno = None
+                self._condicion.notify()
+
+
+class ConexionOffline:
+
+    def __init__(self, pool: "PoolOffline"):
+        self._pool = pool
+        self.sqlite = pool.sqlite
+        self.contadores = pool.contadores
+        self.username = "OFFLINE"
+        self._abierta = True
+        pool._en_uso.acquire()
+
+    def traducir(self, sql: str) -> _Traduccion:
+        return self._pool.traducir(sql)
+
+    def cursor(self):
+        return CursorOffline(self)
+
+    def commit(self):
+        self.contadores.commits += 1
+        self.contadores.idas += 1
+        self.sqlite.commit()
+
+    def rollback(self):
+        self.contadores.rollbacks += 1
+        self.contadores.idas += 1
+        self.sqlite.rollback()
+
+    def close(self):
+        if not self._abierta:
+            return
+        # al volver al pool Oracle deshace lo que no se confirmó
+        self.sqlite.rollback()
+        self._abierta = False
+        self._pool._en_uso.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class PoolOffline:
+    """
+    Pool de conexiones offline sobre una base SQLite en memoria cargada con
+    el DDL y el seed del proyecto. reiniciar_datos() vuelve a ese estado.
+    """
+
+    def __init__(self, ddl: str = None, seed: str = None):
+        self.contadores = Contadores()
+        self.identidades = {}
+        self._traducciones = {}
+        self._lock = threading.Lock()
+        # reentrante: un handler que pide una segunda conexión en el mismo hilo no se bloquea
+        self._en_uso = _EnUso()
+
+        self._plantilla = self._conectar()
+        ddl = ddl or os.path.join(CARPETA_SCRIPTS, "ddl.full.sql")
+        seed = seed or os.path.join(CARPETA_SCRIPTS, "seed_full.sql")
+        with open(ddl, encoding="utf-8") as f:
+            for sentencia in separar_sentencias(f.read()):
+                if sentencia.upper().startswith("INSERT"):
+                    self._plantilla.execute(*self._insert_fijo(sentencia))
+                    continue
+                traducida = traducir_ddl(sentencia, self.identidades)
+                if traducida:
+                    self._plantilla.execute(traducida)
+        with open(seed, encoding="utf-8") as f:
+            for sentencia in separar_sentencias(f.read()):
+                if sentencia.upper() != "COMMIT":
+                    self._plantilla.execute(*self._insert_fijo(sentencia))
+        self._plantilla.commit()
+
+        self.sqlite = self._conectar()
+        self.reiniciar_datos()
+
+    @staticmethod
+    def _conectar():
+        conn = sqlite3.connect(":memory:", detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        _funciones(conn)
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def _insert_fijo(self, sentencia: str):
+        traduccion = self.traducir(sentencia)
+        return traduccion.sql, {}
+
+    def traducir(self, sql: str) -> _Traduccion:
+        traduccion = self._traducciones.get(sql)
+        if traduccion is None:
+            traduccion = traducir(sql, self.identidades)
+            self._traducciones[sql] = traduccion
+        return traduccion
+
+    def reiniciar_datos(self):
+        """Vuelve la base al estado recién sembrado."""
+        with self._lock:
+            self.sqlite.rollback()
+            self._plantilla.backup(self.sqlite)
+
+    def acquire(self):
+        return ConexionOffline(self)
+
+    def release(self, conexion: ConexionOffline):
+        conexion.close()
+
+    def close(self, *args, **kwargs):
+        self.sqlite.close()
+        self._plantilla.close()
@@ -0,0 +1,303 @@
+# scripts/presupuesto_consultas.py
+"""
+Presupuesto de consultas por endpoint: llama cada endpoint de la app contra
+la base offline (scripts/oracle_offline.py, SQLite con el DDL y el seed) y
+compara cuántas sentencias ejecutó y cuántos commits hizo con lo declarado
+en CASOS. Falla (código 1) si un endpoint se pasa, si responde con un código
+distinto al esperado o si hay un endpoint sin presupuesto declarado.
+
+Así un cambio que agrega consultas escondidas (una por fila, una validación
+de más) se ve en la revisión: o se ajusta el código, o se sube el número en
+CASOS a propósito.
+
+Cada caso corre sobre la base recién sembrada. Las idas a la base (round
+trips) y las filas leídas se muestran pero no se controlan.
+
+Uso (desde la carpeta Backend; no necesita Oracle, sí httpx para el TestClient):
+    python -m scripts.presupuesto_consultas
+    python -m scripts.presupuesto_consultas --detalle       # imprime el SQL de cada caso
+    python -m scripts.presupuesto_consultas --solo /tutores
+"""
+import argparse
+import os
+import sys
+from datetime import date, timedelta
+
+os.environ.setdefault("JOBS_HABILITADOS", "0")
+os.environ.setdefault("HECHOS_HABILITADOS", "0")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import cache, db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.utils import create_token_for_user  # noqa: E402
+from scripts.oracle_offline import PoolOffline  # noqa: E402
+
+ADMIN = {"Authorization": "Bearer " + create_token_for_user(2, "Sebastián Admin", "ADMINISTRADOR")}
+TUTOR = {"Authorization": "Bearer " + create_token_for_user(1, "Sergio Tutor", "TUTOR")}
+ADMINISTRATIVO = {"Authorization": "Bearer " + create_token_for_user(4, "Andrea Secretaria", "ADMINISTRATIVO")}
+
+HOY = date.today()
+HACE_UN_MES = (HOY - timedelta(days=30)).isoformat()
+
+# datos extra que algunos casos necesitan sobre el seed
+HORARIO_101 = (
+    "INSERT INTO HORARIO (ID_HORARIO, DIA, HORA_INICIO, HORA_FIN, ID_AULA, ID_SEDE, ID_INSTITUCION) "
+    "VALUES (1, 'Lunes', '07:00', '08:00', 101, 1, 1)"
+)
+PERSONA_SIN_USUARIO = (
+    "INSERT INTO PERSONA (ID_PERSONA, NOMBRE, ROL, CORREO) "
+    "VALUES (60, 'Persona Sin Usuario', 'ADMINISTRATIVO', 'sin.usuario@demo.com')"
+)
+SESION_HOY = (
+    "INSERT INTO SESION_CLASE (ID_SESION, ID_HORARIO, ID_PERIODO, FECHA, HORA_INICIO, HORA_FIN, "
+    "ID_AULA, ID_SEDE, ID_INSTITUCION) "
+    f"VALUES (1, 1, 1, TO_DATE('{HOY.isoformat()}', 'YYYY-MM-DD'), '07:00', '08:00', 101, 1, 1)"
+)
+RESUMEN_KPI = (
+    "INSERT INTO RESUMEN_KPI (ID, SEDES, INSTITUCIONES, ESTUDIANTES, AULAS, AULAS_SIN_TUTOR, AULAS_CON_HORARIO, "
+    "ASISTENCIAS_SEMANA, PRESENTES_SEMANA, SEMANA, CALCULADO) "
+    f"VALUES (1, 2, 1, 3, 2, 0, 1, 4, 3, TO_DATE('{HOY.isoformat()}', 'YYYY-MM-DD'), SYSDATE)"
+)
+AULA_VACIA_909 = (
+    "INSERT INTO AULA (ID_AULA, ID_SEDE, ID_INSTITUCION, NOMBRE_AULA, GRADO, ID_PROGRAMA) "
+    "VALUES (909, 1, 1, 'Aula vacía', '4', 1)"
+)
+
+
+def caso(metodo: str, ruta: str, url: str = None, ejecuciones: int = 0, commits: int = 0,
+         estado: int = 200, json: dict = None, params: dict = None, preparar: list = None,
+         cabeceras: dict = None):
+    """Un endpoint (método + ruta como la declara el router) con su presupuesto."""
+    return {
+        "metodo": metodo, "ruta": ruta, "url": url or ruta, "json": json, "params": params,
+        "preparar": preparar or [], "estado": estado, "cabeceras": cabeceras,
+        "presupuesto": {"ejecuciones": ejecuciones, "commits": commits},
+    }
+
+
+CASOS = [
+    # salud
+    caso("GET", "/"),
+    caso("GET", "/health"),
+    caso("GET", "/db-health", ejecuciones=1),
+    caso("GET", "/metrics"),
+    # auth / personas / usuarios
+    caso("POST", "/auth/login", ejecuciones=1,
+         json={"email": "sergio.tutor@demo.com", "password": "123"}),
+    caso("POST", "/personas/", ejecuciones=3, commits=1,
+         json={"id_persona": 50, "nombre": "Nueva Persona", "rol": "TUTOR", "correo": "nueva@demo.com"}),
+    caso("GET", "/personas/", ejecuciones=1),
+    caso("GET", "/personas/{id_persona}", "/personas/1", ejecuciones=1),
+    caso("POST", "/usuarios/", ejecuciones=1, commits=1, estado=201,
+         json={"contrasena": "abc", "correo": "sin.usuario@demo.com"}, preparar=[PERSONA_SIN_USUARIO]),
+    # tutores
+    caso("GET", "/tutores/me/dashboard", ejecuciones=1, cabeceras=TUTOR, preparar=[HORARIO_101, SESION_HOY]),
+    caso("GET", "/tutores/by-persona/{id_persona}", "/tutores/by-persona/1", ejecuciones=1),
+    caso("GET", "/tutores/{id_tutor}/aulas", "/tutores/1/aulas", ejecuciones=1),
+    caso("GET", "/tutores/{id_tutor}/aulas/count", "/tutores/1/aulas/count", ejecuciones=1),
+    caso("GET", "/tutores/{id_tutor}/aulas/list", "/tutores/1/aulas/list", ejecuciones=1),
+    caso("GET", "/tutores/{id_tutor}/aulas/students-count", "/tutores/1/aulas/students-count", ejecuciones=1),
+    caso("GET", "/tutores/{id_tutor}/aulas/students", "/tutores/1/aulas/students", ejecuciones=3),
+    caso("GET", "/tutores/horarios", params={"tutors": "1,2"}, ejecuciones=1, preparar=[HORARIO_101]),
+    caso("GET", "/tutores/{id_tutor}/semana", "/tutores/1/semana", ejecuciones=1, preparar=[HORARIO_101]),
+    caso("GET", "/tutores/all", ejecuciones=1),
+    caso("GET", "/tutores/info", ejecuciones=1),
+    caso("PUT", "/tutores/{id_tutor}/asignar-persona", "/tutores/1/asignar-persona",
+         json={"id_persona": 4}, ejecuciones=4, commits=1),
+    caso("POST", "/tutores/", json={"id_persona": 2}, ejecuciones=3, commits=1, estado=201),
+    caso("DELETE", "/tutores/{id_tutor}", "/tutores/2", params={"force": True}, ejecuciones=9, commits=1),
+    caso("PUT", "/tutores/{id_tutor}/desvincular-persona", "/tutores/1/desvincular-persona",
+         ejecuciones=3, commits=1),
+    caso("PUT", "/tutores/asignar-aula", json={"id_tutor": 2, "id_aula": 101, "id_sede": 1, "id_institucion": 1},
+         ejecuciones=5, commits=1),
+    # estudiantes
+    caso("POST", "/estudiantes/", ejecuciones=3, commits=1,
+         json={"id_estudiante": 50, "nombre": "Nuevo Estudiante", "grado": "4", "id_aula": 101,
+               "id_sede": 1, "id_institucion": 1}),
+    caso("GET", "/estudiantes/", ejecuciones=1),
+    caso("GET", "/estudiantes/{id_estudiante}", "/estudiantes/1", ejecuciones=1),
+    caso("PUT", "/estudiantes/{id_estudiante}/cambiar-aula", "/estudiantes/1/cambiar-aula",
+         json={"id_aula": 102, "id_sede": 2, "id_institucion": 1}, ejecuciones=5, commits=1),
+    caso("PUT", "/estudiantes/{id_estudiante}/score-final", "/estudiantes/1/score-final",
+         json={"score_final": 90}, ejecuciones=3, commits=1),
+    # aulas
+    caso("GET", "/aulas/", ejecuciones=1),
+    caso("POST", "/aulas/", ejecuciones=3, commits=1, estado=201,
+         json={"nombre_aula": "A-4C", "grado": "4", "id_sede": 1, "id_institucion": 1, "id_programa": 1}),
+    # + lectura de ID_PROGRAMA: si cambia se rearman las sesiones futuras
+    caso("PUT", "/aulas/{id_aula}", "/aulas/101", ejecuciones=4, commits=1,
+         json={"id_aula": 101, "nombre_aula": "A-4A bis", "grado": "4", "id_sede": 1, "id_institucion": 1,
+               "id_programa": 1, "id_tutor": 1}),
+    caso("DELETE", "/aulas/{id_aula}", "/aulas/909", ejecuciones=2, commits=1, preparar=[AULA_VACIA_909]),
+    caso("PUT", "/aulas/asignar-tutor", json={"id_aula": 101, "id_sede": 1, "id_institucion": 1, "id_tutor": 2},
+         ejecuciones=5, commits=1),
+    # sedes / instituciones / programas
+    caso("POST", "/sedes/", ejecuciones=2, commits=1, estado=201,
+         json={"nombre_sede": "Sede Sur", "id_institucion": 2}),
+    caso("GET", "/sedes/", ejecuciones=1),
+    caso("GET", "/sedes/by-institucion/{id_institucion}", "/sedes/by-institucion/1", ejecuciones=1),
+    caso("DELETE", "/sedes/{id_sede}/{id_institucion}", "/sedes/9/1", ejecuciones=1, commits=1,
+         preparar=["INSERT INTO SEDE (ID_SEDE, ID_INSTITUCION, NOMBRE_SEDE) VALUES (9, 1, 'Sede vacía')"]),
+    caso("POST", "/programas/", json={"tipo": "VACACIONAL"}, ejecuciones=1, commits=1, estado=201),
+    caso("POST", "/instituciones/", ejecuciones=2, commits=1, estado=201,
+         json={"nombre": "Institución Sur", "jornada": "MAÑANA", "duracion_hora": 45}),
+    caso("GET", "/instituciones/", ejecuciones=1),
+    caso("DELETE", "/instituciones/{id_institucion}", "/instituciones/9", ejecuciones=1, commits=1,
+         preparar=["INSERT INTO INSTITUCION (ID_INSTITUCION, NOMBRE, DURACIONHORA, JORNADA) "
+                   "VALUES (9, 'Sin sedes', 60, 'TARDE')"]),
+    # horarios
+    caso("GET", "/horarios/", params={"id_aula": 101}, ejecuciones=1, preparar=[HORARIO_101]),
+    caso("POST", "/horarios/", ejecuciones=6, commits=1, estado=201,
+         json={"dia": "Martes", "hora_inicio": "07:00", "hora_fin": "08:00", "id_aula": 101}),
+    caso("GET", "/horarios/{id_horario}", "/horarios/1", ejecuciones=1, preparar=[HORARIO_101]),
+    caso("PUT", "/horarios/{id_horario}", "/horarios/1", ejecuciones=7, commits=1, preparar=[HORARIO_101],
+         json={"dia": "Miércoles", "hora_inicio": "08:00", "hora_fin": "09:00"}),
+    caso("DELETE", "/horarios/{id_horario}", "/horarios/1", ejecuciones=2, commits=1, preparar=[HORARIO_101]),
+    # periodos, componentes, notas
+    caso("POST", "/periodos/", ejecuciones=3, commits=1, estado=201,
+         json={"fecha_inicio": f"{HOY.year}-07-01", "fecha_fin": f"{HOY.year}-11-30", "id_programa": 1}),
+    caso("POST", "/componentes/", json={"nombre": "Parcial 2", "porcentaje": 30, "id_programa": 1},
+         ejecuciones=1, commits=1, estado=201),
+    caso("GET", "/notas/", ejecuciones=1),
+    caso("POST", "/notas/", ejecuciones=1, commits=1,
+         json={"valor": 75, "id_estudiante": 2, "id_periodo": 1, "id_componente": 1, "id_tutor": 1}),
+    caso("PUT", "/notas/{id_nota}", "/notas/1",
+         json={"id_estudiante": 1, "id_componente": 1, "calificacion": 95}, ejecuciones=1, commits=1),
+    # asistencia
+    caso("GET", "/asistencias/tutores", ejecuciones=1),
+    # MERGE sobre la llave natural y la consulta del id (MERGE no tiene RETURNING)
+    caso("POST", "/asistencias/tutores", ejecuciones=2, commits=1, estado=201,
+         json={"id_tutor": 1, "id_aula": 101, "id_sede": 1, "id_institucion": 1,
+               "hora_entrada": "07:00", "hora_salida": "08:00", "se_dio": 1}),
+    caso("GET", "/asistencias/tutores/reposiciones-pendientes", ejecuciones=1),
+    caso("GET", "/asistencias/estudiantes", ejecuciones=1),
+    caso("POST", "/asistencias/estudiantes", ejecuciones=2, commits=1, estado=201,
+         json={"id_estudiante": 1, "id_aula": 101, "id_sede": 1, "id_institucion": 1, "presente": 1}),
+    # con Idempotency-Key: reservar la clave y guardar la respuesta (cada una con su commit)
+    caso("POST", "/asistencias/estudiantes", ejecuciones=4, commits=3, estado=201,
+         cabeceras={**TUTOR, "Idempotency-Key": "presupuesto-1"},
+         json={"id_estudiante": 1, "id_aula": 101, "id_sede": 1, "id_institucion": 1, "presente": 1}),
+    caso("POST", "/motivos/", json={"descripcion": "Paro"}, ejecuciones=1, commits=1, estado=201),
+    caso("POST", "/registros/", ejecuciones=1, commits=1, estado=201,
+         json={"fecha": HOY.isoformat(), "hora": "10:00", "motivo": "Cambio de aula", "id_persona": 2}),
+    # festivos y sesiones
+    caso("GET", "/festivos/", ejecuciones=1),
+    caso("POST", "/festivos/", ejecuciones=2, commits=1, estado=201,
+         json={"fecha_festivo": "2025-06-23", "descripcion": "Sagrado Corazón"}),
+    caso("DELETE", "/festivos/{id_festivo}", "/festivos/1", ejecuciones=3, commits=1),
+    caso("GET", "/sesiones/", params={"desde": HACE_UN_MES}, ejecuciones=1),
+    caso("POST", "/sesiones/materializar", params={"id_periodo": 1}, ejecuciones=2, commits=1),
+    # reportes
+    caso("GET", "/reportes/horas-tutor", ejecuciones=1),
+    caso("POST", "/reportes/horas-tutor/refrescar", ejecuciones=5, commits=1),
+    caso("GET", "/reportes/asistencia/estudiantes", ejecuciones=1),
+    caso("GET", "/reportes/asistencia/aulas", ejecuciones=1),
+    caso("POST", "/reportes/asistencia/recalcular", ejecuciones=7, commits=1),
+    caso("GET", "/reportes/asistencia/agregados", estado=503),
+    # histórico (archivos, no consulta la base)
+    caso("GET", "/historico/periodos"),
+    caso("GET", "/historico/asistencia"),
+    caso("GET", "/historico/notas"),
+    # admin
+    caso("POST", "/admin/perfilado/muestreo", params={"segundos": 0.1}, estado=202, cabeceras=ADMIN),
+    caso("GET", "/admin/perfilado", cabeceras=ADMIN),
+    caso("GET", "/admin/perfilado/{nombre}", "/admin/perfilado/no-existe.pstats", estado=404, cabeceras=ADMIN),
+    caso("GET", "/admin/resumen", ejecuciones=1, cabeceras=ADMIN),
+    caso("GET", "/admin/resumen", params={"por_sede": "true"}, ejecuciones=2, cabeceras=ADMIN,
+         preparar=[RESUMEN_KPI]),
+    caso("POST", "/admin/resumen/refrescar", params={"completo": "true"}, ejecuciones=6, commits=1, cabeceras=ADMIN),
+    # el dashboard de ADMINISTRATIVO lee los KPIs, pero no los perfiles
+    caso("GET", "/admin/resumen", ejecuciones=1, cabeceras=ADMINISTRATIVO),
+    caso("GET", "/admin/perfilado", estado=403, cabeceras=ADMINISTRATIVO),
+    # bootstrap: una consulta por colección (la segunda vez sale de la caché)
+    caso("GET", "/bootstrap", ejecuciones=6, cabeceras=ADMIN),
+    caso("GET", "/bootstrap", ejecuciones=5, cabeceras=TUTOR),
+    # sync: token + una consulta por colección; con token, solo las colecciones con cambios
+    caso("GET", "/sync", ejecuciones=4, cabeceras=TUTOR),
+    caso("GET", "/sync", params={"since": 0}, ejecuciones=2, cabeceras=TUTOR),
+    caso("POST", "/sync", ejecuciones=2, commits=1, cabeceras=TUTOR,
+         json={"marcas": [{"id_cliente": f"m-{i}", "id_estudiante": 1, "id_aula": 101, "id_sede": 1,
+                           "id_institucion": 1, "fecha": "2025-03-03T07:00:00"} for i in range(20)]}),
+    # lote: lo de cada sub-petición, y una sola transacción si se pide
+    caso("POST", "/batch", ejecuciones=2,
+         json={"peticiones": [{"url": "/tutores/1/aulas"}, {"url": "/aulas/"}]}),
+    caso("POST", "/batch", ejecuciones=7, commits=1,
+         json={"transaccion": True, "peticiones": [
+             {"metodo": "PUT", "url": "/tutores/1/desvincular-persona"},
+             {"metodo": "PUT", "url": "/tutores/1/asignar-persona", "cuerpo": {"id_persona": 1}},
+         ]}),
+]
+
+
+def rutas_de_la_app():
+    """{(método, ruta)} de todos los endpoints publicados en el OpenAPI."""
+    return {
+        (metodo.upper(), ruta)
+        for ruta, operaciones in app.openapi()["paths"].items()
+        for metodo in operaciones
+    }
+
+
+def correr(cliente: TestClient, pool: PoolOffline, c: dict):
+    """(respuesta, contadores, sentencias) del caso sobre la base recién sembrada."""
+    pool.reiniciar_datos()
+    # sin lo que haya quedado en caché del caso anterior
+    for cache_ in cache.CACHES.values():
+        cache_.limpiar()
+    for sql in c["preparar"]:
+        pool.sqlite.execute(pool.traducir(sql).sql)
+    pool.sqlite.commit()
+    pool.contadores.reiniciar()
+    respuesta = cliente.request(c["metodo"], c["url"], json=c["json"], params=c["params"],
+                                headers=c["cabeceras"])
+    return respuesta, pool.contadores.como_dict(), list(pool.contadores.sentencias)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Controla las consultas por endpoint contra la base offline")
+    parser.add_argument("--detalle", action="store_true", help="imprimir el SQL ejecutado en cada caso")
+    parser.add_argument("--solo", help="solo los casos cuya ruta empieza así")
+    args = parser.parse_args()
+
+    pool = PoolOffline()
+    db.pool = pool
+    cliente = TestClient(app, raise_server_exceptions=False)
+
+    fallas = 0
+    declaradas = {(c["metodo"], c["ruta"]) for c in CASOS}
+    for metodo, ruta in sorted(rutas_de_la_app() - declaradas):
+        print(f"SIN PRESUPUESTO  {metodo} {ruta}")
+        fallas += 1
+
+    print(f"{'':6} {'endpoint':<58} {'ejec':>9} {'commit':>8} {'idas':>5} {'filas':>6}")
+    for c in CASOS:
+        if args.solo and not c["ruta"].startswith(args.solo):
+            continue
+        respuesta, contadores, sentencias = correr(cliente, pool, c)
+        presupuesto = c["presupuesto"]
+        problemas = []
+        if respuesta.status_code != c["estado"]:
+            problemas.append(f"respondió {respuesta.status_code} (esperado {c['estado']}): {respuesta.text[:200]}")
+        for clave, maximo in presupuesto.items():
+            if contadores[clave] > maximo:
+                problemas.append(f"{clave}: {contadores[clave]} > {maximo}")
+
+        marca = "FALLA" if problemas else "OK"
+        print(f"{marca:<6} {c['metodo'] + ' ' + c['ruta']:<58} "
+              f"{contadores['ejecuciones']:>4}/{presupuesto['ejecuciones']:<4} "
+              f"{contadores['commits']:>3}/{presupuesto['commits']:<4} "
+              f"{contadores['idas']:>5} {contadores['filas']:>6}")
+        for p in problemas:
+            print(f"         {p}")
+        if problemas or args.detalle:
+            for sql in sentencias:
+                print(f"         | {' '.join(sql.split())[:150]}")
+        fallas += bool(problemas)
+
+    print(f"{len(CASOS)} casos, {fallas} con problemas")
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
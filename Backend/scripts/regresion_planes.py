@@ -0,0 +1,363 @@
+# scripts/regresion_planes.py
+"""
+Regresión de planes de ejecución: compara el plan de cada sentencia de los
+routers (ver scripts/asesor_indices.py) con una línea base guardada y falla si
+alguna pasó a leer completa una tabla, un índice o todas las particiones, o si
+su costo estimado subió de banda.
+
+Para que los planes se parezcan a los de producción sin cargar millones de
+filas, con --escalar (o --preparar) las estadísticas de cada tabla, columna e
+índice se fijan con DBMS_STATS.SET_*_STATS a los volúmenes de VOLUMENES y se
+bloquean mientras se capturan los planes; al terminar se desbloquean y se
+restauran las que había (o se borran, si la tabla no tenía).
+
+Pensado para una base desechable, p. ej. el Oracle XE de docker-compose.yml:
+    python -m scripts.regresion_planes --preparar --actualizar   # crea esquema + seed y guarda la línea base
+    python -m scripts.regresion_planes --escalar                 # compara contra la línea base
+    python -m scripts.regresion_planes --escalar --mostrar aula.py   # imprime DBMS_XPLAN de esas sentencias
+
+--preparar ejecuta ddl.full.sql (borra y recrea TODAS las tablas) y seed_full.sql.
+--preparar y --escalar solo corren si ORACLE_DSN apunta a localhost o al
+servicio oracle-db de docker-compose, o con REGRESION_PLANES_DESECHABLE=1:
+durante la corrida el optimizador de esa base ve las estadísticas falsas.
+Sin ellos, los planes salen de las estadísticas actuales de la base.
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import sys
+
+import oracledb
+
+from app.db import ORACLE_DSN, get_conn
+from scripts.asesor_indices import extraer_sentencias
+from scripts.migrar import separar_sentencias
+
+CARPETA_SCRIPTS = os.path.dirname(__file__)
+LINEA_BASE = os.path.join(CARPETA_SCRIPTS, "planes_base.json")
+
+# filas por tabla en una instalación grande (varios años, todas las sedes)
+VOLUMENES = {
+    "INSTITUCION": 60,
+    "SEDE": 180,
+    "PROGRAMA": 2,
+    "AULA": 3_000,
+    "PERSONA": 4_000,
+    "USUARIO": 4_000,
+    "TUTOR": 400,
+    "ESTUDIANTE": 90_000,
+    "HORARIO": 9_000,
+    "PERIODO": 40,
+    "COMPONENTE": 30,
+    "NOTA": 1_000_000,
+    "MOTIVO": 20,
+    "ASISTENCIA_AULA_TUTOR": 700_000,
+    "ASISTENCIA_AULA_ESTUDIANTE": 14_000_000,
+    "FESTIVO": 150,
+    "REGISTRO_DE_CAMBIO": 50_000,
+    "SESION_CLASE": 700_000,
+    "RESUMEN_HORAS_TUTOR": 600_000,
+    "RESUMEN_ASISTENCIA_ESTUDIANTE": 90_000,
+    "RESUMEN_ASISTENCIA_AULA": 3_000,
+    "ARCHIVO_PERIODO": 30,
+}
+
+# valores distintos por columna cuando no es la PK de su tabla
+DISTINTOS = {
+    "ID_INSTITUCION": VOLUMENES["INSTITUCION"],
+    "ID_SEDE": 5,
+    "ID_AULA": VOLUMENES["AULA"],
+    "ID_TUTOR": VOLUMENES["TUTOR"],
+    "ID_ESTUDIANTE": VOLUMENES["ESTUDIANTE"],
+    "ID_PERSONA": VOLUMENES["PERSONA"],
+    "ID_HORARIO": VOLUMENES["HORARIO"],
+    "ID_PERIODO": VOLUMENES["PERIODO"],
+    "ID_COMPONENTE": VOLUMENES["COMPONENTE"],
+    "ID_PROGRAMA": VOLUMENES["PROGRAMA"],
+    "ID_MOTIVO": VOLUMENES["MOTIVO"],
+    "FECHA": 1_500,
+    "SE_DIO": 2,
+    "PRESENTE": 2,
+    "EN_RIESGO": 2,
+    "ROL": 4,
+    "DIA": 6,
+    "ESTADO": 3,
+}
+FILAS_POR_BLOQUE = 80
+
+# hosts de una base de pruebas (docker-compose.yml)
+HOSTS_DESECHABLES = {"localhost", "127.0.0.1", "::1", "oracle-db"}
+
+
+def es_desechable() -> bool:
+    """True si ORACLE_DSN es la base local de pruebas o REGRESION_PLANES_DESECHABLE=1."""
+    if os.getenv("REGRESION_PLANES_DESECHABLE") == "1":
+        return True
+    # host:puerto/servicio; un alias TNS o un descriptor completo no cuentan
+    host = ORACLE_DSN.split("/")[0].rsplit(":", 1)[0].strip("[]").lower()
+    return host in HOSTS_DESECHABLES
+
+
+# ---------------- preparación ----------------
+
+def ejecutar_script(cur, ruta: str):
+    with open(ruta, encoding="utf-8") as f:
+        for sentencia in separar_sentencias(f.read()):
+            if sentencia.upper() == "COMMIT":
+                continue
+            cur.execute(sentencia)
+
+
+def preparar(conn):
+    """Recrea el esquema y carga los datos de ejemplo."""
+    cur = conn.cursor()
+    try:
+        ejecutar_script(cur, os.path.join(CARPETA_SCRIPTS, "ddl.full.sql"))
+        ejecutar_script(cur, os.path.join(CARPETA_SCRIPTS, "seed_full.sql"))
+        conn.commit()
+    finally:
+        cur.close()
+
+
+def escalar_estadisticas(conn, esquema: str, tocadas: list):
+    """
+    Fija estadísticas de tablas, columnas e índices a los VOLUMENES y las
+    bloquea. Va anotando en `tocadas` cada tabla antes de cambiarla.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT TABLE_NAME FROM USER_TABLES")
+        existentes = {r[0] for r in cur.fetchall()}
+
+        for tabla, filas in VOLUMENES.items():
+            if tabla not in existentes:
+                continue
+            tocadas.append(tabla)
+            bloques = max(1, filas // FILAS_POR_BLOQUE)
+            cur.callproc("DBMS_STATS.UNLOCK_TABLE_STATS", [esquema, tabla])
+            cur.callproc("DBMS_STATS.SET_TABLE_STATS", [], {
+                "ownname": esquema, "tabname": tabla, "numrows": filas, "numblks": bloques,
+            })
+
+            cur.execute("""
+                SELECT c.COLUMN_NAME,
+                       (SELECT COUNT(*)
+                        FROM USER_CONS_COLUMNS k
+                        JOIN USER_CONSTRAINTS p ON p.CONSTRAINT_NAME = k.CONSTRAINT_NAME
+                        WHERE p.TABLE_NAME = c.TABLE_NAME
+                        AND p.CONSTRAINT_TYPE IN ('P', 'U')
+                        AND k.COLUMN_NAME = c.COLUMN_NAME)
+                FROM USER_TAB_COLUMNS c
+                WHERE c.TABLE_NAME = :1
+            """, (tabla,))
+            for columna, unica in cur.fetchall():
+                distintos = filas if unica else min(filas, DISTINTOS.get(columna, max(1, filas // 10)))
+                cur.callproc("DBMS_STATS.SET_COLUMN_STATS", [], {
+                    "ownname": esquema, "tabname": tabla, "colname": columna,
+                    "distcnt": distintos, "density": 1 / distintos, "nullcnt": 0,
+                })
+
+            cur.execute("""
+                SELECT i.INDEX_NAME, MIN(c.COLUMN_NAME) KEEP (DENSE_RANK FIRST ORDER BY c.COLUMN_POSITION),
+                       COUNT(*), MAX(i.UNIQUENESS)
+                FROM USER_INDEXES i
+                JOIN USER_IND_COLUMNS c ON c.INDEX_NAME = i.INDEX_NAME
+                WHERE i.TABLE_NAME = :1
+                GROUP BY i.INDEX_NAME
+            """, (tabla,))
+            for indice, primera, columnas, unicidad in cur.fetchall():
+                if unicidad == "UNIQUE":
+                    distintos = filas
+                else:
+                    # cada columna extra multiplica las combinaciones (con tope en las filas)
+                    distintos = min(filas, DISTINTOS.get(primera, max(1, filas // 10)) * 10 ** (columnas - 1))
+                cur.callproc("DBMS_STATS.SET_INDEX_STATS", [], {
+                    "ownname": esquema, "indname": indice, "numrows": filas,
+                    "numlblks": max(1, filas // 300), "numdist": distintos,
+                    "clstfct": min(filas, bloques * 4), "indlevel": 2 if filas < 1_000_000 else 3,
+                })
+
+            cur.callproc("DBMS_STATS.LOCK_TABLE_STATS", [esquema, tabla])
+    finally:
+        cur.close()
+
+
+def restaurar_estadisticas(conn, esquema: str, tablas, antes):
+    """Desbloquea las tablas y les devuelve las estadísticas que tenían en `antes`."""
+    cur = conn.cursor()
+    try:
+        for tabla in tablas:
+            cur.callproc("DBMS_STATS.UNLOCK_TABLE_STATS", [esquema, tabla])
+            try:
+                # restaura también las de columnas e índices
+                cur.callproc("DBMS_STATS.RESTORE_TABLE_STATS", [], {
+                    "ownname": esquema, "tabname": tabla, "as_of_timestamp": antes, "force": True,
+                })
+            except oracledb.DatabaseError:
+                # ORA-20006: no había estadísticas antes (p. ej. recién creada por --preparar)
+                cur.callproc("DBMS_STATS.DELETE_TABLE_STATS", [], {
+                    "ownname": esquema, "tabname": tabla, "force": True,
+                })
+    finally:
+        cur.close()
+
+
+@contextlib.contextmanager
+def estadisticas_escaladas(conn):
+    """Estadísticas de VOLUMENES dentro del bloque; al salir, aunque falle, las de antes."""
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT USER, SYSTIMESTAMP FROM DUAL")
+        esquema, antes = cur.fetchone()
+    finally:
+        cur.close()
+    tocadas = []
+    try:
+        escalar_estadisticas(conn, esquema, tocadas)
+        yield
+    finally:
+        restaurar_estadisticas(conn, esquema, tocadas, antes)
+
+
+# ---------------- captura y comparación ----------------
+
+def capturar(cur, sql: str, id_sentencia: str):
+    """{'costo', 'pasos': [...], 'xplan': [...]} del plan estimado."""
+    cur.execute("DELETE FROM PLAN_TABLE WHERE STATEMENT_ID = :1", (id_sentencia,))
+    cur.execute(f"EXPLAIN PLAN SET STATEMENT_ID = '{id_sentencia}' FOR {sql}")
+    cur.execute("""
+        SELECT ID, OPERATION, OPTIONS, OBJECT_NAME, COST
+        FROM PLAN_TABLE
+        WHERE STATEMENT_ID = :1
+        ORDER BY ID
+    """, (id_sentencia,))
+    filas = cur.fetchall()
+    cur.execute(
+        "SELECT PLAN_TABLE_OUTPUT FROM TABLE(DBMS_XPLAN.DISPLAY('PLAN_TABLE', :1, 'BASIC +ROWS +COST +PREDICATE'))",
+        (id_sentencia,),
+    )
+    xplan = [r[0] for r in cur.fetchall()]
+    cur.execute("DELETE FROM PLAN_TABLE WHERE STATEMENT_ID = :1", (id_sentencia,))
+    return {
+        "costo": filas[0][4] if filas and filas[0][4] is not None else 0,
+        "pasos": [" ".join(x for x in (op, opciones, objeto) if x) for _, op, opciones, objeto, _ in filas],
+        "xplan": xplan,
+    }
+
+
+def claves(sentencias):
+    """Clave estable por sentencia: archivo::función#n (la línea cambia con cualquier edición)."""
+    vistas = {}
+    resultado = []
+    for archivo, linea, funcion, sql in sentencias:
+        base = f"{archivo}::{funcion}"
+        vistas[base] = vistas.get(base, 0) + 1
+        resultado.append((f"{base}#{vistas[base]}", linea, sql))
+    return resultado
+
+
+def banda(costo) -> int:
+    return int(math.log2((costo or 0) + 1))
+
+
+def _lecturas_completas(pasos):
+    return {
+        p for p in pasos
+        if p.startswith("TABLE ACCESS FULL") or p.startswith("INDEX FULL SCAN")
+        or p.startswith("INDEX FAST FULL SCAN") or p.startswith("PARTITION RANGE ALL")
+    }
+
+
+def comparar(base: dict, actual: dict, tolerancia: int):
+    """Lista de regresiones (texto) entre dos planes de la misma sentencia."""
+    problemas = []
+    for paso in sorted(_lecturas_completas(actual["pasos"]) - _lecturas_completas(base["pasos"])):
+        problemas.append(f"nuevo acceso completo: {paso}")
+    if banda(actual["costo"]) > banda(base["costo"]) + tolerancia:
+        problemas.append(f"costo {base['costo']} -> {actual['costo']}")
+    return problemas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara los planes de los routers con la línea base")
+    parser.add_argument("--preparar", action="store_true",
+                        help="ejecutar ddl.full.sql y seed_full.sql antes (BORRA las tablas)")
+    parser.add_argument("--escalar", action="store_true",
+                        help="fijar las estadísticas a VOLUMENES mientras se capturan (solo base desechable)")
+    parser.add_argument("--actualizar", action="store_true", help="guardar los planes actuales como línea base")
+    parser.add_argument("--tolerancia", type=int, default=1,
+                        help="bandas de costo (potencias de 2) que puede subir un plan sin fallar")
+    parser.add_argument("--mostrar", metavar="TEXTO", help="imprimir DBMS_XPLAN de las sentencias cuya clave contenga TEXTO")
+    args = parser.parse_args()
+
+    if not args.actualizar and not os.path.exists(LINEA_BASE):
+        print(f"No existe {LINEA_BASE}: ejecute primero con --actualizar")
+        return 1
+
+    escalar = args.preparar or args.escalar
+    if escalar and not es_desechable():
+        print(f"{ORACLE_DSN} no parece una base de pruebas: --preparar y --escalar cambian sus tablas o "
+              f"estadísticas. Si lo es, use REGRESION_PLANES_DESECHABLE=1")
+        return 1
+    if not escalar:
+        print("Sin --escalar: los planes salen de las estadísticas actuales de la base")
+
+    conn = get_conn()
+    cur = conn.cursor()
+    planes = {}
+    try:
+        if args.preparar:
+            print(f"Recreando esquema y datos en {ORACLE_DSN} ...")
+            preparar(conn)
+
+        with estadisticas_escaladas(conn) if escalar else contextlib.nullcontext():
+            for i, (clave, linea, sql) in enumerate(claves(extraer_sentencias())):
+                try:
+                    plan = capturar(cur, sql, f"REGRESION_{i}")
+                except oracledb.DatabaseError as e:
+                    print(f"NO ANALIZABLE  {clave} (línea {linea}): {str(e).splitlines()[0]}")
+                    continue
+                plan["sql"] = " ".join(sql.split())
+                planes[clave] = plan
+                if args.mostrar and args.mostrar in clave:
+                    print(f"--- {clave} (línea {linea})")
+                    print("\n".join(plan["xplan"]))
+        conn.rollback()
+    finally:
+        cur.close()
+        conn.close()
+
+    if args.actualizar:
+        with open(LINEA_BASE, "w", encoding="utf-8") as f:
+            json.dump(planes, f, ensure_ascii=False, indent=1, sort_keys=True)
+        print(f"Línea base guardada: {len(planes)} planes en {LINEA_BASE}")
+        return 0
+
+    with open(LINEA_BASE, encoding="utf-8") as f:
+        base = json.load(f)
+
+    regresiones = 0
+    for clave, plan in planes.items():
+        if clave not in base:
+            print(f"NUEVA     {clave}: sin línea base (costo {plan['costo']})")
+            continue
+        problemas = comparar(base[clave], plan, args.tolerancia)
+        if problemas:
+            regresiones += 1
+            print(f"REGRESIÓN {clave}")
+            for p in problemas:
+                print(f"          {p}")
+            print("\n".join(f"          {l}" for l in plan["xplan"]))
+        elif banda(plan["costo"]) < banda(base[clave]["costo"]):
+            print(f"MEJORA    {clave}: costo {base[clave]['costo']} -> {plan['costo']}")
+    for clave in sorted(set(base) - set(planes)):
+        print(f"RETIRADA  {clave}")
+
+    print(f"{len(planes)} planes, {regresiones} regresiones")
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
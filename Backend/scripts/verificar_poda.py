@@ -0,0 +1,172 @@
+# scripts/verificar_poda.py
+"""
+Comprueba que los endpoints que leen las tablas de asistencia particionadas
+(V006) solo recorren las particiones del rango pedido (partition pruning).
+
+Llama a cada endpoint contra la base real; cada consulta que toca
+ASISTENCIA_AULA_TUTOR o ASISTENCIA_AULA_ESTUDIANTE se ejecuta normalmente y
+después se lee el plan que Oracle usó de V$SQL_PLAN. Un paso
+'PARTITION RANGE ALL' (todas las particiones) cuenta como falla.
+
+Uso (desde la carpeta Backend, con las mismas variables de entorno de la app;
+el usuario necesita SELECT sobre V$SESSION y V$SQL_PLAN):
+    python -m scripts.verificar_poda
+    python -m scripts.verificar_poda --plan    # imprime también los planes
+"""
+import argparse
+import re
+import sys
+from datetime import date, timedelta
+
+import oracledb
+from fastapi import HTTPException
+
+from app.db import get_conn
+from app.routers import asistencia, sesion
+
+_TABLAS_PARTICIONADAS = re.compile(r"\bASISTENCIA_AULA_(TUTOR|ESTUDIANTE)\b", re.IGNORECASE)
+
+
+def plan_anterior(conn):
+    """Plan real de la última sentencia ejecutada en la sesión."""
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT PREV_SQL_ID, PREV_CHILD_NUMBER
+            FROM V$SESSION
+            WHERE SID = SYS_CONTEXT('USERENV', 'SID')
+        """)
+        sql_id, hijo = cur.fetchone()
+        cur.execute("""
+            SELECT ID, PARENT_ID, DEPTH, OPERATION, OPTIONS, OBJECT_NAME,
+                   PARTITION_START, PARTITION_STOP
+            FROM V$SQL_PLAN
+            WHERE SQL_ID = :1 AND CHILD_NUMBER = :2
+            ORDER BY ID
+        """, (sql_id, hijo))
+        cols = [c[0].lower() for c in cur.description]
+        return [dict(zip(cols, r)) for r in cur.fetchall()]
+    finally:
+        cur.close()
+
+
+class _CursorPlanes:
+    """Cursor que guarda el plan de cada consulta sobre tablas particionadas."""
+
+    def __init__(self, conn, planes):
+        self._conn = conn
+        self._cur = conn.cursor()
+        self._planes = planes
+
+    def execute(self, sql, *args, **kwargs):
+        resultado = self._cur.execute(sql, *args, **kwargs)
+        if _TABLAS_PARTICIONADAS.search(sql):
+            self._planes.append((sql, plan_anterior(self._conn)))
+        return resultado
+
+    def __getattr__(self, nombre):
+        return getattr(self._cur, nombre)
+
+
+class _ConexionPlanes:
+    """Conexión prestada a los endpoints: nunca confirma ni se cierra."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.planes = []
+
+    def cursor(self):
+        return _CursorPlanes(self._conn, self.planes)
+
+    def commit(self):
+        self._conn.rollback()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        pass
+
+
+def problemas(plan):
+    """Pasos del plan que leen todas las particiones."""
+    return [
+        p for p in plan
+        if p["operation"] == "PARTITION RANGE" and p["options"] == "ALL"
+    ]
+
+
+def casos():
+    """(nombre, módulo del router, endpoint, argumentos)."""
+    hoy = date.today()
+    mes = hoy.replace(day=1)
+    trimestre = hoy - timedelta(days=90)
+    return [
+        ("GET /asistencias/tutores", asistencia, asistencia.listar_asistencia_tutor, {}),
+        ("GET /asistencias/tutores (tutor, trimestre)", asistencia, asistencia.listar_asistencia_tutor,
+         {"desde": trimestre, "hasta": hoy, "id_tutor": 1}),
+        ("GET /asistencias/estudiantes", asistencia, asistencia.listar_asistencia_estudiante, {}),
+        ("GET /asistencias/estudiantes (aula, trimestre)", asistencia, asistencia.listar_asistencia_estudiante,
+         {"desde": trimestre, "hasta": hoy, "id_aula": 1, "id_sede": 1, "id_institucion": 1}),
+        ("GET /asistencias/tutores/reposiciones-pendientes", asistencia,
+         asistencia.listar_reposiciones_pendientes, {}),
+        ("GET /asistencias/tutores/reposiciones-pendientes (mes)", asistencia,
+         asistencia.listar_reposiciones_pendientes, {"desde": mes, "hasta": hoy}),
+        ("GET /sesiones", sesion, sesion.listar_sesiones, {}),
+    ]
+
+
+def _imprimir_plan(plan):
+    for p in plan:
+        rango = ""
+        if p["partition_start"] is not None:
+            rango = f"  [{p['partition_start']} .. {p['partition_stop']}]"
+        objeto = f" {p['object_name']}" if p["object_name"] else ""
+        print(f"      {'  ' * p['depth']}{p['operation']} {p['options'] or ''}{objeto}{rango}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica la poda de particiones de asistencia")
+    parser.add_argument("--plan", action="store_true", help="imprimir los planes")
+    args = parser.parse_args()
+
+    conn = get_conn()
+    fallas = 0
+    try:
+        for nombre, modulo, endpoint, kwargs in casos():
+            conexion = _ConexionPlanes(conn)
+            original = modulo.get_conn
+            modulo.get_conn = lambda: conexion
+            try:
+                endpoint(**kwargs)
+            except HTTPException as e:
+                print(f"ERROR  {nombre}: {e.status_code} {e.detail}")
+                fallas += 1
+                continue
+            finally:
+                modulo.get_conn = original
+
+            if not conexion.planes:
+                print(f"ERROR  {nombre}: no consultó tablas de asistencia")
+                fallas += 1
+                continue
+
+            malos = [p for _, plan in conexion.planes for p in problemas(plan)]
+            if malos:
+                fallas += 1
+            print(f"{'FALLA' if malos else 'OK':<6} {nombre}")
+            if malos or args.plan:
+                for _, plan in conexion.planes:
+                    _imprimir_plan(plan)
+    except oracledb.DatabaseError as e:
+        print(f"Error leyendo los planes (¿permisos sobre V$SQL_PLAN?): {e}")
+        return 1
+    finally:
+        conn.rollback()
+        conn.close()
+
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())